@@ -0,0 +1,68 @@
+"""
+Ambiente do Alembic
+
+Usa settings.DATABASE_URL e os modelos de app.models.models.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.config import settings
+from app.models.models import Base
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# URL passada na linha de comando (-x / set_main_option) tem prioridade
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+
+target_metadata = Base.metadata
+
+# Objetos só do PostgreSQL criados pelas migrações, fora dos modelos
+# (busca textual, migração 0008)
+DATABASE_ONLY = {
+    ("column", "search_vector"),
+    ("index", "ix_legislations_search_vector"),
+    ("index", "ix_legislation_chunks_search_vector"),
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Não comparar com os modelos os objetos de DATABASE_ONLY"""
+    return not (reflected and compare_to is None and (type_, name) in DATABASE_ONLY)
+
+
+def run_migrations_offline() -> None:
+    """Gerar o SQL sem conectar ao banco (alembic upgrade head --sql)"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Aplicar as migrações conectando ao banco"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata,
+                          include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
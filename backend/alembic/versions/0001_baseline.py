@@ -0,0 +1,206 @@
+"""Esquema inicial (tabelas criadas até então por init_db/create_all)
+
+Bancos já criados com init_db: marcar com `alembic stamp 0001` antes do
+primeiro `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:40:57
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('data_collection_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_type', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('parameters', sa.JSON(), nullable=True),
+    sa.Column('total_items', sa.Integer(), nullable=True),
+    sa.Column('processed_items', sa.Integer(), nullable=True),
+    sa.Column('failed_items', sa.Integer(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_data_collection_jobs_id'), 'data_collection_jobs', ['id'], unique=False)
+    op.create_table('legislations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('external_id', sa.String(), nullable=True),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('number', sa.String(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('title', sa.Text(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('full_text', sa.Text(), nullable=True),
+    sa.Column('simplified_text', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('author', sa.String(), nullable=True),
+    sa.Column('presentation_date', sa.DateTime(), nullable=True),
+    sa.Column('last_update', sa.DateTime(), nullable=True),
+    sa.Column('tags', sa.JSON(), nullable=True),
+    sa.Column('raw_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_legislations_external_id'), 'legislations', ['external_id'], unique=True)
+    op.create_index(op.f('ix_legislations_id'), 'legislations', ['id'], unique=False)
+    op.create_table('municipal_legislations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('city', sa.String(), nullable=False),
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('publication_date', sa.DateTime(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('simplified_content', sa.Text(), nullable=True),
+    sa.Column('source_url', sa.String(), nullable=True),
+    sa.Column('tags', sa.JSON(), nullable=True),
+    sa.Column('raw_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_municipal_legislations_city'), 'municipal_legislations', ['city'], unique=False)
+    op.create_index(op.f('ix_municipal_legislations_id'), 'municipal_legislations', ['id'], unique=False)
+    op.create_index(op.f('ix_municipal_legislations_state'), 'municipal_legislations', ['state'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('conversation_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('role', sa.String(length=16), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('meta_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_conversation_messages_session_created', 'conversation_messages', ['session_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_conversation_messages_user_created', 'conversation_messages', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_table('favorites',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('legislation_id', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['legislation_id'], ['legislations.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_favorites_id'), 'favorites', ['id'], unique=False)
+    op.create_table('legislation_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('legislation_id', sa.Integer(), nullable=False),
+    sa.Column('chunk_type', sa.String(), nullable=False),
+    sa.Column('chunk_number', sa.String(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('normalized_content', sa.Text(), nullable=True),
+    sa.Column('meta_data', sa.JSON(), nullable=True),
+    sa.Column('embedding', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['legislation_id'], ['legislations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_legislation_chunks_id'), 'legislation_chunks', ['id'], unique=False)
+    op.create_index(op.f('ix_legislation_chunks_legislation_id'), 'legislation_chunks', ['legislation_id'], unique=False)
+    op.create_table('queries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('query_text', sa.Text(), nullable=False),
+    sa.Column('query_type', sa.String(), nullable=True),
+    sa.Column('response', sa.Text(), nullable=True),
+    sa.Column('simplified_response', sa.Text(), nullable=True),
+    sa.Column('audio_url', sa.String(), nullable=True),
+    sa.Column('meta_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_queries_id'), 'queries', ['id'], unique=False)
+    op.create_table('ai_feedback',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('query_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=True),
+    sa.Column('feedback_text', sa.Text(), nullable=True),
+    sa.Column('is_helpful', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['query_id'], ['queries.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ai_feedback_id'), 'ai_feedback', ['id'], unique=False)
+    op.create_table('training_corpus',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('legislation_id', sa.Integer(), nullable=True),
+    sa.Column('chunk_id', sa.Integer(), nullable=True),
+    sa.Column('question', sa.Text(), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('answer_source', sa.Text(), nullable=True),
+    sa.Column('question_type', sa.String(), nullable=True),
+    sa.Column('meta_data', sa.JSON(), nullable=True),
+    sa.Column('embedding', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['chunk_id'], ['legislation_chunks.id'], ),
+    sa.ForeignKeyConstraint(['legislation_id'], ['legislations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_training_corpus_chunk_id'), 'training_corpus', ['chunk_id'], unique=False)
+    op.create_index(op.f('ix_training_corpus_id'), 'training_corpus', ['id'], unique=False)
+    op.create_index(op.f('ix_training_corpus_legislation_id'), 'training_corpus', ['legislation_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_training_corpus_legislation_id'), table_name='training_corpus')
+    op.drop_index(op.f('ix_training_corpus_id'), table_name='training_corpus')
+    op.drop_index(op.f('ix_training_corpus_chunk_id'), table_name='training_corpus')
+    op.drop_table('training_corpus')
+    op.drop_index(op.f('ix_ai_feedback_id'), table_name='ai_feedback')
+    op.drop_table('ai_feedback')
+    op.drop_index(op.f('ix_queries_id'), table_name='queries')
+    op.drop_table('queries')
+    op.drop_index(op.f('ix_legislation_chunks_legislation_id'), table_name='legislation_chunks')
+    op.drop_index(op.f('ix_legislation_chunks_id'), table_name='legislation_chunks')
+    op.drop_table('legislation_chunks')
+    op.drop_index(op.f('ix_favorites_id'), table_name='favorites')
+    op.drop_table('favorites')
+    op.drop_index('ix_conversation_messages_user_created', table_name='conversation_messages')
+    op.drop_index('ix_conversation_messages_session_created', table_name='conversation_messages')
+    op.drop_table('conversation_messages')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_municipal_legislations_state'), table_name='municipal_legislations')
+    op.drop_index(op.f('ix_municipal_legislations_id'), table_name='municipal_legislations')
+    op.drop_index(op.f('ix_municipal_legislations_city'), table_name='municipal_legislations')
+    op.drop_table('municipal_legislations')
+    op.drop_index(op.f('ix_legislations_id'), table_name='legislations')
+    op.drop_index(op.f('ix_legislations_external_id'), table_name='legislations')
+    op.drop_table('legislations')
+    op.drop_index(op.f('ix_data_collection_jobs_id'), table_name='data_collection_jobs')
+    op.drop_table('data_collection_jobs')
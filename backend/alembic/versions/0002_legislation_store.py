@@ -0,0 +1,101 @@
+"""Armazenamento local de metadados: URN, ID estável e legislações em destaque
+
+Preenche urn (de raw_data) e stable_id nas linhas existentes antes de
+criar os índices únicos. URNs repetidas ficam só na linha mais antiga; as
+demais recebem o ID estável de fonte + ID externo.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:41:59
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.integrations.fulltext_resolver import normalize_urn
+from app.models.models import legislation_stable_id
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _backfill() -> None:
+    connection = op.get_bind()
+    legislations = sa.table(
+        'legislations',
+        sa.column('id', sa.Integer()),
+        sa.column('source', sa.String()),
+        sa.column('external_id', sa.String()),
+        sa.column('raw_data', sa.JSON()),
+        sa.column('urn', sa.String()),
+        sa.column('stable_id', sa.BigInteger()),
+    )
+    seen_urns = set()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(legislations.c.id, legislations.c.source,
+                      legislations.c.external_id, legislations.c.raw_data)
+            .where(legislations.c.id > last_id)
+            .order_by(legislations.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            raw = row.raw_data
+            if isinstance(raw, str):
+                raw = json.loads(raw)
+            urn = (raw or {}).get('urn')
+            urn = normalize_urn(urn) if urn else None
+            if urn in seen_urns:
+                urn = None
+            elif urn:
+                seen_urns.add(urn)
+            updates.append({
+                'row_id': row.id,
+                'urn': urn,
+                'stable_id': legislation_stable_id(urn, row.source, row.external_id or row.id),
+            })
+        connection.execute(
+            legislations.update()
+            .where(legislations.c.id == sa.bindparam('row_id'))
+            .values(urn=sa.bindparam('urn'), stable_id=sa.bindparam('stable_id')),
+            updates
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column('legislations', sa.Column('urn', sa.String(), nullable=True))
+    op.add_column('legislations', sa.Column('stable_id', sa.BigInteger(), nullable=True))
+    _backfill()
+    with op.batch_alter_table('legislations') as batch_op:
+        batch_op.alter_column('stable_id', existing_type=sa.BigInteger(), nullable=False)
+    op.create_index(op.f('ix_legislations_stable_id'), 'legislations', ['stable_id'], unique=True)
+    op.create_index(op.f('ix_legislations_urn'), 'legislations', ['urn'], unique=True)
+
+    op.create_table('trending_legislations',
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('legislation_id', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['legislation_id'], ['legislations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('rank')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('trending_legislations')
+    op.drop_index(op.f('ix_legislations_urn'), table_name='legislations')
+    op.drop_index(op.f('ix_legislations_stable_id'), table_name='legislations')
+    with op.batch_alter_table('legislations') as batch_op:
+        batch_op.drop_column('stable_id')
+        batch_op.drop_column('urn')
@@ -0,0 +1,40 @@
+"""Cursores da coleta incremental (harvest_cursors)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:47:29
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('harvest_cursors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('feed', sa.String(), nullable=False),
+    sa.Column('mode', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=True),
+    sa.Column('end_year', sa.Integer(), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('since', sa.DateTime(), nullable=True),
+    sa.Column('last_modified', sa.String(), nullable=True),
+    sa.Column('records_harvested', sa.Integer(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('last_success_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('feed')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('harvest_cursors')
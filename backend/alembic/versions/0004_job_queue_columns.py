@@ -0,0 +1,37 @@
+"""Fila de jobs: fonte, prioridade, tarefa, tentativas e cancelamento
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:55:51
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('data_collection_jobs', sa.Column('source', sa.String(), nullable=True))
+    op.add_column('data_collection_jobs', sa.Column('priority', sa.Integer(), nullable=True))
+    op.add_column('data_collection_jobs', sa.Column('task_id', sa.String(), nullable=True))
+    op.add_column('data_collection_jobs', sa.Column('attempts', sa.Integer(), nullable=True))
+    op.add_column('data_collection_jobs', sa.Column('cancel_requested', sa.Boolean(), nullable=True))
+    op.create_index(op.f('ix_data_collection_jobs_source'), 'data_collection_jobs', ['source'], unique=False)
+
+    # Jobs antigos: a fonte é o próprio tipo (lexml, camara, ...)
+    op.execute("UPDATE data_collection_jobs SET source = job_type WHERE source IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_data_collection_jobs_source'), table_name='data_collection_jobs')
+    with op.batch_alter_table('data_collection_jobs') as batch_op:
+        batch_op.drop_column('cancel_requested')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('task_id')
+        batch_op.drop_column('priority')
+        batch_op.drop_column('source')
@@ -0,0 +1,93 @@
+"""Embeddings em binário (float16/float32/int8) em vez de arrays JSON
+
+Converte os embeddings existentes de legislation_chunks e training_corpus
+para o formato de app/core/vector_codec.py (EMBEDDING_STORAGE_FORMAT). Os
+arrays JSON 'null' viram NULL. O downgrade volta para arrays JSON.
+
+Para comparar tamanho e tempo de leitura, rode
+scripts/embedding_storage_report.py antes e depois.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 01:20:46
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.vector_codec import decode_vector, encode_vector
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TABLES = ('legislation_chunks', 'training_corpus')
+BATCH_SIZE = 1000
+
+
+def _convert(table_name: str, source_type, target_type, convert) -> None:
+    """Copiar embedding → embedding_new, convertendo em lotes por id"""
+    connection = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer()),
+        sa.column('embedding', source_type),
+        sa.column('embedding_new', target_type),
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(table.c.id, table.c.embedding)
+            .where(table.c.id > last_id)
+            .where(table.c.embedding.is_not(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            value = convert(row.embedding)
+            if value is not None:
+                updates.append({'row_id': row.id, 'value': value})
+        if updates:
+            connection.execute(
+                table.update()
+                .where(table.c.id == sa.bindparam('row_id'))
+                .values(embedding_new=sa.bindparam('value')),
+                updates
+            )
+        last_id = rows[-1].id
+
+
+def _to_binary(value):
+    if isinstance(value, str):
+        value = json.loads(value)
+    return encode_vector(value) if value else None
+
+
+def _to_json(value):
+    return decode_vector(bytes(value)).astype(float).tolist()
+
+
+def _swap(table_name: str, source_type, target_type, convert) -> None:
+    op.add_column(table_name, sa.Column('embedding_new', target_type, nullable=True))
+    _convert(table_name, source_type, target_type, convert)
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.drop_column('embedding')
+        batch_op.alter_column('embedding_new', new_column_name='embedding',
+                              existing_type=target_type, existing_nullable=True)
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        _swap(table_name, sa.JSON(), sa.LargeBinary(), _to_binary)
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        _swap(table_name, sa.LargeBinary(), sa.JSON(), _to_json)
@@ -0,0 +1,30 @@
+"""Deduplicação entre fontes: registro canônico das legislações
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 01:26:45
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('legislations') as batch_op:
+        batch_op.add_column(sa.Column('canonical_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_legislations_canonical_id', 'legislations',
+                                    ['canonical_id'], ['id'], ondelete='SET NULL')
+    op.create_index(op.f('ix_legislations_canonical_id'), 'legislations', ['canonical_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_legislations_canonical_id'), table_name='legislations')
+    with op.batch_alter_table('legislations') as batch_op:
+        batch_op.drop_constraint('fk_legislations_canonical_id', type_='foreignkey')
+        batch_op.drop_column('canonical_id')
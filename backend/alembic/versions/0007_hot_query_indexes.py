@@ -0,0 +1,49 @@
+"""Índices das consultas frequentes (parciais para a fila de embeddings)
+
+Índices compostos para os filtros de busca (fonte, tipo, ano), os pares do
+corpus por legislação e chunk e a fila de jobs (estado, fonte); índices
+parciais WHERE embedding IS NULL para os chunks e pares ainda sem
+embedding. No PostgreSQL os índices são criados com CONCURRENTLY, sem
+bloquear escritas nas tabelas grandes.
+
+Os planos das consultas são conferidos em tests/test_query_plans.py e
+scripts/explain_hot_queries.py.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 01:38:24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+PENDING_EMBEDDING = sa.text('embedding IS NULL')
+
+INDEXES = (
+    # nome, tabela, colunas, filtro (índice parcial)
+    ('ix_legislations_source_type_year', 'legislations', ['source', 'type', 'year'], None),
+    ('ix_legislation_chunks_pending_embedding', 'legislation_chunks', ['legislation_id', 'id'], PENDING_EMBEDDING),
+    ('ix_training_corpus_legislation_chunk', 'training_corpus', ['legislation_id', 'chunk_id'], None),
+    ('ix_training_corpus_pending_embedding', 'training_corpus', ['legislation_id', 'id'], PENDING_EMBEDDING),
+    ('ix_data_collection_jobs_status_source', 'data_collection_jobs', ['status', 'source'], None),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY não roda dentro de uma transação
+    with op.get_context().autocommit_block():
+        for name, table_name, columns, where in INDEXES:
+            op.create_index(name, table_name, columns, unique=False, postgresql_concurrently=True,
+                            postgresql_where=where, sqlite_where=where)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table_name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table_name, postgresql_concurrently=True)
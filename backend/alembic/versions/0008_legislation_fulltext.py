@@ -0,0 +1,78 @@
+"""Busca textual local: tsvector (português + unaccent) com índices GIN
+
+Só no PostgreSQL (em outros bancos a busca local usa LIKE; ver
+app/services/local_search.py). Cria a configuração portuguese_unaccent
+(dicionário português com unaccent antes do stemmer) e as colunas geradas
+search_vector:
+
+- legislations: título (peso A), ementa (B) e começo do texto completo (C);
+  o texto inteiro fica nos chunks;
+- legislation_chunks: conteúdo do chunk.
+
+As colunas não estão nos modelos (alembic/env.py as ignora no
+autogenerate). ADD COLUMN ... STORED reescreve a tabela: em bancos grandes,
+rode em janela de manutenção. Os índices GIN são criados com CONCURRENTLY.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 01:52:10
+"""
+from alembic import op
+
+
+# Identificadores da revisão (usados pelo Alembic)
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+CONFIG = 'portuguese_unaccent'
+# Limite do texto completo no vetor da legislação (tsvector tem no máximo 1 MB)
+FULL_TEXT_CHARS = 100000
+
+VECTORS = {
+    'legislations': (
+        f"setweight(to_tsvector('{CONFIG}'::regconfig, coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{CONFIG}'::regconfig, coalesce(summary, '')), 'B') || "
+        f"setweight(to_tsvector('{CONFIG}'::regconfig, left(coalesce(full_text, ''), {FULL_TEXT_CHARS})), 'C')"
+    ),
+    'legislation_chunks': f"to_tsvector('{CONFIG}'::regconfig, coalesce(content, ''))",
+}
+
+
+def _postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    if not _postgres():
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute(f'CREATE TEXT SEARCH CONFIGURATION {CONFIG} (COPY = portuguese)')
+    op.execute(
+        f'ALTER TEXT SEARCH CONFIGURATION {CONFIG} '
+        'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem'
+    )
+    for table_name, expression in VECTORS.items():
+        op.execute(
+            f'ALTER TABLE {table_name} ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({expression}) STORED'
+        )
+    # CREATE INDEX CONCURRENTLY não roda dentro de uma transação
+    with op.get_context().autocommit_block():
+        for table_name in VECTORS:
+            op.execute(
+                f'CREATE INDEX CONCURRENTLY ix_{table_name}_search_vector '
+                f'ON {table_name} USING gin (search_vector)'
+            )
+
+
+def downgrade() -> None:
+    if not _postgres():
+        return
+    with op.get_context().autocommit_block():
+        for table_name in VECTORS:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS ix_{table_name}_search_vector')
+    for table_name in VECTORS:
+        op.execute(f'ALTER TABLE {table_name} DROP COLUMN search_vector')
+    op.execute(f'DROP TEXT SEARCH CONFIGURATION {CONFIG}')
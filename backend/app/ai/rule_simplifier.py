@@ -0,0 +1,215 @@
+"""
+Simplificador local baseado em regras (caminho rápido)
+
+Aplica um glossário de expressões jurídicas -> linguagem cidadã e calcula um
+índice de legibilidade sem chamar o LLM. Todo o glossário é compilado em uma
+única expressão regular (alternação ordenada do termo mais longo para o mais
+curto), de modo que o texto é percorrido uma única vez.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+
+# Glossário: expressão jurídica -> equivalente em linguagem simples
+# As chaves devem estar em minúsculas; espaços internos aceitam qualquer
+# quantidade de espaço em branco no texto original.
+LEGAL_GLOSSARY: Dict[str, str] = {
+    "dispõe sobre": "trata de",
+    "dispõe sobre o": "trata do",
+    "dispõe sobre a": "trata da",
+    "dispõe sobre os": "trata dos",
+    "dispõe sobre as": "trata das",
+    "disporá sobre": "vai tratar de",
+    "outrossim": "além disso",
+    "destarte": "assim",
+    "dessarte": "assim",
+    "mormente": "principalmente",
+    "consoante": "conforme",
+    "precípuo": "principal",
+    "precípua": "principal",
+    "ex vi de": "por força de",
+    "in verbis": "nestes termos",
+    "in fine": "no final",
+    "caput": "texto principal do artigo",
+    "doravante": "daqui em diante",
+    "porquanto": "porque",
+    "conquanto": "embora",
+    "não obstante": "apesar de",
+    "a fim de": "para",
+    "com vistas a": "para",
+    "tendo em vista": "considerando",
+    "haja vista": "considerando",
+    "nos termos do": "de acordo com o",
+    "nos termos da": "de acordo com a",
+    "em conformidade com": "de acordo com",
+    "no âmbito do": "dentro do",
+    "no âmbito da": "dentro da",
+    "faço saber que": "informo que",
+    "faz saber que": "informa que",
+    "sanciono a seguinte lei": "aprovo a seguinte lei",
+    "entra em vigor na data de sua publicação": "passa a valer no dia em que for publicada",
+    "revogam-se as disposições em contrário": "deixam de valer as regras que contrariem esta lei",
+    "fica revogado": "deixa de valer",
+    "fica revogada": "deixa de valer",
+    "ficam revogados": "deixam de valer",
+    "ficam revogadas": "deixam de valer",
+    "é vedado": "é proibido",
+    "é vedada": "é proibida",
+    "são vedados": "são proibidos",
+    "são vedadas": "são proibidas",
+    "sob pena de": "sob risco de",
+    "mediante": "por meio de",
+    "ressalvado": "exceto",
+    "ressalvada": "exceto",
+    "ressalvados": "exceto",
+    "ressalvadas": "exceto",
+    "supracitado": "citado acima",
+    "supracitada": "citada acima",
+    "retromencionado": "mencionado antes",
+    "retromencionada": "mencionada antes",
+    "erário": "dinheiro público",
+    "óbice": "impedimento",
+    "ônus": "custo",
+    "outorgar": "conceder",
+    "faz jus a": "tem direito a",
+    "fará jus a": "terá direito a",
+    "fazer jus a": "ter direito a",
+    "far-se-á": "será feita",
+    "dar-se-á": "acontecerá",
+    "incumbe": "cabe",
+    "incumbirá": "caberá",
+    "lavratura": "registro",
+}
+
+# Palavras por minuto usadas para estimar o tempo de leitura
+WORDS_PER_MINUTE = 200
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+(?:-[^\W\d_]+)*")
+_VOWEL_GROUP_PATTERN = re.compile(r"[aeiouyáéíóúâêôãõàü]+", re.IGNORECASE)
+_SENTENCE_END_PATTERN = re.compile(r"[.!?]+(?:\s|$)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@dataclass
+class Readability:
+    """Métricas de legibilidade de um texto"""
+    score: float  # Índice de Flesch adaptado ao português (0-100, maior = mais fácil)
+    words: int
+    sentences: int
+    syllables: int
+
+    @property
+    def reading_time_minutes(self) -> int:
+        return max(1, round(self.words / WORDS_PER_MINUTE))
+
+
+@dataclass
+class RuleSimplification:
+    """Resultado do simplificador baseado em regras"""
+    text: str
+    readability: Readability
+    replacements: int
+
+
+class RuleBasedSimplifier:
+    """Simplificador determinístico com glossário jurídico e índice de legibilidade"""
+
+    def __init__(self, glossary: Dict[str, str] = LEGAL_GLOSSARY):
+        self.glossary = {self._normalize_key(k): v for k, v in glossary.items()}
+
+        # Termos mais longos primeiro para que "fica revogado" vença "revogado"
+        terms = sorted(self.glossary, key=len, reverse=True)
+        alternatives = [
+            r"\s+".join(re.escape(part) for part in term.split())
+            for term in terms
+        ]
+        self._pattern = re.compile(
+            r"(?<![\w-])(?:" + "|".join(alternatives) + r")(?![\w-])",
+            re.IGNORECASE
+        )
+
+    @staticmethod
+    def _normalize_key(term: str) -> str:
+        return " ".join(term.lower().split())
+
+    def _replace(self, match: "re.Match[str]") -> str:
+        original = match.group(0)
+        replacement = self.glossary.get(self._normalize_key(original))
+        if replacement is None:
+            return original
+        if original[0].isupper():
+            return replacement[0].upper() + replacement[1:]
+        return replacement
+
+    def apply_glossary(self, text: str) -> Tuple[str, int]:
+        """
+        Substituir expressões jurídicas do glossário
+
+        Args:
+            text: Texto original
+
+        Returns:
+            Tupla (texto substituído, número de substituições)
+        """
+        if not text:
+            return "", 0
+        return self._pattern.subn(self._replace, text)
+
+    def readability(self, text: str) -> Readability:
+        """
+        Calcular o índice de Flesch adaptado ao português (Martins et al., 1996)
+
+        score = 248.835 - 1.015 * (palavras / frases) - 84.6 * (sílabas / palavras)
+
+        As sílabas são estimadas pelo número de grupos vocálicos.
+
+        Args:
+            text: Texto a avaliar
+
+        Returns:
+            Métricas de legibilidade
+        """
+        words: List[str] = _WORD_PATTERN.findall(text or "")
+        word_count = len(words)
+        if word_count == 0:
+            return Readability(score=100.0, words=0, sentences=0, syllables=0)
+
+        syllables = sum(
+            max(1, len(_VOWEL_GROUP_PATTERN.findall(word))) for word in words
+        )
+        sentences = max(1, len(_SENTENCE_END_PATTERN.findall(text)))
+
+        score = (
+            248.835
+            - 1.015 * (word_count / sentences)
+            - 84.6 * (syllables / word_count)
+        )
+        return Readability(
+            score=round(max(0.0, min(100.0, score)), 2),
+            words=word_count,
+            sentences=sentences,
+            syllables=syllables
+        )
+
+    def simplify(self, text: str) -> RuleSimplification:
+        """
+        Gerar rascunho simplificado e sua legibilidade
+
+        Args:
+            text: Texto legislativo original
+
+        Returns:
+            Rascunho simplificado, legibilidade e número de substituições
+        """
+        draft, replacements = self.apply_glossary(text)
+        draft = _WHITESPACE_PATTERN.sub(" ", draft).strip()
+        return RuleSimplification(
+            text=draft,
+            readability=self.readability(draft),
+            replacements=replacements
+        )
+
+
+# Instância global
+rule_simplifier = RuleBasedSimplifier()
@@ -1,7 +1,11 @@
 from typing import List, Dict, Any, Optional
 from loguru import logger
 from app.core.config import settings
+from app.core.metrics import LLM_SECONDS, record_llm_usage, timed
+from app.core.tracing import NON_RECORDING_SPAN, traced, tracer
 from app.services.legislation_search import unified_search
+from app.services.query_parser import ParsedQuery, parse_query
+from app.ai.rule_simplifier import rule_simplifier
 
 try:
     from langchain_openai import ChatOpenAI
@@ -53,6 +57,7 @@ class ChatService:
             logger.error(f"Erro ao inicializar modelo de linguagem: {str(e)}")
             self.llm = None
 
+    @traced("chat")
     async def chat(
         self,
         message: str,
@@ -75,6 +80,8 @@ class ChatService:
                 "suggestions": []
             }
 
+        # Encerrado ao montar o prompt ou, se a montagem falhar, no finally
+        prompt_span = NON_RECORDING_SPAN
         try:
             # Verificar se o LLM está disponível antes de processar
             if not self.llm:
@@ -84,7 +91,8 @@ class ChatService:
                     "suggestions": []
                 }
 
-            # Preparar mensagens para o modelo
+            # Preparar mensagens para o modelo (a busca de contexto tem seu próprio span)
+            prompt_span = tracer.start_span("chat.prompt")
             messages = []
 
             # Adicionar mensagem do sistema
@@ -151,17 +159,22 @@ class ChatService:
                     elif role == "assistant":
                         messages.append(AIMessage(content=content))
 
+            # Analisar a pergunta uma única vez (busca, ranqueamento e prompt)
+            parsed = parse_query(message)
+
             # Buscar legislação relevante antes de responder
             legislation_context = ""
             try:
                 # Buscar legislação relacionada (aumentar resultados para melhor matching)
-                context = await unified_search.get_relevant_context(
-                    query=message,
-                    max_results=5
-                )
+                with tracer.span("chat.retrieval"):
+                    context = await unified_search.get_relevant_context(
+                        query=message,
+                        max_results=5,
+                        parsed=parsed
+                    )
                 if context:
                     legislation_context = f"""\n\n=== LEGISLAÇÃO ENCONTRADA NAS FONTES OFICIAIS ===
-
+{self._describe_reference(parsed)}
 {context}
 
 === INSTRUÇÕES OBRIGATÓRIAS - LEIA COM ATENÇÃO ===
@@ -212,16 +225,22 @@ Lembre-se: As APIs têm dados atualizados e você deve sempre encorajar o usuár
 
             # Adicionar mensagem atual
             messages.append(HumanMessage(content=message))
+            prompt_span.set_attribute("llm.prompt.messages", len(messages))
+            prompt_span.end()
 
             # Obter resposta do modelo
-            response = await self.llm.ainvoke(messages)
+            with tracer.span("llm.chat", kind="client") as span, timed(LLM_SECONDS, operation="chat"):
+                response = await self.llm.ainvoke(messages)
+                span.set_attributes(record_llm_usage("chat", response))
             response_text = response.content if hasattr(
                 response, 'content') else str(response)
 
             # Buscar fontes para incluir na resposta
             sources = []
             try:
-                search_results = await unified_search.search(message, limit=3)
+                with tracer.span("chat.sources"):
+                    search_results = await unified_search.search(
+                        message, limit=3, parsed=parsed)
                 sources = [
                     {
                         "title": r.get("title", ""),
@@ -276,6 +295,18 @@ Lembre-se: As APIs têm dados atualizados e você deve sempre encorajar o usuár
                 "sources": [],
                 "suggestions": []
             }
+        finally:
+            if prompt_span.is_recording():
+                prompt_span.end()
+
+    def _describe_reference(self, parsed: ParsedQuery) -> str:
+        """Descrever o documento citado na pergunta (para orientar o modelo)"""
+        if not parsed.number:
+            return ""
+        reference = f"{parsed.doc_type or 'Documento'} nº {parsed.number_display or parsed.number}"
+        if parsed.year:
+            reference += f" de {parsed.year}"
+        return f"\nDOCUMENTO CITADO PELO USUÁRIO: {reference}\n"
 
     def _generate_suggestions(self, message: str) -> List[str]:
         """Gerar sugestões de perguntas relacionadas"""
@@ -317,7 +348,9 @@ Lembre-se: As APIs têm dados atualizados e você deve sempre encorajar o usuár
             
             Texto simplificado:"""
 
-            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            with tracer.span("llm.simplify", kind="client") as span, timed(LLM_SECONDS, operation="simplify"):
+                response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+                span.set_attributes(record_llm_usage("simplify", response))
             return response.content if hasattr(response, 'content') else str(response)
 
         except Exception as e:
@@ -328,8 +361,24 @@ Lembre-se: As APIs têm dados atualizados e você deve sempre encorajar o usuár
 class SimplificationService:
     """Serviço especializado para simplificação de textos legislativos"""
 
+    # Ajuste do limiar de legibilidade por nível (níveis menos simples toleram textos mais difíceis)
+    LEVEL_THRESHOLD_OFFSETS = {
+        "simple": 0.0,
+        "moderate": -15.0,
+        "technical": -30.0
+    }
+
     def __init__(self):
         self.chat_service = ChatService()
+        self.stats = {
+            "requests": 0,
+            "fast_path_hits": 0,
+            "llm_calls": 0
+        }
+
+    def _readability_threshold(self, target_level: str) -> float:
+        offset = self.LEVEL_THRESHOLD_OFFSETS.get(target_level, 0.0)
+        return settings.SIMPLIFICATION_READABILITY_THRESHOLD + offset
 
     async def simplify_text(
         self,
@@ -339,22 +388,55 @@ class SimplificationService:
         """
         Simplificar texto legislativo e retornar com metadados
 
+        Primeiro gera um rascunho local (glossário jurídico + índice de
+        legibilidade). O LLM só é chamado quando o rascunho continua difícil
+        de ler para o nível pedido.
+
         Args:
             text: Texto a ser simplificado
             target_level: Nível de simplificação (simple, moderate, technical)
 
         Returns:
-            Dict com 'simplified_text' e 'reading_time_minutes'
+            Dict com 'simplified_text', 'reading_time_minutes',
+            'readability_score' e 'method' (rules ou llm)
         """
-        simplified = await self.chat_service.simplify_text(text, target_level)
-
-        # Calcular tempo de leitura (assumindo ~200 palavras por minuto)
-        word_count = len(simplified.split())
-        reading_time = max(1, round(word_count / 200))
+        self.stats["requests"] += 1
+        draft = rule_simplifier.simplify(text)
+
+        use_fast_path = settings.SIMPLIFICATION_FAST_PATH_ENABLED and (
+            draft.readability.score >= self._readability_threshold(target_level)
+            or not self.chat_service.llm
+        )
+
+        if use_fast_path:
+            self.stats["fast_path_hits"] += 1
+            simplified = draft.text
+            readability = draft.readability
+            method = "rules"
+        else:
+            self.stats["llm_calls"] += 1
+            simplified = await self.chat_service.simplify_text(text, target_level)
+            readability = rule_simplifier.readability(simplified)
+            method = "llm"
 
         return {
             "simplified_text": simplified,
-            "reading_time_minutes": reading_time
+            "reading_time_minutes": readability.reading_time_minutes,
+            "readability_score": readability.score,
+            "method": method
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obter estatísticas de uso do caminho rápido
+
+        Returns:
+            Dict com contadores e taxa de acerto do caminho rápido
+        """
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "fast_path_hit_rate": round(self.stats["fast_path_hits"] / requests, 4) if requests else 0.0
         }
 
 
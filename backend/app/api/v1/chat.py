@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Path, Query
+from typing import List, Optional
 from loguru import logger
 
-from app.schemas.schemas import ChatRequest, ChatResponse, ChatMessage
+from app.schemas.schemas import ChatRequest, ChatResponse, ChatMessage, ChatHistoryResponse
 from app.ai.simplification import chat_service
 from app.services.audio import audio_service
+from app.services.chat_history import chat_history
 
 router = APIRouter()
 
@@ -16,19 +19,52 @@ async def chat(request: ChatRequest):
     
     Processa mensagem do usuário e retorna resposta contextualizada
     sobre legislação brasileira.
+
+    O histórico fica no servidor: basta enviar o session_id retornado na
+    resposta anterior. conversation_history continua aceito para clientes
+    antigos e tem prioridade quando enviado.
     """
     try:
+        # Histórico no banco/Redis: chamadas síncronas fora do event loop
+        session_id = request.session_id or await asyncio.to_thread(chat_history.start_session)
+
         # Processar mensagem com histórico de conversa
-        history = request.conversation_history or []
-        history_dict = [
-            {"role": msg.role, "content": msg.content}
-            for msg in history
-        ]
+        if request.conversation_history:
+            history_dict = [
+                {"role": msg.role, "content": msg.content}
+                for msg in request.conversation_history
+            ]
+        elif request.session_id:
+            try:
+                history_dict = await asyncio.to_thread(chat_history.get_context, session_id)
+            except Exception as e:
+                logger.warning(f"Erro ao carregar histórico da sessão: {str(e)}")
+                history_dict = []
+        else:
+            history_dict = []
         
         response = await chat_service.chat(
             message=request.message,
             conversation_history=history_dict
         )
+
+        # Guardar a pergunta e a resposta na sessão (falha não impede a resposta).
+        # Sem autenticação, as mensagens não são associadas a um usuário
+        try:
+            await asyncio.to_thread(
+                chat_history.append,
+                session_id,
+                [
+                    {"role": "user", "content": request.message},
+                    {
+                        "role": "assistant",
+                        "content": response["message"],
+                        "meta_data": {"sources": response.get("sources", [])}
+                    }
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Erro ao salvar histórico da sessão: {str(e)}")
         
         # Gerar áudio se solicitado
         audio_url = None
@@ -42,6 +78,7 @@ async def chat(request: ChatRequest):
         
         return ChatResponse(
             message=response["message"],
+            session_id=session_id,
             audio_url=audio_url,
             sources=response.get("sources", []),
             suggestions=response.get("suggestions", [])
@@ -73,18 +110,34 @@ async def get_suggestions():
     return {"suggestions": suggestions}
 
 
-@router.get("/history/{user_id}")
-async def get_chat_history(user_id: int, limit: int = 20):
+@router.get("/history/{session_id}", response_model=ChatHistoryResponse)
+async def get_chat_history(
+    session_id: str = Path(..., max_length=36),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
     """
-    Obter histórico de conversas do usuário
-    
+    Obter histórico de uma sessão de conversa (mais recentes primeiro)
+
+    Sem autenticação, o histórico é acessível só por quem tem o session_id
+    (UUID aleatório devolvido pelo POST /chat/); não há listagem por usuário.
+
     Args:
-        user_id: ID do usuário
+        session_id: ID da sessão
         limit: Número máximo de mensagens
+        cursor: Cursor da próxima página (next_cursor da resposta anterior)
     """
-    # TODO: Implementar busca no banco de dados
-    return {
-        "user_id": user_id,
-        "messages": [],
-        "total": 0
-    }
+    try:
+        messages, next_cursor = await asyncio.to_thread(
+            chat_history.list_session_messages, session_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao buscar histórico: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return ChatHistoryResponse(
+        session_id=session_id,
+        messages=messages,
+        next_cursor=next_cursor
+    )
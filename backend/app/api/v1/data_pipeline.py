@@ -1,17 +1,16 @@
 """
 Endpoints para o pipeline de preparação de dados
 """
-from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional, List
 from loguru import logger
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.services.pipeline_service import PipelineService
-from app.services.data_collector import DataCollector
 from app.services.corpus_builder import CorpusBuilder
 from app.services.embedding_service import embedding_service
-from app.models.models import DataCollectionJob
+from app.services.job_queue import job_queue
 
 router = APIRouter()
 
@@ -31,90 +30,39 @@ async def collect_lexml(
     year: Optional[int] = Query(None),
     tipo_documento: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
-    background_tasks: BackgroundTasks = None,
-    db: Session = Depends(get_db)
+    priority: Optional[int] = Query(None, ge=0, le=9, description="0 = mais urgente")
 ):
     """
     Coletar dados do LexML
     
-    Inicia uma coleta de dados do LexML e armazena no banco.
+    Enfileira uma coleta do LexML; acompanhe em GET /jobs/{job_id}.
     """
-    try:
-        collector = DataCollector(db)
-        
-        # Criar job
-        job = collector.create_collection_job(
-            job_type="lexml",
-            parameters={
-                "year": year,
-                "tipo_documento": tipo_documento,
-                "limit": limit
-            }
-        )
-        
-        # Executar em background
-        if background_tasks:
-            background_tasks.add_task(
-                collector.run_collection_job,
-                job.id
-            )
-            return {
-                "job_id": job.id,
-                "status": "started",
-                "message": "Coleta iniciada em background"
-            }
-        else:
-            result = await collector.run_collection_job(job.id)
-            return {
-                "job_id": job.id,
-                "status": "completed",
-                "result": result
-            }
-            
-    except Exception as e:
-        logger.error(f"Erro ao coletar dados do LexML: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _enqueue(
+        "lexml",
+        {"year": year, "tipo_documento": tipo_documento, "limit": limit},
+        priority,
+        "Coleta enfileirada"
+    )
 
 
 @router.post("/collect/camara")
 async def collect_camara(
     year: Optional[int] = Query(None),
+    sigla_tipo: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
-    background_tasks: BackgroundTasks = None,
-    db: Session = Depends(get_db)
+    priority: Optional[int] = Query(None, ge=0, le=9, description="0 = mais urgente")
 ):
     """
     Coletar dados da Câmara dos Deputados
+    
+    Enfileira uma coleta de proposições; acompanhe em GET /jobs/{job_id}.
     """
-    try:
-        collector = DataCollector(db)
-        
-        job = collector.create_collection_job(
-            job_type="camara",
-            parameters={"year": year, "limit": limit}
-        )
-        
-        if background_tasks:
-            background_tasks.add_task(
-                collector.run_collection_job,
-                job.id
-            )
-            return {
-                "job_id": job.id,
-                "status": "started",
-                "message": "Coleta iniciada em background"
-            }
-        else:
-            result = await collector.run_collection_job(job.id)
-            return {
-                "job_id": job.id,
-                "status": "completed",
-                "result": result
-            }
-            
-    except Exception as e:
-        logger.error(f"Erro ao coletar dados da Câmara: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _enqueue(
+        "camara",
+        {"year": year, "sigla_tipo": sigla_tipo, "limit": limit},
+        priority,
+        "Coleta enfileirada"
+    )
 
 
 @router.post("/pipeline/run")
@@ -123,8 +71,7 @@ async def run_pipeline(
     year: Optional[int] = Query(None),
     tipo_documento: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=500),
-    background_tasks: BackgroundTasks = None,
-    db: Session = Depends(get_db)
+    priority: Optional[int] = Query(None, ge=0, le=9, description="0 = mais urgente")
 ):
     """
     Executar pipeline completo de preparação de dados
@@ -134,37 +81,74 @@ async def run_pipeline(
     - Pré-processamento e chunking
     - Construção de corpus
     - Geração de embeddings
+
+    Enfileira o pipeline; acompanhe em GET /jobs/{job_id}.
+    """
+    return await _enqueue(
+        "pipeline",
+        {"source": source, "year": year, "tipo_documento": tipo_documento, "limit": limit},
+        priority,
+        "Pipeline enfileirado"
+    )
+
+
+@router.post("/dedup/run")
+async def run_dedup(
+    prune_aliases: bool = Query(True, description="Remover chunks e corpus das duplicatas"),
+    priority: Optional[int] = Query(None, ge=0, le=9, description="0 = mais urgente")
+):
     """
+    Deduplicar legislações entre fontes (LexML, Senado, Câmara)
+
+    Agrupa duplicatas por MinHash/LSH do texto e similaridade dos
+    embeddings; cada grupo fica com um registro canônico e os demais
+    apontam para ele (canonical_id). Acompanhe em GET /jobs/{job_id}.
+    """
+    return await _enqueue(
+        "dedup",
+        {"prune_aliases": prune_aliases},
+        priority,
+        "Deduplicação enfileirada"
+    )
+
+
+async def _enqueue(job_type: str, parameters: dict, priority: Optional[int], message: str):
+    """Gravar e enfileirar o job (os workers do Celery executam)"""
     try:
-        pipeline = PipelineService(db)
-        
-        if background_tasks:
-            background_tasks.add_task(
-                pipeline.run_full_pipeline,
-                source=source,
-                year=year,
-                tipo_documento=tipo_documento,
-                limit=limit
-            )
-            return {
-                "status": "started",
-                "message": "Pipeline iniciado em background"
-            }
-        else:
-            result = await pipeline.run_full_pipeline(
-                source=source,
-                year=year,
-                tipo_documento=tipo_documento,
-                limit=limit
-            )
-            return {
-                "status": "completed",
-                "result": result
-            }
-            
+        job = await asyncio.to_thread(job_queue.submit, job_type, parameters, priority)
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "message": message
+        }
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar job {job_type}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/corpus/build")
+async def build_corpus_sharded(
+    shards: int = Query(4, ge=1, le=64, description="Intervalos de IDs processados em paralelo"),
+    priority: Optional[int] = Query(None, ge=0, le=9, description="0 = mais urgente"),
+    db: Session = Depends(get_db)
+):
+    """
+    Construir o corpus de todas as legislações com chunks
+
+    Divide as legislações em intervalos de IDs e enfileira um job por
+    intervalo (até JOB_SOURCE_CONCURRENCY["corpus"] ao mesmo tempo).
+    Só os pares que faltam são inseridos. Acompanhe em GET /jobs/{job_id}.
+    """
+    try:
+        ranges = await asyncio.to_thread(CorpusBuilder(db).shard_ranges, shards)
     except Exception as e:
-        logger.error(f"Erro ao executar pipeline: {str(e)}")
+        logger.error(f"Erro ao dividir o corpus em intervalos: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    jobs = [
+        await _enqueue("corpus", {"start_id": start, "end_id": end}, priority, "Corpus enfileirado")
+        for start, end in ranges
+    ]
+    return {"jobs": jobs, "ranges": ranges}
 
 
 @router.post("/corpus/build/{legislation_id}")
@@ -212,29 +196,15 @@ async def generate_embeddings(
 
 
 @router.get("/jobs/{job_id}")
-async def get_job_status(
-    job_id: int,
-    db: Session = Depends(get_db)
-):
+async def get_job_status(job_id: int):
     """
     Obter status de um job de coleta
     """
     try:
-        job = db.query(DataCollectionJob).filter_by(id=job_id).first()
+        job = await asyncio.to_thread(job_queue.get, job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job não encontrado")
-        
-        return {
-            "id": job.id,
-            "job_type": job.job_type,
-            "status": job.status,
-            "total_items": job.total_items,
-            "processed_items": job.processed_items,
-            "failed_items": job.failed_items,
-            "error_message": job.error_message,
-            "started_at": job.started_at,
-            "completed_at": job.completed_at
-        }
+        return job
         
     except HTTPException:
         raise
@@ -242,3 +212,22 @@ async def get_job_status(
         logger.error(f"Erro ao obter status do job: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: int):
+    """
+    Cancelar um job
+    
+    Jobs pendentes são descartados; jobs em execução param ao fim da página atual.
+    """
+    try:
+        job = await asyncio.to_thread(job_queue.cancel, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job não encontrado")
+        return job
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao cancelar job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,182 +1,125 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from typing import List, Optional
 from loguru import logger
-from datetime import datetime
 
-from app.schemas.schemas import LegislationSimplified, LegislationDetail
+from app.models.models import Legislation
+from app.schemas.schemas import (
+    LegislationSimplified,
+    LegislationDetail,
+    FullTextPrefetchRequest,
+    FullTextPrefetchResponse,
+)
+from app.integrations.fulltext_resolver import fulltext_resolver
 from app.integrations.legislative_apis import lexml_client
+from app.services.legislation_store import legislation_store
 
 router = APIRouter()
 
 
+def _simplified_fields(legislation: Legislation) -> dict:
+    """Campos comuns de LegislationSimplified a partir do registro local"""
+    return {
+        "id": legislation.stable_id,
+        "type": legislation.type,
+        "number": legislation.number or "N/A",
+        "year": legislation.year,
+        "title": legislation.title,
+        "simplified_text": legislation.simplified_text,
+        "status": legislation.status,
+        "author": legislation.author,
+        "presentation_date": legislation.presentation_date,
+        "tags": legislation.tags,
+        "urn": legislation.urn,
+        "identifier": legislation.external_id or legislation.urn,
+    }
+
+
 @router.get("/trending", response_model=List[LegislationSimplified])
 async def get_trending_legislation(limit: int = Query(10, ge=1, le=50)):
     """
     Obter legislações em destaque
 
-    Retorna as proposições mais recentes e relevantes do LexML.
+    Retorna as proposições mais recentes do banco local. A lista é
+    recalculada periodicamente (coleta do LexML em background), sem chamar
+    o LexML na requisição.
     """
     try:
         result = []
-
-        # Buscar no LexML - projetos de lei recentes
-        current_year = datetime.now().year
-
-        # Buscar projetos de lei do ano atual
-        lexml_projects = await lexml_client.search_projects_of_law(
-            year=current_year,
-            limit=limit
-        )
-
-        # Se não houver projetos suficientes, buscar também leis
-        if len(lexml_projects) < limit:
-            lexml_laws = await lexml_client.search_laws(
-                year=current_year,
-                limit=limit - len(lexml_projects)
-            )
-            lexml_projects.extend(lexml_laws)
-
-        for doc in lexml_projects[:limit]:
-            # Extrair número e ano do título ou URN
-            title = doc.get("title", "")
-            urn = doc.get("urn", "")
-
-            # Tentar extrair número do título (ex: "PLS nº 489/2008")
-            number = ""
-            year = doc.get("date", current_year)
-
-            if "nº" in title or "Nº" in title:
-                parts = title.split(
-                    "nº") if "nº" in title else title.split("Nº")
-                if len(parts) > 1:
-                    number_part = parts[1].split("/")[0].strip()
-                    number = number_part
-
-            # Usar hash da URN como ID se não houver lexml_id
-            doc_id = doc.get("lexml_id")
-            if not doc_id:
-                # ID numérico baseado no hash
-                doc_id = abs(hash(urn)) % (10 ** 10)
-
-            # Determinar status baseado nos dados do LexML
-            status = None
-            # O LexML pode ter informações de status no campo 'dc_type' ou outros campos
-            dc_type = doc.get("dc_type", "").lower(
-            ) if doc.get("dc_type") else ""
-            if "aprovado" in dc_type or "aprovada" in dc_type:
-                status = "Aprovado"
-            elif "rejeitado" in dc_type or "rejeitada" in dc_type:
-                status = "Rejeitado"
-            elif "arquivado" in dc_type or "arquivada" in dc_type:
-                status = "Arquivado"
-            else:
-                # Por padrão, projetos de lei do LexML estão em tramitação
-                status = "Em tramitação"
-
+        # Consulta síncrona ao banco fora do event loop
+        for legislation in await asyncio.to_thread(legislation_store.trending, limit):
+            summary = legislation.summary or ""
             result.append(LegislationSimplified(
-                id=int(doc_id) if doc_id else abs(hash(urn)) % (10 ** 10),
-                type=doc.get("tipo_documento", "Documento"),
-                number=number or "N/A",
-                year=int(year) if year else current_year,
-                title=title,
-                summary=doc.get("description", "")[
-                    :200] + "..." if doc.get("description") else "",
-                status=status,
-                author=doc.get("autoridade"),
-                presentation_date=None,
-                tags=None,
-                urn=urn,
-                identifier=doc.get("lexml_id") or urn
+                **_simplified_fields(legislation),
+                summary=summary[:200] + "..." if summary else "",
             ))
-
-        return result[:limit]
+        return result
 
     except Exception as e:
         logger.error(f"Erro ao buscar legislações em destaque: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{legislation_id}", response_model=LegislationDetail)
-async def get_legislation_detail(legislation_id: int):
+@router.post("/fulltext/prefetch", response_model=FullTextPrefetchResponse)
+async def prefetch_full_text(
+    request: FullTextPrefetchRequest,
+    background_tasks: BackgroundTasks
+):
     """
-    Obter detalhes de uma legislação específica do LexML
+    Buscar em background o texto completo de várias URNs
 
-    Args:
-        legislation_id: ID da legislação (lexml_id ou hash da URN)
+    Os textos ficam no cache do resolvedor e o GET /legislation/{id}
+    passa a respondê-los sem esperar o LexML.
     """
-    try:
-        # Buscar por ID no LexML usando busca genérica
-        # Como o LexML não tem endpoint direto por ID, vamos buscar por palavras-chave
-        # ou usar a busca por URN se o ID for uma URN
-
-        # Por enquanto, vamos buscar legislações recentes e filtrar por ID
-        # Em produção, seria melhor ter um cache ou banco de dados local
-        current_year = datetime.now().year
-
-        # Buscar em projetos de lei
-        projects = await lexml_client.search_projects_of_law(
-            year=current_year,
-            limit=100
-        )
+    urns = list(dict.fromkeys(urn for urn in request.urns if urn))
+    background_tasks.add_task(fulltext_resolver.prefetch, urns)
+    return FullTextPrefetchResponse(status="started", requested=len(urns))
 
-        # Buscar em leis
-        laws = await lexml_client.search_laws(
-            year=current_year,
-            limit=100
-        )
 
-        all_docs = projects + laws
-
-        # Encontrar documento pelo ID
-        doc = None
-        for d in all_docs:
-            doc_id = d.get("lexml_id")
-            if doc_id and str(doc_id) == str(legislation_id):
-                doc = d
-                break
-            # Também verificar por hash da URN
-            if not doc_id:
-                urn = d.get("urn", "")
-                if urn and abs(hash(urn)) % (10 ** 10) == legislation_id:
-                    doc = d
-                    break
-
-        if not doc:
-            raise HTTPException(
-                status_code=404, detail="Legislação não encontrada no LexML")
+@router.get("/fulltext/stats")
+async def get_full_text_stats():
+    """
+    Estatísticas do resolvedor de texto completo (caches e padrões aprendidos)
+    """
+    return fulltext_resolver.get_stats()
 
-        # Buscar texto completo se disponível
-        full_text = doc.get("full_text")
-        if not full_text and doc.get("urn"):
-            full_text = await lexml_client._get_document_full_text(doc.get("urn"))
 
-        # Extrair número do título
-        title = doc.get("title", "")
-        number = ""
-        if "nº" in title or "Nº" in title:
-            parts = title.split("nº") if "nº" in title else title.split("Nº")
-            if len(parts) > 1:
-                number_part = parts[1].split("/")[0].strip()
-                number = number_part
+@router.get("/{legislation_id}", response_model=LegislationDetail)
+async def get_legislation_detail(legislation_id: int, background_tasks: BackgroundTasks):
+    """
+    Obter detalhes de uma legislação do banco local
 
-        year = doc.get("date", current_year)
+    Sem texto completo gravado, usa o do cache do resolvedor ou agenda a
+    busca no LexML em background (o texto é gravado para as próximas
+    requisições).
+
+    Args:
+        legislation_id: ID estável da legislação (ou lexml_id)
+    """
+    try:
+        # Consulta síncrona ao banco fora do event loop
+        legislation = await asyncio.to_thread(legislation_store.get, legislation_id)
+        if legislation is None:
+            raise HTTPException(
+                status_code=404, detail="Legislação não encontrada")
+
+        full_text = legislation.full_text
+        if not full_text and legislation.urn:
+            full_text = fulltext_resolver.cached(legislation.urn)
+            if full_text:
+                background_tasks.add_task(
+                    legislation_store.save_full_text, legislation.stable_id, full_text)
+            else:
+                background_tasks.add_task(
+                    legislation_store.fill_full_text, legislation.stable_id, legislation.urn)
 
         return LegislationDetail(
-            id=int(doc.get("lexml_id")) if doc.get("lexml_id") else abs(
-                hash(doc.get("urn", ""))) % (10 ** 10),
-            type=doc.get("tipo_documento", "Documento"),
-            number=number or "N/A",
-            year=int(year) if year else current_year,
-            title=title,
-            summary=doc.get("description", ""),
+            **_simplified_fields(legislation),
+            summary=legislation.summary,
             full_text=full_text,
-            simplified_text=None,
-            status=None,
-            author=doc.get("autoridade"),
-            presentation_date=None,
-            last_update=None,
-            tags=None,
-            raw_data=doc
+            last_update=legislation.last_update,
+            raw_data=legislation.raw_data
         )
 
     except HTTPException:
@@ -359,10 +302,16 @@ async def get_lexml_by_urn(urn: str):
     """
     Obter documento específico do LexML por URN
 
+    Documentos já coletados vêm do banco local; os demais, do LexML.
+
     Args:
         urn: URN do documento (ex: 'senado.federal pls 2008' ou URN completa)
     """
     try:
+        legislation = await asyncio.to_thread(legislation_store.get_by_urn, urn)
+        if legislation is not None and legislation.raw_data:
+            return legislation.raw_data
+
         document = await lexml_client.get_document_by_urn(urn)
 
         if not document:
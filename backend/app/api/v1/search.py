@@ -1,9 +1,13 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 from loguru import logger
 
+from app.core.config import settings
 from app.schemas.schemas import SearchRequest, SearchResponse, LegislationSimplified
 from app.integrations.legislative_apis import camara_client, lexml_client
+from app.services.local_search import local_search
 
 router = APIRouter()
 
@@ -13,8 +17,33 @@ async def search_legislation(request: SearchRequest):
     """
     Buscar legislação por palavras-chave
 
-    Busca em múltiplas fontes (Câmara, Senado, municípios).
+    Modo local: busca textual no banco (ranking, trechos destacados e
+    facetas por tipo, ano e fonte). Modo live: LexML e Câmara na hora. No
+    modo auto (padrão), as APIs só são consultadas quando o banco não tem
+    resultado.
     """
+    mode = request.mode or settings.SEARCH_MODE
+    if mode in ("local", "auto"):
+        try:
+            # Consultas síncronas ao banco fora do event loop
+            found = await asyncio.to_thread(
+                local_search.search, request.query, request.filters, request.page, request.page_size)
+            if mode == "local" or found["total"]:
+                return SearchResponse(
+                    total=found["total"],
+                    page=request.page,
+                    page_size=request.page_size,
+                    results=[LegislationSimplified(**item) for item in found["results"]],
+                    facets=found["facets"],
+                    took_ms=found["took_ms"],
+                    mode="local"
+                )
+        except Exception as e:
+            if mode == "local":
+                logger.error(f"Erro na busca local: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            logger.warning(f"Erro na busca local, consultando as APIs: {str(e)}")
+
     try:
         year_filter = request.filters.get("year") if request.filters else None
 
@@ -152,7 +181,8 @@ async def search_legislation(request: SearchRequest):
                         total=len(results),
                         page=request.page,
                         page_size=request.page_size,
-                        results=results
+                        results=results,
+                        mode="live"
                     )
             except Exception as e:
                 logger.warning(
@@ -253,7 +283,8 @@ async def search_legislation(request: SearchRequest):
             total=len(results),
             page=request.page,
             page_size=request.page_size,
-            results=results
+            results=results,
+            mode="live"
         )
 
     except Exception as e:
@@ -310,3 +341,12 @@ async def get_available_filters():
             "Arquivado"
         ]
     }
+
+
+@router.get("/reranker/stats")
+async def get_reranker_stats():
+    """
+    Estatísticas do reranqueamento (cross-encoder) e do cache de pontuações
+    """
+    from app.services.reranker import reranker
+    return reranker.get_stats()
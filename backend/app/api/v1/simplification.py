@@ -36,7 +36,9 @@ async def simplify_text(request: SimplificationRequest):
             original_text=request.text,
             simplified_text=result["simplified_text"],
             audio_url=audio_url,
-            reading_time_minutes=result["reading_time_minutes"]
+            reading_time_minutes=result["reading_time_minutes"],
+            readability_score=result.get("readability_score"),
+            method=result.get("method")
         )
         
     except Exception as e:
@@ -64,7 +66,9 @@ async def simplify_batch(texts: list[str], target_level: str = "simple"):
             results.append({
                 "original": text,
                 "simplified": result["simplified_text"],
-                "reading_time": result["reading_time_minutes"]
+                "reading_time": result["reading_time_minutes"],
+                "readability_score": result.get("readability_score"),
+                "method": result.get("method")
             })
         
         return {
@@ -75,3 +79,14 @@ async def simplify_batch(texts: list[str], target_level: str = "simple"):
     except Exception as e:
         logger.error(f"Erro ao simplificar lote: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+async def get_simplification_stats():
+    """
+    Obter estatísticas do caminho rápido de simplificação
+
+    Retorna quantas simplificações foram resolvidas pelo glossário local
+    e quantas precisaram do LLM.
+    """
+    return simplification_service.get_stats()
@@ -0,0 +1,63 @@
+"""
+Aplicação Celery: workers da fila de jobs de coleta e do pipeline
+
+Worker (ver docker-compose.yml):
+    celery -A app.celery_app worker --loglevel=info --concurrency=4
+
+A API só enfileira (app/services/job_queue.py); cada tarefa executa um job
+e o progresso fica em data_collection_jobs. Para escalar a ingestão, suba
+mais workers: o limite de jobs simultâneos por fonte vale entre todos eles.
+Com CELERY_TASK_ALWAYS_EAGER a tarefa roda no próprio processo (testes).
+"""
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    from celery import Celery
+    CELERY_AVAILABLE = True
+except ImportError:
+    CELERY_AVAILABLE = False
+    logger.warning("celery não instalado: jobs executados no processo da API")
+
+celery_app = None
+run_job = None
+
+if CELERY_AVAILABLE:
+    celery_app = Celery(
+        "vozdalei",
+        broker=settings.CELERY_BROKER_URL,
+        backend=settings.CELERY_RESULT_BACKEND
+    )
+    celery_app.conf.update(
+        task_serializer="json",
+        accept_content=["json"],
+        result_serializer="json",
+        # Estado e resultado ficam no job, não no backend do Celery
+        task_ignore_result=True,
+        task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+        # Um job por processo de cada vez; a mensagem só sai da fila no fim
+        # do job e volta se o worker morrer no meio
+        task_acks_late=True,
+        task_reject_on_worker_lost=True,
+        worker_prefetch_multiplier=1,
+        # Redis: 10 níveis de prioridade, 0 = mais urgente
+        task_default_priority=settings.JOB_DEFAULT_PRIORITY,
+        broker_transport_options={
+            "priority_steps": list(range(10)),
+            "sep": ":",
+            "queue_order_strategy": "priority",
+        },
+    )
+
+    @celery_app.task(bind=True, name="jobs.run", max_retries=None)
+    def run_job(self, job_id: int):
+        """Executar um job de data_collection_jobs"""
+        from app.services.job_queue import JobDeferred, JobRetry, job_queue
+
+        redelivered = bool((self.request.delivery_info or {}).get("redelivered"))
+        try:
+            return job_queue.execute(job_id, redelivered=redelivered)
+        except (JobDeferred, JobRetry) as e:
+            # Volta para a fila com a mesma prioridade; tentativas contadas no job
+            raise self.retry(countdown=e.delay, exc=e)
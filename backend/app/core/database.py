@@ -6,6 +6,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 from app.models.models import Base
 
 # Criar engine
@@ -14,6 +15,8 @@ engine = create_engine(
     poolclass=NullPool,
     echo=settings.DEBUG
 )
+# Tempo das consultas em /metrics
+instrument_engine(engine)
 
 # Criar session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,318 @@
+"""
+Métricas da aplicação no formato de texto do Prometheus (GET /metrics)
+
+As métricas são do prometheus_client, num registro próprio da aplicação
+(registry). Este módulo define as métricas e os atalhos de registro usados
+no caminho crítico:
+- @timed(HISTOGRAMA, rótulo=valor) em funções síncronas e assíncronas, ou
+  with timed(HISTOGRAMA, rótulo=valor) as timer: ... (timer.outcome =
+  "error" quando o erro é tratado dentro do bloco);
+- @instrument_client("nome") na classe de um cliente HTTP: todos os métodos
+  assíncronos públicos medidos por método, com gauge de requisições em curso
+  e um span de tracing (app/core/tracing.py) por chamada;
+- instrument_engine(engine): tempo de cada consulta SQL por operação;
+- record_cache e record_llm_usage: acertos de cache e tokens do LLM.
+
+Cada registro custa alguns microssegundos (tests/test_metrics.py mede).
+
+Vários workers (WEB_CONCURRENCY > 1): cada processo tem seus próprios
+valores, e um scrape cairia num worker qualquer. Com PROMETHEUS_MULTIPROC_DIR
+definido (antes de iniciar o servidor, num diretório vazio a cada início;
+o Dockerfile faz isso), o prometheus_client entra no modo multiprocesso:
+- cada worker grava seus valores em arquivos nesse diretório;
+- /metrics expõe exposition_registry(), que soma os arquivos de todos os
+  workers (MultiProcessCollector); a razão de acertos dos caches é
+  calculada sobre os contadores já somados;
+- gauges de requisições em andamento usam multiprocess_mode="livesum"
+  (soma dos workers vivos) e mark_process_dead() no shutdown do worker
+  remove os arquivos dele. Um worker morto sem shutdown deixa o último
+  valor dele no gauge até o próximo início.
+Sem a variável, o registro do processo (registry) é exposto diretamente.
+"""
+import functools
+import inspect
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+from app.core.config import settings
+from app.core.tracing import call_attributes, tracer
+
+# Limites dos histogramas de latência (segundos)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Modo multiprocesso do prometheus_client (lido por ele na importação)
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Instância global
+registry = CollectorRegistry()
+
+# Requisições HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "vozdalei_http_request_seconds", "Duração das requisições HTTP", ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS, registry=registry)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "vozdalei_http_requests_in_flight", "Requisições HTTP em andamento",
+    multiprocess_mode="livesum", registry=registry)
+
+# APIs externas (LexML, Senado, Câmara, Querido Diário)
+UPSTREAM_SECONDS = Histogram(
+    "vozdalei_upstream_request_seconds", "Duração das chamadas às APIs externas, por método do cliente",
+    ("client", "method", "outcome"), buckets=LATENCY_BUCKETS, registry=registry)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "vozdalei_upstream_requests_in_flight", "Chamadas às APIs externas em andamento", ("client",),
+    multiprocess_mode="livesum", registry=registry)
+
+# Busca unificada: cada fonte
+SEARCH_SOURCE_SECONDS = Histogram(
+    "vozdalei_search_source_seconds", "Duração de cada fonte da busca unificada", ("source", "outcome"),
+    buckets=LATENCY_BUCKETS, registry=registry)
+
+# LLM
+LLM_SECONDS = Histogram(
+    "vozdalei_llm_request_seconds", "Duração das chamadas ao LLM", ("operation", "outcome"),
+    buckets=LATENCY_BUCKETS, registry=registry)
+LLM_TOKENS = Counter(
+    "vozdalei_llm_tokens", "Tokens enviados e recebidos do LLM", ("operation", "kind"), registry=registry)
+
+# Áudio (Whisper e gTTS)
+AUDIO_SECONDS = Histogram(
+    "vozdalei_audio_seconds", "Duração da transcrição (Whisper) e da síntese de voz (gTTS)",
+    ("operation", "outcome"), buckets=LATENCY_BUCKETS, registry=registry)
+
+# Banco de dados
+DB_QUERY_SECONDS = Histogram(
+    "vozdalei_db_query_seconds", "Duração das consultas SQL", ("operation",),
+    buckets=DB_BUCKETS, registry=registry)
+
+# Caches
+CACHE_LOOKUPS = Counter(
+    "vozdalei_cache_lookups", "Consultas aos caches em memória", ("cache", "result"), registry=registry)
+
+
+class _CacheHitRatio:
+    """Gauge calculado na coleta: fração de acertos de cada cache"""
+
+    def __init__(self, source: Any):
+        # Coletor com vozdalei_cache_lookups: o contador do processo ou a soma dos workers
+        self.source = source
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        totals: Dict[str, List[float]] = {}
+        for metric in self.source.collect():
+            if metric.name != "vozdalei_cache_lookups":
+                continue
+            for sample in metric.samples:
+                if not sample.name.endswith("_total"):
+                    continue
+                hits_and_total = totals.setdefault(sample.labels["cache"], [0.0, 0.0])
+                hits_and_total[1] += sample.value
+                if sample.labels["result"] == "hit":
+                    hits_and_total[0] += sample.value
+        family = GaugeMetricFamily(
+            "vozdalei_cache_hit_ratio", "Fração de acertos de cada cache desde o início do servidor",
+            labels=("cache",))
+        for cache, (hits, total) in totals.items():
+            if total:
+                family.add_metric((cache,), hits / total)
+        yield family
+
+
+registry.register(_CacheHitRatio(CACHE_LOOKUPS))
+
+_aggregated_registry: Optional[CollectorRegistry] = None
+
+
+def exposition_registry() -> CollectorRegistry:
+    """
+    Registro exposto em /metrics
+
+    Returns:
+        Soma de todos os workers no modo multiprocesso; senão, o registro do processo
+    """
+    global _aggregated_registry
+    if not MULTIPROC_DIR:
+        return registry
+    if _aggregated_registry is None:
+        # Os arquivos dos workers são lidos a cada coleta
+        aggregated = CollectorRegistry()
+        workers = multiprocess.MultiProcessCollector(aggregated, MULTIPROC_DIR)
+        aggregated.register(_CacheHitRatio(workers))
+        _aggregated_registry = aggregated
+    return _aggregated_registry
+
+
+def mark_process_dead() -> None:
+    """Worker encerrando: tirar seus valores dos gauges "livesum" (modo multiprocesso)"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid(), MULTIPROC_DIR)
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    """Registrar acertos e falhas de um cache"""
+    if not settings.METRICS_ENABLED:
+        return
+    if hits:
+        CACHE_LOOKUPS.labels(cache=cache, result="hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache=cache, result="miss").inc(misses)
+
+
+def record_llm_usage(operation: str, response: Any) -> Dict[str, int]:
+    """
+    Registrar os tokens de uma resposta do LangChain
+
+    Lê usage_metadata (input_tokens/output_tokens) ou, em versões antigas,
+    response_metadata['token_usage'] (prompt_tokens/completion_tokens).
+
+    Returns:
+        Atributos de span gen_ai.usage.input_tokens/output_tokens
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if not usage:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        usage = {
+            "input_tokens": token_usage.get("prompt_tokens", 0),
+            "output_tokens": token_usage.get("completion_tokens", 0),
+        }
+    attributes = {}
+    for kind in ("input", "output"):
+        tokens = usage.get(f"{kind}_tokens") or 0
+        if tokens and settings.METRICS_ENABLED:
+            LLM_TOKENS.labels(operation=operation, kind=kind).inc(tokens)
+        attributes[f"gen_ai.usage.{kind}_tokens"] = tokens
+    return attributes
+
+
+class _Timer:
+    """Mede um bloco ou cada chamada de uma função, com outcome ok/error"""
+
+    __slots__ = ("histogram", "labels", "outcome", "started")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.outcome = "ok"
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        if settings.METRICS_ENABLED:
+            outcome = "error" if exc_type is not None else self.outcome
+            self.histogram.labels(outcome=outcome, **self.labels).observe(elapsed)
+
+    def __call__(self, func: Callable) -> Callable:
+        # Decorador: um timer novo por chamada (chamadas simultâneas não dividem estado)
+        histogram, labels = self.histogram, self.labels
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with _Timer(histogram, labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _Timer(histogram, labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def timed(histogram: Histogram, **labels: Any) -> _Timer:
+    """
+    Medir um bloco (with) ou cada chamada de uma função (decorador)
+
+    Args:
+        histogram: Histograma de destino, com o rótulo 'outcome'
+        **labels: Valores fixos dos demais rótulos (outcome é preenchido sozinho)
+    """
+    return _Timer(histogram, labels)
+
+
+# Cliente cuja chamada está em andamento nesta tarefa: métodos que chamam
+# outros métodos do mesmo cliente contam uma vez só no gauge de andamento
+_current_client: ContextVar[Optional[str]] = ContextVar("metrics_current_client", default=None)
+
+
+def _instrument_method(client: str, name: str, func: Callable) -> Callable:
+    in_flight = UPSTREAM_IN_FLIGHT.labels(client=client)
+
+    span_name = f"{client}.{name}"
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with tracer.span(span_name, kind="client") as span, _Timer(UPSTREAM_SECONDS, {"client": client, "method": name}):
+            span.set_attribute("peer.service", client)
+            span.set_attributes(call_attributes(kwargs))
+            if _current_client.get() == client:
+                return await func(*args, **kwargs)
+            token = _current_client.set(client)
+            try:
+                with in_flight.track_inprogress():
+                    return await func(*args, **kwargs)
+            finally:
+                _current_client.reset(token)
+    return wrapper
+
+
+def instrument_client(client: str) -> Callable[[type], type]:
+    """
+    Decorador de classe: mede os métodos assíncronos públicos de um cliente
+
+    Args:
+        client: Nome do cliente no rótulo 'client' (lexml, senado, camara, ...)
+    """
+    def decorator(cls: type) -> type:
+        for name, member in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(member):
+                setattr(cls, name, _instrument_method(client, name, member))
+        return cls
+    return decorator
+
+
+def _statement_operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def instrument_engine(engine: Any) -> None:
+    """
+    Medir as consultas SQL de um engine (eventos before/after_cursor_execute)
+
+    Consultas com erro não são medidas; o início guardado na conexão é
+    descartado no evento handle_error.
+
+    Args:
+        engine: Engine do SQLAlchemy
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts: Optional[List[float]] = conn.info.get("metrics_query_start")
+        if starts:
+            elapsed = time.perf_counter() - starts.pop()
+            if settings.METRICS_ENABLED:
+                DB_QUERY_SECONDS.labels(operation=_statement_operation(statement)).observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # Só erros de uma consulta já iniciada (com contexto de execução)
+        conn = exception_context.connection
+        if conn is not None and exception_context.execution_context is not None:
+            starts: Optional[List[float]] = conn.info.get("metrics_query_start")
+            if starts:
+                starts.pop()
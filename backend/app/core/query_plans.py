@@ -0,0 +1,130 @@
+"""
+Planos de execução (EXPLAIN) das consultas mais frequentes
+
+HOT_QUERIES reproduz as consultas dos serviços que rodam a cada lote ou a
+cada job (fila de embeddings, corpus, fila de jobs, filtros de busca).
+explain() devolve o plano em texto no SQLite ou no PostgreSQL e
+full_scans() aponta as tabelas lidas por inteiro (SCAN sem índice /
+Seq Scan), usado em tests/test_query_plans.py e em
+scripts/explain_hot_queries.py.
+"""
+import re
+from typing import Callable, Dict, Iterable, List
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Executable
+
+from app.models.models import DataCollectionJob, Legislation, LegislationChunk, TrainingCorpus
+
+# IDs de exemplo para as consultas por lote
+SAMPLE_IDS = [1, 2, 3, 4, 5]
+
+
+def _running_jobs():
+    # Vagas por fonte em JobQueue._claim
+    other = aliased(DataCollectionJob)
+    return select(func.count(other.id)).where(other.source == "lexml", other.status == "running")
+
+
+HOT_QUERIES: Dict[str, Callable[[], Executable]] = {
+    # EmbeddingService.update_chunk_embeddings / update_corpus_embeddings
+    "chunks_pending_embedding": lambda: (
+        select(LegislationChunk.id).where(LegislationChunk.embedding.is_(None)).limit(100)
+    ),
+    "corpus_pending_embedding": lambda: (
+        select(TrainingCorpus.id).where(TrainingCorpus.embedding.is_(None)).limit(100)
+    ),
+    # PipelineService._chunk_stage e CorpusBuilder.build_corpus_for_legislations (retomada)
+    "chunks_pending_for_legislations": lambda: (
+        select(LegislationChunk.id).where(
+            LegislationChunk.legislation_id.in_(SAMPLE_IDS), LegislationChunk.embedding.is_(None)
+        )
+    ),
+    "corpus_pending_for_legislations": lambda: (
+        select(TrainingCorpus.id, TrainingCorpus.question).where(
+            TrainingCorpus.legislation_id.in_(SAMPLE_IDS), TrainingCorpus.embedding.is_(None)
+        )
+    ),
+    # CorpusBuilder._build: pares já gravados
+    "corpus_existing_keys": lambda: (
+        select(TrainingCorpus.chunk_id, TrainingCorpus.question)
+        .where(TrainingCorpus.legislation_id.in_(SAMPLE_IDS))
+    ),
+    # CorpusBuilder.build_corpus_range: próximo lote de legislações com chunks
+    "chunked_legislations_page": lambda: (
+        select(LegislationChunk.legislation_id)
+        .where(LegislationChunk.legislation_id > 0)
+        .distinct().order_by(LegislationChunk.legislation_id).limit(100)
+    ),
+    # Filtros de busca e SenadoCollector.estatisticas
+    "legislations_by_filters": lambda: (
+        select(Legislation.id).where(
+            Legislation.source == "senado", Legislation.type == "PL", Legislation.year == 2020
+        )
+    ),
+    "legislations_by_type": lambda: (
+        select(Legislation.type, func.count())
+        .where(Legislation.source == "senado").group_by(Legislation.type)
+    ),
+    # JobQueue._claim
+    "running_jobs_for_source": _running_jobs,
+    "pending_jobs": lambda: (
+        select(DataCollectionJob.id).where(DataCollectionJob.status == "pending")
+    ),
+}
+
+
+def explain(connection: Connection, statement: Executable) -> List[str]:
+    """
+    Plano de execução de uma consulta
+
+    Args:
+        connection: Conexão SQLite ou PostgreSQL
+        statement: Consulta SQLAlchemy
+
+    Returns:
+        Linhas do plano (detalhe do EXPLAIN QUERY PLAN no SQLite, EXPLAIN em
+        texto no PostgreSQL)
+    """
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+
+
+def full_scans(plan: Iterable[str], tables: Iterable[str]) -> List[str]:
+    """
+    Tabelas lidas por inteiro no plano
+
+    Varreduras de índice (SCAN ... USING INDEX, Index Scan, Bitmap) não
+    contam: num índice parcial elas só passam pelas linhas do filtro.
+
+    Args:
+        plan: Linhas de explain()
+        tables: Tabelas a verificar
+
+    Returns:
+        Tabelas com varredura sequencial
+    """
+    found = []
+    for table in tables:
+        sqlite_scan = re.compile(rf"^SCAN {table}(_\d+)?\b(?! USING (COVERING )?INDEX)")
+        postgres_scan = re.compile(rf"Seq Scan on {table}\b")
+        if any(sqlite_scan.search(line.strip()) or postgres_scan.search(line) for line in plan):
+            found.append(table)
+    return found
+
+
+def hot_query_plans(connection: Connection) -> Dict[str, List[str]]:
+    """
+    Planos de todas as consultas de HOT_QUERIES
+
+    Args:
+        connection: Conexão com o banco
+
+    Returns:
+        Nome da consulta → linhas do plano
+    """
+    return {name: explain(connection, build()) for name, build in HOT_QUERIES.items()}
@@ -0,0 +1,247 @@
+"""
+Rastreamento (tracing) das requisições com o SDK do OpenTelemetry
+
+Cada requisição HTTP abre um span raiz (com o cabeçalho W3C traceparent,
+quando presente) e os caminhos críticos abrem spans filhos: chat, busca
+unificada e cada fonte, chamadas às APIs externas, LLM e áudio. Os spans
+terminados vão para o BatchSpanProcessor do SDK, que os exporta em lote
+numa thread própria:
+- "jsonl": um span por linha em TRACING_JSONL_PATH (análise offline);
+- "otlp": OTLP/HTTP em TRACING_OTLP_ENDPOINT (coletor local).
+
+Amostragem pela raiz do trace: ParentBased(TraceIdRatioBased(
+TRACING_SAMPLE_RATIO)); os filhos seguem a decisão da raiz. Com
+TRACING_ENABLED=False ou dentro de um trace fora da amostra, span() não
+aloca nada.
+
+Uso:
+    with tracer.span("chat.retrieval", {"query.length": len(query)}) as span:
+        ...
+        span.set_attribute("results", len(results))
+
+    @traced("search.unified")
+    async def search(...): ...
+"""
+import functools
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanLimits, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+from app.core.config import settings
+
+# Tipos de span aceitos em span()/start_span()
+SPAN_KINDS = {"internal": SpanKind.INTERNAL, "server": SpanKind.SERVER, "client": SpanKind.CLIENT}
+# Valores aceitos como atributo em call_attributes
+ATTRIBUTE_TYPES = (str, bool, int, float)
+MAX_ATTRIBUTE_LENGTH = 256
+EXPORT_BATCH_SIZE = 512
+
+# Span que não registra nada (tracing desligado ou trace fora da amostra)
+NON_RECORDING_SPAN = trace.INVALID_SPAN
+
+_propagator = TraceContextTextMapPropagator()
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> Any:
+        return NON_RECORDING_SPAN
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NOOP_SCOPE = _NoopScope()
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Acrescenta um span por linha (JSON) a um arquivo"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    @staticmethod
+    def to_dict(span: ReadableSpan) -> Dict[str, Any]:
+        """Registro de uma linha do arquivo"""
+        return {
+            "trace_id": trace.format_trace_id(span.context.trace_id),
+            "span_id": trace.format_span_id(span.context.span_id),
+            "parent_span_id": trace.format_span_id(span.parent.span_id) if span.parent else None,
+            "name": span.name,
+            "kind": span.kind.name.lower(),
+            "start_time_unix_nano": span.start_time,
+            "end_time_unix_nano": span.end_time,
+            "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+            "attributes": dict(span.attributes),
+            "events": [{"name": event.name, "time_ns": event.timestamp, "attributes": dict(event.attributes)}
+                       for event in span.events],
+            "status": {"code": span.status.status_code.name.lower(),
+                       "message": span.status.description or ""},
+        }
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as output:
+            for span in spans:
+                output.write(json.dumps(self.to_dict(span), ensure_ascii=False) + "\n")
+        return SpanExportResult.SUCCESS
+
+
+def create_exporter(name: str) -> SpanExporter:
+    """Exportador configurado em TRACING_EXPORTER (jsonl ou otlp)"""
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT, timeout=5)
+    if name == "jsonl":
+        return JsonlSpanExporter(settings.TRACING_JSONL_PATH)
+    raise ValueError(f"Exportador de traces desconhecido: {name}")
+
+
+class Tracer:
+    """Spans do SDK com a configuração da aplicação (amostragem, exportador, fila)"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        sample_ratio: Optional[float] = None,
+        exporter: Optional[SpanExporter] = None
+    ):
+        self.configure(enabled, sample_ratio, exporter)
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        sample_ratio: Optional[float] = None,
+        exporter: Optional[SpanExporter] = None
+    ) -> None:
+        """
+        (Re)configurar o tracer; valores None vêm de settings
+
+        Args:
+            enabled: Liga/desliga o tracing (TRACING_ENABLED)
+            sample_ratio: Fração dos traces registrados, 0 a 1 (TRACING_SAMPLE_RATIO)
+            exporter: Exportador (padrão: TRACING_EXPORTER)
+        """
+        self.enabled = settings.TRACING_ENABLED if enabled is None else enabled
+        ratio = settings.TRACING_SAMPLE_RATIO if sample_ratio is None else sample_ratio
+        self.sample_ratio = min(max(ratio, 0.0), 1.0)
+        self._exporter = exporter
+        self._provider: Optional[TracerProvider] = None
+        self._tracer: Optional[trace.Tracer] = None
+
+    @property
+    def provider(self) -> TracerProvider:
+        """Provider do SDK, criado no primeiro span (a thread de exportação junto)"""
+        if self._provider is None:
+            self._provider = TracerProvider(
+                sampler=ParentBased(TraceIdRatioBased(self.sample_ratio)),
+                resource=Resource.create({"service.name": settings.APP_NAME}),
+                span_limits=SpanLimits(max_attribute_length=MAX_ATTRIBUTE_LENGTH),
+            )
+            self._provider.add_span_processor(BatchSpanProcessor(
+                self._exporter or create_exporter(settings.TRACING_EXPORTER),
+                max_queue_size=settings.TRACING_MAX_QUEUE,
+                schedule_delay_millis=settings.TRACING_EXPORT_INTERVAL_SECONDS * 1000,
+                max_export_batch_size=min(EXPORT_BATCH_SIZE, settings.TRACING_MAX_QUEUE),
+            ))
+        return self._provider
+
+    def _sdk_tracer(self) -> trace.Tracer:
+        if self._tracer is None:
+            self._tracer = self.provider.get_tracer("app.core.tracing")
+        return self._tracer
+
+    @staticmethod
+    def _context(traceparent: Optional[str]) -> Any:
+        # Sem span ativo, continua o trace de quem chamou (cabeçalho W3C)
+        if traceparent and not trace.get_current_span().get_span_context().is_valid:
+            return _propagator.extract({"traceparent": traceparent})
+        return None
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = "internal",
+        traceparent: Optional[str] = None
+    ) -> Any:
+        """Criar um span filho do span ativo, sem ativá-lo (encerrar com end())"""
+        if not self.enabled:
+            return NON_RECORDING_SPAN
+        return self._sdk_tracer().start_span(
+            name, context=self._context(traceparent), kind=SPAN_KINDS[kind], attributes=attributes)
+
+    def span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = "internal",
+        traceparent: Optional[str] = None
+    ) -> Any:
+        """Context manager: span ativo durante o bloco, encerrado na saída"""
+        if not self.enabled:
+            return _NOOP_SCOPE
+        parent = trace.get_current_span()
+        if parent is not NON_RECORDING_SPAN and not parent.is_recording():
+            # Trace fora da amostra: nada a criar para os filhos
+            return _NOOP_SCOPE
+        return self._sdk_tracer().start_as_current_span(
+            name, context=self._context(traceparent), kind=SPAN_KINDS[kind], attributes=attributes)
+
+    def current_span(self) -> Any:
+        """Span ativo (ou um span que não registra nada)"""
+        return trace.get_current_span()
+
+    def force_flush(self) -> None:
+        if self._provider is not None:
+            self._provider.force_flush()
+
+    def shutdown(self) -> None:
+        """Exportar o que falta e parar a thread (bloqueia; fora do event loop)"""
+        if self._provider is not None:
+            self._provider.shutdown()
+            self._provider = None
+            self._tracer = None
+
+
+# Instância global
+tracer = Tracer()
+
+
+def traced(name: str, kind: str = "internal") -> Callable:
+    """
+    Decorador que abre um span em cada chamada (função síncrona ou assíncrona)
+
+    Args:
+        name: Nome do span
+        kind: internal, server ou client
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with tracer.span(name, kind=kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def call_attributes(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Argumentos nomeados simples (texto, número, bool) como atributos 'arg.<nome>'"""
+    return {f"arg.{key}": value for key, value in kwargs.items() if isinstance(value, ATTRIBUTE_TYPES)}
@@ -0,0 +1,168 @@
+"""
+Formato binário dos embeddings no banco (colunas LargeBinary / bytea)
+
+Cada vetor é um cabeçalho de 4 bytes (formato + reservado) seguido dos
+valores. float32 e float16 são lidos sem cópia com np.frombuffer; int8 é
+quantização escalar simétrica por vetor (escala float32 logo após o
+cabeçalho, valores = round(x / escala)).
+
+Tamanho de um vetor de 384 dimensões: 1.540 bytes (float32), 772 (float16),
+392 (int8), contra ~8 KB como array JSON.
+
+O formato fica no próprio valor, então mudar EMBEDDING_STORAGE_FORMAT não
+exige migração: as linhas antigas continuam legíveis.
+"""
+import json
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.core.config import settings
+
+FORMATS: Dict[str, int] = {"float32": 1, "float16": 2, "int8": 3}
+_DTYPES = {1: np.float32, 2: np.float16, 3: np.int8}
+_HEADER = 4
+_SCALE = 4  # escala float32 do int8, após o cabeçalho
+
+
+def encode_vector(vector: Any, storage_format: Optional[str] = None) -> bytes:
+    """
+    Codificar um vetor no formato binário
+
+    Args:
+        vector: Lista de floats ou array 1-D
+        storage_format: float32, float16 ou int8 (padrão: EMBEDDING_STORAGE_FORMAT)
+
+    Returns:
+        Bytes com cabeçalho e valores
+    """
+    storage_format = storage_format or settings.EMBEDDING_STORAGE_FORMAT
+    if storage_format not in FORMATS:
+        raise ValueError(f"Formato de embedding desconhecido: {storage_format}")
+    code = FORMATS[storage_format]
+    values = np.asarray(vector, dtype=np.float32).ravel()
+    header = bytes((code, 0, 0, 0))
+    if code != FORMATS["int8"]:
+        return header + values.astype(_DTYPES[code]).tobytes()
+
+    peak = float(np.abs(values).max()) if values.size else 0.0
+    scale = peak / 127 if peak > 0 else 1.0
+    quantized = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+    return header + np.float32(scale).tobytes() + quantized.tobytes()
+
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    """
+    Ler um vetor codificado por encode_vector
+
+    float32 e float16 são visões somente leitura sobre os bytes (sem cópia,
+    no tipo armazenado); int8 volta desquantizado em float32.
+    """
+    code = blob[0]
+    if code not in _DTYPES:
+        raise ValueError(f"Formato de embedding desconhecido: {code}")
+    if code != FORMATS["int8"]:
+        return np.frombuffer(blob, dtype=_DTYPES[code], offset=_HEADER)
+    scale = np.frombuffer(blob, dtype=np.float32, count=1, offset=_HEADER)[0]
+    return np.frombuffer(blob, dtype=np.int8, offset=_HEADER + _SCALE).astype(np.float32) * scale
+
+
+def decode_matrix(blobs: Sequence[bytes]) -> np.ndarray:
+    """
+    Ler vários vetores em uma matriz float32 (linhas x dimensão)
+
+    Vetores do mesmo formato e dimensão são juntados em um único buffer e
+    lidos com um np.frombuffer, sem passar por objetos por linha.
+    """
+    if not blobs:
+        return np.empty((0, 0), dtype=np.float32)
+    codes = {blob[0] for blob in blobs}
+    sizes = {len(blob) for blob in blobs}
+    if len(codes) == 1 and len(sizes) == 1:
+        code = codes.pop()
+        if code == FORMATS["int8"]:
+            rows = np.frombuffer(b"".join(blobs), dtype=np.uint8).reshape(len(blobs), -1)
+            scales = rows[:, _HEADER:_HEADER + _SCALE].copy().view(np.float32)
+            return rows[:, _HEADER + _SCALE:].view(np.int8).astype(np.float32) * scales
+        payload = b"".join(memoryview(blob)[_HEADER:] for blob in blobs)
+        matrix = np.frombuffer(payload, dtype=_DTYPES[code]).reshape(len(blobs), -1)
+        return matrix if code == FORMATS["float32"] else matrix.astype(np.float32)
+    return np.vstack([decode_vector(blob) for blob in blobs]).astype(np.float32, copy=False)
+
+
+class VectorType(TypeDecorator):
+    """
+    Coluna de embedding em formato binário
+
+    Aceita lista, array ou bytes já codificados; devolve um array NumPy
+    (ver decode_vector).
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, (bytes, bytearray, memoryview)):
+            return value
+        return encode_vector(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decode_vector(bytes(value))
+
+
+def storage_report(connection: Connection, table_name: str) -> Dict[str, Any]:
+    """
+    Tamanho e tempo de leitura dos embeddings de uma tabela (JSON ou binário)
+
+    Usado antes e depois da migração 0005 (scripts/embedding_storage_report.py).
+
+    Args:
+        connection: Conexão com o banco
+        table_name: legislation_chunks ou training_corpus
+
+    Returns:
+        rows, format, column_bytes (soma dos valores), bytes_per_row,
+        table_bytes (tabela com índices e TOAST; só PostgreSQL) e
+        load_seconds (ler todos os vetores para uma matriz float32)
+    """
+    dialect = connection.dialect.name
+    length = "pg_column_size(embedding)" if dialect == "postgresql" else "length(embedding)"
+    rows, column_bytes = connection.execute(text(
+        f"SELECT COUNT(*), COALESCE(SUM({length}), 0) FROM {table_name} WHERE embedding IS NOT NULL"
+    )).one()
+    table_bytes = None
+    if dialect == "postgresql":
+        table_bytes = connection.execute(
+            text("SELECT pg_total_relation_size(:name)"), {"name": table_name}
+        ).scalar()
+
+    start = time.perf_counter()
+    values = [row[0] for row in connection.execute(
+        text(f"SELECT embedding FROM {table_name} WHERE embedding IS NOT NULL ORDER BY id")
+    )]
+    if values and isinstance(values[0], (bytes, memoryview)):
+        blobs = [bytes(value) for value in values]
+        storage_format = {code: name for name, code in FORMATS.items()}.get(blobs[0][0])
+        matrix = decode_matrix(blobs)
+    else:
+        storage_format = "json"
+        vectors = [json.loads(value) if isinstance(value, str) else value for value in values]
+        vectors = [vector for vector in vectors if vector]
+        matrix = np.array(vectors, dtype=np.float32) if vectors else np.empty((0, 0), dtype=np.float32)
+    load_seconds = time.perf_counter() - start
+
+    return {
+        "table": table_name,
+        "rows": rows,
+        "format": storage_format if values else None,
+        "dimension": matrix.shape[1] if matrix.size else 0,
+        "column_bytes": int(column_bytes),
+        "bytes_per_row": round(column_bytes / rows, 1) if rows else None,
+        "table_bytes": table_bytes,
+        "load_seconds": round(load_seconds, 4),
+    }
@@ -0,0 +1,442 @@
+"""
+Resolução do texto completo de documentos LexML a partir da URN
+
+O LexML não tem um endereço único para o documento completo: há várias
+variações de URL e cada autoridade (ex: br:senado.federal, br:federal)
+responde em uma delas. Em vez de tentá-las uma a uma (até 5 x timeout para
+um documento sem texto), as candidatas são disparadas ao mesmo tempo e vence
+a primeira resposta com texto; as demais são canceladas.
+
+O resolvedor também guarda:
+- o padrão de URL que funcionou por autoridade (vai à frente na próxima
+  corrida, junto com os demais);
+- cache negativo com TTL para URNs sem texto completo (o LexML respondeu
+  sem texto ou com 404/410; 429, 5xx e falhas de rede não entram);
+- cache LRU dos textos encontrados (usado pelo prefetch em background);
+- a busca em andamento por URN, compartilhada entre chamadas simultâneas.
+"""
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import aiohttp
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.integrations.lexml_document import LexMLDocumentParser, units_to_text
+from app.integrations.lexml_parser import FEED_CHUNK_SIZE
+
+
+# Padrões de URL candidatos, na ordem de preferência.
+# {base}: LEXML_DOCUMENT_BASE_URL, {urn}: URN, {quoted}: URN codificada
+URL_PATTERNS: Tuple[Tuple[str, str], ...] = (
+    ("documento", "{base}/documento/{quoted}"),
+    ("documento_raw", "{base}/documento/{urn}"),
+    ("documento_formato_xml", "{base}/documento/{quoted}?formato=xml"),
+    ("documento_xml", "{base}/documento/{quoted}/xml"),
+    # Pode retornar só metadados; nesse caso é descartada
+    ("sru_lexml", "{base}/busca/SRU?operation=searchRetrieve&query=urn%3D%22{quoted}%22"
+                  "&recordSchema=lexml&maximumRecords=1"),
+)
+
+# Tamanho mínimo de um texto significativo (não apenas metadados)
+MIN_XML_TEXT_LENGTH = 200
+MIN_TEXT_LENGTH = 100
+
+# Status que dizem que o documento não existe naquela URL (os demais erros são temporários)
+NOT_FOUND_STATUSES = frozenset({404, 410})
+
+# Uma busca de URL: texto encontrado, None se respondeu sem texto; exceção =
+# falha de rede ou erro temporário (429, 5xx)
+Fetcher = Callable[[str], Awaitable[Optional[str]]]
+
+
+def normalize_urn(urn: str) -> str:
+    """Garantir o prefixo urn:lex:br: na URN"""
+    if urn.startswith("urn:lex:"):
+        return urn
+    return f"urn:lex:br:{urn}"
+
+
+def urn_authority(urn: str) -> str:
+    """
+    Autoridade da URN (ex: 'br:senado.federal' em 'urn:lex:br:senado.federal:projeto.lei;...')
+
+    Args:
+        urn: URN normalizada
+
+    Returns:
+        Localidade:autoridade (ou a URN inteira se fora do formato)
+    """
+    parts = urn[len("urn:lex:"):].split(":")
+    return ":".join(parts[:2]) if len(parts) >= 2 else urn
+
+
+def extract_text_from_html(html_content: str) -> Optional[str]:
+    """
+    Extrair texto de HTML (simplificado)
+
+    Args:
+        html_content: Conteúdo HTML
+
+    Returns:
+        Texto extraído ou None
+    """
+    # Remover scripts e styles
+    html_content = re.sub(
+        r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    html_content = re.sub(
+        r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    # Remover tags HTML
+    text = re.sub(r'<[^>]+>', '\n', html_content)
+    # Limpar espaços em branco
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = text.strip()
+
+    return text if len(text) > MIN_TEXT_LENGTH else None
+
+
+async def read_lexml_units(response: aiohttp.ClientResponse):
+    """
+    Ler o documento LexML direto da resposta HTTP, bloco a bloco
+
+    Args:
+        response: Resposta com o XML do documento
+
+    Returns:
+        Unidades estruturais ou None se a resposta for SRU (metadados)
+    """
+    parser = LexMLDocumentParser()
+    units = []
+    async for chunk in response.content.iter_chunked(FEED_CHUNK_SIZE):
+        units.extend(parser.feed(chunk))
+        if parser.is_sru:
+            return None
+    units.extend(parser.close())
+    return units
+
+
+class FullTextResolver:
+    """Busca concorrente do texto completo com caches positivo e negativo"""
+
+    def __init__(
+        self,
+        fetcher: Optional[Fetcher] = None,
+        base_url: Optional[str] = None,
+        timeout_seconds: Optional[float] = None,
+        negative_ttl_seconds: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        prefetch_concurrency: Optional[int] = None
+    ):
+        """
+        Inicializar resolvedor
+
+        Args:
+            fetcher: Função que busca uma URL (padrão: HTTP com aiohttp)
+            base_url: Endereço do LexML (padrão: LEXML_DOCUMENT_BASE_URL)
+            timeout_seconds: Timeout de cada URL (padrão: LEXML_FULLTEXT_TIMEOUT_SECONDS)
+            negative_ttl_seconds: Validade do cache negativo (padrão: LEXML_FULLTEXT_NEGATIVE_TTL_SECONDS)
+            cache_size: Máximo de textos em cache (padrão: LEXML_FULLTEXT_CACHE_SIZE)
+            prefetch_concurrency: URNs buscadas ao mesmo tempo no prefetch
+        """
+        self._fetcher = fetcher
+        self.base_url = (base_url or settings.LEXML_DOCUMENT_BASE_URL).rstrip("/")
+        self.timeout_seconds = timeout_seconds or settings.LEXML_FULLTEXT_TIMEOUT_SECONDS
+        self.negative_ttl_seconds = (
+            negative_ttl_seconds if negative_ttl_seconds is not None
+            else settings.LEXML_FULLTEXT_NEGATIVE_TTL_SECONDS
+        )
+        self.cache_size = cache_size or settings.LEXML_FULLTEXT_CACHE_SIZE
+        self.prefetch_concurrency = (
+            prefetch_concurrency or settings.LEXML_FULLTEXT_PREFETCH_CONCURRENCY)
+
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self._missing: "OrderedDict[str, float]" = OrderedDict()
+        self._patterns: Dict[str, str] = {}  # autoridade -> nome do padrão que funcionou
+        self._inflight: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+        self.stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "negative_hits": 0,
+            "inflight_joins": 0,
+            "resolved": 0,
+            "not_found": 0,
+            "urls_fetched": 0,
+            "learned_pattern_hits": 0,
+        }
+
+    # Caches
+
+    def _cache_get(self, urn: str) -> Optional[str]:
+        text = self._texts.get(urn)
+        if text is not None:
+            self._texts.move_to_end(urn)
+        return text
+
+    def _cache_put(self, urn: str, text: str) -> None:
+        self._texts[urn] = text
+        self._texts.move_to_end(urn)
+        while len(self._texts) > self.cache_size:
+            self._texts.popitem(last=False)
+
+    def _is_missing(self, urn: str) -> bool:
+        expires_at = self._missing.get(urn)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._missing[urn]
+            return False
+        return True
+
+    def _mark_missing(self, urn: str) -> None:
+        if self.negative_ttl_seconds <= 0:
+            return
+        self._missing[urn] = time.monotonic() + self.negative_ttl_seconds
+        self._missing.move_to_end(urn)
+        # Entradas pequenas: limite maior que o do cache de textos, mas sem crescer sem fim
+        while len(self._missing) > self.cache_size * 16:
+            self._missing.popitem(last=False)
+
+    def cached(self, urn: Optional[str]) -> Optional[str]:
+        """Texto completo já em cache (sem buscar no LexML)"""
+        if not urn:
+            return None
+        return self._cache_get(normalize_urn(urn))
+
+    def forget(self, urn: str) -> None:
+        """Remover a URN dos caches positivo e negativo"""
+        urn = normalize_urn(urn)
+        self._texts.pop(urn, None)
+        self._missing.pop(urn, None)
+
+    # Busca
+
+    def candidate_urls(self, urn: str) -> List[Tuple[str, str]]:
+        """
+        URLs candidatas para a URN, o padrão aprendido da autoridade primeiro
+
+        Args:
+            urn: URN normalizada
+
+        Returns:
+            Lista de (nome do padrão, URL)
+        """
+        values = {"base": self.base_url, "urn": urn, "quoted": quote(urn, safe="")}
+        candidates = [(name, pattern.format(**values)) for name, pattern in URL_PATTERNS]
+        learned = self._patterns.get(urn_authority(urn))
+        if learned:
+            candidates.sort(key=lambda candidate: candidate[0] != learned)
+        return candidates
+
+    async def _fetch_url(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        async with session.get(
+            url,
+            headers={"Accept": "application/xml, text/xml, */*"},
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+        ) as response:
+            if response.status in NOT_FOUND_STATUSES:
+                return None
+            if response.status != 200:
+                # 429/5xx: como falha de rede (não vai para o cache negativo)
+                response.raise_for_status()
+                return None
+            content_type = response.headers.get("Content-Type", "").lower()
+
+            # Se for XML, extrair o texto enquanto o documento é baixado
+            if "xml" in content_type:
+                units = await read_lexml_units(response)
+                if units is None:
+                    # É XML SRU (metadados), não o documento completo
+                    return None
+                text = units_to_text(units)
+                return text if text and len(text) > MIN_XML_TEXT_LENGTH else None
+
+            # Se for HTML, extrair texto
+            if "html" in content_type:
+                return extract_text_from_html(await response.text())
+
+            # Se for texto plano
+            text = await response.text()
+            return text if text and len(text) > MIN_TEXT_LENGTH else None
+
+    async def _race(
+        self,
+        fetch: Fetcher,
+        candidates: List[Tuple[str, str]]
+    ) -> Tuple[Optional[str], Optional[str], bool]:
+        """
+        Disparar as URLs ao mesmo tempo e ficar com a primeira que tiver texto
+
+        Returns:
+            Tupla (texto, nome do padrão vencedor, todas as URLs responderam
+            sem erro). Sem texto, o último item diz se a ausência é
+            definitiva: basta uma URL com erro temporário para não ser
+        """
+        tasks = {
+            asyncio.ensure_future(fetch(url)): name for name, url in candidates
+        }
+        self.stats["urls_fetched"] += len(tasks)
+        failed = False
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        failed = True
+                        logger.debug(f"Erro ao buscar texto completo ({tasks[task]}): {task.exception()}")
+                        continue
+                    if task.result():
+                        return task.result(), tasks[task], True
+            return None, None, not failed
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _resolve(self, urn: str) -> Optional[str]:
+        session = None
+        fetch = self._fetcher
+        if fetch is None:
+            session = aiohttp.ClientSession()
+
+            async def fetch(url: str) -> Optional[str]:
+                return await self._fetch_url(session, url)
+
+        try:
+            authority = urn_authority(urn)
+            learned = self._patterns.get(authority)
+            # Todas as candidatas juntas: um padrão aprendido que deixou de
+            # responder custa um timeout a menos que tentá-lo sozinho antes
+            text, winner, conclusive = await self._race(fetch, self.candidate_urls(urn))
+            if text and learned and winner == learned:
+                self.stats["learned_pattern_hits"] += 1
+        finally:
+            if session is not None:
+                await session.close()
+
+        if text:
+            self._patterns[authority] = winner
+            self._cache_put(urn, text)
+            self.stats["resolved"] += 1
+            return text
+
+        self.stats["not_found"] += 1
+        if conclusive:
+            # Todas as URLs responderam e nenhuma tem o texto: não tentar de novo
+            # tão cedo. Se alguma falhou (rede, timeout, 429/5xx), o texto pode
+            # estar justamente nela: sem cache negativo. A consulta SRU sozinha
+            # (normalmente só metadados) não basta para concluir
+            self._mark_missing(urn)
+        logger.warning(f"Não foi possível obter texto completo para URN {urn}")
+        return None
+
+    async def resolve(self, urn: Optional[str]) -> Optional[str]:
+        """
+        Obter o texto completo do documento
+
+        Args:
+            urn: URN do documento (ex: 'urn:lex:br:senado.federal:projeto.lei;pls:2008;489')
+
+        Returns:
+            Texto completo formatado ou None
+        """
+        if not urn:
+            return None
+        urn = normalize_urn(urn)
+        self.stats["requests"] += 1
+
+        text = self._cache_get(urn)
+        if text is not None:
+            self.stats["cache_hits"] += 1
+            record_cache("fulltext", hits=1)
+            return text
+        if self._is_missing(urn):
+            self.stats["negative_hits"] += 1
+            record_cache("fulltext", hits=1)
+            return None
+        record_cache("fulltext", misses=1)
+
+        future = self._inflight.get(urn)
+        if future is not None:
+            # Mesma URN já sendo buscada (ex: prefetch): aguardar a mesma busca
+            self.stats["inflight_joins"] += 1
+        else:
+            future = asyncio.ensure_future(self._resolve(urn))
+            self._inflight[urn] = future
+            future.add_done_callback(lambda done: self._finish_inflight(urn, done))
+
+        try:
+            # shield: se quem chamou desistir, a busca continua e preenche os caches
+            return await asyncio.shield(future)
+        except Exception as e:
+            logger.debug(f"Não foi possível obter texto completo para URN {urn}: {str(e)}")
+            return None
+
+    def _finish_inflight(self, urn: str, future: "asyncio.Future[Optional[str]]") -> None:
+        self._inflight.pop(urn, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Erro na busca do texto completo de {urn}: {future.exception()}")
+
+    async def resolve_within(self, urn: Optional[str], timeout_seconds: float) -> Optional[str]:
+        """
+        Obter o texto completo esperando no máximo timeout_seconds
+
+        Se o tempo acabar, a busca continua em background e o texto fica no
+        cache para a próxima chamada.
+
+        Args:
+            urn: URN do documento
+            timeout_seconds: Tempo máximo de espera
+
+        Returns:
+            Texto completo ou None (sem texto ou ainda buscando)
+        """
+        try:
+            return await asyncio.wait_for(self.resolve(urn), timeout=timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.debug(f"Texto completo de {urn} ainda em busca; continuando em background")
+            return None
+
+    async def prefetch(self, urns: Iterable[str]) -> Dict[str, Any]:
+        """
+        Buscar o texto completo de várias URNs (job em background)
+
+        Args:
+            urns: URNs a buscar
+
+        Returns:
+            Resumo {'requested', 'found', 'missing'}
+        """
+        unique = list(dict.fromkeys(normalize_urn(urn) for urn in urns if urn))
+        semaphore = asyncio.Semaphore(self.prefetch_concurrency)
+
+        async def one(urn: str) -> bool:
+            async with semaphore:
+                return await self.resolve(urn) is not None
+
+        found = await asyncio.gather(*(one(urn) for urn in unique))
+        summary = {
+            "requested": len(unique),
+            "found": sum(found),
+            "missing": len(unique) - sum(found),
+        }
+        logger.info(f"Prefetch de texto completo concluído: {summary}")
+        return summary
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obter estatísticas do resolvedor e dos caches"""
+        return {
+            **self.stats,
+            "cached_texts": len(self._texts),
+            "negative_entries": len(self._missing),
+            "inflight": len(self._inflight),
+            "learned_patterns": dict(self._patterns),
+        }
+
+
+# Instância global
+fulltext_resolver = FullTextResolver()
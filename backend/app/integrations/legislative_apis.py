@@ -1,13 +1,17 @@
 import aiohttp
 import xml.etree.ElementTree as ET
 import re
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Union
 from loguru import logger
 from datetime import datetime
-from urllib.parse import quote
 import html
 
 from app.core.config import settings
+from app.core.metrics import instrument_client
+from app.integrations.fulltext_resolver import extract_text_from_html, fulltext_resolver
+from app.integrations.lexml_document import extract_lexml_text
+from app.integrations.lexml_parser import sru_parser
+from app.integrations.pagination import Page, max_pages_for, page_size_or_default, paginate
 
 
 def clean_xml_for_parsing(xml_content: str) -> str:
@@ -60,6 +64,7 @@ def clean_xml_for_parsing(xml_content: str) -> str:
         return xml_content
 
 
+@instrument_client("camara")
 class CamaraAPIClient:
     """Cliente para API da Câmara dos Deputados"""
 
@@ -71,7 +76,9 @@ class CamaraAPIClient:
         year: Optional[int] = None,
         author: Optional[str] = None,
         sigla_tipo: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        page: int = 1,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Buscar proposições (PLs, PECs, etc)
@@ -81,7 +88,9 @@ class CamaraAPIClient:
             year: Ano da proposição
             author: Nome do autor
             sigla_tipo: Tipo da proposição (PL, PEC, PLP, PLV, etc)
-            limit: Número máximo de resultados
+            limit: Número máximo de resultados (itens por página)
+            page: Página dos resultados
+            raise_errors: Propagar erros em vez de devolver lista vazia
 
         Returns:
             Lista de proposições
@@ -89,6 +98,7 @@ class CamaraAPIClient:
         try:
             params = {
                 "itens": limit,
+                "pagina": page,
                 "ordem": "DESC",
                 "ordenarPor": "id"
             }
@@ -112,9 +122,50 @@ class CamaraAPIClient:
                     return data.get("dados", [])
 
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Erro ao buscar proposições: {str(e)}")
             return []
 
+    def iter_propositions(
+        self,
+        keywords: Optional[str] = None,
+        year: Optional[int] = None,
+        author: Optional[str] = None,
+        sigla_tipo: Optional[str] = None,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterar todas as proposições do filtro, página a página
+
+        A próxima página é baixada enquanto a atual é processada. Erros de
+        rede são propagados.
+
+        Args:
+            keywords, year, author, sigla_tipo: Filtros de search_propositions
+            page_size: Proposições por página (padrão: PAGINATION_PAGE_SIZE; a API aceita até 100)
+            prefetch: Páginas buscadas à frente (padrão: PAGINATION_PREFETCH_PAGES)
+            limit: Número máximo de proposições
+
+        Returns:
+            Iterador assíncrono de proposições
+        """
+        itens = min(page_size_or_default(page_size), 100)
+
+        async def fetch(page: int) -> Page:
+            dados = await self.search_propositions(
+                keywords=keywords, year=year, author=author, sigla_tipo=sigla_tipo,
+                limit=itens, page=page, raise_errors=True
+            )
+            return Page(dados, page + 1 if len(dados) >= itens else None)
+
+        return paginate(
+            fetch, 1, prefetch=prefetch,
+            max_pages=max_pages_for(limit, itens), limit=limit
+        )
+
     async def get_proposition_details(self, proposition_id: int) -> Optional[Dict[str, Any]]:
         """
         Obter detalhes de uma proposição específica
@@ -259,6 +310,7 @@ class CamaraAPIClient:
             return []
 
 
+@instrument_client("querido_diario")
 class QueridoDiarioClient:
     """Cliente para API do Querido Diário"""
 
@@ -312,124 +364,19 @@ class QueridoDiarioClient:
             return []
 
 
+@instrument_client("lexml")
 class LexMLClient:
     """Cliente para API do LexML - Rede de Informação Legislativa e Jurídica"""
 
     BASE_URL = settings.LEXML_API_URL
 
-    def _parse_lexml_xml(self, xml_content: str) -> List[Dict[str, Any]]:
-        """
-        Parsear resposta XML do LexML baseado na estrutura SRU real
-
-        Args:
-            xml_content: Conteúdo XML da resposta
-
-        Returns:
-            Lista de documentos parseados
-        """
-        try:
-            # Limpar XML antes de parsear
-            xml_content = clean_xml_for_parsing(xml_content)
-            try:
-                root = ET.fromstring(xml_content)
-            except ET.ParseError as parse_error:
-                # Se ainda houver erro de parsing, tentar limpeza mais agressiva
-                if 'undefined entity' in str(parse_error).lower():
-                    logger.warning(
-                        f"Erro de entidade indefinida em _parse_lexml_xml, tentando limpeza mais agressiva: {str(parse_error)}")
-                    # Limpeza mais agressiva: substituir todas as entidades não padrão
-                    xml_content = re.sub(
-                        r'&(?!amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+;)[^;]*;', '&amp;', xml_content)
-                    root = ET.fromstring(xml_content)
-                else:
-                    raise
-
-            # Namespaces do SRU
-            namespaces = {
-                'srw': 'http://www.loc.gov/zing/srw/',
-                'dc': 'http://purl.org/dc/elements/1.1/',
-                'srw_dc': 'info:srw/schema/1/dc-schema'
-            }
-
-            records = []
-            for record in root.findall('.//srw:record', namespaces):
-                record_data = record.find('.//srw_dc:dc', namespaces)
-                if record_data is None:
-                    continue
-
-                doc = {}
-
-                # Extrair campos principais (sem namespace para campos customizados)
-                tipo_doc = record_data.find('tipoDocumento')
-                if tipo_doc is not None:
-                    doc['tipo_documento'] = tipo_doc.text
-
-                # Facet tipo documento
-                facet_tipo = record_data.find('facet-tipoDocumento')
-                if facet_tipo is not None:
-                    doc['facet_tipo_documento'] = facet_tipo.text
-
-                urn = record_data.find('urn')
-                if urn is not None:
-                    doc['urn'] = urn.text
-                    doc['identifier'] = urn.text
-
-                # Campos Dublin Core (com namespace)
-                title = record_data.find('.//dc:title', namespaces)
-                if title is not None:
-                    doc['title'] = title.text
-
-                description = record_data.find('.//dc:description', namespaces)
-                if description is not None:
-                    doc['description'] = description.text
-
-                date = record_data.find('.//dc:date', namespaces)
-                if date is not None:
-                    doc['date'] = date.text
-
-                dc_type = record_data.find('.//dc:type', namespaces)
-                if dc_type is not None:
-                    doc['dc_type'] = dc_type.text
-
-                # Campos customizados do LexML (sem namespace)
-                localidade = record_data.find('localidade')
-                if localidade is not None:
-                    doc['localidade'] = localidade.text
-
-                facet_localidade = record_data.find('facet-localidade')
-                if facet_localidade is not None:
-                    doc['facet_localidade'] = facet_localidade.text
-
-                autoridade = record_data.find('autoridade')
-                if autoridade is not None:
-                    doc['autoridade'] = autoridade.text
-
-                facet_autoridade = record_data.find('facet-autoridade')
-                if facet_autoridade is not None:
-                    doc['facet_autoridade'] = facet_autoridade.text
-
-                # Identifier Dublin Core
-                identifier = record_data.find('.//dc:identifier', namespaces)
-                if identifier is not None:
-                    doc['lexml_id'] = identifier.text
-
-                records.append(doc)
-
-            return records
-
-        except ET.ParseError as e:
-            logger.error(f"Erro ao parsear XML do LexML: {str(e)}")
-            return []
-        except Exception as e:
-            logger.error(f"Erro ao processar resposta do LexML: {str(e)}")
-            return []
-
     async def search(
         self,
         query: str,
         start_record: int = 1,
         maximum_records: int = 20,
-        record_schema: str = "dc"
+        record_schema: str = "dc",
+        raise_errors: bool = False
     ) -> Dict[str, Any]:
         """
         Buscar documentos no LexML usando SRU
@@ -439,6 +386,8 @@ class LexMLClient:
             start_record: Registro inicial (para paginação)
             maximum_records: Número máximo de registros
             record_schema: Schema dos registros (dc, mods, etc)
+            raise_errors: Propagar erros em vez de devolver resultado vazio
+                (coleta incremental: falha não pode parecer fim da lista)
 
         Returns:
             Dict com 'total', 'records' e 'next_start'
@@ -460,33 +409,13 @@ class LexMLClient:
                     headers={"Accept": "application/xml"}
                 ) as response:
                     response.raise_for_status()
-                    xml_content = await response.text()
-
-                    # Limpar XML antes de parsear
-                    xml_content = clean_xml_for_parsing(xml_content)
-                    try:
-                        root = ET.fromstring(xml_content)
-                    except ET.ParseError as parse_error:
-                        # Se ainda houver erro de parsing, tentar limpeza mais agressiva
-                        if 'undefined entity' in str(parse_error).lower():
-                            logger.warning(
-                                f"Erro de entidade indefinida na busca LexML, tentando limpeza mais agressiva: {str(parse_error)}")
-                            # Limpeza mais agressiva: substituir todas as entidades não padrão
-                            xml_content = re.sub(
-                                r'&(?!amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+;)[^;]*;', '&amp;', xml_content)
-                            root = ET.fromstring(xml_content)
-                        else:
-                            raise
-                    namespaces = {'srw': 'http://www.loc.gov/zing/srw/'}
+                    # Bytes brutos: o parser respeita o encoding declarado no XML
+                    xml_content = await response.read()
 
-                    # Obter número total de registros
-                    number_of_records = root.find(
-                        './/srw:numberOfRecords', namespaces)
-                    total = int(
-                        number_of_records.text) if number_of_records is not None else 0
-
-                    # Parsear registros
-                    records = self._parse_lexml_xml(xml_content)
+                    # Total e registros extraídos em uma única passada
+                    parsed = sru_parser.parse(xml_content)
+                    total = parsed.total
+                    records = parsed.records
 
                     # Calcular próximo registro
                     next_start = start_record + maximum_records if start_record + \
@@ -501,6 +430,8 @@ class LexMLClient:
                     }
 
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Erro ao buscar no LexML: {str(e)}")
             return {
                 "total": 0,
@@ -510,6 +441,45 @@ class LexMLClient:
                 "next_start": None
             }
 
+    def iter_search(
+        self,
+        query: str,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterar todos os documentos de uma query SRU, página a página
+
+        Segue next_start até o total informado pelo LexML; a próxima página é
+        baixada enquanto a atual é processada. Erros de rede são propagados.
+
+        Args:
+            query: Query SRU
+            page_size: Registros por página (padrão: PAGINATION_PAGE_SIZE)
+            prefetch: Páginas buscadas à frente (padrão: PAGINATION_PREFETCH_PAGES)
+            limit: Número máximo de documentos
+
+        Returns:
+            Iterador assíncrono de documentos
+        """
+        maximum_records = page_size_or_default(page_size)
+        if limit is not None:
+            maximum_records = max(1, min(maximum_records, limit))
+
+        async def fetch(start_record: int) -> Page:
+            result = await self.search(
+                query, start_record=start_record,
+                maximum_records=maximum_records, raise_errors=True
+            )
+            records = result["records"]
+            return Page(records, result["next_start"] if records else None, result["total"])
+
+        return paginate(
+            fetch, 1, prefetch=prefetch,
+            max_pages=max_pages_for(limit, maximum_records), limit=limit
+        )
+
     async def search_by_urn(
         self,
         urn: str,
@@ -550,6 +520,32 @@ class LexMLClient:
         Returns:
             Lista de documentos
         """
+        query = self._keywords_query(keywords, year, tipo_documento, autoridade)
+        result = await self.search(query, maximum_records=limit)
+        return result.get("records", [])
+
+    def iter_by_keywords(
+        self,
+        keywords: str,
+        year: Optional[int] = None,
+        tipo_documento: Optional[str] = None,
+        autoridade: Optional[str] = None,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar todos os resultados de search_by_keywords (ver iter_search)"""
+        query = self._keywords_query(keywords, year, tipo_documento, autoridade)
+        return self.iter_search(query, page_size=page_size, prefetch=prefetch, limit=limit)
+
+    @staticmethod
+    def _keywords_query(
+        keywords: str,
+        year: Optional[int],
+        tipo_documento: Optional[str],
+        autoridade: Optional[str]
+    ) -> str:
+        """Query SRU da busca por palavras-chave"""
         # Construir query SRU
         query_parts = []
 
@@ -569,12 +565,9 @@ class LexMLClient:
         if autoridade:
             query_parts.append(f'autoridade="{autoridade}"')
 
-        query = " and ".join(
+        return " and ".join(
             query_parts) if query_parts else f'dc.title all "{keywords}"'
 
-        result = await self.search(query, maximum_records=limit)
-        return result.get("records", [])
-
     async def search_projects_of_law(
         self,
         year: Optional[int] = None,
@@ -592,6 +585,25 @@ class LexMLClient:
         Returns:
             Lista de projetos de lei
         """
+        query = self._projects_query(year, house)
+        result = await self.search(query, maximum_records=limit)
+        return result.get("records", [])
+
+    def iter_projects_of_law(
+        self,
+        year: Optional[int] = None,
+        house: Optional[str] = None,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar todos os resultados de search_projects_of_law (ver iter_search)"""
+        query = self._projects_query(year, house)
+        return self.iter_search(query, page_size=page_size, prefetch=prefetch, limit=limit)
+
+    @staticmethod
+    def _projects_query(year: Optional[int], house: Optional[str]) -> str:
+        """Query SRU dos projetos de lei"""
         query_parts = ['tipoDocumento="Projeto de Lei"']
 
         if year:
@@ -604,9 +616,7 @@ class LexMLClient:
         elif house == 'camara':
             query_parts.append('autoridade="Câmara dos Deputados"')
 
-        query = " and ".join(query_parts)
-        result = await self.search(query, maximum_records=limit)
-        return result.get("records", [])
+        return " and ".join(query_parts)
 
     async def search_laws(
         self,
@@ -625,6 +635,25 @@ class LexMLClient:
         Returns:
             Lista de leis
         """
+        query = self._laws_query(year, keywords)
+        result = await self.search(query, maximum_records=limit)
+        return result.get("records", [])
+
+    def iter_laws(
+        self,
+        year: Optional[int] = None,
+        keywords: Optional[str] = None,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar todos os resultados de search_laws (ver iter_search)"""
+        query = self._laws_query(year, keywords)
+        return self.iter_search(query, page_size=page_size, prefetch=prefetch, limit=limit)
+
+    @staticmethod
+    def _laws_query(year: Optional[int], keywords: Optional[str]) -> str:
+        """Query SRU das leis"""
         query_parts = ['tipoDocumento="Lei"']
 
         if year:
@@ -636,9 +665,7 @@ class LexMLClient:
             query_parts.append(
                 f'dc.title all "{keywords}" or dc.description all "{keywords}"')
 
-        query = " and ".join(query_parts)
-        result = await self.search(query, maximum_records=limit)
-        return result.get("records", [])
+        return " and ".join(query_parts)
 
     async def get_document_by_urn(self, urn: str) -> Optional[Dict[str, Any]]:
         """
@@ -694,8 +721,8 @@ class LexMLClient:
         """
         Obter o texto completo do documento através da URN
 
-        O LexML fornece documentos em XML. Este método busca o XML completo
-        e extrai o texto estruturado (artigos, parágrafos, incisos, etc).
+        O LexML fornece documentos em XML. As URLs candidatas são buscadas ao
+        mesmo tempo, com cache de URNs sem texto (ver fulltext_resolver).
 
         Args:
             urn: URN do documento (ex: 'urn:lex:br:senado.federal:projeto.lei;pls:2008;489')
@@ -703,89 +730,9 @@ class LexMLClient:
         Returns:
             Texto completo formatado ou None
         """
-        if not urn:
-            return None
-
-        try:
-            # Normalizar URN
-            if not urn.startswith("urn:lex:"):
-                urn = f"urn:lex:br:{urn}" if not urn.startswith(
-                    "urn:lex:br:") else urn
-
-            # Tentar diferentes endpoints do LexML para obter o XML completo
-            # O LexML pode fornecer o documento em diferentes formatos
-            urls_to_try = [
-                # Tentar endpoint direto do documento (mais provável de ter o XML completo)
-                f"https://www.lexml.gov.br/documento/{quote(urn, safe='')}",
-                f"https://www.lexml.gov.br/documento/{urn}",
-                # Tentar com formato XML explícito
-                f"https://www.lexml.gov.br/documento/{quote(urn, safe='')}?formato=xml",
-                # Tentar endpoint de download/export
-                f"https://www.lexml.gov.br/documento/{quote(urn, safe='')}/xml",
-                # Última opção: buscar via SRU com schema lexml (pode retornar XML completo)
-                f"https://www.lexml.gov.br/busca/SRU?operation=searchRetrieve&query=urn%3D%22{quote(urn, safe='')}%22&recordSchema=lexml&maximumRecords=1",
-            ]
-
-            async with aiohttp.ClientSession() as session:
-                for url in urls_to_try:
-                    try:
-                        async with session.get(
-                            url,
-                            headers={
-                                "Accept": "application/xml, text/xml, */*"},
-                            timeout=aiohttp.ClientTimeout(total=10)
-                        ) as response:
-                            if response.status == 200:
-                                content_type = response.headers.get(
-                                    "Content-Type", "")
-
-                                # Se for XML, processar
-                                if "xml" in content_type.lower():
-                                    xml_content = await response.text()
-
-                                    # Verificar se é XML SRU (metadados) ou XML LexML (documento completo)
-                                    if "searchRetrieveResponse" in xml_content or "srw:" in xml_content:
-                                        # É XML SRU (metadados), não o documento completo
-                                        # Tentar extrair referência ao documento completo
-                                        logger.debug(
-                                            f"Recebido XML SRU (metadados) para {urn}, tentando obter documento completo")
-                                        # Continuar para próxima URL
-                                        continue
-
-                                    # Extrair texto do XML LexML
-                                    text = self._extract_text_from_lexml_xml(
-                                        xml_content)
-                                    if text and len(text) > 200:  # Texto significativo
-                                        return text
-
-                                # Se for HTML, tentar extrair texto
-                                elif "html" in content_type.lower():
-                                    html_content = await response.text()
-                                    # Extrair texto do HTML (simplificado)
-                                    text = self._extract_text_from_html(
-                                        html_content)
-                                    if text:
-                                        return text
-
-                                # Se for texto plano
-                                else:
-                                    text = await response.text()
-                                    if text and len(text) > 100:  # Texto significativo
-                                        return text
-                    except Exception as e:
-                        logger.debug(f"Erro ao tentar URL {url}: {str(e)}")
-                        continue
-
-            logger.warning(
-                f"Não foi possível obter texto completo para URN {urn}")
-            return None
-
-        except Exception as e:
-            logger.debug(
-                f"Não foi possível obter texto completo para URN {urn}: {str(e)}")
-            return None
+        return await fulltext_resolver.resolve(urn)
 
-    def _extract_text_from_lexml_xml(self, xml_content: str) -> Optional[str]:
+    def _extract_text_from_lexml_xml(self, xml_content: Union[str, bytes]) -> Optional[str]:
         """
         Extrair texto estruturado do XML LexML
 
@@ -793,147 +740,22 @@ class LexMLClient:
         - Artigo, Paragrafo, Inciso, Alinea
         - Texto, Rotulo, etc.
 
+        A extração é incremental (ver app.integrations.lexml_document): uma
+        unidade estrutural por linha, sem carregar a árvore inteira.
+
         Args:
             xml_content: Conteúdo XML do LexML
 
         Returns:
             Texto formatado ou None
         """
-        try:
-            # Limpar XML antes de parsear
-            xml_content = clean_xml_for_parsing(xml_content)
-            try:
-                root = ET.fromstring(xml_content)
-            except ET.ParseError as parse_error:
-                # Se ainda houver erro de parsing, tentar limpeza mais agressiva
-                if 'undefined entity' in str(parse_error).lower():
-                    logger.warning(
-                        f"Erro de entidade indefinida ao extrair texto LexML, tentando limpeza mais agressiva: {str(parse_error)}")
-                    # Limpeza mais agressiva: substituir todas as entidades não padrão
-                    xml_content = re.sub(
-                        r'&(?!amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+;)[^;]*;', '&amp;', xml_content)
-                    root = ET.fromstring(xml_content)
-                else:
-                    raise
-
-            # Verificar se é XML SRU (metadados) - não processar
-            if root.tag.endswith('searchRetrieveResponse') or 'srw:' in root.tag:
-                return None
-
-            # Namespaces comuns do LexML (tentar diferentes variações)
-            namespaces_list = [
-                {'lexml': 'http://www.lexml.gov.br/1.0'},
-                {'': 'http://www.lexml.gov.br/1.0'},
-                {},  # Sem namespace
-            ]
-
-            text_parts = []
-
-            # Tentar com diferentes namespaces
-            for namespaces in namespaces_list:
-                # Buscar artigos (com diferentes variações de case)
-                for tag_variation in ['Artigo', 'artigo', 'ARTIGO']:
-                    artigos = root.findall(
-                        f'.//{tag_variation}', namespaces) if namespaces else root.findall(f'.//{tag_variation}')
-                    for artigo in artigos:
-                        # Buscar rótulo
-                        for rotulo_tag in ['Rotulo', 'rotulo', 'ROTULO', 'Label', 'label']:
-                            rotulo = artigo.find(
-                                f'.//{rotulo_tag}', namespaces) if namespaces else artigo.find(f'.//{rotulo_tag}')
-                            if rotulo is not None and rotulo.text:
-                                text_parts.append(f"\n{rotulo.text.strip()}")
-                                break
-
-                        # Buscar parágrafos
-                        for par_tag in ['Paragrafo', 'paragrafo', 'PARAGRAFO', 'Paragraphe']:
-                            paragrafos = artigo.findall(
-                                f'.//{par_tag}', namespaces) if namespaces else artigo.findall(f'.//{par_tag}')
-                            for paragrafo in paragrafos:
-                                # Rótulo do parágrafo
-                                for rotulo_tag in ['Rotulo', 'rotulo', 'ROTULO']:
-                                    par_rotulo = paragrafo.find(
-                                        f'.//{rotulo_tag}', namespaces) if namespaces else paragrafo.find(f'.//{rotulo_tag}')
-                                    if par_rotulo is not None and par_rotulo.text:
-                                        text_parts.append(
-                                            f"\n{par_rotulo.text.strip()}")
-                                        break
-
-                                # Texto do parágrafo
-                                for texto_tag in ['Texto', 'texto', 'TEXTO', 'Text', 'text', 'Conteudo', 'conteudo']:
-                                    texto = paragrafo.find(
-                                        f'.//{texto_tag}', namespaces) if namespaces else paragrafo.find(f'.//{texto_tag}')
-                                    if texto is not None and texto.text and texto.text.strip():
-                                        text_parts.append(texto.text.strip())
-                                        break
-
-                        # Buscar incisos
-                        for inc_tag in ['Inciso', 'inciso', 'INCISO']:
-                            incisos = artigo.findall(
-                                f'.//{inc_tag}', namespaces) if namespaces else artigo.findall(f'.//{inc_tag}')
-                            for inciso in incisos:
-                                # Rótulo do inciso
-                                for rotulo_tag in ['Rotulo', 'rotulo', 'ROTULO']:
-                                    inc_rotulo = inciso.find(
-                                        f'.//{rotulo_tag}', namespaces) if namespaces else inciso.find(f'.//{rotulo_tag}')
-                                    if inc_rotulo is not None and inc_rotulo.text:
-                                        text_parts.append(
-                                            f"\n{inc_rotulo.text.strip()}")
-                                        break
-
-                                # Texto do inciso
-                                for texto_tag in ['Texto', 'texto', 'TEXTO']:
-                                    texto = inciso.find(
-                                        f'.//{texto_tag}', namespaces) if namespaces else inciso.find(f'.//{texto_tag}')
-                                    if texto is not None and texto.text and texto.text.strip():
-                                        text_parts.append(texto.text.strip())
-                                        break
-
-                # Se encontrou texto, parar de tentar outros namespaces
-                if text_parts:
-                    break
-
-            # Se não encontrou estrutura específica, extrair todo o texto de forma genérica
-            if not text_parts or len(''.join(text_parts)) < 100:
-                # Função recursiva para extrair todo o texto
-                def extract_all_text(elem, depth=0):
-                    """Extrair todo o texto de um elemento recursivamente"""
-                    texts = []
-                    # Texto direto do elemento
-                    if elem.text and elem.text.strip():
-                        texts.append(elem.text.strip())
-                    # Texto dos filhos
-                    for child in elem:
-                        child_texts = extract_all_text(child, depth + 1)
-                        if child_texts:
-                            texts.extend(child_texts)
-                    # Texto após os filhos (tail)
-                    if elem.tail and elem.tail.strip():
-                        texts.append(elem.tail.strip())
-                    return texts
-
-                all_texts = extract_all_text(root)
-                if all_texts:
-                    # Filtrar textos muito curtos ou que parecem ser metadados
-                    filtered_texts = [t for t in all_texts if len(
-                        t) > 10 and not t.isdigit()]
-                    if filtered_texts:
-                        text_parts.extend(filtered_texts)
-
-            # Juntar e limpar
-            result = "\n".join(text_parts).strip() if text_parts else None
-
-            # Verificar se o resultado é significativo (não apenas metadados)
-            if result and len(result) > 200:
-                return result
+        result = extract_lexml_text(xml_content)
 
-            return None
+        # Verificar se o resultado é significativo (não apenas metadados)
+        if result and len(result) > 200:
+            return result
 
-        except ET.ParseError as e:
-            logger.debug(f"Erro ao parsear XML LexML: {str(e)}")
-            return None
-        except Exception as e:
-            logger.debug(f"Erro ao extrair texto do XML: {str(e)}")
-            return None
+        return None
 
     def _extract_text_from_html(self, html_content: str) -> Optional[str]:
         """
@@ -946,20 +768,7 @@ class LexMLClient:
             Texto extraído ou None
         """
         try:
-            # Remover tags HTML básicas e extrair texto
-            # Remover scripts e styles
-            html_content = re.sub(
-                r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-            html_content = re.sub(
-                r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-            # Remover tags HTML
-            text = re.sub(r'<[^>]+>', '\n', html_content)
-            # Limpar espaços em branco
-            text = re.sub(r'\n\s*\n', '\n\n', text)
-            text = text.strip()
-
-            return text if len(text) > 100 else None
-
+            return extract_text_from_html(html_content)
         except Exception as e:
             logger.debug(f"Erro ao extrair texto do HTML: {str(e)}")
             return None
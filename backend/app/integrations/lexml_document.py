@@ -0,0 +1,432 @@
+"""
+Extração estruturada do texto completo de documentos LexML
+
+O documento é lido de forma incremental por um parser com alvo próprio
+(lxml ou xml.etree): o parser chama start/end/data e nenhuma árvore é
+montada, então a memória usada depende da profundidade do documento e do
+tamanho de cada unidade, não do tamanho do documento. O documento pode ser alimentado em blocos (ex: direto da
+resposta HTTP) sem nunca ser carregado inteiro.
+
+Em vez de texto corrido, o extrator emite unidades estruturais (artigo,
+parágrafo, inciso, alínea, item, agrupadores, ementa) com rótulo, número,
+texto e caminho na hierarquia, para que o chunking não precise reencontrar
+a estrutura com expressões regulares.
+
+Caput é transparente: seu texto pertence ao artigo. Uma unidade é emitida
+quando começa sua primeira subdivisão (ou no seu fim), portanto as unidades
+saem na ordem do documento, pai antes dos filhos.
+"""
+import html
+import io
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from app.integrations.lexml_parser import (
+    FEED_CHUNK_SIZE,
+    LXML_AVAILABLE,
+    fix_entities,
+)
+
+if LXML_AVAILABLE:
+    from lxml import etree as lxml_etree
+
+
+# Nome local (minúsculo) do elemento -> tipo da unidade
+UNIT_TAGS: Dict[str, str] = {
+    "artigo": "article",
+    "paragrafo": "paragraph",
+    "inciso": "inciso",
+    "alinea": "alinea",
+    "item": "item",
+    "parte": "heading",
+    "livro": "heading",
+    "titulo": "heading",
+    "capitulo": "heading",
+    "secao": "heading",
+    "subsecao": "heading",
+}
+# Unidades sem subdivisões: o texto é todo o conteúdo do elemento
+LEAF_UNIT_TAGS: Dict[str, str] = {
+    "epigrafe": "epigrafe",
+    "ementa": "ementa",
+}
+LABEL_TAGS = frozenset({"rotulo", "label"})
+TEXT_TAGS = frozenset({"p", "texto", "text", "conteudo", "nomeagrupador"})
+TRANSPARENT_TAGS = frozenset({"caput"})
+
+# Textos soltos (fora de unidades) menores que isso são ignorados
+MIN_LOOSE_TEXT_LENGTH = 10
+
+# Tamanho máximo de uma entidade mantida entre blocos (ex: "&ccedil;")
+_MAX_ENTITY_LENGTH = 32
+
+# Tipos de elemento; os >= _LEAF têm o texto acumulado até o fim do elemento
+_OTHER, _TRANSPARENT, _UNIT, _LEAF, _LABEL, _TEXT = range(6)
+
+_NUMBER_PATTERN = re.compile(
+    r"(\d+)[º°ª]?(?:\s*-\s*([A-Z])\b)?|\b([IVXLCDM]+)\b|\b(único|unico)\b|\b([a-z])\)"
+)
+_XML_DECLARATION_PATTERN = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+@dataclass
+class LexMLUnit:
+    """Unidade estrutural de um documento LexML"""
+    type: str  # article, paragraph, inciso, alinea, item, heading, ementa, epigrafe, text
+    label: str = ""  # rótulo como no documento (ex: "Art. 5º", "§ 1º", "I -")
+    number: Optional[str] = None  # número extraído do rótulo (ex: "5", "1-A", "I", "a")
+    text: str = ""
+    article: Optional[str] = None  # número do artigo que contém a unidade
+    path: Tuple[str, ...] = ()  # rótulos das unidades ancestrais e da própria
+    depth: int = 0
+
+    @property
+    def content(self) -> str:
+        """Rótulo + texto, como aparece no documento"""
+        if self.label and self.text:
+            return f"{self.label} {self.text}"
+        return self.label or self.text
+
+
+class _OpenUnit:
+    """Unidade ainda aberta durante o parsing"""
+
+    __slots__ = ("type", "label", "number", "parts", "emitted", "article", "path", "depth")
+
+    def __init__(self, unit_type: str, parent: Optional["_OpenUnit"]):
+        self.type = unit_type
+        self.label = ""
+        self.number: Optional[str] = None
+        self.parts: List[str] = []
+        self.emitted = False
+        self.article = parent.article if parent else None
+        self.path = parent.path if parent else ()
+        self.depth = parent.depth + 1 if parent else 0
+
+
+def label_number(label: str) -> Optional[str]:
+    """
+    Extrair o número de um rótulo
+
+    Args:
+        label: Rótulo (ex: "Art. 1º-A", "§ 2º", "Parágrafo único", "IV -", "b)")
+
+    Returns:
+        Número normalizado (ex: "1-A", "2", "único", "IV", "b") ou None
+    """
+    match = _NUMBER_PATTERN.search(label)
+    if match is None:
+        return None
+    digits, suffix, roman, unique, letter = match.groups()
+    if digits:
+        return f"{digits}-{suffix}" if suffix else digits
+    if unique:
+        return "único"
+    return roman or letter
+
+
+def _clean(text: str) -> str:
+    if "&" in text:
+        # Texto com entidades escapadas duas vezes na origem (ex: &amp;ccedil;)
+        text = html.unescape(text)
+    return " ".join(text.split())
+
+
+class _UnitBuilder:
+    """Alvo do parser XML: monta as unidades a partir de start/end/data, sem árvore"""
+
+    def __init__(self, min_loose_text_length: int):
+        self.min_loose_text_length = min_loose_text_length
+        self.kinds: Dict[str, Tuple[int, Optional[str]]] = {}
+        self.units: List[_OpenUnit] = []
+        self.output: List[LexMLUnit] = []
+        self.buffer: List[str] = []  # texto do elemento de texto atual ou texto solto
+        self.text_depth = 0
+        self.started = False
+        self.is_sru = False
+
+    def _kind(self, tag: str) -> Tuple[int, Optional[str]]:
+        name = tag.rsplit("}", 1)[-1].lower()
+        if name in UNIT_TAGS:
+            kind = (_UNIT, UNIT_TAGS[name])
+        elif name in LEAF_UNIT_TAGS:
+            kind = (_LEAF, LEAF_UNIT_TAGS[name])
+        elif name in LABEL_TAGS:
+            kind = (_LABEL, None)
+        elif name in TEXT_TAGS:
+            kind = (_TEXT, None)
+        elif name in TRANSPARENT_TAGS:
+            kind = (_TRANSPARENT, None)
+        elif name == "searchretrieveresponse":
+            kind = (_OTHER, "sru")
+        else:
+            kind = (_OTHER, None)
+        self.kinds[tag] = kind
+        return kind
+
+    def _emit(self, unit: _OpenUnit) -> None:
+        text = " ".join(unit.parts)
+        unit.parts = []
+        # Texto posterior às subdivisões vira uma nova unidade sem rótulo, com o
+        # mesmo número e caminho
+        if text or (unit.label and not unit.emitted):
+            self.output.append(LexMLUnit(
+                type=unit.type,
+                label="" if unit.emitted else unit.label,
+                number=unit.number,
+                text=text,
+                article=unit.article,
+                path=unit.path,
+                depth=unit.depth
+            ))
+        unit.emitted = True
+
+    def _open_unit(self, unit_type: str) -> None:
+        parent = self.units[-1] if self.units else None
+        if parent is not None and not parent.emitted:
+            # Primeira subdivisão: o cabeçalho do pai (rótulo + caput) está completo
+            self._emit(parent)
+        self.units.append(_OpenUnit(unit_type, parent))
+
+    def _set_label(self, label: str) -> None:
+        unit = self.units[-1]
+        if unit.label or unit.emitted:
+            return
+        unit.label = label
+        unit.number = label_number(label)
+        unit.path = unit.path + (label,)
+        if unit.type == "article":
+            unit.article = unit.number
+
+    def _loose_text(self, text: str) -> None:
+        if len(text) > self.min_loose_text_length and not text.isdigit():
+            self.output.append(LexMLUnit(type="text", text=text))
+
+    def _flush_buffer(self) -> str:
+        text = _clean("".join(self.buffer))
+        self.buffer.clear()
+        return text
+
+    def start(self, tag: str, attrib) -> None:
+        if self.is_sru:
+            return
+        if self.text_depth:
+            # Elementos dentro de um texto (ex: <span>) são lidos junto com ele
+            self.text_depth += 1
+            return
+        kind, unit_type = self.kinds.get(tag) or self._kind(tag)
+        if not self.started:
+            self.started = True
+            self.is_sru = unit_type == "sru"
+        if self.buffer:
+            self._loose_text(self._flush_buffer())
+        if kind >= _LEAF:
+            self.text_depth = 1
+        elif kind == _UNIT:
+            self._open_unit(unit_type)
+
+    def data(self, text: str) -> None:
+        # Fora de elementos de texto, só interessa o texto solto (fora de unidades)
+        if self.text_depth or not self.units:
+            self.buffer.append(text)
+
+    def end(self, tag: str) -> None:
+        if self.is_sru:
+            return
+        if self.text_depth:
+            self.text_depth -= 1
+            if self.text_depth:
+                return
+            kind, unit_type = self.kinds[tag]
+            text = self._flush_buffer()
+            if not text:
+                return
+            if kind == _LEAF:
+                self.output.append(LexMLUnit(type=unit_type, text=text, depth=len(self.units)))
+            elif not self.units:
+                self._loose_text(text)
+            elif kind == _LABEL:
+                self._set_label(text)
+            else:
+                self.units[-1].parts.append(text)
+            return
+
+        if self.kinds[tag][0] == _UNIT:
+            self._emit(self.units.pop())
+        elif self.buffer:
+            self._loose_text(self._flush_buffer())
+
+    def close(self) -> None:
+        if self.buffer:
+            self._loose_text(self._flush_buffer())
+        # Documento truncado (modo de recuperação): emitir unidades ainda abertas
+        while self.units:
+            self._emit(self.units.pop())
+
+
+class LexMLDocumentParser:
+    """Parser incremental de documentos LexML completos"""
+
+    def __init__(
+        self,
+        use_lxml: Optional[bool] = None,
+        min_loose_text_length: int = MIN_LOOSE_TEXT_LENGTH
+    ):
+        """
+        Inicializar parser
+
+        Args:
+            use_lxml: Forçar (True) ou desabilitar (False) o lxml; None = usar se instalado
+            min_loose_text_length: Tamanho mínimo dos textos soltos (fora de unidades)
+        """
+        self.use_lxml = LXML_AVAILABLE if use_lxml is None else (use_lxml and LXML_AVAILABLE)
+        self._builder = _UnitBuilder(min_loose_text_length)
+        if self.use_lxml:
+            # recover: documentos completos vindos da web nem sempre são XML válido
+            self._parser = lxml_etree.XMLParser(
+                target=self._builder,
+                recover=True,
+                resolve_entities=False,
+                no_network=True,
+                huge_tree=True
+            )
+        else:
+            self._parser = ET.XMLParser(target=self._builder)
+        self._pending = b""
+        self.closed = False
+
+    @property
+    def is_sru(self) -> bool:
+        """Resposta SRU (metadados), não o documento"""
+        return self._builder.is_sru
+
+    def _drain(self) -> List[LexMLUnit]:
+        output, self._builder.output = self._builder.output, []
+        return output
+
+    def feed(self, data: bytes) -> List[LexMLUnit]:
+        """
+        Alimentar o parser com um bloco do documento
+
+        Entidades HTML e & soltos são corrigidos bloco a bloco; uma entidade
+        cortada no fim do bloco é guardada para o próximo.
+
+        Args:
+            data: Bloco de bytes do documento
+
+        Returns:
+            Unidades completadas por este bloco
+
+        Raises:
+            xml.etree.ElementTree.ParseError: XML irrecuperável (só sem lxml)
+        """
+        if self.is_sru or not data:
+            return []
+        data = self._pending + data
+        amp = data.rfind(b"&", max(0, len(data) - _MAX_ENTITY_LENGTH))
+        if amp != -1 and b";" not in data[amp:]:
+            data, self._pending = data[:amp], data[amp:]
+        else:
+            self._pending = b""
+        self._parser.feed(fix_entities(data))
+        return self._drain()
+
+    def close(self) -> List[LexMLUnit]:
+        """
+        Finalizar o parsing
+
+        Returns:
+            Unidades restantes
+        """
+        if self.closed:
+            return []
+        self.closed = True
+        if not self.is_sru:
+            if self._pending:
+                self._parser.feed(fix_entities(self._pending))
+                self._pending = b""
+            self._parser.close()
+        return self._drain()
+
+
+def _as_stream(content: Union[str, bytes, io.IOBase]):
+    if isinstance(content, str):
+        # O parser decodifica bytes; a declaração de encoding não vale mais para str
+        content = _XML_DECLARATION_PATTERN.sub("", content, count=1).encode("utf-8")
+    if isinstance(content, bytes):
+        return io.BytesIO(content)
+    return content
+
+
+def iter_lexml_units(
+    content: Union[str, bytes, io.IOBase],
+    use_lxml: Optional[bool] = None,
+    chunk_size: int = FEED_CHUNK_SIZE,
+    min_loose_text_length: int = MIN_LOOSE_TEXT_LENGTH
+) -> Iterator[LexMLUnit]:
+    """
+    Iterar sobre as unidades estruturais de um documento LexML
+
+    Args:
+        content: Documento (bytes, str ou arquivo binário aberto)
+        use_lxml: Forçar/desabilitar lxml (None = usar se instalado)
+        chunk_size: Tamanho dos blocos lidos do documento
+        min_loose_text_length: Tamanho mínimo dos textos soltos (fora de unidades)
+
+    Yields:
+        Unidades na ordem do documento (nada para respostas SRU)
+    """
+    stream = _as_stream(content)
+    parser = LexMLDocumentParser(
+        use_lxml=use_lxml, min_loose_text_length=min_loose_text_length)
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        yield from parser.feed(data)
+        if parser.is_sru:
+            return
+    yield from parser.close()
+
+
+def units_to_text(units: List[LexMLUnit]) -> Optional[str]:
+    """
+    Montar o texto do documento, uma unidade por linha
+
+    Se houver unidades estruturais, os textos soltos (metadados, cabeçalhos
+    de página) são descartados; senão, o texto é o dos textos soltos.
+
+    Args:
+        units: Unidades extraídas
+
+    Returns:
+        Texto ou None se não houver texto
+    """
+    structured = [unit.content for unit in units if unit.type != "text"]
+    lines = structured or [unit.text for unit in units]
+    return "\n".join(lines).strip() or None
+
+
+def extract_lexml_text(
+    content: Union[str, bytes, io.IOBase],
+    use_lxml: Optional[bool] = None
+) -> Optional[str]:
+    """
+    Extrair o texto de um documento LexML (uma unidade por linha)
+
+    Args:
+        content: Documento (bytes, str ou arquivo binário aberto)
+        use_lxml: Forçar/desabilitar lxml (None = usar se instalado)
+
+    Returns:
+        Texto ou None (resposta SRU, documento sem texto ou XML irrecuperável)
+    """
+    try:
+        return units_to_text(list(iter_lexml_units(content, use_lxml=use_lxml)))
+    except ET.ParseError as e:
+        logger.debug(f"Erro ao parsear XML LexML: {str(e)}")
+        return None
@@ -0,0 +1,239 @@
+"""
+Parser das respostas SRU do LexML
+
+Lê a resposta em uma única passada, extraindo numberOfRecords e os
+registros Dublin Core ao mesmo tempo.
+
+Com lxml (padrão quando instalado) o parser é incremental: só os eventos das
+tags de interesse chegam ao Python e cada registro é liberado da árvore
+assim que é lido; há ainda modo de recuperação para XML quebrado. Sem lxml,
+usa xml.etree (fromstring + iter, mais rápido que o parser incremental do
+xml.etree, que gera um evento Python por elemento).
+
+Respostas válidas são parseadas direto, sem nenhuma limpeza prévia. Só
+quando o parser falha (ex: entidades HTML como &ccedil; ou & soltos) as
+entidades são corrigidas uma vez e o documento é parseado de novo.
+"""
+import html
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from html.entities import name2codepoint
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+SRW_NS = "http://www.loc.gov/zing/srw/"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+SRW_DC_NS = "info:srw/schema/1/dc-schema"
+
+_NUMBER_OF_RECORDS_TAG = f"{{{SRW_NS}}}numberOfRecords"
+_DC_RECORD_TAG = f"{{{SRW_DC_NS}}}dc"
+_SRW_RECORD_TAG = f"{{{SRW_NS}}}record"
+
+# Elemento do registro -> campos do documento (primeira ocorrência vence)
+_FIELD_MAP: Dict[str, tuple] = {
+    "tipoDocumento": ("tipo_documento",),
+    "facet-tipoDocumento": ("facet_tipo_documento",),
+    "urn": ("urn", "identifier"),
+    f"{{{DC_NS}}}title": ("title",),
+    f"{{{DC_NS}}}description": ("description",),
+    f"{{{DC_NS}}}date": ("date",),
+    f"{{{DC_NS}}}type": ("dc_type",),
+    "localidade": ("localidade",),
+    "facet-localidade": ("facet_localidade",),
+    "autoridade": ("autoridade",),
+    "facet-autoridade": ("facet_autoridade",),
+    f"{{{DC_NS}}}identifier": ("lexml_id",),
+}
+
+# Tamanho dos blocos enviados ao parser incremental (lxml)
+FEED_CHUNK_SIZE = 64 * 1024
+
+# Entidades que não são das 5 predefinidas do XML nem referências numéricas
+_INVALID_ENTITY_PATTERN = re.compile(
+    rb"&(?!(?:amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+);)(?:([A-Za-z][A-Za-z0-9]*);)?"
+)
+# Caracteres de controle proibidos em XML 1.0
+_INVALID_CHARS_PATTERN = re.compile(rb"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_XML_DECLARATION_PATTERN = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+@dataclass
+class SRUResult:
+    """Resultado do parsing de uma resposta SRU"""
+    total: int = 0
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    recovered: bool = False  # True se foi preciso corrigir entidades ou recuperar XML
+
+
+def _number_of_records(text: Optional[str], records: List[Dict[str, Any]]) -> int:
+    """Total declarado em numberOfRecords; vazio ou inválido conta os registros lidos"""
+    try:
+        return int(text.strip())
+    except (AttributeError, ValueError):
+        return len(records)
+
+
+def _fix_entity(match: "re.Match[bytes]") -> bytes:
+    name = match.group(1)
+    if name is not None:
+        codepoint = name2codepoint.get(name.decode("ascii"))
+        if codepoint is not None:
+            # Entidade HTML conhecida -> referência numérica (válida em XML)
+            return b"&#%d;" % codepoint
+        return b"&amp;" + name + b";"
+    # & solto
+    return b"&amp;"
+
+
+def fix_entities(content: bytes) -> bytes:
+    """
+    Tornar entidades inválidas em XML parseáveis
+
+    Entidades HTML conhecidas viram referências numéricas (o texto é
+    preservado); entidades desconhecidas e & soltos são escapados.
+
+    Args:
+        content: XML em bytes
+
+    Returns:
+        XML com entidades corrigidas
+    """
+    content = _INVALID_ENTITY_PATTERN.sub(_fix_entity, content)
+    return _INVALID_CHARS_PATTERN.sub(b"", content)
+
+
+def _text(element) -> Optional[str]:
+    text = element.text
+    if text and "&" in text:
+        # Texto com entidades escapadas duas vezes na origem (ex: &amp;ccedil;)
+        return html.unescape(text)
+    return text
+
+
+def _record_from_element(dc_element) -> Dict[str, Any]:
+    """Extrair campos de um elemento srw_dc:dc percorrendo seus filhos uma vez"""
+    doc: Dict[str, Any] = {}
+    for child in dc_element:
+        fields = _FIELD_MAP.get(child.tag)
+        if fields is None or fields[0] in doc:
+            continue
+        value = _text(child)
+        for name in fields:
+            doc[name] = value
+    return doc
+
+
+class SRUParser:
+    """Parser de respostas SRU (searchRetrieve) do LexML"""
+
+    def __init__(self, use_lxml: Optional[bool] = None):
+        """
+        Inicializar parser
+
+        Args:
+            use_lxml: Forçar (True) ou desabilitar (False) o lxml; None = usar se instalado
+        """
+        self.use_lxml = LXML_AVAILABLE if use_lxml is None else (use_lxml and LXML_AVAILABLE)
+
+    def _parse_once(self, content: bytes, recover: bool = False) -> SRUResult:
+        if self.use_lxml:
+            return self._parse_lxml(content, recover)
+        return self._parse_etree(content)
+
+    def _parse_lxml(self, content: bytes, recover: bool) -> SRUResult:
+        parser = lxml_etree.XMLPullParser(
+            events=("end",),
+            tag=(_NUMBER_OF_RECORDS_TAG, _DC_RECORD_TAG, _SRW_RECORD_TAG),
+            recover=recover,
+            resolve_entities=False,
+            no_network=True,
+            huge_tree=True
+        )
+        result = SRUResult()
+        total_text: Optional[str] = None
+
+        def drain():
+            nonlocal total_text
+            for _, element in parser.read_events():
+                tag = element.tag
+                if tag == _DC_RECORD_TAG:
+                    result.records.append(_record_from_element(element))
+                elif tag == _SRW_RECORD_TAG:
+                    # Registro já lido: liberar a subárvore e os registros anteriores
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+                else:
+                    total_text = element.text
+
+        for start in range(0, len(content), FEED_CHUNK_SIZE):
+            parser.feed(content[start:start + FEED_CHUNK_SIZE])
+            drain()
+        parser.close()
+        drain()
+        result.total = _number_of_records(total_text, result.records)
+        return result
+
+    def _parse_etree(self, content: bytes) -> SRUResult:
+        root = ET.fromstring(content)
+        number_of_records = root.find(f".//{_NUMBER_OF_RECORDS_TAG}")
+        records = [_record_from_element(dc) for dc in root.iter(_DC_RECORD_TAG)]
+        return SRUResult(
+            total=_number_of_records(getattr(number_of_records, "text", None), records),
+            records=records
+        )
+
+    def parse(self, content: Union[str, bytes]) -> SRUResult:
+        """
+        Parsear resposta SRU
+
+        Args:
+            content: Resposta bruta (de preferência bytes, respeitando o encoding declarado)
+
+        Returns:
+            SRUResult com total e registros (vazio se o XML for irrecuperável)
+        """
+        if isinstance(content, str):
+            # O parser decodifica bytes; a declaração de encoding não vale mais para str
+            content = _XML_DECLARATION_PATTERN.sub("", content, count=1).encode("utf-8")
+        if not content:
+            return SRUResult()
+
+        errors = (ET.ParseError, lxml_etree.XMLSyntaxError) if LXML_AVAILABLE else (ET.ParseError,)
+
+        try:
+            return self._parse_once(content)
+        except errors as e:
+            logger.debug(f"XML do LexML inválido, corrigindo entidades: {str(e)}")
+
+        fixed = fix_entities(content)
+        try:
+            result = self._parse_once(fixed)
+            result.recovered = True
+            return result
+        except errors as e:
+            if not self.use_lxml:
+                logger.error(f"Erro ao parsear XML do LexML: {str(e)}")
+                return SRUResult(recovered=True)
+            logger.warning(f"XML do LexML ainda inválido, usando modo de recuperação: {str(e)}")
+
+        try:
+            result = self._parse_once(fixed, recover=True)
+            result.recovered = True
+            return result
+        except errors as e:
+            logger.error(f"Erro ao parsear XML do LexML: {str(e)}")
+            return SRUResult(recovered=True)
+
+
+# Instância global
+sru_parser = SRUParser()
@@ -0,0 +1,180 @@
+"""
+Paginação em streaming para os clientes das APIs legislativas
+
+paginate_pages recebe uma função que busca uma página pela posição (número
+da página, startRecord, ...) e devolve um iterador assíncrono de páginas. Um
+produtor em background busca a página seguinte enquanto o chamador processa
+a atual. A fila entre os dois tem tamanho limitado (prefetch): se o
+consumidor for mais lento, o produtor espera (contrapressão). A memória fica
+limitada a prefetch + 2 páginas, qualquer que seja o total.
+
+Uso:
+    async for norma in senado_client.iter_normas(ano=2024):
+        ...
+    async for lote in batched(lexml_client.iter_laws(year=2024), 100):
+        legislation_store.upsert_lexml_documents(lote)
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class Page:
+    """Página de resultados e a posição da próxima (None = última)"""
+    records: List[Any]
+    next_position: Optional[Any] = None
+    total: Optional[int] = None
+
+
+PageFetcher = Callable[[Any], Awaitable[Page]]
+
+
+class _Failure:
+    """Erro do produtor, repassado ao consumidor pela fila"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_END = object()
+
+
+async def paginate_pages(
+    fetch: PageFetcher,
+    first_position: Any = 1,
+    prefetch: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> AsyncIterator[Page]:
+    """
+    Iterar páginas buscando as próximas em background
+
+    Args:
+        fetch: Função assíncrona posição -> Page (erros são propagados ao consumidor)
+        first_position: Posição da primeira página
+        prefetch: Páginas buscadas à frente (padrão: PAGINATION_PREFETCH_PAGES;
+            0 = uma página por vez, só quando pedida)
+        max_pages: Número máximo de páginas
+
+    Yields:
+        Páginas em ordem
+    """
+    prefetch = settings.PAGINATION_PREFETCH_PAGES if prefetch is None else prefetch
+
+    if prefetch <= 0:
+        position, pages = first_position, 0
+        while position is not None and (max_pages is None or pages < max_pages):
+            page = await fetch(position)
+            pages += 1
+            yield page
+            position = page.next_position
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=prefetch)
+
+    async def produce() -> None:
+        position, pages = first_position, 0
+        try:
+            while position is not None and (max_pages is None or pages < max_pages):
+                page = await fetch(position)
+                pages += 1
+                await queue.put(page)
+                position = page.next_position
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(_Failure(e))
+            return
+        await queue.put(_END)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # Consumidor parou (fim, erro ou break): não buscar mais páginas
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+
+
+async def paginate(
+    fetch: PageFetcher,
+    first_position: Any = 1,
+    prefetch: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    limit: Optional[int] = None
+) -> AsyncIterator[Any]:
+    """
+    Iterar registros de todas as páginas (ver paginate_pages)
+
+    Args:
+        fetch: Função assíncrona posição -> Page
+        first_position: Posição da primeira página
+        prefetch: Páginas buscadas à frente (padrão: PAGINATION_PREFETCH_PAGES)
+        max_pages: Número máximo de páginas
+        limit: Número máximo de registros
+
+    Yields:
+        Registros na ordem das páginas
+    """
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+    pages = paginate_pages(fetch, first_position, prefetch=prefetch, max_pages=max_pages)
+    try:
+        async for page in pages:
+            for record in page.records:
+                yield record
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+    finally:
+        await pages.aclose()
+
+
+async def batched(records: AsyncIterator[Any], size: int) -> AsyncIterator[List[Any]]:
+    """
+    Agrupar registros de um iterador assíncrono em listas de até size itens
+
+    Args:
+        records: Iterador assíncrono (ex: client.iter_normas(...))
+        size: Tamanho de cada lote
+
+    Yields:
+        Lotes de registros (o último pode ser menor)
+    """
+    batch: List[Any] = []
+    try:
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        aclose = getattr(records, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def page_size_or_default(page_size: Optional[int]) -> int:
+    """Tamanho de página pedido ou PAGINATION_PAGE_SIZE"""
+    return page_size or settings.PAGINATION_PAGE_SIZE
+
+
+def max_pages_for(limit: Optional[int], page_size: int) -> Optional[int]:
+    """Páginas necessárias para limit registros (o prefetch não passa disso)"""
+    if limit is None:
+        return None
+    return max(1, -(-limit // page_size))
@@ -22,16 +22,21 @@ FORMATOS DISPONÍVEIS:
 import aiohttp
 import xml.etree.ElementTree as ET
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from loguru import logger
 from datetime import datetime
 from time import time
 
+from app.core.config import settings
+from app.core.metrics import instrument_client
+from app.integrations.pagination import Page, max_pages_for, page_size_or_default, paginate
 
+
+@instrument_client("senado")
 class SenadoAPIClient:
     """Cliente para API de Dados Abertos do Senado Federal"""
 
-    BASE_URL = "https://legis.senado.leg.br/dadosabertos"
+    BASE_URL = settings.SENADO_API_URL
 
     def __init__(self):
         self.headers = {
@@ -329,12 +334,16 @@ class SenadoAPIClient:
         data_inicio: Optional[str] = None,  # YYYYMMDD
         data_fim: Optional[str] = None,  # YYYYMMDD
         pagina: int = 1,
-        quantidade: int = 100
+        quantidade: int = 100,
+        raise_errors: bool = False
     ) -> Dict[str, Any]:
         """
         Listar normas (leis, decretos, medidas provisórias, etc)
 
         Endpoint: /norma/listar
+
+        Com raise_errors, erros são propagados em vez de devolver lista vazia
+        (coleta incremental: falha não pode parecer fim da lista).
         """
         try:
             params = {
@@ -370,6 +379,8 @@ class SenadoAPIClient:
                                 data = await alt_response.json()
                                 return data
                             else:
+                                if raise_errors:
+                                    alt_response.raise_for_status()
                                 logger.warning(
                                     f"Endpoint alternativo também falhou: {alt_response.status}")
                                 return {"normas": [], "total": 0}
@@ -379,6 +390,8 @@ class SenadoAPIClient:
                     return data
 
         except aiohttp.ClientResponseError as e:
+            if raise_errors:
+                raise
             if e.status == 404:
                 logger.warning(
                     f"Endpoint do Senado retornou 404. Verifique a documentação oficial: https://legis.senado.leg.br/dadosabertos/v3/api-docs. URL: {e.request_info.url}")
@@ -395,9 +408,53 @@ class SenadoAPIClient:
                     f"Erro HTTP ao listar normas: {e.status} - {str(e)}")
             return {"normas": [], "total": 0}
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Erro ao listar normas: {str(e)}")
             return {"normas": [], "total": 0}
 
+    def iter_normas(
+        self,
+        ano: Optional[int] = None,
+        tipo: Optional[str] = None,
+        tramitando: bool = False,
+        data_inicio: Optional[str] = None,  # YYYYMMDD
+        data_fim: Optional[str] = None,  # YYYYMMDD
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterar todas as normas do filtro, página a página
+
+        A próxima página é baixada enquanto a atual é processada; a memória
+        fica limitada a poucas páginas. Erros de rede são propagados.
+
+        Args:
+            ano, tipo, tramitando, data_inicio, data_fim: Filtros de listar_normas
+            page_size: Normas por página (padrão: PAGINATION_PAGE_SIZE)
+            prefetch: Páginas buscadas à frente (padrão: PAGINATION_PREFETCH_PAGES)
+            limit: Número máximo de normas
+
+        Returns:
+            Iterador assíncrono de normas
+        """
+        quantidade = page_size_or_default(page_size)
+
+        async def fetch(pagina: int) -> Page:
+            resultado = await self.listar_normas(
+                ano=ano, tipo=tipo, tramitando=tramitando,
+                data_inicio=data_inicio, data_fim=data_fim,
+                pagina=pagina, quantidade=quantidade, raise_errors=True
+            )
+            normas = resultado.get("normas", [])
+            return Page(normas, pagina + 1 if len(normas) >= quantidade else None)
+
+        return paginate(
+            fetch, 1, prefetch=prefetch,
+            max_pages=max_pages_for(limit, quantidade), limit=limit
+        )
+
     async def detalhe_norma(self, codigo_norma: str) -> Dict[str, Any]:
         """
         Obter detalhes completos de uma norma
@@ -469,17 +526,20 @@ class SenadoAPIClient:
         ano: Optional[int] = None,
         numero: Optional[str] = None,
         sigla: Optional[str] = None,  # PLS, PLC, PEC, etc
-        tramitando: bool = True,
+        tramitando: Optional[bool] = True,  # None = todas
         autor: Optional[str] = None,
         data_inicio: Optional[str] = None,
         data_fim: Optional[str] = None,
         pagina: int = 1,
-        quantidade: int = 100
+        quantidade: int = 100,
+        raise_errors: bool = False
     ) -> Dict[str, Any]:
         """
         Listar matérias (projetos de lei, PECs, etc)
 
         Endpoint: /materia/pesquisa/lista
+
+        Com raise_errors, erros são propagados em vez de devolver lista vazia.
         """
         try:
             params = {
@@ -495,7 +555,7 @@ class SenadoAPIClient:
                 params["sigla"] = sigla
             if tramitando:
                 params["tramitando"] = "S"
-            else:
+            elif tramitando is not None:
                 params["tramitando"] = "N"
             if autor:
                 params["autor"] = autor
@@ -513,9 +573,51 @@ class SenadoAPIClient:
                     return data
 
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Erro ao listar matérias: {str(e)}")
             return {"materias": [], "total": 0}
 
+    def iter_materias(
+        self,
+        ano: Optional[int] = None,
+        sigla: Optional[str] = None,
+        tramitando: Optional[bool] = True,  # None = todas
+        autor: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterar todas as matérias do filtro, página a página (ver iter_normas)
+
+        Args:
+            ano, sigla, tramitando, autor, data_inicio, data_fim: Filtros de listar_materias
+            page_size: Matérias por página (padrão: PAGINATION_PAGE_SIZE)
+            prefetch: Páginas buscadas à frente (padrão: PAGINATION_PREFETCH_PAGES)
+            limit: Número máximo de matérias
+
+        Returns:
+            Iterador assíncrono de matérias
+        """
+        quantidade = page_size_or_default(page_size)
+
+        async def fetch(pagina: int) -> Page:
+            resultado = await self.listar_materias(
+                ano=ano, sigla=sigla, tramitando=tramitando, autor=autor,
+                data_inicio=data_inicio, data_fim=data_fim,
+                pagina=pagina, quantidade=quantidade, raise_errors=True
+            )
+            materias = resultado.get("materias", [])
+            return Page(materias, pagina + 1 if len(materias) >= quantidade else None)
+
+        return paginate(
+            fetch, 1, prefetch=prefetch,
+            max_pages=max_pages_for(limit, quantidade), limit=limit
+        )
+
     async def detalhe_materia(self, codigo_materia: str) -> Dict[str, Any]:
         """
         Obter detalhes completos de uma matéria
@@ -897,42 +999,27 @@ class SenadoAPIClient:
     ) -> List[Dict[str, Any]]:
         """
         Coletar todas as normas/matérias de um período
+
+        Acumula tudo em memória; para períodos longos prefira iterar
+        iter_normas/iter_materias ano a ano.
         """
         todos_documentos = []
 
         for ano in range(ano_inicio, ano_fim + 1):
             logger.info(f"Coletando {tipo}s de {ano}...")
 
-            pagina = 1
-            while True:
-                if tipo == "norma":
-                    resultado = await self.listar_normas(
-                        ano=ano,
-                        pagina=pagina,
-                        quantidade=100
-                    )
-                    documentos = resultado.get("normas", [])
-                else:
-                    resultado = await self.listar_materias(
-                        ano=ano,
-                        pagina=pagina,
-                        quantidade=100
-                    )
-                    documentos = resultado.get("materias", [])
-
-                if not documentos:
-                    break
-
-                todos_documentos.extend(documentos)
-                logger.info(f"  Página {pagina}: {len(documentos)} {tipo}s")
-
-                pagina += 1
+            if tipo == "norma":
+                documentos = self.iter_normas(ano=ano)
+            else:
+                documentos = self.iter_materias(ano=ano)
 
-                # Limite de segurança
-                if pagina > 100:
-                    logger.warning(
-                        f"Limite de páginas atingido para ano {ano}")
-                    break
+            try:
+                antes = len(todos_documentos)
+                async for documento in documentos:
+                    todos_documentos.append(documento)
+                logger.info(f"  {len(todos_documentos) - antes} {tipo}s")
+            except Exception as e:
+                logger.error(f"Erro ao coletar {tipo}s de {ano}: {str(e)}")
 
         return todos_documentos
 
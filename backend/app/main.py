@@ -1,10 +1,23 @@
-from fastapi import FastAPI
+import asyncio
+import time
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from loguru import logger
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.core.config import settings
+from app.core.metrics import (
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    exposition_registry,
+    mark_process_dead,
+)
+from app.core.tracing import tracer
 from app.api.v1 import router as api_router
+from app.services.reranker import load_cross_encoder
+from app.services.trending_refresher import trending_refresher
 
 # Configurar logger
 logger.add("logs/app.log", rotation="500 MB", level="INFO")
@@ -43,6 +56,45 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Duração das requisições por rota (modelo da rota, não o caminho com IDs)"""
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+    started = time.perf_counter()
+    status = 500
+    with HTTP_REQUESTS_IN_FLIGHT.track_inprogress():
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status
+            ).observe(time.perf_counter() - started)
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Span raiz de cada requisição (continua o trace de um cabeçalho traceparent)"""
+    with tracer.span(f"{request.method} {request.url.path}", kind="server",
+                     traceparent=request.headers.get("traceparent")) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            span.update_name(f"{request.method} {route.path}")
+        span.set_attributes({
+            "http.request.method": request.method,
+            "http.route": getattr(route, "path", None),
+            "url.path": request.url.path,
+            "http.response.status_code": response.status_code,
+        })
+        return response
+
+
 @app.get("/")
 async def root():
     """Endpoint raiz da API"""
@@ -63,6 +115,34 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas no formato de texto do Prometheus"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas")
+    return Response(generate_latest(exposition_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    """Iniciar jobs periódicos (destaques de legislação) e carregar o cross-encoder"""
+    if settings.TRENDING_REFRESH_ENABLED:
+        trending_refresher.start()
+    if settings.RERANKER_ENABLED or settings.SEARCH_RANKER == "cross_encoder":
+        # Numa thread (pode baixar o modelo): a API já responde enquanto carrega
+        app.state.cross_encoder_load = asyncio.create_task(
+            asyncio.to_thread(load_cross_encoder, settings.CROSS_ENCODER_MODEL))
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    """Parar jobs periódicos"""
+    await trending_refresher.stop()
+    mark_process_dead()
+    # A exportação final dos spans bloqueia (até o timeout do exportador): fora do event loop
+    await asyncio.to_thread(tracer.shutdown)
+
+
 # Incluir rotas da API v1
 app.include_router(api_router, prefix="/api/v1")
 
@@ -1,11 +1,32 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey
+import hashlib
+
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, JSON, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
+from app.core.vector_codec import VectorType
+
 Base = declarative_base()
 
 
+def legislation_stable_id(urn: str = None, source: str = None, external_id: str = None) -> int:
+    """
+    ID público estável de uma legislação: digest da URN (ou de fonte + ID externo)
+
+    Igual em qualquer processo e máquina (ao contrário de hash()). Usa 53 bits
+    para caber em um número do JavaScript sem perda de precisão.
+    """
+    key = urn or f"{source}:{external_id}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 11
+
+
+def _default_stable_id(context) -> int:
+    params = context.get_current_parameters()
+    return legislation_stable_id(params.get("urn"), params.get("source"), params.get("external_id"))
+
+
 class User(Base):
     """Modelo de usuário"""
     __tablename__ = "users"
@@ -29,9 +50,20 @@ class User(Base):
 class Legislation(Base):
     """Modelo de legislação (PL, PEC, etc)"""
     __tablename__ = "legislations"
+    __table_args__ = (
+        # Filtros de busca e estatísticas por fonte (fonte, tipo, ano)
+        Index("ix_legislations_source_type_year", "source", "type", "year"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     external_id = Column(String, unique=True, index=True)  # ID da API externa
+    urn = Column(String, unique=True, index=True)  # URN LexML (quando houver)
+    # ID público estável (digest da URN), usado em GET /legislation/{id}
+    stable_id = Column(BigInteger, unique=True, index=True,
+                       nullable=False, default=_default_stable_id)
+    # Registro canônico quando esta legislação é duplicata de outra fonte (ver app/services/deduplicator.py)
+    canonical_id = Column(Integer, ForeignKey("legislations.id", ondelete="SET NULL"),
+                          nullable=True, index=True)
     source = Column(String, nullable=False)  # camara, senado, municipal
     type = Column(String, nullable=False)  # PL, PEC, PLV, etc
     number = Column(String, nullable=False)
@@ -72,6 +104,26 @@ class Query(Base):
     user = relationship("User", back_populates="queries")
 
 
+class ConversationMessage(Base):
+    """Mensagem de uma sessão de conversa com o chatbot"""
+    __tablename__ = "conversation_messages"
+    __table_args__ = (
+        # Paginação por chave (keyset): (created_at, id) por usuário e por sessão
+        Index("ix_conversation_messages_user_created",
+              "user_id", "created_at", "id"),
+        Index("ix_conversation_messages_session_created",
+              "session_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String(36), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    role = Column(String(16), nullable=False)  # user, assistant, system
+    content = Column(Text, nullable=False)
+    meta_data = Column(JSON)  # fontes, sugestões, etc
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class Favorite(Base):
     """Modelo de favoritos do usuário"""
     __tablename__ = "favorites"
@@ -121,6 +173,11 @@ class AIFeedback(Base):
 class LegislationChunk(Base):
     """Modelo para armazenar chunks (pedaços) de legislação processados"""
     __tablename__ = "legislation_chunks"
+    __table_args__ = (
+        # Índice parcial: só os chunks ainda sem embedding (fila da etapa de embeddings)
+        Index("ix_legislation_chunks_pending_embedding", "legislation_id", "id",
+              postgresql_where=text("embedding IS NULL"), sqlite_where=text("embedding IS NULL")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     legislation_id = Column(Integer, ForeignKey(
@@ -132,7 +189,7 @@ class LegislationChunk(Base):
     normalized_content = Column(Text)  # conteúdo normalizado
     # metadados adicionais (citações, referências, etc)
     meta_data = Column(JSON)  # renomeado de 'metadata' para evitar conflito com SQLAlchemy
-    embedding = Column(JSON)  # embedding vetorial (armazenado como JSON array)
+    embedding = Column(VectorType)  # embedding vetorial (binário, ver app/core/vector_codec.py)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relacionamento
@@ -142,6 +199,12 @@ class LegislationChunk(Base):
 class TrainingCorpus(Base):
     """Modelo para armazenar pares pergunta-resposta para treinamento"""
     __tablename__ = "training_corpus"
+    __table_args__ = (
+        # Pares já gravados por legislação e chunk (CorpusBuilder)
+        Index("ix_training_corpus_legislation_chunk", "legislation_id", "chunk_id"),
+        Index("ix_training_corpus_pending_embedding", "legislation_id", "id",
+              postgresql_where=text("embedding IS NULL"), sqlite_where=text("embedding IS NULL")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     legislation_id = Column(Integer, ForeignKey(
@@ -154,7 +217,7 @@ class TrainingCorpus(Base):
     # o_que_e, quem, quando, como, qual_pena, etc
     question_type = Column(String)
     meta_data = Column(JSON)  # metadados adicionais (renomeado de 'metadata' para evitar conflito com SQLAlchemy)
-    embedding = Column(JSON)  # embedding da pergunta
+    embedding = Column(VectorType)  # embedding da pergunta (binário)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow,
                         onupdate=datetime.utcnow)
@@ -164,16 +227,40 @@ class TrainingCorpus(Base):
     chunk = relationship("LegislationChunk")
 
 
+class TrendingLegislation(Base):
+    """Legislações em destaque, materializadas periodicamente a partir de legislations"""
+    __tablename__ = "trending_legislations"
+
+    rank = Column(Integer, primary_key=True)  # posição (1 = primeiro)
+    legislation_id = Column(Integer, ForeignKey(
+        "legislations.id", ondelete="CASCADE"), nullable=False)
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relacionamento
+    legislation = relationship("Legislation")
+
+
 class DataCollectionJob(Base):
     """Modelo para rastrear jobs de coleta de dados"""
     __tablename__ = "data_collection_jobs"
+    __table_args__ = (
+        # Jobs por estado e fonte (vagas por fonte na fila, jobs pendentes)
+        Index("ix_data_collection_jobs_status_source", "status", "source"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    # lexml, camara, senado, municipal
+    # lexml, camara, senado, municipal, pipeline
     job_type = Column(String, nullable=False)
-    # pending, running, completed, failed
+    # pending, running, completed, failed, cancelled
     status = Column(String, nullable=False)
     parameters = Column(JSON)  # parâmetros da coleta
+    # Fonte consultada (limite de jobs simultâneos por fonte)
+    source = Column(String, index=True)
+    # Prioridade na fila: 0 (mais urgente) a 9
+    priority = Column(Integer, default=5)
+    task_id = Column(String)  # ID da tarefa no Celery
+    attempts = Column(Integer, default=0)
+    cancel_requested = Column(Boolean, default=False)
     total_items = Column(Integer, default=0)
     processed_items = Column(Integer, default=0)
     failed_items = Column(Integer, default=0)
@@ -181,3 +268,26 @@ class DataCollectionJob(Base):
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class HarvestCursor(Base):
+    """Posição persistida da coleta incremental de uma fonte (retomada após falha)"""
+    __tablename__ = "harvest_cursors"
+
+    id = Column(Integer, primary_key=True)
+    # lexml_leis, lexml_projetos, senado_normas, senado_materias
+    feed = Column(String, unique=True, nullable=False)
+    mode = Column(String, nullable=False, default="full")  # full, delta
+    # idle, running, completed, failed
+    status = Column(String, nullable=False, default="idle")
+    year = Column(Integer)  # ano em coleta
+    end_year = Column(Integer)  # último ano da execução
+    position = Column(Integer)  # próxima página / startRecord do ano em coleta
+    since = Column(DateTime)  # delta: registros a partir desta data
+    last_modified = Column(String)  # maior data de registro vista
+    records_harvested = Column(Integer, default=0)  # registros gravados na execução
+    error_message = Column(Text)
+    started_at = Column(DateTime)
+    last_success_at = Column(DateTime)  # início da última execução concluída
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)
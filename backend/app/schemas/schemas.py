@@ -47,6 +47,9 @@ class LegislationSimplified(BaseModel):
     tags: Optional[List[str]] = None
     urn: Optional[str] = None
     identifier: Optional[str] = None
+    # Busca local: trecho com os termos marcados (<mark>) e relevância
+    snippet: Optional[str] = None
+    rank: Optional[float] = None
     
     class Config:
         from_attributes = True
@@ -58,6 +61,15 @@ class LegislationDetail(LegislationSimplified):
     last_update: Optional[datetime] = None
 
 
+class FullTextPrefetchRequest(BaseModel):
+    urns: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class FullTextPrefetchResponse(BaseModel):
+    status: str
+    requested: int
+
+
 # Query Schemas
 class QueryRequest(BaseModel):
     query_text: str = Field(..., min_length=3, max_length=2000)
@@ -88,17 +100,34 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=2000)
+    # Sessão guardada no servidor (dispensa reenviar o histórico completo)
+    session_id: Optional[str] = Field(default=None, max_length=36)
     conversation_history: Optional[List[ChatMessage]] = []
     use_audio: bool = False
 
 
 class ChatResponse(BaseModel):
     message: str
+    session_id: Optional[str] = None
     audio_url: Optional[str] = None
     sources: Optional[List[Dict[str, Any]]] = []
     suggestions: Optional[List[str]] = []
 
 
+class ChatHistoryMessage(BaseModel):
+    id: int
+    session_id: str
+    role: str
+    content: str
+    timestamp: datetime
+
+
+class ChatHistoryResponse(BaseModel):
+    session_id: str
+    messages: List[ChatHistoryMessage]
+    next_cursor: Optional[str] = None
+
+
 # Simplification Schemas
 class SimplificationRequest(BaseModel):
     text: str = Field(..., min_length=10)
@@ -111,6 +140,8 @@ class SimplificationResponse(BaseModel):
     simplified_text: str
     audio_url: Optional[str] = None
     reading_time_minutes: int
+    readability_score: Optional[float] = None
+    method: Optional[str] = None  # rules (caminho rápido) ou llm
 
 
 # Search Schemas
@@ -119,6 +150,8 @@ class SearchRequest(BaseModel):
     filters: Optional[Dict[str, Any]] = None
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=10, ge=1, le=50)
+    # local, live ou auto (None = SEARCH_MODE)
+    mode: Optional[str] = Field(default=None, pattern="^(local|live|auto)$")
 
 
 class SearchResponse(BaseModel):
@@ -126,6 +159,11 @@ class SearchResponse(BaseModel):
     page: int
     page_size: int
     results: List[LegislationSimplified]
+    # Busca local: contagens por type, year e source e tempo da consulta
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+    took_ms: Optional[float] = None
+    # Origem dos resultados: local ou live
+    mode: Optional[str] = None
 
 
 # Favorite Schemas
@@ -8,6 +8,9 @@ import asyncio
 from pathlib import Path
 import warnings
 
+from app.core.metrics import AUDIO_SECONDS, record_cache, timed
+from app.core.tracing import traced
+
 try:
     import whisper
     from gtts import gTTS
@@ -56,6 +59,7 @@ class AudioService:
         except Exception as e:
             logger.error(f"Erro ao carregar modelo Whisper: {str(e)}")
 
+    @traced("audio.transcribe")
     async def transcribe_audio(
         self,
         audio_data: str,
@@ -225,11 +229,12 @@ class AudioService:
 
             # Transcrever
             try:
-                result = await asyncio.to_thread(
-                    self.whisper_model.transcribe,
-                    str(temp_wav_path),
-                    language=language
-                )
+                with timed(AUDIO_SECONDS, operation="transcribe"):
+                    result = await asyncio.to_thread(
+                        self.whisper_model.transcribe,
+                        str(temp_wav_path),
+                        language=language
+                    )
 
                 if not result or "text" not in result:
                     logger.error("Whisper retornou resultado inválido")
@@ -277,6 +282,7 @@ class AudioService:
                 "error": f"Erro ao processar áudio: {str(e)}"
             }
 
+    @traced("audio.text_to_speech")
     async def text_to_speech(
         self,
         text: str,
@@ -306,11 +312,14 @@ class AudioService:
 
             # Se já existe, retornar caminho
             if output_path.exists():
+                record_cache("tts", hits=1)
                 return str(output_path)
+            record_cache("tts", misses=1)
 
             # Gerar áudio
-            tts = gTTS(text=text, lang=language, slow=slow)
-            await asyncio.to_thread(tts.save, str(output_path))
+            with timed(AUDIO_SECONDS, operation="tts"):
+                tts = gTTS(text=text, lang=language, slow=slow)
+                await asyncio.to_thread(tts.save, str(output_path))
 
             logger.info(f"Áudio gerado: {output_path}")
             return str(output_path)
@@ -319,6 +328,7 @@ class AudioService:
             logger.error(f"Erro ao gerar áudio: {str(e)}")
             return None
 
+    @traced("audio.convert_format")
     async def convert_audio_format(
         self,
         input_path: str,
@@ -0,0 +1,392 @@
+"""
+Histórico de conversas do chatbot no servidor
+
+As mensagens ficam na tabela conversation_messages, que é a fonte da
+verdade. As sessões ativas ficam em um cache (memória ou Redis) com as
+últimas mensagens, para que o /chat receba só o session_id em vez de todo o
+histórico a cada requisição.
+
+Com vários workers do uvicorn, cada processo tem o seu cache em memória e
+a próxima pergunta da sessão pode cair em outro processo. Por isso:
+- CHAT_HISTORY_CACHE="auto" usa o Redis (compartilhado) quando
+  WEB_CONCURRENCY > 1;
+- o cache em memória guarda o id da última mensagem e, antes de ser usado,
+  é conferido com a última mensagem da sessão no banco (uma consulta pelo
+  índice); se outro processo gravou no meio, a sessão é recarregada.
+
+A listagem do histórico de uma sessão usa paginação por chave (keyset) sobre
+(created_at, id), coberta pelo índice (session_id, created_at, id): o custo
+de cada página não depende de quantas páginas já foram lidas.
+"""
+import base64
+import json
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import ConversationMessage
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class MemorySessionCache:
+    """
+    Cache LRU em memória das últimas mensagens de cada sessão
+
+    É local ao processo: as mensagens guardam o id no banco ("id") para que
+    o ChatHistoryStore confira se a entrada ainda está atualizada.
+    """
+
+    shared = False
+
+    def __init__(self, max_sessions: int, ttl_seconds: int, max_messages: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[str, Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        expires_at, messages = entry
+        if expires_at < time.monotonic():
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return list(messages)
+
+    def set(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        self._sessions[session_id] = (
+            time.monotonic() + self.ttl_seconds,
+            list(messages[-self.max_messages:])
+        )
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def append(
+        self,
+        session_id: str,
+        new_messages: List[Dict[str, Any]],
+        previous_id: Optional[int] = None
+    ) -> None:
+        # Só atualiza sessões aquecidas e em dia com o banco (a última mensagem
+        # do cache é a anterior às novas); as demais são recarregadas do banco
+        cached = self.get(session_id)
+        if cached is None:
+            return
+        if _last_id(cached) != previous_id:
+            self._sessions.pop(session_id, None)
+            return
+        self.set(session_id, cached + new_messages)
+
+
+class RedisSessionCache:
+    """Cache das últimas mensagens de cada sessão em uma lista do Redis"""
+
+    # Compartilhado entre os workers: toda gravação passa por ele
+    shared = True
+    KEY_PREFIX = "chat:session:"
+
+    def __init__(self, url: str, ttl_seconds: int, max_messages: int):
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+
+    def get(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        key = self._key(session_id)
+        if not self.client.exists(key):
+            return None
+        return [json.loads(item) for item in self.client.lrange(key, 0, -1)]
+
+    def set(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        # Listas vazias não existem no Redis: sessões sem mensagens não são guardadas
+        if not messages:
+            return
+        key = self._key(session_id)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.rpush(key, *[json.dumps(m) for m in messages[-self.max_messages:]])
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def append(
+        self,
+        session_id: str,
+        new_messages: List[Dict[str, Any]],
+        previous_id: Optional[int] = None
+    ) -> None:
+        key = self._key(session_id)
+        if not new_messages or not self.client.exists(key):
+            return
+        pipe = self.client.pipeline()
+        pipe.rpush(key, *[json.dumps(m) for m in new_messages])
+        pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+
+def _last_id(messages: List[Dict[str, Any]]) -> Optional[int]:
+    """Id no banco da última mensagem em cache (None para sessão vazia)"""
+    return messages[-1].get("id") if messages else None
+
+
+def _context(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+
+def encode_cursor(created_at: datetime, message_id: int) -> str:
+    """Codificar a posição (created_at, id) da última mensagem da página"""
+    raw = f"{created_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodificar cursor de paginação
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+class ChatHistoryStore:
+    """Armazena sessões de conversa no banco com cache das sessões ativas"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        cache: Optional[Any] = None
+    ):
+        """
+        Inicializar armazenamento
+
+        Args:
+            session_factory: Fábrica de sessões do banco (padrão: SessionLocal)
+            cache: Cache de sessões (padrão: conforme CHAT_HISTORY_CACHE)
+        """
+        self._session_factory = session_factory
+        self.max_messages = settings.CHAT_HISTORY_CONTEXT_MESSAGES
+        self.cache = cache or self._create_cache()
+
+    def _create_cache(self):
+        backend = settings.CHAT_HISTORY_CACHE
+        if backend == "auto":
+            backend = "redis" if settings.WEB_CONCURRENCY > 1 else "memory"
+        if backend == "redis":
+            if REDIS_AVAILABLE:
+                try:
+                    cache = RedisSessionCache(
+                        settings.REDIS_URL,
+                        ttl_seconds=settings.CHAT_HISTORY_CACHE_TTL_SECONDS,
+                        max_messages=self.max_messages
+                    )
+                    cache.client.ping()
+                    return cache
+                except Exception as e:
+                    logger.warning(f"Redis indisponível para histórico, usando memória "
+                                   f"(conferida com o banco a cada pergunta): {str(e)}")
+            else:
+                logger.warning("redis não instalado. Histórico em cache de memória "
+                               "(conferida com o banco a cada pergunta).")
+        return MemorySessionCache(
+            max_sessions=settings.CHAT_HISTORY_CACHE_MAX_SESSIONS,
+            ttl_seconds=settings.CHAT_HISTORY_CACHE_TTL_SECONDS,
+            max_messages=self.max_messages
+        )
+
+    def _db(self) -> Session:
+        if self._session_factory is None:
+            # Import tardio: não cria engine ao importar o módulo
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def start_session(self) -> str:
+        """Criar uma nova sessão (já aquecida no cache)"""
+        session_id = str(uuid.uuid4())
+        self.cache.set(session_id, [])
+        return session_id
+
+    def get_context(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        Obter as últimas mensagens da sessão (para o prompt do modelo)
+
+        Args:
+            session_id: ID da sessão
+
+        Returns:
+            Lista de mensagens {'role', 'content'} em ordem cronológica
+        """
+        cached = self.cache.get(session_id)
+        # Cache local ao processo: vale só se ninguém gravou na sessão depois dele
+        if cached is not None and (
+            self.cache.shared or self._last_message_id(session_id) == _last_id(cached)
+        ):
+            return _context(cached)
+
+        db = self._db()
+        try:
+            rows = (
+                db.query(ConversationMessage.id, ConversationMessage.role, ConversationMessage.content)
+                .filter(ConversationMessage.session_id == session_id)
+                .order_by(ConversationMessage.created_at.desc(), ConversationMessage.id.desc())
+                .limit(self.max_messages)
+                .all()
+            )
+        finally:
+            db.close()
+
+        messages = [
+            {"id": message_id, "role": role, "content": content}
+            for message_id, role, content in reversed(rows)
+        ]
+        self.cache.set(session_id, messages)
+        return _context(messages)
+
+    @staticmethod
+    def _latest_id_query(db: Session, session_id: str):
+        return (
+            db.query(ConversationMessage.id)
+            .filter(ConversationMessage.session_id == session_id)
+            .order_by(ConversationMessage.created_at.desc(), ConversationMessage.id.desc())
+            .limit(1)
+        )
+
+    def _last_message_id(self, session_id: str) -> Optional[int]:
+        """Id da última mensagem da sessão no banco (None se não houver)"""
+        db = self._db()
+        try:
+            return self._latest_id_query(db, session_id).scalar()
+        finally:
+            db.close()
+
+    def append(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        user_id: Optional[int] = None
+    ) -> None:
+        """
+        Gravar mensagens da sessão (uma transação) e atualizar o cache
+
+        Args:
+            session_id: ID da sessão
+            messages: Mensagens {'role', 'content', 'meta_data'?} em ordem
+            user_id: ID do usuário (opcional)
+        """
+        if not messages:
+            return
+
+        now = datetime.utcnow()
+        db = self._db()
+        try:
+            previous_id = self._latest_id_query(db, session_id).scalar()
+            rows = [
+                ConversationMessage(
+                    session_id=session_id,
+                    user_id=user_id,
+                    role=message["role"],
+                    content=message["content"],
+                    meta_data=message.get("meta_data"),
+                    created_at=now
+                )
+                for message in messages
+            ]
+            db.add_all(rows)
+            db.flush()
+            new_messages = [
+                {"id": row.id, "role": row.role, "content": row.content} for row in rows
+            ]
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.cache.append(session_id, new_messages, previous_id=previous_id)
+
+    def list_session_messages(
+        self,
+        session_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Listar mensagens da sessão, mais recentes primeiro (paginação por chave)
+
+        Args:
+            session_id: ID da sessão
+            limit: Tamanho da página
+            cursor: Cursor retornado pela página anterior
+
+        Returns:
+            Tupla (mensagens, cursor da próxima página ou None)
+        """
+        db = self._db()
+        try:
+            query = db.query(ConversationMessage).filter(
+                ConversationMessage.session_id == session_id)
+            if cursor:
+                created_at, message_id = decode_cursor(cursor)
+                query = query.filter(or_(
+                    ConversationMessage.created_at < created_at,
+                    and_(
+                        ConversationMessage.created_at == created_at,
+                        ConversationMessage.id < message_id
+                    )
+                ))
+            # Buscar um a mais para saber se há próxima página
+            rows = (
+                query.order_by(
+                    ConversationMessage.created_at.desc(),
+                    ConversationMessage.id.desc()
+                )
+                .limit(limit + 1)
+                .all()
+            )
+        finally:
+            db.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = (
+            encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+        )
+        messages = [
+            {
+                "id": row.id,
+                "session_id": row.session_id,
+                "role": row.role,
+                "content": row.content,
+                "timestamp": row.created_at
+            }
+            for row in rows
+        ]
+        return messages, next_cursor
+
+
+# Instância global
+chat_history = ChatHistoryStore()
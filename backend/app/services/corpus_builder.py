@@ -1,12 +1,40 @@
 """
 Serviço para construir corpus de treinamento com pares pergunta-resposta
+
+Trabalha por conjuntos: legislações, chunks e pares já existentes de um lote
+são lidos em uma consulta cada, e os pares novos são inseridos em um único
+INSERT em lote (executemany). Intervalos de IDs de legislação podem ser
+processados em paralelo por vários workers (build_corpus_range e
+shard_ranges).
 """
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 from loguru import logger
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.models import Legislation, LegislationChunk, TrainingCorpus
-from app.services.text_processor import text_processor
+
+# Perguntas geradas quando o chunk contém alguma das palavras-chave
+KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "quem_sujeito": ("sujeito", "obrigado"),
+    "qual_pena": ("pena", "multa", "sanção"),
+    "quando_vigor": ("vigor", "vigência"),
+}
+_KEYWORD_QUESTIONS = (
+    ("quem_sujeito", "Quem está sujeito à {law}?"),
+    ("qual_pena", "Qual a pena prevista na {law}?"),
+    ("quando_vigor", "Quando a {law} entra em vigor?"),
+)
+
+
+def keyword_flags(content: str) -> FrozenSet[str]:
+    """Tipos de pergunta por palavra-chave presentes no texto (minúsculas calculadas uma vez)"""
+    lowered = content.lower()
+    return frozenset(
+        question_type for question_type, words in KEYWORDS.items()
+        if any(word in lowered for word in words)
+    )
 
 
 class CorpusBuilder:
@@ -18,85 +46,48 @@ class CorpusBuilder:
     def generate_qa_pairs(
         self,
         chunk: LegislationChunk,
-        legislation: Legislation
+        legislation: Legislation,
+        flags: Optional[FrozenSet[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Gerar pares pergunta-resposta a partir de um chunk
         
         Args:
-            chunk: Chunk de legislação
-            legislation: Legislação completa
+            chunk: Chunk de legislação (ou linha com os mesmos campos)
+            legislation: Legislação completa (ou linha com type, number, year, title)
+            flags: Palavras-chave do chunk (padrão: keyword_flags do conteúdo)
             
         Returns:
             Lista de pares pergunta-resposta
         """
-        qa_pairs = []
         content = chunk.normalized_content or chunk.content
+        if flags is None:
+            flags = keyword_flags(content)
+        law = f"{legislation.type} {legislation.number}/{legislation.year}"
+        source = f"Art. {chunk.chunk_number}"
+        questions = []
         
-        # 1. Pergunta: "O que diz o artigo X?"
         if chunk.chunk_type == "article" and chunk.chunk_number:
-            qa_pairs.append({
-                "question": f"O que diz o artigo {chunk.chunk_number} da {legislation.type} {legislation.number}/{legislation.year}?",
-                "answer": content,
-                "answer_source": f"Art. {chunk.chunk_number}",
-                "question_type": "o_que_diz"
-            })
-        
-        # 2. Pergunta: "Qual o conteúdo do artigo X?"
-        if chunk.chunk_type == "article" and chunk.chunk_number:
-            qa_pairs.append({
-                "question": f"Qual o conteúdo do artigo {chunk.chunk_number}?",
-                "answer": content,
-                "answer_source": f"Art. {chunk.chunk_number}",
-                "question_type": "qual_conteudo"
-            })
-        
-        # 3. Pergunta: "Sobre o que trata esta lei?"
-        if chunk.chunk_type == "article" and chunk.chunk_number == "1":
-            qa_pairs.append({
-                "question": f"Sobre o que trata a {legislation.type} {legislation.number}/{legislation.year}?",
-                "answer": content,
-                "answer_source": f"Art. {chunk.chunk_number}",
-                "question_type": "sobre_que_trata"
-            })
-        
-        # 4. Pergunta: "Quem está sujeito a esta lei?"
-        if "sujeito" in content.lower() or "obrigado" in content.lower():
-            qa_pairs.append({
-                "question": f"Quem está sujeito à {legislation.type} {legislation.number}/{legislation.year}?",
-                "answer": content,
-                "answer_source": f"Art. {chunk.chunk_number}",
-                "question_type": "quem_sujeito"
-            })
-        
-        # 5. Pergunta: "Qual a pena/multa?"
-        if "pena" in content.lower() or "multa" in content.lower() or "sanção" in content.lower():
-            qa_pairs.append({
-                "question": f"Qual a pena prevista na {legislation.type} {legislation.number}/{legislation.year}?",
-                "answer": content,
-                "answer_source": f"Art. {chunk.chunk_number}",
-                "question_type": "qual_pena"
-            })
+            # 1. "O que diz o artigo X?"  2. "Qual o conteúdo do artigo X?"
+            questions.append((f"O que diz o artigo {chunk.chunk_number} da {law}?", "o_que_diz"))
+            questions.append((f"Qual o conteúdo do artigo {chunk.chunk_number}?", "qual_conteudo"))
+            # 3. "Sobre o que trata esta lei?"
+            if chunk.chunk_number == "1":
+                questions.append((f"Sobre o que trata a {law}?", "sobre_que_trata"))
         
-        # 6. Pergunta: "Quando esta lei entra em vigor?"
-        if "vigor" in content.lower() or "vigência" in content.lower():
-            qa_pairs.append({
-                "question": f"Quando a {legislation.type} {legislation.number}/{legislation.year} entra em vigor?",
-                "answer": content,
-                "answer_source": f"Art. {chunk.chunk_number}",
-                "question_type": "quando_vigor"
-            })
+        # 4-6. Perguntas por palavra-chave (quem está sujeito, pena, vigência)
+        for question_type, template in _KEYWORD_QUESTIONS:
+            if question_type in flags:
+                questions.append((template.format(law=law), question_type))
         
         # 7. Pergunta genérica baseada no título
         if legislation.title:
-            qa_pairs.append({
-                "question": f"O que é a {legislation.type} {legislation.number}/{legislation.year} sobre {legislation.title[:50]}?",
-                "answer": content,
-                "answer_source": f"Art. {chunk.chunk_number}",
-                "question_type": "o_que_e"
-            })
+            questions.append((f"O que é a {law} sobre {legislation.title[:50]}?", "o_que_e"))
         
-        return qa_pairs
+        return [
+            {"question": question, "answer": content, "answer_source": source, "question_type": question_type}
+            for question, question_type in questions
+        ]
     
     def build_corpus_from_legislation(
         self,
@@ -108,18 +99,18 @@ class CorpusBuilder:
         
         Args:
             legislation_id: ID da legislação
-            force_rebuild: Se True, recria mesmo se já existir
+            force_rebuild: Se True, gera os pares mesmo se já houver corpus
+                (só os que ainda não existem são inseridos)
             
         Returns:
             Estatísticas do corpus criado
         """
         try:
-            legislation = self.db.query(Legislation).filter_by(id=legislation_id).first()
-            if not legislation:
+            if not self.db.query(Legislation.id).filter_by(id=legislation_id).first():
                 raise ValueError(f"Legislação {legislation_id} não encontrada")
             
             # Verificar se já existe corpus
-            existing = self.db.query(TrainingCorpus).filter_by(
+            existing = self.db.query(TrainingCorpus.id).filter_by(
                 legislation_id=legislation_id
             ).first()
             
@@ -127,62 +118,22 @@ class CorpusBuilder:
                 logger.info(f"Corpus já existe para legislação {legislation_id}")
                 return {"status": "exists", "total": 0}
             
-            # Buscar chunks da legislação
-            chunks = self.db.query(LegislationChunk).filter_by(
-                legislation_id=legislation_id
-            ).all()
+            result = self._build([legislation_id])
+            self.db.commit()
             
-            if not chunks:
+            if not result["chunks"]:
                 logger.warning(f"Nenhum chunk encontrado para legislação {legislation_id}")
                 return {"status": "no_chunks", "total": 0}
             
-            # Gerar pares QA para cada chunk
-            total_pairs = 0
-            created_pairs = 0
-            
-            for chunk in chunks:
-                qa_pairs = self.generate_qa_pairs(chunk, legislation)
-                total_pairs += len(qa_pairs)
-                
-                for qa in qa_pairs:
-                    # Verificar se já existe
-                    existing = self.db.query(TrainingCorpus).filter_by(
-                        legislation_id=legislation_id,
-                        chunk_id=chunk.id,
-                        question=qa["question"]
-                    ).first()
-                    
-                    if existing and not force_rebuild:
-                        continue
-                    
-                    # Criar novo par
-                    corpus_entry = TrainingCorpus(
-                        legislation_id=legislation_id,
-                        chunk_id=chunk.id,
-                        question=qa["question"],
-                        answer=qa["answer"],
-                        answer_source=qa["answer_source"],
-                        question_type=qa["question_type"],
-                        meta_data={
-                            "chunk_type": chunk.chunk_type,
-                            "chunk_number": chunk.chunk_number
-                        }
-                    )
-                    
-                    self.db.add(corpus_entry)
-                    created_pairs += 1
-            
-            self.db.commit()
-            
             logger.info(
                 f"Corpus criado para legislação {legislation_id}: "
-                f"{created_pairs} pares criados de {total_pairs} gerados"
+                f"{result['total_created']} pares criados de {result['total_generated']} gerados"
             )
             
             return {
                 "status": "created",
-                "total_generated": total_pairs,
-                "total_created": created_pairs,
+                "total_generated": result["total_generated"],
+                "total_created": result["total_created"],
                 "legislation_id": legislation_id
             }
             
@@ -191,6 +142,133 @@ class CorpusBuilder:
             self.db.rollback()
             raise
     
+    def build_corpus_for_legislations(self, legislation_ids: List[int]) -> Dict[str, Any]:
+        """
+        Construir o corpus de um lote de legislações em uma transação
+
+        Legislações que já têm corpus são puladas; os chunks do lote são lidos
+        em uma consulta e os pares inseridos juntos.
+
+        Args:
+            legislation_ids: IDs das legislações
+
+        Returns:
+            Estatísticas e 'pending_embeddings': (id, pergunta) dos pares sem
+            embedding, novos ou de uma execução anterior interrompida
+        """
+        try:
+            with_corpus = {
+                legislation_id for (legislation_id,) in
+                self.db.query(TrainingCorpus.legislation_id).filter(
+                    TrainingCorpus.legislation_id.in_(legislation_ids)
+                ).distinct()
+            }
+            todo = [i for i in legislation_ids if i not in with_corpus]
+
+            result = self._build(todo, check_existing=False)
+            pending = result["created"]
+            self.db.commit()
+
+            if with_corpus:
+                pending.extend(
+                    self.db.query(TrainingCorpus.id, TrainingCorpus.question).filter(
+                        TrainingCorpus.legislation_id.in_(with_corpus),
+                        TrainingCorpus.embedding.is_(None)
+                    ).all()
+                )
+
+            return {
+                "processed": len(todo),
+                "skipped": len(with_corpus),
+                "total_generated": result["total_generated"],
+                "total_created": result["total_created"],
+                "pending_embeddings": [tuple(row) for row in pending]
+            }
+
+        except Exception as e:
+            logger.error(f"Erro ao construir corpus do lote: {str(e)}")
+            self.db.rollback()
+            raise
+
+    def build_corpus_range(
+        self,
+        start_id: int = 0,
+        end_id: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Construir o corpus das legislações com chunks em um intervalo de IDs
+
+        Um worker por intervalo (ver shard_ranges). Cada lote é uma
+        transação e só insere os pares que faltam, então um intervalo
+        interrompido pode ser executado de novo.
+
+        Args:
+            start_id: Primeiro ID de legislação (inclusive)
+            end_id: Último ID (exclusive; None = até o fim)
+            batch_size: Legislações por transação (padrão: PIPELINE_BATCH_SIZE)
+            progress: Chamado com o número de legislações processadas após cada lote
+
+        Returns:
+            Estatísticas: processed, total_generated, total_created
+        """
+        batch_size = batch_size or settings.PIPELINE_BATCH_SIZE
+        stats = {"processed": 0, "total_generated": 0, "total_created": 0}
+        last_id = start_id - 1
+        while True:
+            query = self.db.query(LegislationChunk.legislation_id).filter(
+                LegislationChunk.legislation_id > last_id
+            )
+            if end_id is not None:
+                query = query.filter(LegislationChunk.legislation_id < end_id)
+            ids = [row[0] for row in query.distinct().order_by(LegislationChunk.legislation_id).limit(batch_size)]
+            if not ids:
+                break
+            try:
+                result = self._build(ids)
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"Erro ao construir corpus das legislações {ids[0]}-{ids[-1]}: {str(e)}")
+                self.db.rollback()
+                raise
+            stats["processed"] += len(ids)
+            stats["total_generated"] += result["total_generated"]
+            stats["total_created"] += result["total_created"]
+            last_id = ids[-1]
+            if progress:
+                progress(stats["processed"])
+
+        logger.info(
+            f"Corpus das legislações [{start_id}, {end_id if end_id is not None else '∞'}): "
+            f"{stats['total_created']} pares criados em {stats['processed']} legislações")
+        return stats
+
+    def shard_ranges(self, shards: int) -> List[Tuple[int, Optional[int]]]:
+        """
+        Dividir as legislações com chunks em intervalos de IDs de tamanho parecido
+
+        Args:
+            shards: Número de intervalos
+
+        Returns:
+            Intervalos (início inclusive, fim exclusive; o último termina em None)
+        """
+        ids = select(LegislationChunk.legislation_id).distinct().subquery()
+        tiles = select(
+            ids.c.legislation_id,
+            func.ntile(max(shards, 1)).over(order_by=ids.c.legislation_id).label("shard")
+        ).subquery()
+        starts = [
+            row[0] for row in self.db.execute(
+                select(func.min(tiles.c.legislation_id)).group_by(tiles.c.shard).order_by(tiles.c.shard)
+            )
+        ]
+        return [
+            (start, starts[i + 1] if i + 1 < len(starts) else None)
+            for i, start in enumerate(starts)
+        ]
+
     def build_corpus_batch(
         self,
         legislation_ids: Optional[List[int]] = None,
@@ -199,6 +277,9 @@ class CorpusBuilder:
         """
         Construir corpus para múltiplas legislações
         
+        Legislações que já têm corpus são puladas; as demais são processadas
+        em lotes de PIPELINE_BATCH_SIZE (uma transação por lote).
+        
         Args:
             legislation_ids: Lista de IDs (None = todas)
             limit: Limite de legislações
@@ -207,25 +288,23 @@ class CorpusBuilder:
             Estatísticas gerais
         """
         try:
-            query = self.db.query(Legislation)
+            query = self.db.query(Legislation.id).order_by(Legislation.id)
             
             if legislation_ids:
                 query = query.filter(Legislation.id.in_(legislation_ids))
             
-            legislations = query.limit(limit).all()
+            ids = [row[0] for row in query.limit(limit)]
             
             total_created = 0
             total_generated = 0
-            processed = 0
-            
-            for legislation in legislations:
-                result = self.build_corpus_from_legislation(legislation.id)
-                total_created += result.get("total_created", 0)
-                total_generated += result.get("total_generated", 0)
-                processed += 1
+            size = settings.PIPELINE_BATCH_SIZE
+            for start in range(0, len(ids), size):
+                result = self.build_corpus_for_legislations(ids[start:start + size])
+                total_created += result["total_created"]
+                total_generated += result["total_generated"]
             
             return {
-                "processed": processed,
+                "processed": len(ids),
                 "total_generated": total_generated,
                 "total_created": total_created
             }
@@ -234,3 +313,73 @@ class CorpusBuilder:
             logger.error(f"Erro ao construir corpus em lote: {str(e)}")
             raise
 
+    def _build(self, legislation_ids: Iterable[int], check_existing: bool = True) -> Dict[str, Any]:
+        """
+        Gerar e inserir os pares de um lote de legislações (sem commit)
+
+        Args:
+            legislation_ids: IDs das legislações
+            check_existing: Carregar os pares (chunk_id, pergunta) já gravados
+                para não repeti-los (False quando o lote não tem corpus)
+
+        Returns:
+            chunks, total_generated, total_created e created: (id, pergunta)
+            dos pares inseridos
+        """
+        legislation_ids = list(legislation_ids)
+        if not legislation_ids:
+            return {"chunks": 0, "total_generated": 0, "total_created": 0, "created": []}
+
+        legislations = {
+            row.id: row for row in self.db.execute(
+                select(Legislation.id, Legislation.type, Legislation.number,
+                       Legislation.year, Legislation.title)
+                .where(Legislation.id.in_(legislation_ids))
+            )
+        }
+        chunks = self.db.execute(
+            select(LegislationChunk.id, LegislationChunk.legislation_id, LegislationChunk.chunk_type,
+                   LegislationChunk.chunk_number, LegislationChunk.content,
+                   LegislationChunk.normalized_content)
+            .where(LegislationChunk.legislation_id.in_(legislation_ids))
+            .order_by(LegislationChunk.legislation_id, LegislationChunk.id)
+        ).all()
+        existing: Set[Tuple[int, str]] = set()
+        if check_existing:
+            existing = set(self.db.execute(
+                select(TrainingCorpus.chunk_id, TrainingCorpus.question)
+                .where(TrainingCorpus.legislation_id.in_(legislation_ids))
+            ).tuples())
+
+        generated = 0
+        rows = []
+        for chunk in chunks:
+            for qa in self.generate_qa_pairs(chunk, legislations[chunk.legislation_id]):
+                generated += 1
+                key = (chunk.id, qa["question"])
+                if key in existing:
+                    continue
+                existing.add(key)
+                rows.append({
+                    "legislation_id": chunk.legislation_id,
+                    "chunk_id": chunk.id,
+                    **qa,
+                    "meta_data": {
+                        "chunk_type": chunk.chunk_type,
+                        "chunk_number": chunk.chunk_number
+                    }
+                })
+
+        created = []
+        if rows:
+            # INSERT em lote (múltiplos VALUES por comando); a pergunta volta junto com o ID
+            created = self.db.execute(
+                insert(TrainingCorpus).returning(TrainingCorpus.id, TrainingCorpus.question),
+                rows
+            ).all()
+        return {
+            "chunks": len(chunks),
+            "total_generated": generated,
+            "total_created": len(rows),
+            "created": [tuple(row) for row in created]
+        }
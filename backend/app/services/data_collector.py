@@ -2,7 +2,7 @@
 Serviço para coleta e armazenamento de dados legislativos
 """
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime
 from loguru import logger
 from sqlalchemy.orm import Session
@@ -16,7 +16,13 @@ from app.models.models import (
     DataCollectionJob,
     Base
 )
-from app.integrations.legislative_apis import lexml_client
+from app.integrations.legislative_apis import camara_client, lexml_client
+from app.integrations.pagination import batched
+from app.services.legislation_store import (
+    camara_proposition_fields,
+    legislation_store,
+    lexml_fields,
+)
 
 
 class DataCollector:
@@ -29,8 +35,10 @@ class DataCollector:
         self,
         year: Optional[int] = None,
         tipo_documento: Optional[str] = None,
-        limit: int = 100,
-        job_id: Optional[int] = None
+        limit: Optional[int] = 100,
+        job_id: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        on_stored: Optional[Callable[[List[int]], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         Coletar dados do LexML
@@ -38,105 +46,122 @@ class DataCollector:
         Args:
             year: Ano para filtrar
             tipo_documento: Tipo de documento (Lei, Projeto de Lei, etc)
-            limit: Limite de documentos
+            limit: Limite de documentos (None = todos os resultados)
             job_id: ID do job de coleta
+            progress: Chamada com o número de documentos processados após cada
+                página (uma exceção nela interrompe a coleta, ex: cancelamento)
+            on_stored: Corrotina chamada com os stable_id de cada página gravada
+                (o pipeline repassa às próximas etapas; a coleta espera por ela)
         """
         try:
             logger.info(
                 f"Iniciando coleta do LexML - tipo: {tipo_documento}, ano: {year}")
 
-            # Buscar documentos
+            # Documentos em streaming: a próxima página é baixada enquanto
+            # a atual é gravada (memória limitada a poucas páginas)
             if tipo_documento == "Projeto de Lei":
-                documents = await lexml_client.search_projects_of_law(
-                    year=year,
-                    limit=limit
-                )
+                documents = lexml_client.iter_projects_of_law(year=year, limit=limit)
             elif tipo_documento == "Lei":
-                documents = await lexml_client.search_laws(
-                    year=year,
-                    limit=limit
-                )
+                documents = lexml_client.iter_laws(year=year, limit=limit)
             else:
-                documents = await lexml_client.search_by_keywords(
+                documents = lexml_client.iter_by_keywords(
                     keywords="",
                     year=year,
                     tipo_documento=tipo_documento,
                     limit=limit
                 )
 
-            collected = 0
-            failed = 0
-
-            for doc in documents:
-                try:
-                    # Verificar se já existe
-                    existing = self.db.query(Legislation).filter(
-                        Legislation.external_id == doc.get("lexml_id")
-                    ).first()
-
-                    if existing:
-                        logger.debug(
-                            f"Documento {doc.get('lexml_id')} já existe, pulando")
-                        continue
-
-                    # Criar novo registro
-                    legislation = Legislation(
-                        external_id=doc.get("lexml_id", ""),
-                        source="lexml",
-                        type=doc.get("tipo_documento", "Documento"),
-                        number=self._extract_number(doc.get("title", "")),
-                        year=int(doc.get("date", datetime.now().year)),
-                        title=doc.get("title", ""),
-                        summary=doc.get("description", ""),
-                        full_text=None,  # Será preenchido depois
-                        author=doc.get("autoridade"),
-                        raw_data=doc,
-                        created_at=datetime.utcnow()
-                    )
-
-                    self.db.add(legislation)
-                    self.db.commit()
-                    collected += 1
-
-                    # Atualizar progresso do job
-                    if job_id:
-                        job = self.db.query(DataCollectionJob).filter_by(
-                            id=job_id).first()
-                        if job:
-                            job.processed_items = collected
-                            self.db.commit()
-
-                except Exception as e:
-                    logger.error(
-                        f"Erro ao salvar documento {doc.get('lexml_id')}: {str(e)}")
-                    failed += 1
-                    self.db.rollback()
-
+            result = await self._store_stream(documents, lexml_fields, job_id, progress, on_stored)
             logger.info(
-                f"Coleta do LexML concluída: {collected} coletados, {failed} falhas")
-            return {
-                "collected": collected,
-                "failed": failed,
-                "total": len(documents)
-            }
+                f"Coleta do LexML concluída: {result['collected']} coletados, "
+                f"{result['updated']} atualizados, {result['failed']} sem identificador")
+            return result
 
         except Exception as e:
             logger.error(f"Erro na coleta do LexML: {str(e)}")
             raise
 
+    async def collect_from_camara(
+        self,
+        year: Optional[int] = None,
+        sigla_tipo: Optional[str] = None,
+        limit: Optional[int] = 100,
+        job_id: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        on_stored: Optional[Callable[[List[int]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Coletar proposições da Câmara dos Deputados
 
-    def _extract_number(self, title: str) -> str:
-        """Extrair número do título (ex: 'PLS nº 489/2008' -> '489')"""
+        Args:
+            year: Ano das proposições
+            sigla_tipo: Tipo da proposição (PL, PEC, PLP, etc)
+            limit: Limite de proposições (None = todas)
+            job_id: ID do job de coleta
+            progress, on_stored: Ver collect_from_lexml
+        """
         try:
-            if "nº" in title or "Nº" in title:
-                parts = title.split(
-                    "nº") if "nº" in title else title.split("Nº")
-                if len(parts) > 1:
-                    number_part = parts[1].split("/")[0].strip()
-                    return number_part
-            return ""
-        except:
-            return ""
+            logger.info(
+                f"Iniciando coleta da Câmara - tipo: {sigla_tipo}, ano: {year}")
+
+            propositions = camara_client.iter_propositions(
+                year=year,
+                sigla_tipo=sigla_tipo,
+                limit=limit
+            )
+            result = await self._store_stream(
+                propositions,
+                lambda proposicao: camara_proposition_fields(proposicao, year),
+                job_id,
+                progress,
+                on_stored
+            )
+            logger.info(
+                f"Coleta da Câmara concluída: {result['collected']} coletadas, "
+                f"{result['updated']} atualizadas, {result['failed']} sem identificador")
+            return result
+
+        except Exception as e:
+            logger.error(f"Erro na coleta da Câmara: {str(e)}")
+            raise
+
+    async def _store_stream(
+        self,
+        records: AsyncIterator[Dict[str, Any]],
+        to_fields: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+        job_id: Optional[int],
+        progress: Optional[Callable[[int], None]],
+        on_stored: Optional[Callable[[List[int]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Gravar registros em streaming, um upsert em lote por página"""
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        total = 0
+        job = None
+        if job_id:
+            job = self.db.query(DataCollectionJob).filter_by(id=job_id).first()
+
+        async for batch in batched(records, settings.PAGINATION_PAGE_SIZE):
+            rows = [row for row in map(to_fields, batch) if row]
+            for key, value in legislation_store.upsert(rows, db=self.db).items():
+                counts[key] += value
+            counts["skipped"] += len(batch) - len(rows)
+            total += len(batch)
+            if on_stored and rows:
+                await on_stored([row["stable_id"] for row in rows])
+
+            # Atualizar progresso do job
+            if job:
+                job.processed_items = counts["created"]
+                self.db.commit()
+            if progress:
+                progress(total)
+
+        return {
+            "collected": counts["created"],
+            "updated": counts["updated"],
+            "failed": counts["skipped"],
+            "total": total
+        }
 
     def create_collection_job(
         self,
@@ -176,8 +201,16 @@ class DataCollector:
                     limit=job.parameters.get("limit", 100),
                     job_id=job_id
                 )
+            elif job.job_type == "camara":
+                result = await self.collect_from_camara(
+                    year=job.parameters.get("year"),
+                    sigla_tipo=job.parameters.get("sigla_tipo"),
+                    limit=job.parameters.get("limit", 100),
+                    job_id=job_id
+                )
             else:
-                raise ValueError(f"Tipo de job desconhecido: {job.job_type}. Apenas 'lexml' é suportado.")
+                raise ValueError(
+                    f"Tipo de job desconhecido: {job.job_type}. Use 'lexml' ou 'camara'.")
 
             job.status = "completed"
             job.completed_at = datetime.utcnow()
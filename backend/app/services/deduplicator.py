@@ -0,0 +1,389 @@
+"""
+Deduplicação de legislações entre fontes
+
+A mesma lei chega do LexML, do Senado e da Câmara com external_ids
+diferentes. Cada legislação vira uma assinatura MinHash dos shingles de
+palavras do texto normalizado; o LSH (assinatura dividida em faixas) só
+compara pares que colidem em alguma faixa, então o custo cresce
+linearmente com o número de legislações.
+
+Um par candidato de mesmo ano e número é duplicata se o Jaccard estimado
+passa de DEDUP_JACCARD_THRESHOLD, ou se fica entre DEDUP_CANDIDATE_THRESHOLD
+e esse valor e a média dos embeddings dos chunks das duas tem cosseno acima
+de DEDUP_EMBEDDING_THRESHOLD (mesmo texto com formatação diferente).
+
+Os grupos de duplicatas recebem um registro canônico (DEDUP_SOURCE_PRIORITY);
+os demais apontam para ele em Legislation.canonical_id, e seus chunks e
+pares do corpus são removidos (o pipeline não gera chunks de aliases).
+
+Como os chunks do alias são removidos, a prova por embeddings some depois
+da primeira execução. Um par da zona cinzenta já ligado por canonical_id
+fica ligado sem consultar os embeddings; a ligação só é desfeita se o
+texto deixar de sustentá-la (Jaccard abaixo de DEDUP_CANDIDATE_THRESHOLD
+ou número diferente). Assim, repetir a execução não muda nada.
+"""
+import time
+import unicodedata
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import LargeBinary, or_, type_coerce
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.vector_codec import decode_matrix
+from app.models.models import Legislation, LegislationChunk, TrainingCorpus
+
+# Primo de Mersenne 2^31 - 1: (a * x + b) cabe em 64 bits
+_PRIME = (1 << 31) - 1
+# Shingles por bloco no cálculo do MinHash (limita a memória em textos longos)
+_BLOCK = 4096
+# Comparações por faixa do LSH: em faixas muito cheias (textos-padrão), só os
+# primeiros registros; o union-find junta o resto do grupo por eles
+_MAX_BUCKET_COMPARISONS = 32
+# IDs por DELETE/consulta de embeddings
+_ID_CHUNK = 500
+
+
+def legislation_key(year: Optional[int], number: Optional[str]) -> Tuple[Optional[int], str]:
+    """Ano e dígitos do número ("8.078" e "8078" são a mesma lei)"""
+    return year, "".join(char for char in number or "" if char.isdigit()).lstrip("0")
+
+
+def normalize_for_dedup(text: str) -> List[str]:
+    """Palavras do texto em minúsculas, sem acentos e sem pontuação"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char if char.isalnum() else " " for char in text if not unicodedata.combining(char))
+    return text.split()
+
+
+class MinHasher:
+    """Assinaturas MinHash de shingles de palavras"""
+
+    def __init__(self, num_perm: Optional[int] = None, shingle_size: Optional[int] = None, seed: int = 1):
+        """
+        Args:
+            num_perm: Tamanho da assinatura (padrão: DEDUP_NUM_PERM)
+            shingle_size: Palavras por shingle (padrão: DEDUP_SHINGLE_SIZE)
+            seed: Semente das permutações (assinaturas só se comparam com a mesma)
+        """
+        self.num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.shingle_size = shingle_size or settings.DEDUP_SHINGLE_SIZE
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, self.num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, _PRIME, self.num_perm, dtype=np.uint64)[:, None]
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Hashes distintos (32 bits) dos shingles de palavras do texto"""
+        words = normalize_for_dedup(text)
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words),
+                             dtype=np.uint64, count=len(words))
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+        combined = np.zeros(count, dtype=np.uint64)
+        for offset in range(size):
+            combined = (combined * np.uint64(1000003) + hashes[offset:offset + count]) & np.uint64(0xFFFFFFFF)
+        return np.unique(combined)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Assinatura MinHash do texto
+
+        Returns:
+            Array uint32 de num_perm valores, ou None para texto vazio
+        """
+        shingles = self.shingles(text)
+        if not shingles.size:
+            return None
+        values = shingles % np.uint64(_PRIME)
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, len(values), _BLOCK):
+            block = values[start:start + _BLOCK][None, :]
+            np.minimum(signature, ((self._a * block + self._b) % np.uint64(_PRIME)).min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Fração de posições iguais das assinaturas (estimativa do Jaccard)"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class LSHIndex:
+    """Faixas da assinatura → registros com a mesma faixa"""
+
+    def __init__(self, num_perm: int, bands: int):
+        if num_perm % bands:
+            raise ValueError(f"{num_perm} permutações não se dividem em {bands} faixas")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+
+    def add(self, key: int, signature: np.ndarray) -> Set[int]:
+        """
+        Indexar a assinatura
+
+        Returns:
+            Registros já indexados que colidem com ela em alguma faixa
+        """
+        candidates: Set[int] = set()
+        for band, buckets in enumerate(self._buckets):
+            bucket = buckets.setdefault(signature[band * self.rows:(band + 1) * self.rows].tobytes(), [])
+            candidates.update(bucket[:_MAX_BUCKET_COMPARISONS])
+            bucket.append(key)
+        return candidates
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, item: int) -> int:
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a: int, b: int) -> None:
+        self.parent[self.find(a)] = self.find(b)
+
+    def groups(self) -> List[List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return [members for members in groups.values() if len(members) > 1]
+
+
+class Deduplicator:
+    """Agrupa legislações duplicadas entre fontes e liga os aliases ao registro canônico"""
+
+    def __init__(
+        self,
+        db_session: Session,
+        hasher: Optional[MinHasher] = None,
+        bands: Optional[int] = None,
+        jaccard_threshold: Optional[float] = None,
+        candidate_threshold: Optional[float] = None,
+        embedding_threshold: Optional[float] = None,
+        source_priority: Optional[Sequence[str]] = None,
+        require_same_number: Optional[bool] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Args:
+            db_session: Sessão do banco de dados
+            hasher: Gerador de assinaturas (padrão: MinHasher com DEDUP_NUM_PERM)
+            bands: Faixas do LSH (padrão: DEDUP_LSH_BANDS)
+            jaccard_threshold: Duplicata só pelo texto (padrão: DEDUP_JACCARD_THRESHOLD)
+            candidate_threshold: Menor Jaccard para consultar os embeddings
+                (padrão: DEDUP_CANDIDATE_THRESHOLD)
+            embedding_threshold: Cosseno mínimo dos embeddings (padrão: DEDUP_EMBEDDING_THRESHOLD)
+            source_priority: Ordem das fontes na escolha do canônico (padrão: DEDUP_SOURCE_PRIORITY)
+            require_same_number: Só juntar legislações de mesmo ano e número
+                (padrão: DEDUP_REQUIRE_SAME_NUMBER)
+            batch_size: Legislações por consulta (padrão: DEDUP_BATCH_SIZE)
+        """
+        self.db = db_session
+        self.hasher = hasher or MinHasher()
+        self.bands = bands or settings.DEDUP_LSH_BANDS
+        self.jaccard_threshold = jaccard_threshold or settings.DEDUP_JACCARD_THRESHOLD
+        self.candidate_threshold = candidate_threshold or settings.DEDUP_CANDIDATE_THRESHOLD
+        self.embedding_threshold = embedding_threshold or settings.DEDUP_EMBEDDING_THRESHOLD
+        self.source_priority = list(source_priority or settings.DEDUP_SOURCE_PRIORITY)
+        self.require_same_number = (settings.DEDUP_REQUIRE_SAME_NUMBER
+                                    if require_same_number is None else require_same_number)
+        self.batch_size = batch_size or settings.DEDUP_BATCH_SIZE
+
+    def run(
+        self,
+        prune_aliases: bool = True,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Deduplicar todas as legislações
+
+        Lê as legislações em lotes por id, indexa as assinaturas no LSH e
+        verifica só os pares que colidem. Repetir a execução recalcula os
+        grupos e grava apenas as mudanças de canonical_id; pares da zona
+        cinzenta já ligados são mantidos (os embeddings do alias foram
+        removidos na execução anterior).
+
+        Args:
+            prune_aliases: Remover chunks e pares do corpus dos aliases
+            progress: Chamado com o número de legislações lidas após cada lote
+
+        Returns:
+            Estatísticas: legislations, candidate_pairs, number_mismatches,
+            text_duplicates, embedding_duplicates, clusters, aliases, updated, chunks_removed,
+            corpus_removed, seconds
+        """
+        started = time.perf_counter()
+        stats = {
+            "legislations": 0,
+            "candidate_pairs": 0,
+            "number_mismatches": 0,
+            "text_duplicates": 0,
+            "embedding_duplicates": 0,
+            "clusters": 0,
+            "aliases": 0,
+            "updated": 0,
+            "chunks_removed": 0,
+            "corpus_removed": 0,
+        }
+
+        rank: Dict[int, Tuple[int, int, int]] = {}
+        current: Dict[int, int] = {}
+        signatures = np.empty((0, self.hasher.num_perm), dtype=np.uint32)
+        ids: List[int] = []
+        keys: List[Tuple[Optional[int], str]] = []
+        index = LSHIndex(self.hasher.num_perm, self.bands)
+        clusters = _UnionFind()
+        gray_pairs: List[Tuple[int, int]] = []
+
+        for rows in self._batches():
+            batch = []
+            for legislation_id, source, year, number, title, summary, full_text, canonical_id in rows:
+                if canonical_id is not None:
+                    current[legislation_id] = canonical_id
+                rank[legislation_id] = (self._source_rank(source), 0 if full_text else 1, legislation_id)
+                text = "\n".join(part for part in (summary or title, full_text) if part)
+                signature = self.hasher.signature(text)
+                if signature is not None:
+                    batch.append((legislation_id, legislation_key(year, number), signature))
+
+            if len(ids) + len(batch) > len(signatures):
+                # Capacidade dobrada: cópias amortizadas em tempo linear
+                grown = np.empty((max(2 * len(signatures), len(ids) + len(batch)), self.hasher.num_perm),
+                                 dtype=np.uint32)
+                grown[:len(ids)] = signatures[:len(ids)]
+                signatures = grown
+            for legislation_id, key, signature in batch:
+                position = len(ids)
+                signatures[position] = signature
+                ids.append(legislation_id)
+                keys.append(key)
+                for other in index.add(position, signature):
+                    stats["candidate_pairs"] += 1
+                    if self.require_same_number and keys[other] != key:
+                        # Leis diferentes com texto parecido (ex.: denominação de rodovias)
+                        stats["number_mismatches"] += 1
+                        continue
+                    similarity = estimated_jaccard(signature, signatures[other])
+                    if similarity >= self.jaccard_threshold:
+                        stats["text_duplicates"] += 1
+                        clusters.union(legislation_id, ids[other])
+                    elif similarity >= self.candidate_threshold:
+                        gray_pairs.append((legislation_id, ids[other]))
+
+            stats["legislations"] += len(rows)
+            if progress:
+                progress(stats["legislations"])
+
+        # Zona cinzenta: pares já no mesmo grupo mantêm a ligação; os demais
+        # dependem dos embeddings
+        linked = [(a, b) for a, b in gray_pairs if current.get(a, a) == current.get(b, b)]
+        unlinked = [(a, b) for a, b in gray_pairs if current.get(a, a) != current.get(b, b)]
+        for a, b in linked + self._embedding_matches(unlinked):
+            stats["embedding_duplicates"] += 1
+            clusters.union(a, b)
+
+        aliases: Dict[int, int] = {}
+        for members in clusters.groups():
+            canonical = min(members, key=rank.__getitem__)
+            aliases.update({member: canonical for member in members if member != canonical})
+            stats["clusters"] += 1
+        stats["aliases"] = len(aliases)
+
+        changes = [
+            {"id": legislation_id, "canonical_id": aliases.get(legislation_id)}
+            for legislation_id in set(current) | set(aliases)
+            if current.get(legislation_id) != aliases.get(legislation_id)
+        ]
+        try:
+            for start in range(0, len(changes), self.batch_size):
+                self.db.bulk_update_mappings(Legislation, changes[start:start + self.batch_size])
+            stats["updated"] = len(changes)
+            if prune_aliases and aliases:
+                stats["corpus_removed"], stats["chunks_removed"] = self._prune(sorted(aliases))
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Erro ao gravar a deduplicação: {str(e)}")
+            self.db.rollback()
+            raise
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"Deduplicação: {stats['legislations']} legislações, {stats['candidate_pairs']} pares "
+            f"comparados, {stats['clusters']} grupos, {stats['aliases']} aliases "
+            f"({stats['seconds']}s)")
+        return stats
+
+    def _batches(self):
+        """Legislações em lotes por id (sem carregar a tabela inteira)"""
+        last_id = 0
+        while True:
+            rows = (
+                self.db.query(Legislation.id, Legislation.source, Legislation.year, Legislation.number,
+                              Legislation.title, Legislation.summary, Legislation.full_text,
+                              Legislation.canonical_id)
+                .filter(Legislation.id > last_id)
+                .order_by(Legislation.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def _source_rank(self, source: str) -> int:
+        try:
+            return self.source_priority.index(source)
+        except ValueError:
+            return len(self.source_priority)
+
+    def _embedding_matches(self, pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Pares cuja média dos embeddings dos chunks tem cosseno acima do limite"""
+        if not pairs:
+            return []
+        wanted = sorted({legislation_id for pair in pairs for legislation_id in pair})
+        blobs: Dict[int, List[bytes]] = {}
+        raw = type_coerce(LegislationChunk.embedding, LargeBinary)
+        for start in range(0, len(wanted), _ID_CHUNK):
+            rows = self.db.query(LegislationChunk.legislation_id, raw).filter(
+                LegislationChunk.legislation_id.in_(wanted[start:start + _ID_CHUNK]),
+                LegislationChunk.embedding.is_not(None)
+            )
+            for legislation_id, blob in rows:
+                blobs.setdefault(legislation_id, []).append(bytes(blob))
+
+        centroids: Dict[int, np.ndarray] = {}
+        for legislation_id, values in blobs.items():
+            centroid = decode_matrix(values).mean(axis=0)
+            norm = np.linalg.norm(centroid)
+            if norm > 0:
+                centroids[legislation_id] = centroid / norm
+        return [
+            (a, b) for a, b in pairs
+            if a in centroids and b in centroids
+            and float(centroids[a] @ centroids[b]) >= self.embedding_threshold
+        ]
+
+    def _prune(self, alias_ids: List[int]) -> Tuple[int, int]:
+        """Remover pares do corpus e chunks dos aliases (o canônico já tem os seus)"""
+        corpus_removed = chunks_removed = 0
+        for start in range(0, len(alias_ids), _ID_CHUNK):
+            part = alias_ids[start:start + _ID_CHUNK]
+            alias_chunks = self.db.query(LegislationChunk.id).filter(
+                LegislationChunk.legislation_id.in_(part))
+            corpus_removed += self.db.query(TrainingCorpus).filter(or_(
+                TrainingCorpus.legislation_id.in_(part),
+                TrainingCorpus.chunk_id.in_(alias_chunks.scalar_subquery())
+            )).delete(synchronize_session=False)
+            chunks_removed += self.db.query(LegislationChunk).filter(
+                LegislationChunk.legislation_id.in_(part)
+            ).delete(synchronize_session=False)
+        return corpus_removed, chunks_removed
@@ -0,0 +1,217 @@
+"""
+Cache persistente de embeddings por conteúdo
+
+Chave: (nome do modelo, sha256 do texto normalizado). Perguntas geradas
+por modelo ("Qual o conteúdo do artigo 1?") se repetem em toda lei, e
+refazer o chunking de uma lei gera os mesmos textos: com o cache cada texto
+distinto é codificado uma vez por modelo.
+
+Os vetores ficam em um arquivo SQLite (float32 em BLOB, tabela sem rowid),
+compartilhado entre processos (workers do Celery) no modo WAL.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from app.core.metrics import record_cache
+
+# Lote máximo de chaves por consulta (limite de parâmetros do SQLite)
+_LOOKUP_CHUNK = 500
+
+
+def text_key(text: str) -> bytes:
+    """sha256 do texto com espaços normalizados"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).digest()
+
+
+def _pack(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _unpack(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class EmbeddingCache:
+    """Vetores de embeddings em SQLite, por modelo e hash do texto"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Arquivo do cache (":memory:" para um cache só deste processo)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão deste processo (aberta no primeiro uso e de novo após um fork)"""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        conn.commit()
+        self._conn, self._pid = conn, os.getpid()
+        return conn
+
+    def get_many(self, model: str, keys: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Vetores em cache para as chaves (as ausentes ficam fora do resultado)
+
+        Args:
+            model: Nome do modelo
+            keys: Chaves (text_key)
+
+        Returns:
+            Dicionário chave → vetor
+        """
+        keys = list(keys)
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                part = keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *part]
+                )
+                for key, blob in rows:
+                    found[bytes(key)] = _unpack(blob)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[bytes, np.ndarray]) -> None:
+        """
+        Gravar vetores (substitui os já existentes)
+
+        Args:
+            model: Nome do modelo
+            vectors: Dicionário chave → vetor
+        """
+        if not vectors:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, key, _pack(vector)) for key, vector in vectors.items()]
+            )
+            conn.commit()
+
+    def count(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            conn = self._connection()
+            if model is None:
+                return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return conn.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+def encode_with_cache(
+    texts: List[str],
+    encode: Callable[[List[str]], Optional[np.ndarray]],
+    model: str,
+    cache: Optional[EmbeddingCache] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> np.ndarray:
+    """
+    Codificar textos só uma vez cada: repetidos no lote e os já em cache são reaproveitados
+
+    Args:
+        texts: Textos na ordem de saída
+        encode: Codifica uma lista de textos distintos (array float32; None se falhar)
+        model: Nome do modelo (parte da chave do cache)
+        cache: Cache persistente (None = só deduplicação no lote)
+        stats: Contadores acumulados (texts, unique, cache_hits, encoded)
+
+    Returns:
+        Array float32 (len(texts) x dimensão) na ordem de entrada; linhas
+        de textos que não puderam ser codificados ficam com NaN
+    """
+    keys = [text_key(text) for text in texts]
+    unique: Dict[bytes, int] = {}
+    for key in keys:
+        unique.setdefault(key, len(unique))
+    first_text: Dict[bytes, str] = {}
+    for key, text in zip(keys, texts):
+        first_text.setdefault(key, text)
+
+    cached: Dict[bytes, np.ndarray] = {}
+    if cache is not None and unique:
+        try:
+            cached = cache.get_many(model, unique)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache de embeddings indisponível: {str(e)}")
+
+    missing = [key for key in unique if key not in cached]
+    fresh = encode([first_text[key] for key in missing]) if missing else None
+    if fresh is not None and cache is not None:
+        try:
+            cache.put_many(model, dict(zip(missing, fresh)))
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao gravar cache de embeddings: {str(e)}")
+
+    if fresh is not None and fresh.size:
+        dimension = fresh.shape[1]
+    elif cached:
+        dimension = len(next(iter(cached.values())))
+    else:
+        dimension = 0
+    matrix = np.full((len(unique), dimension), np.nan, dtype=np.float32)
+    for key, vector in cached.items():
+        matrix[unique[key]] = vector
+    if fresh is not None and fresh.size:
+        matrix[[unique[key] for key in missing]] = fresh
+
+    if cache is not None:
+        record_cache("embeddings", hits=len(cached), misses=len(missing))
+    if stats is not None:
+        stats["texts"] = stats.get("texts", 0) + len(texts)
+        stats["unique"] = stats.get("unique", 0) + len(unique)
+        stats["cache_hits"] = stats.get("cache_hits", 0) + len(cached)
+        stats["encoded"] = stats.get("encoded", 0) + len(missing)
+    return matrix[[unique[key] for key in keys]]
+
+
+def cache_report(stats: Dict[str, int]) -> Dict[str, Optional[float]]:
+    """
+    Contadores de encode_with_cache com as taxas de deduplicação e de acerto
+
+    dedup_ratio: fração dos textos que não precisou ser codificada
+    (repetida no lote ou já em cache).
+    """
+    texts = stats.get("texts", 0)
+    unique = stats.get("unique", 0)
+    return {
+        **stats,
+        "dedup_ratio": round(1 - stats.get("encoded", 0) / texts, 3) if texts else None,
+        "batch_dedup_ratio": round(1 - unique / texts, 3) if texts else None,
+        "cache_hit_ratio": round(stats.get("cache_hits", 0) / unique, 3) if unique else None,
+    }
@@ -0,0 +1,200 @@
+"""
+Motor de embeddings em CPU: lotes por comprimento e backends quantizados
+
+O custo de um lote no transformer é proporcional a (textos x maior texto do
+lote), porque os menores são completados com padding. Os textos são
+ordenados pelo número de tokens e agrupados em lotes com um orçamento de
+tokens com padding: lotes de textos curtos ficam grandes, os de textos
+longos ficam pequenos, e quase não há padding.
+
+Os vetores saem em um único array float32 contíguo (textos x dimensão), na
+ordem de entrada, sem conversão para listas.
+
+Backends (EMBEDDING_BACKEND):
+- torch: SentenceTransformer padrão
+- onnx: ONNX Runtime (requer sentence-transformers[onnx])
+- onnx-int8: ONNX Runtime com o modelo quantizado em int8 (EMBEDDING_ONNX_INT8_FILE)
+Sem o ONNX Runtime, onnx e onnx-int8 usam o torch.
+"""
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDING_AVAILABLE = True
+except ImportError:
+    EMBEDDING_AVAILABLE = False
+    logger.warning("sentence-transformers não disponível. Embeddings desabilitados.")
+
+try:
+    import onnxruntime  # noqa: F401
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+@lru_cache(maxsize=4)
+def load_embedding_model(model_name: str, backend: str = "torch") -> Optional[Any]:
+    """
+    Carregar modelo SentenceTransformer em CPU (uma única instância por modelo e backend)
+
+    Args:
+        model_name: Nome do modelo no Hugging Face
+        backend: torch, onnx ou onnx-int8
+
+    Returns:
+        Modelo carregado ou None se indisponível
+    """
+    if not EMBEDDING_AVAILABLE:
+        return None
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de embeddings desconhecido: {backend}")
+    if backend != "torch" and not ONNX_AVAILABLE:
+        logger.warning(f"onnxruntime não instalado: backend {backend} substituído por torch")
+        backend = "torch"
+
+    kwargs = {}
+    if backend != "torch":
+        kwargs["backend"] = "onnx"
+    if backend == "onnx-int8":
+        kwargs["model_kwargs"] = {"file_name": settings.EMBEDDING_ONNX_INT8_FILE}
+    try:
+        logger.info(f"Carregando modelo de embeddings: {model_name} ({backend})")
+        return SentenceTransformer(model_name, device="cpu", **kwargs)
+    except Exception as e:
+        if backend != "torch":
+            logger.warning(f"Backend {backend} indisponível para {model_name}: {str(e)}")
+            return load_embedding_model(model_name, "torch")
+        logger.error(f"Erro ao carregar modelo de embeddings: {str(e)}")
+        return None
+
+
+def word_count_length(texts: Sequence[str]) -> List[int]:
+    """Estimativa de tokens sem tokenizador (subpalavras: ~1,5 por palavra)"""
+    return [int(len(text.split()) * 1.5) + 2 for text in texts]
+
+
+def token_lengths(model: Any, texts: Sequence[str]) -> List[int]:
+    """
+    Número de tokens de cada texto, limitado ao máximo do modelo
+
+    Usa o tokenizador do modelo quando houver; senão, word_count_length.
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+    max_length = getattr(model, "max_seq_length", None) or 512
+    if tokenizer is None:
+        return [min(length, max_length) for length in word_count_length(texts)]
+    encoded = tokenizer(list(texts), add_special_tokens=True, truncation=True, max_length=max_length)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def length_buckets(
+    lengths: Sequence[int],
+    batch_size: int,
+    max_batch_tokens: int
+) -> List[List[int]]:
+    """
+    Agrupar índices em lotes de comprimento parecido
+
+    Os índices são ordenados do maior para o menor texto; cada lote cresce
+    até batch_size textos ou até (textos x maior comprimento) passar de
+    max_batch_tokens.
+
+    Args:
+        lengths: Tokens de cada texto
+        batch_size: Máximo de textos por lote
+        max_batch_tokens: Máximo de tokens com padding por lote
+
+    Returns:
+        Lotes de índices dos textos
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+    for index in order:
+        longest_if_added = max(longest, lengths[index])
+        if current and (
+            len(current) >= batch_size
+            or (len(current) + 1) * longest_if_added > max_batch_tokens
+        ):
+            buckets.append(current)
+            current, longest_if_added = [], lengths[index]
+        current.append(index)
+        longest = longest_if_added
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def padding_efficiency(lengths: Sequence[int], buckets: Sequence[Sequence[int]]) -> float:
+    """Fração dos tokens processados que não é padding"""
+    padded = sum(len(bucket) * max(lengths[i] for i in bucket) for bucket in buckets if bucket)
+    return sum(lengths) / padded if padded else 1.0
+
+
+class EmbeddingEngine:
+    """Gera embeddings em lotes por comprimento, devolvendo um array float32"""
+
+    def __init__(
+        self,
+        model: Any,
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        bucketing: bool = True,
+        length_fn: Optional[Callable[[Sequence[str]], List[int]]] = None
+    ):
+        """
+        Args:
+            model: Modelo com a interface do SentenceTransformer (encode)
+            batch_size: Máximo de textos por lote (padrão: EMBEDDING_BATCH_SIZE)
+            max_batch_tokens: Tokens com padding por lote (padrão: EMBEDDING_MAX_BATCH_TOKENS)
+            bucketing: False = lotes fixos na ordem de entrada (comportamento antigo)
+            length_fn: Comprimento dos textos (padrão: tokenizador do modelo)
+        """
+        self.model = model
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_MAX_BATCH_TOKENS
+        self.bucketing = bucketing
+        self.length_fn = length_fn or (lambda texts: token_lengths(self.model, texts))
+
+    def batches(self, texts: Sequence[str], batch_size: Optional[int] = None) -> List[List[int]]:
+        """Lotes de índices que serão enviados ao modelo"""
+        batch_size = batch_size or self.batch_size
+        if not self.bucketing:
+            return [list(range(start, min(start + batch_size, len(texts))))
+                    for start in range(0, len(texts), batch_size)]
+        return length_buckets(self.length_fn(texts), batch_size, self.max_batch_tokens)
+
+    def encode(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Gerar embeddings
+
+        Args:
+            texts: Textos
+            batch_size: Máximo de textos por lote (padrão: o do motor)
+
+        Returns:
+            Array float32 contíguo (len(texts) x dimensão), na ordem de entrada
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        output: Optional[np.ndarray] = None
+        for bucket in self.batches(texts, batch_size):
+            vectors = self.model.encode(
+                [texts[i] for i in bucket],
+                batch_size=len(bucket),
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[bucket] = vectors
+        return output
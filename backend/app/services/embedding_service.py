@@ -1,44 +1,58 @@
 """
 Serviço para gerar embeddings de textos legislativos
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import numpy as np
 from loguru import logger
+from sqlalchemy import LargeBinary, select, type_coerce
 from sqlalchemy.orm import Session
 
-try:
-    from sentence_transformers import SentenceTransformer
-    EMBEDDING_AVAILABLE = True
-except ImportError:
-    EMBEDDING_AVAILABLE = False
-    logger.warning("sentence-transformers não disponível. Embeddings desabilitados.")
-
+from app.core.config import settings
+from app.core.vector_codec import decode_matrix
 from app.models.models import LegislationChunk, TrainingCorpus
+from app.services.embedding_cache import EmbeddingCache, cache_report, encode_with_cache
+from app.services.embedding_engine import EMBEDDING_AVAILABLE, EmbeddingEngine, load_embedding_model
 
 
 class EmbeddingService:
     """Serviço para gerar embeddings usando modelos de linguagem"""
     
-    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(
+        self,
+        model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+        model: Optional[Any] = None,
+        cache: Optional[EmbeddingCache] = None,
+        backend: Optional[str] = None
+    ):
         """
         Inicializar serviço de embeddings
         
         Args:
             model_name: Nome do modelo SentenceTransformer
+            model: Modelo já carregado (None = carregar model_name)
+            cache: Cache de embeddings por conteúdo (padrão: EMBEDDING_CACHE_PATH,
+                se EMBEDDING_CACHE_ENABLED)
+            backend: torch, onnx ou onnx-int8 (padrão: EMBEDDING_BACKEND)
         """
-        self.model = None
+        self.model = model
         self.model_name = model_name
-        
-        if EMBEDDING_AVAILABLE:
-            try:
-                logger.info(f"Carregando modelo de embeddings: {model_name}")
-                self.model = SentenceTransformer(model_name)
+        if cache is None and settings.EMBEDDING_CACHE_ENABLED:
+            cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH)
+        self.cache = cache
+        # Contadores acumulados do cache (texts, unique, cache_hits, encoded)
+        self.stats: Dict[str, int] = {}
+        self.backend = backend or settings.EMBEDDING_BACKEND
+        # Vetores do modelo quantizado diferem um pouco dos originais: chave própria no cache
+        self.cache_model = f"{model_name}@int8" if self.backend == "onnx-int8" else model_name
+
+        if model is None and EMBEDDING_AVAILABLE:
+            self.model = load_embedding_model(model_name, self.backend)
+            if self.model is not None:
                 logger.info("Modelo de embeddings carregado com sucesso")
-            except Exception as e:
-                logger.error(f"Erro ao carregar modelo de embeddings: {str(e)}")
-                self.model = None
-        else:
+        elif model is None:
             logger.warning("sentence-transformers não disponível")
+        # Lotes por comprimento em tokens, saída em array float32
+        self.engine = EmbeddingEngine(self.model) if self.model is not None else None
     
     def generate_embedding(self, text: str) -> Optional[List[float]]:
         """
@@ -68,37 +82,75 @@ class EmbeddingService:
             logger.error(f"Erro ao gerar embedding: {str(e)}")
             return None
     
+    def generate_embeddings_array(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Gerar embeddings como um array float32 (textos x dimensão)
+        
+        Textos repetidos no lote são codificados uma vez, e os já codificados
+        por este modelo vêm do cache (ver app/services/embedding_cache.py).
+        Os demais vão ao modelo em lotes por comprimento (EmbeddingEngine).
+
+        Args:
+            texts: Lista de textos
+            batch_size: Máximo de textos por lote do modelo (padrão: EMBEDDING_BATCH_SIZE)
+            stats: Contadores do cache acumulados pelo chamador (ex.: por execução do pipeline)
+            
+        Returns:
+            Array na ordem dos textos (linhas com NaN se a geração falhar),
+            ou None sem modelo
+        """
+        if not self.model:
+            return None
+
+        call_stats: Dict[str, int] = {}
+        embeddings = encode_with_cache(
+            texts,
+            lambda unique: self._encode(unique, batch_size),
+            self.cache_model,
+            cache=self.cache,
+            stats=call_stats
+        )
+        for counters in (self.stats, stats):
+            if counters is not None:
+                for key, value in call_stats.items():
+                    counters[key] = counters.get(key, 0) + value
+        return embeddings
+
     def generate_embeddings_batch(
         self,
         texts: List[str],
-        batch_size: int = 32
+        batch_size: Optional[int] = None,
+        stats: Optional[Dict[str, int]] = None
     ) -> List[Optional[List[float]]]:
         """
-        Gerar embeddings para múltiplos textos
+        Gerar embeddings para múltiplos textos, como listas (respostas da API)
         
         Args:
             texts: Lista de textos
-            batch_size: Tamanho do lote
+            batch_size: Máximo de textos por lote do modelo
+            stats: Contadores do cache (ver generate_embeddings_array)
             
         Returns:
-            Lista de embeddings
+            Lista de embeddings (None onde a geração falhou)
         """
-        if not self.model:
+        embeddings = self.generate_embeddings_array(texts, batch_size, stats)
+        if embeddings is None or embeddings.shape[1] == 0:
             return [None] * len(texts)
-        
+        valid = ~np.isnan(embeddings).any(axis=1)
+        return [row if ok else None for row, ok in zip(embeddings.tolist(), valid)]
+
+    def _encode(self, texts: List[str], batch_size: Optional[int]) -> Optional[np.ndarray]:
+        """Codificar com o modelo (textos distintos, fora do cache)"""
         try:
-            embeddings = self.model.encode(
-                texts,
-                batch_size=batch_size,
-                convert_to_numpy=True,
-                show_progress_bar=True
-            )
-            
-            return [emb.tolist() for emb in embeddings]
-            
+            return self.engine.encode(texts, batch_size)
         except Exception as e:
             logger.error(f"Erro ao gerar embeddings em lote: {str(e)}")
-            return [None] * len(texts)
+            return None
     
     def update_chunk_embeddings(
         self,
@@ -131,13 +183,16 @@ class EmbeddingService:
                 return {"updated": 0, "total": 0}
             
             texts = [chunk.normalized_content or chunk.content for chunk in chunks]
-            embeddings = self.generate_embeddings_batch(texts)
+            cache_stats: Dict[str, int] = {}
+            embeddings = self.generate_embeddings_array(texts, stats=cache_stats)
             
             updated = 0
-            for chunk, embedding in zip(chunks, embeddings):
-                if embedding:
-                    chunk.embedding = embedding
-                    updated += 1
+            if embeddings is not None and embeddings.shape[1]:
+                valid = ~np.isnan(embeddings).any(axis=1)
+                for chunk, embedding, ok in zip(chunks, embeddings, valid):
+                    if ok:
+                        chunk.embedding = embedding
+                        updated += 1
             
             db_session.commit()
             
@@ -145,7 +200,8 @@ class EmbeddingService:
             
             return {
                 "updated": updated,
-                "total": len(chunks)
+                "total": len(chunks),
+                "embedding_cache": cache_report(cache_stats)
             }
             
         except Exception as e:
@@ -184,13 +240,16 @@ class EmbeddingService:
                 return {"updated": 0, "total": 0}
             
             questions = [entry.question for entry in corpus_entries]
-            embeddings = self.generate_embeddings_batch(questions)
+            cache_stats: Dict[str, int] = {}
+            embeddings = self.generate_embeddings_array(questions, stats=cache_stats)
             
             updated = 0
-            for entry, embedding in zip(corpus_entries, embeddings):
-                if embedding:
-                    entry.embedding = embedding
-                    updated += 1
+            if embeddings is not None and embeddings.shape[1]:
+                valid = ~np.isnan(embeddings).any(axis=1)
+                for entry, embedding, ok in zip(corpus_entries, embeddings, valid):
+                    if ok:
+                        entry.embedding = embedding
+                        updated += 1
             
             db_session.commit()
             
@@ -198,7 +257,8 @@ class EmbeddingService:
             
             return {
                 "updated": updated,
-                "total": len(corpus_entries)
+                "total": len(corpus_entries),
+                "embedding_cache": cache_report(cache_stats)
             }
             
         except Exception as e:
@@ -206,10 +266,37 @@ class EmbeddingService:
             db_session.rollback()
             raise
     
+    def load_embeddings(
+        self,
+        db_session: Session,
+        model: Any = LegislationChunk,
+        ids: Optional[Sequence[int]] = None
+    ) -> Tuple[List[int], np.ndarray]:
+        """
+        Carregar embeddings gravados em uma matriz float32
+        
+        Lê os bytes da coluna direto (sem um array por linha) e monta a
+        matriz com um único np.frombuffer quando os vetores têm o mesmo formato.
+        
+        Args:
+            db_session: Sessão do banco de dados
+            model: LegislationChunk ou TrainingCorpus
+            ids: IDs a carregar (None = todos com embedding)
+            
+        Returns:
+            IDs e matriz (len(ids) x dimensão), na mesma ordem
+        """
+        raw = type_coerce(model.embedding, LargeBinary)
+        query = select(model.id, raw).where(model.embedding.is_not(None)).order_by(model.id)
+        if ids is not None:
+            query = query.where(model.id.in_(list(ids)))
+        rows = db_session.execute(query).all()
+        return [row[0] for row in rows], decode_matrix([bytes(row[1]) for row in rows])
+
     def find_similar(
         self,
         query_text: str,
-        embeddings: List[List[float]],
+        embeddings: Sequence[Any],
         texts: List[str],
         top_k: int = 5
     ) -> List[Dict[str, Any]]:
@@ -218,7 +305,7 @@ class EmbeddingService:
         
         Args:
             query_text: Texto de consulta
-            embeddings: Lista de embeddings dos textos
+            embeddings: Embeddings dos textos (listas ou arrays, como lidos da coluna)
             texts: Lista de textos originais
             top_k: Número de resultados
             
@@ -235,8 +322,8 @@ class EmbeddingService:
             # Calcular similaridade (cosine similarity)
             similarities = []
             for emb, text in zip(embeddings, texts):
-                if emb:
-                    emb_array = np.array(emb)
+                if emb is not None and len(emb):
+                    emb_array = np.asarray(emb, dtype=np.float32)
                     similarity = np.dot(query_embedding, emb_array) / (
                         np.linalg.norm(query_embedding) * np.linalg.norm(emb_array)
                     )
@@ -0,0 +1,425 @@
+"""
+Coleta incremental e retomável dos catálogos do LexML e do Senado
+
+Cada fonte (feed) é paginada por ano. A posição da coleta (ano, página ou
+startRecord, maior data vista) fica na tabela harvest_cursors e é gravada na
+mesma transação de cada página de registros: após uma queda, a coleta
+recomeça da primeira página ainda não gravada.
+
+As páginas de um ano são baixadas com concorrência limitada
+(HARVEST_CONCURRENCY), mas gravadas em ordem, uma a uma, direto no banco:
+a memória fica limitada à janela de páginas em voo.
+
+No modo delta, só entram os anos a partir da última execução concluída (e,
+no Senado, só os registros com data a partir dela).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.integrations.legislative_apis import lexml_client
+from app.integrations.senado_api import senado_client
+from app.models.models import HarvestCursor
+from app.services.legislation_store import (
+    LegislationStore,
+    legislation_store,
+    lexml_fields,
+    senado_materia_fields,
+    senado_norma_fields,
+)
+
+
+@dataclass
+class HarvestPage:
+    """Página de uma fonte: registros e, se a fonte informar, o total do ano"""
+    records: List[Dict[str, Any]]
+    total: Optional[int] = None
+
+
+class HarvestFeed:
+    """Fonte paginada por ano (base para LexML e Senado)"""
+
+    name = ""
+    first_position = 1
+
+    def __init__(self, page_size: Optional[int] = None, requests_per_second: Optional[float] = None):
+        """
+        Inicializar fonte
+
+        Args:
+            page_size: Registros por página (padrão: HARVEST_PAGE_SIZE)
+            requests_per_second: Limite de requisições por segundo (None = sem limite)
+        """
+        self.page_size = page_size or settings.HARVEST_PAGE_SIZE
+        self._min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_request_at = 0.0
+
+    def next_position(self, position: int) -> int:
+        """Posição da página seguinte (padrão: número da página)"""
+        return position + 1
+
+    def past_end(self, position: int, total: Optional[int]) -> bool:
+        """A posição está além do total de registros do ano?"""
+        return False
+
+    async def throttle(self) -> None:
+        """Espaçar as requisições conforme requests_per_second"""
+        if not self._min_interval:
+            return
+        now = time.monotonic()
+        wait = self._next_request_at - now
+        self._next_request_at = max(now, self._next_request_at) + self._min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def fetch_page(self, year: int, position: int, since: Optional[datetime]) -> HarvestPage:
+        """Baixar uma página (erros são propagados)"""
+        raise NotImplementedError
+
+    def to_fields(self, record: Dict[str, Any], year: int) -> Optional[Dict[str, Any]]:
+        """Colunas de Legislation para um registro"""
+        raise NotImplementedError
+
+    def record_date(self, record: Dict[str, Any]) -> Optional[str]:
+        """Data do registro (para o cursor last_modified)"""
+        return None
+
+
+class LexMLFeed(HarvestFeed):
+    """Documentos do LexML de um tipo (SRU paginado por startRecord)"""
+
+    def __init__(self, name: str, tipo_documento: str, client: Any = None, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.tipo_documento = tipo_documento
+        self.client = client or lexml_client
+
+    def next_position(self, position: int) -> int:
+        return position + self.page_size
+
+    def past_end(self, position: int, total: Optional[int]) -> bool:
+        return total is not None and position > total
+
+    async def fetch_page(self, year: int, position: int, since: Optional[datetime]) -> HarvestPage:
+        # O SRU não filtra por data de alteração: o delta do LexML é por ano
+        await self.throttle()
+        query = f'tipoDocumento="{self.tipo_documento}" and urn="{year}"'
+        result = await self.client.search(
+            query,
+            start_record=position,
+            maximum_records=self.page_size,
+            raise_errors=True
+        )
+        return HarvestPage(records=result.get("records", []), total=result.get("total"))
+
+    def to_fields(self, record: Dict[str, Any], year: int) -> Optional[Dict[str, Any]]:
+        return lexml_fields(record)
+
+    def record_date(self, record: Dict[str, Any]) -> Optional[str]:
+        return record.get("date")
+
+
+class SenadoFeed(HarvestFeed):
+    """Normas ou matérias do Senado (paginadas por número de página)"""
+
+    def __init__(self, name: str, kind: str, client: Any = None, **kwargs):
+        kwargs.setdefault("requests_per_second", 8.0)  # API: mais de 10 req/s retorna HTTP 429
+        super().__init__(**kwargs)
+        self.name = name
+        self.kind = kind  # norma ou materia
+        self.client = client or senado_client
+
+    async def fetch_page(self, year: int, position: int, since: Optional[datetime]) -> HarvestPage:
+        await self.throttle()
+        params = {
+            "ano": year,
+            "pagina": position,
+            "quantidade": self.page_size,
+            "raise_errors": True,
+        }
+        if since is not None:
+            params["data_inicio"] = since.strftime("%Y%m%d")
+            params["data_fim"] = datetime.now().strftime("%Y%m%d")
+
+        if self.kind == "norma":
+            result = await self.client.listar_normas(**params)
+            return HarvestPage(records=result.get("normas", []))
+        # Todas as matérias, em tramitação ou não
+        result = await self.client.listar_materias(tramitando=None, **params)
+        return HarvestPage(records=result.get("materias", []))
+
+    def to_fields(self, record: Dict[str, Any], year: int) -> Optional[Dict[str, Any]]:
+        if self.kind == "norma":
+            return senado_norma_fields(record, year)
+        return senado_materia_fields(record, year)
+
+    def record_date(self, record: Dict[str, Any]) -> Optional[str]:
+        return record.get("data")
+
+
+def default_feeds() -> Dict[str, HarvestFeed]:
+    """Fontes coletadas por padrão, pelo nome do cursor"""
+    feeds = [
+        LexMLFeed("lexml_leis", "Lei"),
+        LexMLFeed("lexml_projetos", "Projeto de Lei"),
+        SenadoFeed("senado_normas", "norma"),
+        SenadoFeed("senado_materias", "materia"),
+    ]
+    return {feed.name: feed for feed in feeds}
+
+
+class Harvester:
+    """Coleta paginada com cursor persistido, concorrência limitada e modo delta"""
+
+    def __init__(
+        self,
+        store: Optional[LegislationStore] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_delay_seconds: float = 1.0
+    ):
+        """
+        Inicializar coletor
+
+        Args:
+            store: Armazenamento de legislações (padrão: legislation_store)
+            session_factory: Fábrica de sessões do banco (padrão: SessionLocal)
+            concurrency: Páginas baixadas ao mesmo tempo por fonte (padrão: HARVEST_CONCURRENCY)
+            max_retries: Tentativas por página (padrão: HARVEST_MAX_RETRIES)
+            retry_delay_seconds: Espera antes da 2ª tentativa (dobra a cada nova tentativa)
+        """
+        self.store = store or legislation_store
+        self._session_factory = session_factory
+        self.concurrency = max(1, concurrency or settings.HARVEST_CONCURRENCY)
+        self.max_retries = max(1, max_retries or settings.HARVEST_MAX_RETRIES)
+        self.retry_delay_seconds = retry_delay_seconds
+
+    def _db(self) -> Session:
+        if self._session_factory is None:
+            # Import tardio: não cria engine ao importar o módulo
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _load_cursor(self, db: Session, feed_name: str) -> HarvestCursor:
+        cursor = db.query(HarvestCursor).filter(HarvestCursor.feed == feed_name).first()
+        if cursor is None:
+            cursor = HarvestCursor(feed=feed_name, mode="full", status="idle", records_harvested=0)
+            db.add(cursor)
+            db.flush()
+        return cursor
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Estado de todos os cursores"""
+        db = self._db()
+        try:
+            return [
+                {
+                    "feed": cursor.feed,
+                    "mode": cursor.mode,
+                    "status": cursor.status,
+                    "year": cursor.year,
+                    "end_year": cursor.end_year,
+                    "position": cursor.position,
+                    "since": cursor.since,
+                    "last_modified": cursor.last_modified,
+                    "records_harvested": cursor.records_harvested,
+                    "last_success_at": cursor.last_success_at,
+                    "error_message": cursor.error_message,
+                }
+                for cursor in db.query(HarvestCursor).order_by(HarvestCursor.feed)
+            ]
+        finally:
+            db.close()
+
+    async def run(
+        self,
+        feed: HarvestFeed,
+        mode: str = "full",
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None,
+        restart: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Coletar uma fonte, retomando a execução interrompida se houver
+
+        Args:
+            feed: Fonte a coletar
+            mode: 'full' (todos os anos) ou 'delta' (só o que mudou desde a
+                última execução concluída)
+            start_year: Primeiro ano no modo full (padrão: HARVEST_START_YEAR)
+            end_year: Último ano (padrão: ano atual)
+            restart: Ignorar a execução interrompida e começar de novo
+
+        Returns:
+            Resumo {'feed', 'mode', 'status', 'records', 'created', 'updated', ...}
+        """
+        if mode not in ("full", "delta"):
+            raise ValueError(f"Modo de coleta desconhecido: {mode}")
+
+        summary: Dict[str, Any] = {
+            "feed": feed.name, "mode": mode, "status": "running", "records": 0,
+            "created": 0, "updated": 0, "unchanged": 0, "skipped": 0,
+        }
+        db = self._db()
+        try:
+            cursor = self._load_cursor(db, feed.name)
+            resume = (
+                not restart
+                and cursor.status in ("running", "failed")
+                and cursor.mode == mode
+                and cursor.year is not None
+            )
+            if mode == "delta" and not resume and cursor.last_success_at is None:
+                logger.info(f"[{feed.name}] Nenhuma coleta concluída ainda: executando coleta completa")
+                mode = summary["mode"] = "full"
+
+            if resume:
+                logger.info(
+                    f"[{feed.name}] Retomando coleta {mode} em {cursor.year}, posição {cursor.position}")
+            else:
+                cursor.mode = mode
+                cursor.since = cursor.last_success_at if mode == "delta" else None
+                cursor.year = cursor.since.year if mode == "delta" else (start_year or settings.HARVEST_START_YEAR)
+                cursor.end_year = end_year or datetime.now().year
+                cursor.position = feed.first_position
+                cursor.records_harvested = 0
+                cursor.started_at = datetime.utcnow()
+                logger.info(f"[{feed.name}] Coleta {mode} de {cursor.year} a {cursor.end_year}")
+            cursor.status = "running"
+            cursor.error_message = None
+            db.commit()
+
+            try:
+                while cursor.year <= cursor.end_year:
+                    await self._harvest_year(feed, cursor, db, summary)
+                    cursor.year += 1
+                    cursor.position = feed.first_position
+                    await asyncio.to_thread(db.commit)
+            except Exception as e:
+                # O cursor volta à última página gravada
+                db.rollback()
+                cursor.status = "failed"
+                cursor.error_message = str(e)
+                db.commit()
+                summary["status"] = "failed"
+                summary["error"] = str(e)
+                logger.error(
+                    f"[{feed.name}] Coleta interrompida em {cursor.year}, posição {cursor.position}: {str(e)}")
+                return summary
+
+            cursor.status = "completed"
+            cursor.last_success_at = cursor.started_at
+            db.commit()
+            summary["status"] = "completed"
+            logger.info(f"[{feed.name}] Coleta concluída: {summary}")
+            return summary
+        finally:
+            db.close()
+
+    async def run_many(self, feeds: Iterable[HarvestFeed], **kwargs) -> List[Dict[str, Any]]:
+        """Coletar várias fontes ao mesmo tempo (argumentos de run)"""
+        return list(await asyncio.gather(*(self.run(feed, **kwargs) for feed in feeds)))
+
+    async def _fetch(
+        self,
+        feed: HarvestFeed,
+        year: int,
+        position: int,
+        since: Optional[datetime]
+    ) -> HarvestPage:
+        attempt = 0
+        while True:
+            try:
+                return await feed.fetch_page(year, position, since)
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_delay_seconds * (2 ** (attempt - 1))
+                logger.warning(
+                    f"[{feed.name}] Erro na página {position} de {year} ({str(e)}); "
+                    f"nova tentativa em {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _harvest_year(
+        self,
+        feed: HarvestFeed,
+        cursor: HarvestCursor,
+        db: Session,
+        summary: Dict[str, Any]
+    ) -> None:
+        """Baixar as páginas do ano em uma janela limitada e gravá-las em ordem"""
+        year, since = cursor.year, cursor.since
+        pending: "OrderedDict[int, asyncio.Future]" = OrderedDict()
+        next_position = cursor.position
+        total: Optional[int] = None
+        # Primeira página sozinha: descobre o total (LexML) antes de abrir a janela
+        window = 1
+        finished = False
+        try:
+            while True:
+                while not finished and len(pending) < window and not feed.past_end(next_position, total):
+                    pending[next_position] = asyncio.ensure_future(
+                        self._fetch(feed, year, next_position, since))
+                    next_position = feed.next_position(next_position)
+                if not pending:
+                    return
+
+                position, task = pending.popitem(last=False)
+                page = await task
+                window = self.concurrency
+                if page.total is not None:
+                    total = page.total
+
+                if page.records:
+                    await asyncio.to_thread(
+                        self._write_page, db, feed, cursor, page, feed.next_position(position), summary)
+
+                if len(page.records) < feed.page_size:
+                    # Última página do ano: páginas já pedidas depois dela são descartadas
+                    finished = True
+                    for extra in pending.values():
+                        extra.cancel()
+                    pending.clear()
+        finally:
+            for task in pending.values():
+                task.cancel()
+
+    def _write_page(
+        self,
+        db: Session,
+        feed: HarvestFeed,
+        cursor: HarvestCursor,
+        page: HarvestPage,
+        next_position: int,
+        summary: Dict[str, Any]
+    ) -> None:
+        """Gravar os registros e avançar o cursor na mesma transação"""
+        counts = self.store.upsert(
+            (feed.to_fields(record, cursor.year) for record in page.records),
+            db=db,
+            commit=False
+        )
+        dates = [date for date in map(feed.record_date, page.records) if date]
+        if dates:
+            cursor.last_modified = max([cursor.last_modified or ""] + [str(date) for date in dates])
+        cursor.position = next_position
+        cursor.records_harvested = (cursor.records_harvested or 0) + len(page.records)
+        db.commit()
+
+        summary["records"] += len(page.records)
+        for key, value in counts.items():
+            summary[key] += value
+
+
+# Instância global
+harvester = Harvester()
@@ -0,0 +1,453 @@
+"""
+Fila de jobs de coleta e do pipeline
+
+Os endpoints só gravam o job em data_collection_jobs e enfileiram uma tarefa
+no Celery (app/celery_app.py); os workers executam JobQueue.execute e
+registram o progresso no próprio job. A latência da API não depende do
+tamanho da coleta, e a ingestão escala com o número de workers.
+
+- Prioridade: 0 (mais urgente) a 9, repassada ao broker
+- Limite por fonte: um job só passa para "running" se a fonte tiver menos
+  de JOB_SOURCE_CONCURRENCY jobs rodando (UPDATE condicional, com as
+  reservas da mesma fonte serializadas por um advisory lock no
+  PostgreSQL); senão a tarefa volta para a fila após JOB_DEFER_SECONDS
+- Novas tentativas: erros de rede/banco devolvem o job para a fila com
+  espera exponencial, até JOB_MAX_RETRIES
+- Cancelamento: jobs pendentes são descartados pelo worker; jobs em
+  execução param no próximo registro de progresso (fim de cada página)
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+from loguru import logger
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.models.models import DataCollectionJob
+
+# Erros transitórios: o job volta para a fila
+RETRYABLE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError, OperationalError)
+
+ProgressCallback = Callable[[int], None]
+JobRunner = Callable[[Session, Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]
+
+
+class JobCancelled(Exception):
+    """Cancelamento pedido durante a execução do job"""
+
+
+class JobDeferred(Exception):
+    """Fonte no limite de jobs simultâneos: tentar de novo depois de delay segundos"""
+
+    def __init__(self, delay: float):
+        super().__init__(f"fonte ocupada, nova tentativa em {delay}s")
+        self.delay = delay
+
+
+class JobRetry(Exception):
+    """Erro transitório: o job voltou para a fila e roda de novo após delay segundos"""
+
+    def __init__(self, delay: float, error: BaseException):
+        super().__init__(f"{error} (nova tentativa em {delay}s)")
+        self.delay = delay
+        self.error = error
+
+
+async def _collect_lexml(db: Session, parameters: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.data_collector import DataCollector
+    return await DataCollector(db).collect_from_lexml(
+        year=parameters.get("year"),
+        tipo_documento=parameters.get("tipo_documento"),
+        limit=parameters.get("limit", 100),
+        progress=progress
+    )
+
+
+async def _collect_camara(db: Session, parameters: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.data_collector import DataCollector
+    return await DataCollector(db).collect_from_camara(
+        year=parameters.get("year"),
+        sigla_tipo=parameters.get("sigla_tipo"),
+        limit=parameters.get("limit", 100),
+        progress=progress
+    )
+
+
+async def _run_pipeline(db: Session, parameters: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.pipeline_service import PipelineService
+    return await PipelineService(db).run_full_pipeline(
+        source=parameters.get("source", "lexml"),
+        year=parameters.get("year"),
+        tipo_documento=parameters.get("tipo_documento"),
+        limit=parameters.get("limit", 50),
+        progress=progress
+    )
+
+
+async def _build_corpus(db: Session, parameters: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.corpus_builder import CorpusBuilder
+    return CorpusBuilder(db).build_corpus_range(
+        start_id=parameters.get("start_id", 0),
+        end_id=parameters.get("end_id"),
+        progress=progress
+    )
+
+
+async def _run_dedup(db: Session, parameters: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.deduplicator import Deduplicator
+    return Deduplicator(db).run(
+        prune_aliases=parameters.get("prune_aliases", True),
+        progress=progress
+    )
+
+
+# Execução de cada tipo de job
+DEFAULT_RUNNERS: Dict[str, JobRunner] = {
+    "lexml": _collect_lexml,
+    "camara": _collect_camara,
+    "pipeline": _run_pipeline,
+    "corpus": _build_corpus,
+    "dedup": _run_dedup,
+}
+
+
+def job_to_dict(job: DataCollectionJob) -> Dict[str, Any]:
+    """Representação do job na API"""
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "source": job.source,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "cancel_requested": bool(job.cancel_requested),
+        "parameters": job.parameters,
+        "total_items": job.total_items,
+        "processed_items": job.processed_items,
+        "failed_items": job.failed_items,
+        "error_message": job.error_message,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at
+    }
+
+
+class JobQueue:
+    """Enfileiramento e execução de jobs com prioridade, limites por fonte, retry e cancelamento"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        runners: Optional[Dict[str, JobRunner]] = None,
+        source_limits: Optional[Dict[str, int]] = None,
+        max_retries: Optional[int] = None,
+        retry_delay_seconds: Optional[float] = None,
+        defer_seconds: Optional[float] = None
+    ):
+        """
+        Inicializar fila
+
+        Args:
+            session_factory: Fábrica de sessões do banco (padrão: SessionLocal)
+            runners: Execução por tipo de job (padrão: lexml, camara e pipeline)
+            source_limits: Jobs simultâneos por fonte (padrão: JOB_SOURCE_CONCURRENCY)
+            max_retries: Novas tentativas após erro transitório (padrão: JOB_MAX_RETRIES)
+            retry_delay_seconds: Espera antes da 1ª nova tentativa (padrão: JOB_RETRY_DELAY_SECONDS)
+            defer_seconds: Espera quando a fonte está no limite (padrão: JOB_DEFER_SECONDS)
+        """
+        self._session_factory = session_factory
+        self.runners = runners or DEFAULT_RUNNERS
+        self.source_limits = settings.JOB_SOURCE_CONCURRENCY if source_limits is None else source_limits
+        self.max_retries = settings.JOB_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay_seconds = (
+            settings.JOB_RETRY_DELAY_SECONDS if retry_delay_seconds is None else retry_delay_seconds
+        )
+        self.defer_seconds = settings.JOB_DEFER_SECONDS if defer_seconds is None else defer_seconds
+
+    def _db(self) -> Session:
+        if self._session_factory is None:
+            # Import tardio: não cria engine ao importar o módulo
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def source_limit(self, source: str) -> int:
+        """Jobs simultâneos permitidos para a fonte"""
+        return self.source_limits.get(source, settings.JOB_DEFAULT_CONCURRENCY)
+
+    # API
+
+    def submit(
+        self,
+        job_type: str,
+        parameters: Dict[str, Any],
+        priority: Optional[int] = None,
+        source: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Gravar o job e enfileirar sua execução
+
+        Args:
+            job_type: Tipo do job (lexml, camara, pipeline, corpus, dedup)
+            parameters: Parâmetros repassados à execução
+            priority: 0 (mais urgente) a 9 (padrão: JOB_DEFAULT_PRIORITY)
+            source: Fonte para o limite de concorrência (padrão: parameters['source'] ou job_type)
+
+        Returns:
+            Job como em job_to_dict
+        """
+        if job_type not in self.runners:
+            raise ValueError(f"Tipo de job desconhecido: {job_type}")
+        priority = settings.JOB_DEFAULT_PRIORITY if priority is None else min(max(priority, 0), 9)
+
+        db = self._db()
+        try:
+            job = DataCollectionJob(
+                job_type=job_type,
+                source=source or parameters.get("source") or job_type,
+                status="pending",
+                parameters=parameters,
+                priority=priority,
+                attempts=0,
+                cancel_requested=False,
+                created_at=datetime.utcnow()
+            )
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        finally:
+            db.close()
+
+        try:
+            task_id = self._dispatch(job_id, priority)
+        except Exception as e:
+            # Broker fora do ar: o job nunca seria executado, não deixá-lo pendente
+            self._finish(job_id, "failed", error=f"Erro ao enfileirar: {e}")
+            logger.error(f"Erro ao enfileirar job {job_id}: {str(e)}")
+            raise
+        db = self._db()
+        try:
+            if task_id:
+                db.query(DataCollectionJob).filter(DataCollectionJob.id == job_id).update(
+                    {DataCollectionJob.task_id: task_id}, synchronize_session=False
+                )
+                db.commit()
+            return job_to_dict(db.get(DataCollectionJob, job_id))
+        finally:
+            db.close()
+
+    def _dispatch(self, job_id: int, priority: int) -> Optional[str]:
+        """Enfileirar no Celery (ou executar em uma thread se o Celery não estiver instalado)"""
+        from app.celery_app import CELERY_AVAILABLE, run_job
+
+        if CELERY_AVAILABLE:
+            return run_job.apply_async(args=[job_id], priority=priority).id
+
+        logger.warning(f"Celery indisponível: job {job_id} executado no processo da API")
+        threading.Thread(target=self._run_local, args=(job_id,), daemon=True).start()
+        return None
+
+    def _run_local(self, job_id: int) -> None:
+        """Execução sem Celery: espera e tenta de novo no mesmo processo"""
+        while True:
+            try:
+                self.execute(job_id)
+                return
+            except (JobDeferred, JobRetry) as e:
+                time.sleep(e.delay)
+            except Exception:
+                return
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Job pelo ID (None se não existir)"""
+        db = self._db()
+        try:
+            job = db.get(DataCollectionJob, job_id)
+            return job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def cancel(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Cancelar um job
+
+        Pendente: cancelado na hora (o worker descarta a tarefa). Em execução:
+        para no próximo registro de progresso. Jobs já terminados não mudam.
+
+        Returns:
+            Job como em job_to_dict (None se não existir)
+        """
+        db = self._db()
+        try:
+            job = db.get(DataCollectionJob, job_id)
+            if job is None:
+                return None
+            if job.status == "pending":
+                job.status = "cancelled"
+                job.completed_at = datetime.utcnow()
+            if job.status in ("cancelled", "running"):
+                job.cancel_requested = True
+            db.commit()
+            return job_to_dict(job)
+        finally:
+            db.close()
+
+    # Worker
+
+    def execute(self, job_id: int, redelivered: bool = False) -> Dict[str, Any]:
+        """
+        Executar um job (chamado pela tarefa do Celery)
+
+        Args:
+            job_id: ID do job
+            redelivered: Mensagem reentregue após a perda do worker (job "running" volta a pendente)
+
+        Returns:
+            Resultado da execução, ou {'job_id', 'status'} se o job não foi executado
+
+        Raises:
+            JobDeferred: Fonte no limite de jobs simultâneos
+            JobRetry: Erro transitório; o job voltou para a fila
+        """
+        job = self._claim(job_id, redelivered)
+        if job is None:
+            return {"job_id": job_id, "status": self.get(job_id)["status"]}
+
+        logger.info(f"Job {job_id} ({job.job_type}) iniciado, tentativa {job.attempts}")
+        db = self._db()
+        try:
+            result = asyncio.run(self.runners[job.job_type](
+                db, job.parameters or {}, lambda processed: self._progress(job_id, processed)
+            ))
+        except JobCancelled:
+            db.rollback()
+            self._finish(job_id, "cancelled")
+            logger.info(f"Job {job_id} cancelado")
+            return {"job_id": job_id, "status": "cancelled"}
+        except RETRYABLE_ERRORS as e:
+            db.rollback()
+            if job.attempts <= self.max_retries:
+                delay = self.retry_delay_seconds * 2 ** (job.attempts - 1)
+                self._finish(job_id, "pending", error=str(e))
+                logger.warning(f"Job {job_id} falhou ({e}); nova tentativa em {delay}s")
+                raise JobRetry(delay, e)
+            self._finish(job_id, "failed", error=str(e))
+            raise
+        except Exception as e:
+            db.rollback()
+            self._finish(job_id, "failed", error=str(e))
+            logger.error(f"Job {job_id} falhou: {str(e)}")
+            raise
+        finally:
+            db.close()
+
+        self._finish(job_id, "completed", result=result)
+        logger.info(f"Job {job_id} concluído")
+        return result
+
+    def _claim(self, job_id: int, redelivered: bool) -> Optional[DataCollectionJob]:
+        """Passar o job para "running" se a fonte tiver vaga; None se não deve rodar"""
+        db = self._db()
+        try:
+            job = db.get(DataCollectionJob, job_id)
+            if job is None:
+                raise ValueError(f"Job {job_id} não encontrado")
+            if redelivered and job.status == "running":
+                job.status = "pending"
+                db.commit()
+            if job.status != "pending":
+                return None
+            if job.cancel_requested:
+                job.status = "cancelled"
+                job.completed_at = datetime.utcnow()
+                db.commit()
+                return None
+
+            # Vaga na fonte conferida e ocupada no mesmo UPDATE, uma reserva por vez por fonte
+            self._lock_source(db, job.source)
+            other = aliased(DataCollectionJob)
+            running = (
+                select(func.count(other.id))
+                .where(other.source == job.source, other.status == "running")
+                .scalar_subquery()
+            )
+            claimed = db.query(DataCollectionJob).filter(
+                DataCollectionJob.id == job_id,
+                DataCollectionJob.status == "pending",
+                DataCollectionJob.cancel_requested.isnot(True),
+                running < self.source_limit(job.source)
+            ).update({
+                DataCollectionJob.status: "running",
+                DataCollectionJob.started_at: datetime.utcnow(),
+                DataCollectionJob.attempts: func.coalesce(DataCollectionJob.attempts, 0) + 1,
+            }, synchronize_session=False)
+            db.commit()
+
+            db.refresh(job)
+            if claimed:
+                db.expunge(job)
+                return job
+            if job.status == "pending" and not job.cancel_requested:
+                raise JobDeferred(self.defer_seconds)
+            return None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _lock_source(db: Session, source: str) -> None:
+        """
+        Serializar as reservas de vaga da fonte até o fim da transação
+
+        No READ COMMITTED do PostgreSQL, dois workers reservando jobs
+        diferentes da mesma fonte contariam os jobs "running" sem ver a
+        reserva ainda não confirmada do outro, e ambos passariam do limite.
+        Com o advisory lock, o segundo espera o commit do primeiro e o seu
+        UPDATE (novo snapshot) já conta a reserva. No SQLite as escritas já
+        são serializadas pelo próprio banco.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:source))"), {"source": source})
+
+    def _progress(self, job_id: int, processed: int) -> None:
+        """Registrar progresso; interrompe o job se o cancelamento foi pedido"""
+        db = self._db()
+        try:
+            job = db.get(DataCollectionJob, job_id)
+            job.processed_items = processed
+            db.commit()
+            if job.cancel_requested:
+                raise JobCancelled(f"Job {job_id} cancelado")
+        finally:
+            db.close()
+
+    def _finish(
+        self,
+        job_id: int,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        db = self._db()
+        try:
+            job = db.get(DataCollectionJob, job_id)
+            job.status = status
+            job.error_message = error
+            if status != "pending":
+                job.completed_at = datetime.utcnow()
+            if result:
+                job.total_items = result.get("total", result.get("collected", 0))
+                job.processed_items = result.get("collected", job.processed_items)
+                job.failed_items = result.get("failed", 0)
+            db.commit()
+        finally:
+            db.close()
+
+
+# Instância global
+job_queue = JobQueue()
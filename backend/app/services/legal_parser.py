@@ -0,0 +1,216 @@
+"""
+Parser da estrutura de textos legais (artigo → parágrafo → inciso → alínea)
+
+Uma única varredura do texto normalizado encontra os rótulos ("Art. 5º",
+"§ 1º", "Parágrafo único", "IV -", "b)") e monta a árvore com as posições
+de cada dispositivo no texto. "Art." maiúsculo abre um artigo, inclusive
+logo depois de um título ("CAPÍTULO I DISPOSIÇÕES PRELIMINARES Art. 1º",
+"Seção I Dos Requisitos Art. 7º"), a não ser que venha depois de uma
+palavra de citação ("no Art. 5º", "nos termos do Art. 5º"); "art."
+minúsculo é sempre citação. Parágrafos só abrem dispositivo no início de
+uma frase. As citações são registradas na mesma varredura.
+
+Para documentos LexML em XML a estrutura vem do próprio XML
+(app/integrations/lexml_document.py); este parser é para texto corrido.
+"""
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+# Níveis da hierarquia: um rótulo fecha os dispositivos abertos de nível igual ou maior
+LEVELS = {"article": 0, "paragraph": 1, "inciso": 2, "alinea": 3}
+
+# Cada alternativa começa com um caractere fixo (A, a, §, P, espaço): o re
+# pula direto para os candidatos em vez de tentar todas as alternativas em
+# cada posição do texto
+_TOKEN = re.compile(
+    r"A(?<!\wA)rt(?:igo)?\.?\s*(?P<article>\d+(?:\.\d{3})*)\s*(?:[º°]|o\b)?"
+    r"(?:-(?P<article_suffix>[A-Z])\b)?\.?"
+    r"|a(?<!\wa)rt(?:igo)?\.?\s*(?P<cited_article>\d+(?:\.\d{3})*)\s*(?:[º°]|o\b)?"
+    r"(?:-(?P<cited_suffix>[A-Z])\b)?"
+    r"|§\s*(?P<paragraph>\d+)\s*[º°]?(?:-(?P<paragraph_suffix>[A-Z])\b)?"
+    r"|P(?P<sole_paragraph>arágrafo\s+único)\.?"
+    r"| (?<=[.;:] )(?:(?P<inciso>[IVXLCDM]+)\s*[-–—](?=\s)|(?P<alinea>[a-z])\)(?=\s))"
+)
+
+# Grupo que fecha por último no match → tipo do rótulo
+_KINDS = {
+    "article": "article",
+    "article_suffix": "article",
+    "cited_article": "cited_article",
+    "cited_suffix": "cited_article",
+    "paragraph": "paragraph",
+    "paragraph_suffix": "paragraph",
+    "sole_paragraph": "paragraph",
+    "inciso": "inciso",
+    "alinea": "alinea",
+}
+
+# Caracteres que terminam a frase anterior a um artigo ou parágrafo
+_BOUNDARY = frozenset('.;:)"”')
+
+# Caracteres e palavras que, logo antes de "Art.", fazem dele uma citação
+_CITATION_PUNCTUATION = frozenset(",(")
+_CITATION_WORDS = frozenset({
+    "o", "a", "os", "as", "no", "na", "nos", "nas", "do", "da", "dos", "das",
+    "ao", "aos", "pelo", "pela", "pelos", "pelas", "e", "ou", "com", "em", "de",
+    "conforme", "segundo", "vide", "referido", "mencionado", "citado", "caput",
+})
+
+
+@dataclass(slots=True)
+class LegalNode:
+    """Dispositivo do texto legal, com posições no texto do documento"""
+    type: str
+    number: str
+    label: str
+    start: int
+    body_start: int
+    end: int = 0
+    parent: Optional["LegalNode"] = field(default=None, repr=False)
+    children: List["LegalNode"] = field(default_factory=list, repr=False)
+
+    @property
+    def level(self) -> int:
+        return LEVELS[self.type]
+
+    def iter(self, node_type: Optional[str] = None) -> Iterator["LegalNode"]:
+        """Este dispositivo e os subordinados, na ordem do texto"""
+        if node_type is None or self.type == node_type:
+            yield self
+        for child in self.children:
+            yield from child.iter(node_type)
+
+    def path(self) -> List["LegalNode"]:
+        """Dispositivos superiores, do artigo até este"""
+        nodes = []
+        node: Optional[LegalNode] = self
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
+        return nodes[::-1]
+
+
+@dataclass
+class LegalDocument:
+    """Árvore de dispositivos e citações de um texto legal"""
+    text: str
+    articles: List[LegalNode]
+    citations: List[Dict[str, Any]]
+
+    def iter(self, node_type: Optional[str] = None) -> Iterator[LegalNode]:
+        """Todos os dispositivos (ou só os de um tipo), na ordem do texto"""
+        for article in self.articles:
+            yield from article.iter(node_type)
+
+    def body(self, node: LegalNode) -> str:
+        """Texto do dispositivo sem o rótulo, incluindo os subordinados"""
+        return self.text[node.body_start:node.end].strip()
+
+    def citations_in(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Citações dentro do intervalo [start, end) do texto"""
+        first = bisect_left(self._citation_starts, start)
+        last = bisect_left(self._citation_starts, end)
+        return self.citations[first:last]
+
+    def __post_init__(self):
+        self._citation_starts = [citation["start"] for citation in self.citations]
+
+
+def _starts_sentence(text: str, position: int) -> bool:
+    """Rótulo no início do texto ou de uma frase (e não uma citação)"""
+    while position > 0 and text[position - 1].isspace():
+        position -= 1
+    return position == 0 or text[position - 1] in _BOUNDARY
+
+
+def _opens_article(text: str, position: int) -> bool:
+    """"Art." maiúsculo abre artigo, salvo depois de uma palavra de citação"""
+    while position > 0 and text[position - 1].isspace():
+        position -= 1
+    if position == 0 or text[position - 1] in _BOUNDARY:
+        return True
+    if text[position - 1] in _CITATION_PUNCTUATION:
+        return False
+    # Palavra anterior: fim de um título ("PRELIMINARES", "Pessoais") ou citação ("no")
+    word_start = position
+    while word_start > 0 and not text[word_start - 1].isspace():
+        word_start -= 1
+    return text[word_start:position].lower() not in _CITATION_WORDS
+
+
+def _number(match: "re.Match", kind: str) -> str:
+    if kind == "article":
+        number, suffix = match.group("article", "article_suffix")
+    elif kind == "cited_article":
+        number, suffix = match.group("cited_article", "cited_suffix")
+    elif kind == "paragraph":
+        number, suffix = match.group("paragraph", "paragraph_suffix")
+        if number is None:
+            return "único"
+    else:
+        return match.group(kind)
+    number = number.replace(".", "")
+    return f"{number}-{suffix}" if suffix else number
+
+
+def parse_legal_text(text: str) -> LegalDocument:
+    """
+    Montar a árvore de dispositivos de um texto legal em uma varredura
+
+    O texto antes do primeiro artigo (ementa, preâmbulo) fica fora da
+    árvore. Incisos e alíneas só abrem dispositivo dentro de um artigo.
+
+    Args:
+        text: Texto da legislação (já normalizado)
+
+    Returns:
+        LegalDocument com os artigos, seus subordinados e as citações
+    """
+    articles: List[LegalNode] = []
+    citations: List[Dict[str, Any]] = []
+    stack: List[LegalNode] = []
+    levels: List[int] = []
+
+    for match in _TOKEN.finditer(text):
+        kind = _KINDS[match.lastgroup]
+        start, end = match.span()
+
+        if kind in ("inciso", "alinea"):
+            if not stack:
+                continue
+            start += 1  # espaço depois da pontuação
+            number = match.group(kind)
+        elif (kind == "cited_article"
+              or (kind == "article" and not _opens_article(text, start))
+              or (kind == "paragraph" and not _starts_sentence(text, start))):
+            citations.append({
+                "type": "paragraph" if kind == "paragraph" else "article",
+                "reference": match.group(0),
+                "number": _number(match, kind),
+                "start": start,
+                "end": end,
+            })
+            continue
+        elif kind == "paragraph" and not stack:
+            continue
+        else:
+            number = _number(match, kind)
+
+        level = LEVELS[kind]
+        while levels and levels[-1] >= level:
+            levels.pop()
+            stack.pop().end = start
+        parent = stack[-1] if stack else None
+        node = LegalNode(kind, number, text[start:end].rstrip(), start, end, 0, parent)
+        if parent is None:
+            articles.append(node)
+        else:
+            parent.children.append(node)
+        stack.append(node)
+        levels.append(level)
+
+    while stack:
+        stack.pop().end = len(text)
+    return LegalDocument(text=text, articles=articles, citations=citations)
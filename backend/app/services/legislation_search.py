@@ -3,26 +3,46 @@ Serviço unificado de busca de legislação
 
 Busca em múltiplas fontes (LexML, Senado, Câmara) e retorna resultados padronizados.
 """
+import asyncio
 from typing import List, Dict, Any, Optional
 from loguru import logger
 from datetime import datetime
+from opentelemetry.trace import StatusCode
 
+from app.core.config import settings
+from app.core.metrics import SEARCH_SOURCE_SECONDS, timed
+from app.core.tracing import traced, tracer
 from app.integrations.legislative_apis import (
     lexml_client,
     camara_client
 )
 from app.integrations.senado_api import senado_client
+from app.services.query_parser import ParsedQuery, parse_query
+from app.services.ranking import result_ranker
+from app.services.reranker import reranker
 
 
 class UnifiedLegislationSearch:
     """Serviço unificado para buscar legislação em múltiplas fontes"""
 
+    # Tipos de documento do parser -> tipos de norma do endpoint de legislação do Senado
+    SENADO_NORMA_TYPES = {
+        "LEI": "LEI",
+        "LCP": "LCP",
+        "MPV": "MPV",
+        "DEC": "DEC"
+    }
+
+    @traced("search.unified")
     async def search(
         self,
         query: str,
         limit: int = 10,  # Aumentar limite padrão
         sources: Optional[List[str]] = None,
-        year: Optional[int] = None
+        year: Optional[int] = None,
+        parsed: Optional[ParsedQuery] = None,
+        ranker: Optional[str] = None,
+        explain: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Buscar legislação em múltiplas fontes
@@ -36,6 +56,9 @@ class UnifiedLegislationSearch:
             sources: Fontes a buscar (None = todas)
                     Opções: 'lexml', 'senado', 'camara'
             year: Ano específico para buscar (opcional)
+            parsed: Consulta já analisada (evita reprocessar a mesma consulta)
+            ranker: Ranker usado na ordenação (None = SEARCH_RANKER)
+            explain: Incluir pontuação e detalhamento em cada resultado
 
         Returns:
             Lista de resultados padronizados (pode incluir resultados relacionados)
@@ -43,239 +66,202 @@ class UnifiedLegislationSearch:
         if sources is None:
             sources = ['lexml', 'senado', 'camara']
 
+        if parsed is None:
+            parsed = parse_query(query)
+
         # Aumentar limite para busca mais abrangente
         search_limit = max(limit, 10)
 
-        # Extrair ano da query se não foi fornecido
-        if year is None:
-            import re
-            year_match = re.search(r'\b(20\d{2})\b', query)
-            if year_match:
-                year = int(year_match.group(1))
-                logger.debug(f"Ano extraído da query: {year}")
+        # Usar ano extraído da query se não foi fornecido
+        if year is None and parsed.year:
+            year = parsed.year
+            logger.debug(f"Ano extraído da query: {year}")
 
         all_results = []
 
-        # Extrair número de lei se mencionado
-        import re
-        lei_pattern = re.search(
-            r'lei\s+(?:n[º°]|n\.?\s*)?\s*(\d+)', query, re.IGNORECASE)
-        lei_numero = lei_pattern.group(1) if lei_pattern else None
-
-        # Normalizar e expandir query para busca mais abrangente
-        query_lower = query.lower().strip()
-
-        # Remover palavras muito comuns que não ajudam na busca
-        stop_words = ['fale', 'me', 'sobre', 'de',
-                      'uma', 'lei', 'leis', 'o', 'a', 'os', 'as']
-        query_words = [w for w in query_lower.split(
-        ) if w not in stop_words and len(w) > 2]
-        clean_query = ' '.join(query_words) if query_words else query_lower
-
-        # Expandir termos comuns
-        expanded_query = query
-        if re.search(r'\bai\b', query_lower):
-            expanded_query = f"{clean_query} inteligência artificial"
-        elif re.search(r'\big\b', query_lower):
-            expanded_query = f"{clean_query} inteligência artificial"
-        elif 'inteligência artificial' in query_lower or 'inteligencia artificial' in query_lower:
-            expanded_query = f"{clean_query} IA"
-        else:
-            # Usar query limpa para busca mais focada
-            expanded_query = clean_query if clean_query != query_lower else query
+        # Número do documento citado (ex: "Lei nº 14.133")
+        lei_numero = parsed.number
+        # Busca direta por número só faz sentido para normas (leis, decretos, MPs)
+        norma_numero = lei_numero if parsed.doc_type in self.SENADO_NORMA_TYPES else None
+
+        # Query expandida para busca mais abrangente
+        expanded_query = parsed.expanded_query
 
         # Buscar no LexML
         if 'lexml' in sources:
-            try:
-                # Se mencionou número específico de lei, tentar buscar diretamente
-                if lei_numero and year:
-                    # Buscar leis do ano que contenham o número
-                    lexml_results = await lexml_client.search_laws(
-                        year=year,
-                        limit=limit * 2
-                    )
-                    # Filtrar por número
-                    lexml_results = [
-                        doc for doc in lexml_results
-                        if lei_numero in str(doc.get("title", "")) or
-                        lei_numero in str(doc.get("lexml_id", ""))
-                    ]
-                    # Se não encontrou, fazer busca genérica
-                    if not lexml_results:
+            with tracer.span("search.lexml") as span, timed(SEARCH_SOURCE_SECONDS, source="lexml") as timer:
+                try:
+                    # Se mencionou número específico de lei, tentar buscar diretamente
+                    if norma_numero and year:
+                        # Buscar leis do ano que contenham o número
+                        lexml_results = await lexml_client.search_laws(
+                            year=year,
+                            limit=limit * 2
+                        )
+                        # Filtrar por número
+                        lexml_results = [
+                            doc for doc in lexml_results
+                            if parsed.matches_number(str(doc.get("title", ""))) or
+                            parsed.matches_number(str(doc.get("lexml_id", "")))
+                        ]
+                        # Se não encontrou, fazer busca genérica
+                        if not lexml_results:
+                            lexml_results = await lexml_client.search_by_keywords(
+                                keywords=query,
+                                limit=limit
+                            )
+                    else:
                         lexml_results = await lexml_client.search_by_keywords(
                             keywords=query,
                             limit=limit
                         )
-                else:
-                    lexml_results = await lexml_client.search_by_keywords(
-                        keywords=query,
-                        limit=limit
-                    )
 
-                # Se tiver ano, priorizar resultados do ano mas não excluir outros
-                if year:
-                    results_with_year = []
-                    results_other_years = []
-                    for doc in lexml_results:
-                        doc_date = str(doc.get("date", "")) + \
-                            str(doc.get("dc:date", ""))
-                        if str(year) in doc_date:
-                            results_with_year.append(doc)
-                        else:
-                            results_other_years.append(doc)
-                    # Priorizar resultados do ano, mas incluir outros se não tiver muitos
-                    lexml_results = results_with_year + results_other_years[:5]
-
-                # Limitar resultados mas garantir que sempre retorne algo se encontrou
-                for doc in lexml_results[:search_limit]:
-                    all_results.append(self._normalize_lexml_result(doc))
-            except Exception as e:
-                logger.debug(f"Erro ao buscar no LexML: {str(e)}")
+                    # Se tiver ano, priorizar resultados do ano mas não excluir outros
+                    if year:
+                        results_with_year = []
+                        results_other_years = []
+                        for doc in lexml_results:
+                            doc_date = str(doc.get("date", "")) + \
+                                str(doc.get("dc:date", ""))
+                            if str(year) in doc_date:
+                                results_with_year.append(doc)
+                            else:
+                                results_other_years.append(doc)
+                        # Priorizar resultados do ano, mas incluir outros se não tiver muitos
+                        lexml_results = results_with_year + results_other_years[:5]
+
+                    # Limitar resultados mas garantir que sempre retorne algo se encontrou
+                    for doc in lexml_results[:search_limit]:
+                        all_results.append(self._normalize_lexml_result(doc))
+                except Exception as e:
+                    timer.outcome = "error"
+                    span.record_exception(e)
+                    span.set_status(StatusCode.ERROR, str(e))
+                    logger.debug(f"Erro ao buscar no LexML: {str(e)}")
 
         # Buscar no Senado
         if 'senado' in sources:
-            try:
-                # Se mencionou número específico de lei, usar endpoint oficial de legislação
-                if lei_numero and year:
-                    # Tentar buscar diretamente usando legislacao_lista (endpoint oficial)
-                    try:
-                        legislacao_result = await senado_client.legislacao_lista(
-                            ano=year,
-                            numero=lei_numero,
-                            tipo="LEI",  # Assumir tipo LEI se não especificado
-                            quantidade=limit
-                        )
-                        # Extrair lista de normas do resultado
-                        normas = []
-                        if isinstance(legislacao_result, dict):
-                            normas = legislacao_result.get(
-                                "normas", legislacao_result.get("dados", []))
-                        elif isinstance(legislacao_result, list):
-                            normas = legislacao_result
-
-                        # Normalizar resultados
-                        for norma in normas:
-                            all_results.append(
-                                self._normalize_senado_legislacao_result(norma))
-
-                        # Se encontrou resultados específicos, não fazer busca genérica
-                        if normas:
-                            logger.debug(
-                                f"Encontradas {len(normas)} normas específicas no Senado via legislacao_lista")
-                    except Exception as e:
-                        logger.debug(
-                            f"Erro ao buscar legislação específica no Senado: {str(e)}")
-                        # Continuar com busca genérica
-
-                # Busca genérica (se não encontrou específica ou não mencionou número)
-                if not (lei_numero and year and any('senado' in str(r.get('source', '')).lower() for r in all_results)):
-                    senado_results = []
-
-                    # 1. Buscar com query expandida
-                    try:
-                        results_expanded = await senado_client.search_legislation(
-                            keywords=expanded_query,
-                            year=year,
-                            limit=search_limit
-                        )
-                        senado_results.extend(results_expanded)
-                    except Exception as e:
-                        logger.debug(
-                            f"Erro na busca expandida Senado: {str(e)}")
-
-                    # 2. Buscar com query original se diferente
-                    if expanded_query != query and len(senado_results) < search_limit:
+            with tracer.span("search.senado") as span, timed(SEARCH_SOURCE_SECONDS, source="senado") as timer:
+                try:
+                    # Se mencionou número específico de lei, usar endpoint oficial de legislação
+                    if norma_numero and year:
+                        # Tentar buscar diretamente usando legislacao_lista (endpoint oficial)
                         try:
-                            results_original = await senado_client.search_legislation(
-                                keywords=query,
-                                year=year,
-                                limit=search_limit
+                            legislacao_result = await senado_client.legislacao_lista(
+                                ano=year,
+                                numero=norma_numero,
+                                tipo=self.SENADO_NORMA_TYPES.get(
+                                    parsed.doc_type, "LEI"),  # Assumir tipo LEI se não especificado
+                                quantidade=limit
                             )
-                            # Combinar resultados únicos
-                            seen_ids = {str(r.get("id", ""))
-                                        for r in senado_results}
-                            for r in results_original:
-                                if str(r.get("id", "")) not in seen_ids:
-                                    senado_results.append(r)
-                                    seen_ids.add(str(r.get("id", "")))
+                            # Extrair lista de normas do resultado
+                            normas = []
+                            if isinstance(legislacao_result, dict):
+                                normas = legislacao_result.get(
+                                    "normas", legislacao_result.get("dados", []))
+                            elif isinstance(legislacao_result, list):
+                                normas = legislacao_result
+
+                            # Normalizar resultados
+                            for norma in normas:
+                                all_results.append(
+                                    self._normalize_senado_legislacao_result(norma))
+
+                            # Se encontrou resultados específicos, não fazer busca genérica
+                            if normas:
+                                logger.debug(
+                                    f"Encontradas {len(normas)} normas específicas no Senado via legislacao_lista")
                         except Exception as e:
                             logger.debug(
-                                f"Erro na busca original Senado: {str(e)}")
+                                f"Erro ao buscar legislação específica no Senado: {str(e)}")
+                            # Continuar com busca genérica
 
-                    # 3. Se ainda não encontrou, buscar sem filtro de ano
-                    if len(senado_results) < 5:
+                    # Busca genérica (se não encontrou específica ou não mencionou número)
+                    if not (norma_numero and year and any('senado' in str(r.get('source', '')).lower() for r in all_results)):
+                        senado_results = []
+
+                        # 1. Buscar com query expandida
                         try:
-                            results_no_year = await senado_client.search_legislation(
+                            results_expanded = await senado_client.search_legislation(
                                 keywords=expanded_query,
-                                year=None,
+                                year=year,
                                 limit=search_limit
                             )
-                            seen_ids = {str(r.get("id", ""))
-                                        for r in senado_results}
-                            for r in results_no_year:
-                                if str(r.get("id", "")) not in seen_ids:
-                                    senado_results.append(r)
-                                    seen_ids.add(str(r.get("id", "")))
+                            senado_results.extend(results_expanded)
                         except Exception as e:
                             logger.debug(
-                                f"Erro na busca sem ano Senado: {str(e)}")
-
-                    for doc in senado_results[:search_limit]:
-                        all_results.append(self._normalize_senado_result(doc))
-            except Exception as e:
-                logger.debug(f"Erro ao buscar no Senado: {str(e)}")
+                                f"Erro na busca expandida Senado: {str(e)}")
+
+                        # 2. Buscar com query original se diferente
+                        if expanded_query != query and len(senado_results) < search_limit:
+                            try:
+                                results_original = await senado_client.search_legislation(
+                                    keywords=query,
+                                    year=year,
+                                    limit=search_limit
+                                )
+                                # Combinar resultados únicos
+                                seen_ids = {str(r.get("id", ""))
+                                            for r in senado_results}
+                                for r in results_original:
+                                    if str(r.get("id", "")) not in seen_ids:
+                                        senado_results.append(r)
+                                        seen_ids.add(str(r.get("id", "")))
+                            except Exception as e:
+                                logger.debug(
+                                    f"Erro na busca original Senado: {str(e)}")
+
+                        # 3. Se ainda não encontrou, buscar sem filtro de ano
+                        if len(senado_results) < 5:
+                            try:
+                                results_no_year = await senado_client.search_legislation(
+                                    keywords=expanded_query,
+                                    year=None,
+                                    limit=search_limit
+                                )
+                                seen_ids = {str(r.get("id", ""))
+                                            for r in senado_results}
+                                for r in results_no_year:
+                                    if str(r.get("id", "")) not in seen_ids:
+                                        senado_results.append(r)
+                                        seen_ids.add(str(r.get("id", "")))
+                            except Exception as e:
+                                logger.debug(
+                                    f"Erro na busca sem ano Senado: {str(e)}")
+
+                        for doc in senado_results[:search_limit]:
+                            all_results.append(self._normalize_senado_result(doc))
+                except Exception as e:
+                    timer.outcome = "error"
+                    span.record_exception(e)
+                    span.set_status(StatusCode.ERROR, str(e))
+                    logger.debug(f"Erro ao buscar no Senado: {str(e)}")
 
         # Buscar na Câmara
         if 'camara' in sources:
-            try:
-                camara_results = await camara_client.search_propositions(
-                    keywords=query,
-                    year=year,  # Passar ano se disponível
-                    limit=limit
-                )
-                for doc in camara_results:
-                    all_results.append(self._normalize_camara_result(doc))
-            except Exception as e:
-                logger.debug(f"Erro ao buscar na Câmara: {str(e)}")
-
-        # Extrair número de lei se mencionado na query
-        import re
-        lei_pattern = re.search(
-            r'lei\s+(?:n[º°]|n\.?\s*)?\s*(\d+)', query, re.IGNORECASE)
-        lei_numero = lei_pattern.group(1) if lei_pattern else None
-
-        # Ordenar por relevância (priorizar resultados que contenham o número da lei)
-        def relevance_score(result):
-            title_lower = result.get('title', '').lower()
-            query_lower = query.lower()
-            score = 0
-
-            # Prioridade máxima: título contém o número da lei mencionado
-            if lei_numero and lei_numero in str(result.get('number', '')):
-                score += 100
-            if lei_numero and lei_numero in title_lower:
-                score += 50
-
-            # Prioridade alta: título contém palavras da query
-            query_words = query_lower.split()
-            matching_words = sum(
-                1 for word in query_words if word in title_lower and len(word) > 3)
-            score += matching_words * 10
-
-            # Prioridade média: query completa no título
-            if query_lower in title_lower:
-                score += 20
-
-            # Prioridade baixa: data mais recente
-            date_str = str(result.get('date', ''))
-            if '2025' in date_str:
-                score += 5
-            elif '2024' in date_str:
-                score += 3
-
-            return score
-
-        all_results.sort(key=relevance_score, reverse=True)
+            with tracer.span("search.camara") as span, timed(SEARCH_SOURCE_SECONDS, source="camara") as timer:
+                try:
+                    camara_results = await camara_client.search_propositions(
+                        keywords=query,
+                        year=year,  # Passar ano se disponível
+                        limit=limit
+                    )
+                    for doc in camara_results:
+                        all_results.append(self._normalize_camara_result(doc))
+                except Exception as e:
+                    timer.outcome = "error"
+                    span.record_exception(e)
+                    span.set_status(StatusCode.ERROR, str(e))
+                    logger.debug(f"Erro ao buscar na Câmara: {str(e)}")
+
+        # Ordenar por relevância (priorizar resultados que contenham o número da lei).
+        # Rankers com modelo (cross-encoder) rodam fora do event loop
+        if result_ranker.uses_model(ranker):
+            all_results = await asyncio.to_thread(
+                result_ranker.rank, parsed, all_results, ranker=ranker, explain=explain)
+        else:
+            all_results = result_ranker.rank(
+                parsed, all_results, ranker=ranker, explain=explain)
 
         # Retornar resultados, garantindo que sempre retorne algo se encontrou
         # Ordenar por relevância antes de limitar
@@ -348,7 +334,8 @@ class UnifiedLegislationSearch:
     async def get_relevant_context(
         self,
         query: str,
-        max_results: int = 5
+        max_results: int = 5,
+        parsed: Optional[ParsedQuery] = None
     ) -> str:
         """
         Obter contexto relevante de legislação para uma pergunta
@@ -356,37 +343,38 @@ class UnifiedLegislationSearch:
         Args:
             query: Pergunta do usuário
             max_results: Número máximo de resultados
+            parsed: Consulta já analisada (evita reprocessar a mesma consulta)
 
         Returns:
             Texto formatado com contexto relevante
         """
-        import re
-
-        # Extrair informações específicas da query
-        year_match = re.search(r'\b(20\d{2})\b', query)
-        year = int(year_match.group(1)) if year_match else None
-
-        # Extrair número de lei se mencionado (ex: "Lei nº 2025", "Lei 2025", "Lei n° 2025")
-        lei_pattern = re.search(
-            r'lei\s+(?:n[º°]|n\.?\s*)?\s*(\d+)', query, re.IGNORECASE)
-        lei_numero = lei_pattern.group(1) if lei_pattern else None
+        if parsed is None:
+            parsed = parse_query(query)
 
         # Buscar sempre, mesmo que não encontre resultados exatos
         # Aumentar limite para ter mais opções
         search_limit = max(max_results * 2, 15)
 
-        # Se mencionou número específico de lei, buscar mais resultados e filtrar
-        if lei_numero:
-            results = await self.search(query, limit=search_limit, year=year)
+        results = await self.search(
+            query, limit=search_limit, year=parsed.year, parsed=parsed)
+
+        # Se mencionou número específico de lei, filtrar resultados
+        if parsed.number:
             # Filtrar resultados que contenham o número da lei no título
             filtered_results = [
                 r for r in results
-                if lei_numero in str(r.get('title', '')) or lei_numero in str(r.get('number', ''))
+                if parsed.matches_number(str(r.get('title', ''))) or
+                parsed.matches_number(str(r.get('number', '')))
             ]
             # Se não encontrou com filtro, usar todos os resultados (podem ser relacionados)
             results = filtered_results if filtered_results else results[:max_results]
+
+        # Reranquear os melhores candidatos e enviar ao LLM só os max_results mais relevantes
+        if settings.RERANKER_ENABLED:
+            # Inferência do cross-encoder (e carga do modelo no primeiro uso) fora do event loop
+            results = await asyncio.to_thread(reranker.rerank, parsed, results, max_results)
         else:
-            results = await self.search(query, limit=search_limit, year=year)
+            results = results[:max_results]
 
         # Se não encontrou resultados, ainda retornar string vazia
         # Mas o LLM será instruído a buscar mesmo assim
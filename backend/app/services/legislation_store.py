@@ -0,0 +1,507 @@
+"""
+Armazenamento local dos metadados de legislação
+
+Os coletores gravam aqui os documentos do LexML (upsert pela URN). O
+GET /legislation/{id} e o /legislation/trending leem só do banco: busca pelo
+ID estável (digest da URN) ou pela URN usa índice único, e os destaques vêm
+da tabela trending_legislations, recalculada periodicamente
+(ver trending_refresher). Nenhuma dessas rotas chama o LexML na requisição.
+"""
+import re
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.integrations.fulltext_resolver import fulltext_resolver, normalize_urn
+from app.models.models import Legislation, TrendingLegislation, legislation_stable_id
+
+# Consultas IN (...) em lotes (limite de parâmetros do banco)
+LOOKUP_BATCH_SIZE = 500
+
+_YEAR_PATTERN = re.compile(r"\d{4}")
+
+# Campos atualizados quando um documento já existente é coletado de novo
+# (texto completo e texto simplificado são preservados)
+_METADATA_FIELDS = ("urn", "type", "number", "year", "title", "summary", "status", "author", "raw_data")
+
+
+def extract_number(title: str) -> str:
+    """Extrair número do título (ex: 'PLS nº 489/2008' -> '489')"""
+    for marker in ("nº", "Nº"):
+        if marker in title:
+            return title.split(marker, 1)[1].split("/")[0].strip()
+    return ""
+
+
+def extract_year(date: Any, default: Optional[int] = None) -> int:
+    """Ano de dc:date ('2023', '2023-05-10') ou o ano atual"""
+    match = _YEAR_PATTERN.search(str(date or ""))
+    if match:
+        return int(match.group())
+    return default or datetime.now().year
+
+
+def lexml_status(doc: Dict[str, Any]) -> str:
+    """Situação a partir de dc:type (projetos do LexML estão em tramitação por padrão)"""
+    dc_type = (doc.get("dc_type") or "").lower()
+    if "aprovado" in dc_type or "aprovada" in dc_type:
+        return "Aprovado"
+    if "rejeitado" in dc_type or "rejeitada" in dc_type:
+        return "Rejeitado"
+    if "arquivado" in dc_type or "arquivada" in dc_type:
+        return "Arquivado"
+    return "Em tramitação"
+
+
+def lexml_fields(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Colunas de Legislation para um documento do LexML
+
+    Args:
+        doc: Documento como devolvido por lexml_client (search_*)
+
+    Returns:
+        Dicionário de colunas ou None se o documento não tiver URN nem ID
+    """
+    urn = normalize_urn(doc["urn"]) if doc.get("urn") else None
+    external_id = doc.get("lexml_id") or urn
+    if not external_id:
+        return None
+
+    title = doc.get("title") or ""
+    return {
+        "external_id": str(external_id),
+        "urn": urn,
+        "stable_id": legislation_stable_id(urn, "lexml", external_id),
+        "source": "lexml",
+        "type": doc.get("tipo_documento") or "Documento",
+        "number": extract_number(title),
+        "year": extract_year(doc.get("date")),
+        "title": title,
+        "summary": doc.get("description") or "",
+        "status": lexml_status(doc),
+        "author": doc.get("autoridade"),
+        "raw_data": doc,
+    }
+
+
+def senado_norma_fields(norma: Dict[str, Any], year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Colunas de Legislation para uma norma da listagem do Senado
+
+    Args:
+        norma: Item de listar_normas
+        year: Ano da listagem (se a norma não tiver data)
+
+    Returns:
+        Dicionário de colunas ou None se a norma não tiver código
+    """
+    codigo = norma.get("codigo")
+    if not codigo:
+        return None
+
+    external_id = f"senado_{codigo}"
+    urn = normalize_urn(norma["urn"]) if norma.get("urn") else None
+    tipo = norma.get("tipo")
+    return {
+        "external_id": external_id,
+        "urn": urn,
+        # Com URN, o mesmo ID da norma vinda do LexML
+        "stable_id": legislation_stable_id(urn, "senado", external_id),
+        "source": "senado",
+        "type": tipo.get("sigla", "LEI") if isinstance(tipo, dict) else "LEI",
+        "number": str(norma.get("numero", "")),
+        "year": extract_year(norma.get("data"), year),
+        "title": norma.get("ementa", ""),
+        "summary": norma.get("ementa", ""),
+        "author": "Senado Federal",
+        "raw_data": {"norma": norma},
+    }
+
+
+def senado_materia_fields(materia: Dict[str, Any], year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Colunas de Legislation para uma matéria da listagem do Senado
+
+    Args:
+        materia: Item de listar_materias
+        year: Ano da listagem (se a matéria não tiver ano)
+
+    Returns:
+        Dicionário de colunas ou None se a matéria não tiver código
+    """
+    codigo = materia.get("codigo")
+    if not codigo:
+        return None
+
+    external_id = f"senado_mat_{codigo}"
+    situacao = materia.get("situacao")
+    return {
+        "external_id": external_id,
+        "urn": None,
+        "stable_id": legislation_stable_id(None, "senado", external_id),
+        "source": "senado",
+        "type": materia.get("sigla", "PLS"),
+        "number": str(materia.get("numero", "")),
+        "year": extract_year(materia.get("ano"), year),
+        "title": materia.get("ementa", ""),
+        "summary": materia.get("ementa", ""),
+        "status": situacao.get("descricao") if isinstance(situacao, dict) else None,
+        "raw_data": {"materia": materia},
+    }
+
+
+def camara_proposition_fields(proposicao: Dict[str, Any], year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Colunas de Legislation para uma proposição da listagem da Câmara
+
+    Args:
+        proposicao: Item de camara_client.search_propositions
+        year: Ano da listagem (se a proposição não tiver ano)
+
+    Returns:
+        Dicionário de colunas ou None se a proposição não tiver ID
+    """
+    proposition_id = proposicao.get("id")
+    if not proposition_id:
+        return None
+
+    external_id = f"camara_{proposition_id}"
+    sigla = proposicao.get("siglaTipo") or "PL"
+    numero = proposicao.get("numero", "")
+    ano = extract_year(proposicao.get("ano"), year)
+    return {
+        "external_id": external_id,
+        "urn": None,
+        "stable_id": legislation_stable_id(None, "camara", external_id),
+        "source": "camara",
+        "type": sigla,
+        "number": str(numero),
+        "year": ano,
+        "title": f"{sigla} {numero}/{ano}",
+        "summary": proposicao.get("ementa", ""),
+        "author": "Câmara dos Deputados",
+        "raw_data": {"proposicao": proposicao},
+    }
+
+
+class LegislationStore:
+    """Metadados de legislação no banco local, com destaques materializados"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        trending_size: Optional[int] = None,
+        cache_seconds: Optional[float] = None
+    ):
+        """
+        Inicializar armazenamento
+
+        Args:
+            session_factory: Fábrica de sessões do banco (padrão: SessionLocal)
+            trending_size: Tamanho da lista de destaques (padrão: TRENDING_SIZE)
+            cache_seconds: Validade do cache em memória dos destaques (padrão: TRENDING_CACHE_SECONDS)
+        """
+        self._session_factory = session_factory
+        self.trending_size = trending_size or settings.TRENDING_SIZE
+        self.cache_seconds = settings.TRENDING_CACHE_SECONDS if cache_seconds is None else cache_seconds
+        # (expira em, legislações em ordem de destaque)
+        self._trending_cache: Optional[Tuple[float, List[Legislation]]] = None
+
+    def _db(self) -> Session:
+        if self._session_factory is None:
+            # Import tardio: não cria engine ao importar o módulo
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    # Escrita (coletores)
+
+    def upsert_lexml_documents(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        db: Optional[Session] = None
+    ) -> Dict[str, int]:
+        """
+        Gravar documentos do LexML (novos são criados, existentes atualizados)
+
+        Args:
+            documents: Documentos como devolvidos por lexml_client
+            db: Sessão do banco (padrão: uma sessão nova, fechada ao final)
+
+        Returns:
+            Contagens {'created', 'updated', 'unchanged', 'skipped'}
+        """
+        return self.upsert(map(lexml_fields, documents), db=db)
+
+    def upsert(
+        self,
+        rows: Iterable[Optional[Dict[str, Any]]],
+        db: Optional[Session] = None,
+        commit: bool = True
+    ) -> Dict[str, int]:
+        """
+        Gravar legislações já convertidas em colunas (lexml_fields, senado_*_fields)
+
+        Os existentes são buscados em lote pelo ID estável, pelo ID externo
+        e pela URN (a mesma norma vinda de outra fonte atualiza o registro
+        existente), e tudo é gravado em uma única transação. Valores None não apagam
+        dados já gravados e raw_data é mesclado com o existente.
+
+        Args:
+            rows: Colunas por legislação (None = registro sem identificador)
+            db: Sessão do banco (padrão: uma sessão nova, fechada ao final)
+            commit: Confirmar a transação (False: quem chamou confirma junto
+                com as próprias alterações, ex: cursor da coleta)
+
+        Returns:
+            Contagens {'created', 'updated', 'unchanged', 'skipped'}
+        """
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        by_stable_id: Dict[int, Dict[str, Any]] = {}
+        stable_by_urn: Dict[str, int] = {}
+        for fields in rows:
+            if fields is None:
+                counts["skipped"] += 1
+                continue
+            # Mesmo documento repetido no lote (mesmo ID ou mesma URN): fica a última versão
+            previous = stable_by_urn.get(fields.get("urn"))
+            if previous is not None:
+                by_stable_id.pop(previous, None)
+            by_stable_id[fields["stable_id"]] = fields
+            if fields.get("urn"):
+                stable_by_urn[fields["urn"]] = fields["stable_id"]
+        if not by_stable_id:
+            return counts
+
+        session = db or self._db()
+        try:
+            existing_by_stable: Dict[int, Legislation] = {}
+            existing_by_external: Dict[str, Legislation] = {}
+            existing_by_urn: Dict[str, Legislation] = {}
+            stable_ids = list(by_stable_id)
+            for start in range(0, len(stable_ids), LOOKUP_BATCH_SIZE):
+                batch = stable_ids[start:start + LOOKUP_BATCH_SIZE]
+                external_ids = [by_stable_id[stable_id]["external_id"] for stable_id in batch]
+                urns = [by_stable_id[stable_id]["urn"] for stable_id in batch if by_stable_id[stable_id].get("urn")]
+                for legislation in session.query(Legislation).filter(or_(
+                    Legislation.stable_id.in_(batch),
+                    Legislation.external_id.in_(external_ids),
+                    Legislation.urn.in_(urns)
+                )):
+                    existing_by_stable[legislation.stable_id] = legislation
+                    existing_by_external[legislation.external_id] = legislation
+                    if legislation.urn:
+                        existing_by_urn[legislation.urn] = legislation
+
+            for stable_id, fields in by_stable_id.items():
+                legislation = (
+                    existing_by_stable.get(stable_id)
+                    or existing_by_external.get(fields["external_id"])
+                    or existing_by_urn.get(fields.get("urn"))
+                )
+                if legislation is None:
+                    session.add(Legislation(**fields))
+                    counts["created"] += 1
+                    continue
+
+                changed = False
+                for name in _METADATA_FIELDS:
+                    value = fields.get(name)
+                    if value is None:
+                        continue
+                    if name == "urn" and existing_by_urn.get(value, legislation) is not legislation:
+                        # URN já é de outro registro (índice único)
+                        continue
+                    current = getattr(legislation, name)
+                    if name == "raw_data" and isinstance(current, dict):
+                        value = {**current, **value}
+                    if current != value:
+                        setattr(legislation, name, value)
+                        changed = True
+                if changed:
+                    legislation.last_update = datetime.utcnow()
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+
+            if commit:
+                session.commit()
+            else:
+                session.flush()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            if db is None:
+                session.close()
+
+        logger.debug(f"Metadados de legislação gravados: {counts}")
+        return counts
+
+    def save_full_text(self, legislation_id: int, text: str) -> bool:
+        """
+        Gravar o texto completo de uma legislação
+
+        Args:
+            legislation_id: ID estável da legislação
+            text: Texto completo
+
+        Returns:
+            True se a legislação existe
+        """
+        db = self._db()
+        try:
+            updated = (
+                db.query(Legislation)
+                .filter(Legislation.stable_id == legislation_id)
+                .update({Legislation.full_text: text}, synchronize_session=False)
+            )
+            db.commit()
+            return bool(updated)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def fill_full_text(self, legislation_id: int, urn: str) -> bool:
+        """
+        Buscar o texto completo no LexML e gravá-lo (job em background)
+
+        Args:
+            legislation_id: ID estável da legislação
+            urn: URN do documento
+
+        Returns:
+            True se o texto foi encontrado e gravado
+        """
+        text = await fulltext_resolver.resolve(urn)
+        if not text:
+            return False
+        return self.save_full_text(legislation_id, text)
+
+    # Leitura
+
+    def get(self, legislation_id: int) -> Optional[Legislation]:
+        """
+        Buscar uma legislação pelo ID estável
+
+        IDs antigos (lexml_id numérico) também são aceitos, pelo ID externo.
+
+        Args:
+            legislation_id: ID estável ou lexml_id
+
+        Returns:
+            Legislação (desanexada da sessão) ou None
+        """
+        db = self._db()
+        try:
+            legislation = db.query(Legislation).filter(Legislation.stable_id == legislation_id).first()
+            if legislation is None:
+                legislation = db.query(Legislation).filter(
+                    Legislation.external_id == str(legislation_id)).first()
+            return legislation
+        finally:
+            db.close()
+
+    def get_by_urn(self, urn: str) -> Optional[Legislation]:
+        """Buscar uma legislação pela URN (desanexada da sessão) ou None"""
+        db = self._db()
+        try:
+            return db.query(Legislation).filter(Legislation.urn == normalize_urn(urn)).first()
+        finally:
+            db.close()
+
+    def trending(self, limit: int = 10) -> List[Legislation]:
+        """
+        Legislações em destaque (lidas da tabela materializada)
+
+        Args:
+            limit: Número de legislações
+
+        Returns:
+            Legislações em ordem de destaque
+        """
+        cached = self._trending_cache
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1][:limit]
+
+        db = self._db()
+        try:
+            legislations = [
+                legislation for _, legislation in (
+                    db.query(TrendingLegislation.rank, Legislation)
+                    .join(Legislation, Legislation.id == TrendingLegislation.legislation_id)
+                    .order_by(TrendingLegislation.rank)
+                    .limit(self.trending_size)
+                )
+            ]
+        finally:
+            db.close()
+
+        if self.cache_seconds > 0:
+            self._trending_cache = (time.monotonic() + self.cache_seconds, legislations)
+        return legislations[:limit]
+
+    def trending_age_seconds(self) -> Optional[float]:
+        """Segundos desde a última materialização dos destaques (None se nunca houve)"""
+        db = self._db()
+        try:
+            refreshed_at = db.query(func.max(TrendingLegislation.refreshed_at)).scalar()
+        finally:
+            db.close()
+        if refreshed_at is None:
+            return None
+        return (datetime.utcnow() - refreshed_at).total_seconds()
+
+    def refresh_trending(self) -> int:
+        """
+        Recalcular a lista de destaques
+
+        Ordem: ano mais recente, projetos antes de leis, data de apresentação
+        e ordem de coleta. A lista é trocada em uma única transação.
+
+        Returns:
+            Número de legislações em destaque
+        """
+        projects_first = case((Legislation.type.ilike("%projeto%"), 0), else_=1)
+        db = self._db()
+        try:
+            ids = [
+                legislation_id for (legislation_id,) in (
+                    db.query(Legislation.id)
+                    .order_by(
+                        Legislation.year.desc(),
+                        projects_first,
+                        Legislation.presentation_date.desc().nullslast(),
+                        Legislation.id.desc()
+                    )
+                    .limit(self.trending_size)
+                )
+            ]
+            refreshed_at = datetime.utcnow()
+            db.query(TrendingLegislation).delete(synchronize_session=False)
+            db.add_all([
+                TrendingLegislation(rank=rank, legislation_id=legislation_id, refreshed_at=refreshed_at)
+                for rank, legislation_id in enumerate(ids, start=1)
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._trending_cache = None
+        logger.info(f"Destaques recalculados: {len(ids)} legislações")
+        return len(ids)
+
+
+# Instância global
+legislation_store = LegislationStore()
@@ -0,0 +1,379 @@
+"""
+Busca textual nas legislações do banco local
+
+No PostgreSQL usa as colunas search_vector (tsvector gerado com a
+configuração portuguese_unaccent, índices GIN; migração 0008) de
+legislations e legislation_chunks: websearch_to_tsquery para a consulta,
+ts_rank_cd para a ordem, ts_headline para os trechos destacados e
+GROUPING SETS para as contagens por tipo, ano e fonte. São três consultas
+por busca (página, trechos dos chunks da página e facetas).
+
+Em outros bancos (SQLite em desenvolvimento e testes) cai para LIKE por
+termo, com pontuação e trechos montados em Python.
+
+Aliases de outra fonte (canonical_id preenchido, ver deduplicator) não
+aparecem nos resultados.
+"""
+import re
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import and_, desc, func, literal, literal_column, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.orm import Session
+
+from app.models.models import Legislation, LegislationChunk
+
+# Configuração de busca textual (português + unaccent), criada na migração 0008
+TEXT_SEARCH_CONFIG = "portuguese_unaccent"
+
+FACETS = ("type", "year", "source")
+
+# Marcação dos termos encontrados nos trechos
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    "MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+)
+# Normalização do ts_rank_cd: divide por 1 + log(tamanho do documento),
+# para o texto completo longo não vencer sempre a ementa curta
+RANK_NORMALIZATION = 1
+
+# Colunas geradas, fora do modelo (só existem no PostgreSQL)
+LEGISLATION_VECTOR = literal_column("legislations.search_vector", TSVECTOR)
+CHUNK_VECTOR = literal_column("legislation_chunks.search_vector", TSVECTOR)
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Pesos do modo sem tsvector: título, ementa e texto (como setweight A, B, C)
+_FALLBACK_WEIGHTS = (("title", 1.0), ("summary", 0.4), ("full_text", 0.2))
+_SNIPPET_CHARS = 200
+
+
+def fold(text: str) -> str:
+    """Minúsculas sem acentos (mesma comparação do unaccent)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def search_terms(query: str) -> List[str]:
+    """Termos da consulta com duas letras ou mais ('*' ou vazio = nenhum)"""
+    return [term for term in _TERM_PATTERN.findall(query or "") if len(term) > 1]
+
+
+def highlight(text: str, terms: List[str], size: int = _SNIPPET_CHARS) -> str:
+    """
+    Trecho em volta do primeiro termo encontrado, com os termos marcados
+
+    Args:
+        text: Texto de origem
+        terms: Termos da consulta
+        size: Tamanho aproximado do trecho em caracteres
+
+    Returns:
+        Trecho com <mark>…</mark> (o começo do texto se nenhum termo aparece)
+    """
+    if not text:
+        return ""
+    # fold() preserva o tamanho para textos já compostos (NFC), então as
+    # posições no texto dobrado valem no original
+    folded = fold(text)
+    if len(folded) != len(text):
+        folded = text.lower()
+    folded_terms = [fold(term) for term in terms]
+    positions = [folded.find(term) for term in folded_terms]
+    found = [p for p in positions if p >= 0]
+    start = max(min(found) - size // 4, 0) if found else 0
+    end = min(start + size, len(text))
+
+    pieces = []
+    cursor = start
+    pattern = re.compile("|".join(re.escape(term) for term in folded_terms if term)) if terms else None
+    if pattern:
+        for match in pattern.finditer(folded, start, end):
+            pieces.append(text[cursor:match.start()])
+            pieces.append(HIGHLIGHT_START + text[match.start():match.end()] + HIGHLIGHT_STOP)
+            cursor = match.end()
+    pieces.append(text[cursor:end])
+    return ("… " if start else "") + "".join(pieces) + (" …" if end < len(text) else "")
+
+
+class LocalLegislationSearch:
+    """Busca textual com ranking, trechos e facetas sobre o banco local"""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        """
+        Inicializar busca
+
+        Args:
+            session_factory: Fábrica de sessões do banco (padrão: SessionLocal)
+        """
+        self._session_factory = session_factory
+
+    def _db(self) -> Session:
+        if self._session_factory is None:
+            # Import tardio: não cria engine ao importar o módulo
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        page: int = 1,
+        page_size: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Buscar legislações no banco local
+
+        Args:
+            query: Texto da busca (sintaxe do websearch_to_tsquery: "frase",
+                OR, -termo); vazio ou '*' lista pelos filtros
+            filters: type, year, source e status (status por trecho, sem caixa)
+            page: Página (a partir de 1)
+            page_size: Resultados por página
+
+        Returns:
+            total, results (campos da legislação, rank e snippet), facets
+            ({faceta: {valor: contagem}}) e took_ms
+        """
+        started = time.perf_counter()
+        db = self._db()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                found = self._search_postgres(db, query, filters or {}, page, page_size)
+            else:
+                found = self._search_fallback(db, query, filters or {}, page, page_size)
+        finally:
+            db.close()
+        found["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.debug(f"Busca local '{query}': {found['total']} resultados em {found['took_ms']} ms")
+        return found
+
+    # Filtros comuns
+
+    @staticmethod
+    def _filter_clauses(filters: Dict[str, Any]) -> List[Any]:
+        clauses = [Legislation.canonical_id.is_(None)]
+        if filters.get("type"):
+            clauses.append(Legislation.type == filters["type"])
+        if filters.get("year"):
+            clauses.append(Legislation.year == int(filters["year"]))
+        if filters.get("source"):
+            clauses.append(Legislation.source == str(filters["source"]).lower())
+        if filters.get("status"):
+            clauses.append(Legislation.status.ilike(f"%{filters['status']}%"))
+        return clauses
+
+    @staticmethod
+    def _result(row: Any, rank: float, snippet: Optional[str]) -> Dict[str, Any]:
+        return {
+            "id": row.stable_id,
+            "type": row.type,
+            "number": row.number or "N/A",
+            "year": row.year,
+            "title": row.title,
+            "summary": row.summary,
+            "status": row.status,
+            "author": row.author,
+            "presentation_date": row.presentation_date,
+            "urn": row.urn,
+            "identifier": row.external_id or row.urn,
+            "source": row.source,
+            "rank": round(float(rank or 0.0), 6),
+            "snippet": snippet,
+        }
+
+    @staticmethod
+    def _facets(rows: List[Tuple[Any, ...]]) -> Dict[str, Dict[str, int]]:
+        facets: Dict[str, Dict[str, int]] = {name: {} for name in FACETS}
+        for name, value, count in rows:
+            if value is not None:
+                facets[name][str(value)] = int(count)
+        return facets
+
+    # PostgreSQL
+
+    def _search_postgres(
+        self,
+        db: Session,
+        query: str,
+        filters: Dict[str, Any],
+        page: int,
+        page_size: int
+    ) -> Dict[str, Any]:
+        config = literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig", REGCONFIG)
+        clauses = self._filter_clauses(filters)
+        fields = (
+            Legislation.id, Legislation.stable_id, Legislation.type, Legislation.number,
+            Legislation.year, Legislation.title, Legislation.summary, Legislation.status,
+            Legislation.author, Legislation.presentation_date, Legislation.urn,
+            Legislation.external_id, Legislation.source,
+        )
+
+        if search_terms(query):
+            tsquery = func.websearch_to_tsquery(config, query)
+            # Melhor chunk de cada legislação com algum chunk encontrado
+            chunk_hits = (
+                select(
+                    LegislationChunk.legislation_id,
+                    func.max(func.ts_rank_cd(CHUNK_VECTOR, tsquery, RANK_NORMALIZATION)).label("rank")
+                )
+                .where(CHUNK_VECTOR.op("@@")(tsquery))
+                .group_by(LegislationChunk.legislation_id)
+                .subquery()
+            )
+            rank = func.greatest(
+                func.ts_rank_cd(LEGISLATION_VECTOR, tsquery, RANK_NORMALIZATION),
+                func.coalesce(chunk_hits.c.rank, 0.0)
+            )
+            base = (
+                select(*fields, rank.label("rank"), chunk_hits.c.rank.label("chunk_rank"))
+                .outerjoin(chunk_hits, chunk_hits.c.legislation_id == Legislation.id)
+                .where(or_(LEGISLATION_VECTOR.op("@@")(tsquery), chunk_hits.c.legislation_id.is_not(None)),
+                       *clauses)
+            )
+        else:
+            tsquery = None
+            base = select(*fields, literal(0.0).label("rank"), literal(None).label("chunk_rank")).where(*clauses)
+
+        def ordering(columns):
+            # Relevância; sem texto de busca, os mais recentes primeiro
+            return (desc(columns.rank), desc(columns.year), desc(columns.id))
+
+        matches = base.subquery()
+        page_rows = (
+            select(matches, func.count().over().label("total"))
+            .order_by(*ordering(matches.c))
+            .limit(page_size)
+            .offset((page - 1) * page_size)
+            .subquery()
+        )
+        summary_text = func.coalesce(page_rows.c.summary, page_rows.c.title)
+        headline = (
+            func.ts_headline(config, summary_text, tsquery, HEADLINE_OPTIONS)
+            if tsquery is not None else summary_text
+        )
+        rows = db.execute(select(page_rows, headline.label("headline")).order_by(*ordering(page_rows.c))).all()
+
+        # Trecho do melhor chunk de cada legislação da página
+        chunk_snippets: Dict[int, str] = {}
+        chunk_ids = [row.id for row in rows if row.chunk_rank]
+        if chunk_ids:
+            best = (
+                select(LegislationChunk.legislation_id, LegislationChunk.content)
+                .where(LegislationChunk.legislation_id.in_(chunk_ids), CHUNK_VECTOR.op("@@")(tsquery))
+                .order_by(LegislationChunk.legislation_id,
+                          desc(func.ts_rank_cd(CHUNK_VECTOR, tsquery, RANK_NORMALIZATION)))
+                .distinct(LegislationChunk.legislation_id)
+                .subquery()
+            )
+            chunk_snippets = dict(db.execute(
+                select(best.c.legislation_id, func.ts_headline(config, best.c.content, tsquery, HEADLINE_OPTIONS))
+            ).all())
+
+        # Facetas: uma consulta com GROUPING SETS sobre o mesmo conjunto
+        facet_rows = db.execute(
+            select(
+                func.grouping(matches.c.type).label("by_type"),
+                func.grouping(matches.c.year).label("by_year"),
+                matches.c.type, matches.c.year, matches.c.source, func.count().label("hits")
+            ).group_by(func.grouping_sets(
+                tuple_(matches.c.type), tuple_(matches.c.year), tuple_(matches.c.source)
+            ))
+        ).all()
+        facets = self._facets([
+            ("type", row.type, row.hits) if row.by_type == 0 else
+            ("year", row.year, row.hits) if row.by_year == 0 else
+            ("source", row.source, row.hits)
+            for row in facet_rows
+        ])
+
+        return {
+            "total": int(rows[0].total) if rows else sum(facets["source"].values()),
+            "results": [
+                self._result(row, row.rank, chunk_snippets.get(row.id) or row.headline)
+                for row in rows
+            ],
+            "facets": facets,
+        }
+
+    # Outros bancos (desenvolvimento e testes)
+
+    def _search_fallback(
+        self,
+        db: Session,
+        query: str,
+        filters: Dict[str, Any],
+        page: int,
+        page_size: int
+    ) -> Dict[str, Any]:
+        terms = search_terms(query)
+        clauses = self._filter_clauses(filters)
+        if terms:
+            # Todos os termos, em qualquer campo ou em algum chunk
+            for term in terms:
+                pattern = f"%{term}%"
+                chunk_match = select(LegislationChunk.id).where(
+                    LegislationChunk.legislation_id == Legislation.id,
+                    LegislationChunk.content.ilike(pattern)
+                ).exists()
+                clauses.append(or_(
+                    Legislation.title.ilike(pattern),
+                    Legislation.summary.ilike(pattern),
+                    Legislation.full_text.ilike(pattern),
+                    chunk_match
+                ))
+
+        rows = db.execute(select(Legislation).where(and_(*clauses))).scalars().all()
+        folded_terms = [fold(term) for term in terms]
+
+        # Primeiro chunk com algum termo de cada legislação (uma consulta)
+        chunks: Dict[int, str] = {}
+        if terms and rows:
+            for legislation_id, content in db.execute(
+                select(LegislationChunk.legislation_id, LegislationChunk.content)
+                .where(LegislationChunk.legislation_id.in_([row.id for row in rows]),
+                       or_(*(LegislationChunk.content.ilike(f"%{term}%") for term in terms)))
+                .order_by(LegislationChunk.id)
+            ):
+                chunks.setdefault(legislation_id, content)
+
+        def score(legislation: Legislation) -> float:
+            fields = [(getattr(legislation, field), weight) for field, weight in _FALLBACK_WEIGHTS]
+            fields.append((chunks.get(legislation.id), _FALLBACK_WEIGHTS[-1][1]))
+            total = 0.0
+            for value, weight in fields:
+                value = fold(value or "")
+                total += weight * sum(value.count(term) for term in folded_terms) / (1 + len(value) / 1000)
+            return total
+
+        ranked = sorted(
+            ((score(row) if terms else 0.0, row) for row in rows),
+            key=lambda item: (-item[0], -item[1].year, -item[1].id)
+        )
+        start = (page - 1) * page_size
+
+        results = []
+        for rank, legislation in ranked[start:start + page_size]:
+            snippet_source = legislation.summary or legislation.title
+            # Sem o termo na ementa, o trecho vem do chunk (ou do texto completo)
+            if terms and not any(term in fold(snippet_source) for term in folded_terms):
+                snippet_source = chunks.get(legislation.id) or legislation.full_text or snippet_source
+            results.append(self._result(legislation, rank, highlight(snippet_source, terms)))
+
+        counts: Dict[Tuple[str, Any], int] = {}
+        for row in rows:
+            for name in FACETS:
+                key = (name, getattr(row, name))
+                counts[key] = counts.get(key, 0) + 1
+        facets = self._facets([(name, value, count) for (name, value), count in counts.items()])
+
+        return {"total": len(rows), "results": results, "facets": facets}
+
+
+# Instância global
+local_search = LocalLegislationSearch()
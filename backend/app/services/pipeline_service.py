@@ -1,153 +1,350 @@
 """
 Serviço orquestrador para o pipeline completo de preparação de dados
+
+As etapas (coleta → chunking → corpus → embeddings) rodam ao mesmo tempo,
+ligadas por filas limitadas (app/services/pipeline_stages.py).
 """
-from typing import Dict, Any, Optional, List
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
 from loguru import logger
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.models import Legislation, LegislationChunk, TrainingCorpus
 from app.services.data_collector import DataCollector
-from app.services.text_processor import text_processor
+from app.services.pipeline_stages import StageMetrics, StageQueue, run_stages
+from app.services.text_processor import process_batch, text_processor
 from app.services.corpus_builder import CorpusBuilder
+from app.services.embedding_cache import cache_report
 from app.services.embedding_service import embedding_service
 
 
 class PipelineService:
     """Serviço para orquestrar o pipeline completo de preparação de dados"""
 
-    def __init__(self, db_session: Session):
+    def __init__(
+        self,
+        db_session: Session,
+        data_collector: Optional[DataCollector] = None,
+        embedder: Any = None,
+        chunk_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        embed_batch_size: Optional[int] = None,
+        embed_min_batch: Optional[int] = None
+    ):
+        """
+        Inicializar pipeline
+
+        Args:
+            db_session: Sessão do banco
+            data_collector: Coletor (padrão: DataCollector na mesma sessão)
+            embedder: Gerador de embeddings (padrão: embedding_service)
+            chunk_workers: Processos do chunking (padrão: PIPELINE_CHUNK_WORKERS; 0 = thread)
+            queue_size: Itens em espera entre etapas (padrão: PIPELINE_QUEUE_SIZE)
+            batch_size: Legislações por lote no chunking e no corpus (padrão: PIPELINE_BATCH_SIZE)
+            embed_batch_size: Textos por lote de embeddings (padrão: PIPELINE_EMBED_BATCH_SIZE)
+            embed_min_batch: Menor lote de embeddings fora do fim do fluxo (padrão: PIPELINE_EMBED_MIN_BATCH)
+        """
         self.db = db_session
-        self.data_collector = DataCollector(db_session)
+        self.data_collector = data_collector or DataCollector(db_session)
         self.corpus_builder = CorpusBuilder(db_session)
+        self.embedder = embedder or embedding_service
+        self.chunk_workers = settings.PIPELINE_CHUNK_WORKERS if chunk_workers is None else chunk_workers
+        self.queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        self.batch_size = batch_size or settings.PIPELINE_BATCH_SIZE
+        self.embed_batch_size = embed_batch_size or settings.PIPELINE_EMBED_BATCH_SIZE
+        self.embed_min_batch = min(embed_min_batch or settings.PIPELINE_EMBED_MIN_BATCH, self.embed_batch_size)
 
     async def run_full_pipeline(
         self,
         source: str = "lexml",
         year: Optional[int] = None,
         tipo_documento: Optional[str] = None,
-        limit: int = 50
+        limit: int = 50,
+        progress: Optional[Callable[[int], None]] = None
     ) -> Dict[str, Any]:
         """
-        Executar pipeline completo:
-        1. Coleta de dados
-        2. Pré-processamento e chunking
-        3. Construção de corpus
-        4. Geração de embeddings
+        Executar pipeline completo, com as etapas em paralelo:
+        1. Coleta de dados (página a página)
+        2. Pré-processamento e chunking (pool de processos)
+        3. Construção de corpus (inserções em lote)
+        4. Geração de embeddings (lotes de PIPELINE_EMBED_BATCH_SIZE textos)
+
+        As legislações passam de uma etapa para a outra por filas limitadas;
+        cada etapa só faz o que ainda falta no banco (legislações sem chunks,
+        sem corpus, textos sem embedding), então repetir a execução não duplica
+        nada e completa uma execução interrompida.
 
         Args:
-            source: Fonte de dados (lexml, camara, senado)
+            source: Fonte de dados (lexml, camara)
             year: Ano para filtrar
             tipo_documento: Tipo de documento
             limit: Limite de documentos
+            progress: Chamada com o número de documentos coletados durante a
+                coleta e a cada lote das etapas (uma exceção nela interrompe o pipeline)
 
         Returns:
-            Estatísticas do pipeline
+            Estatísticas do pipeline, com métricas por etapa em 'stages' e a
+            deduplicação de embeddings em 'embedding_cache'
         """
+        logger.info(
+            f"Iniciando pipeline completo - fonte: {source}, ano: {year}")
+
+        stats = {
+            "collected": 0,
+            "processed": 0,
+            "chunks_created": 0,
+            "corpus_pairs": 0,
+            "embeddings_generated": 0
+        }
+        metrics = {name: StageMetrics(name) for name in ("collect", "chunk", "corpus", "embed")}
+        cache_stats: Dict[str, int] = {}
+        chunk_queue = StageQueue(metrics["chunk"], self.queue_size)
+        corpus_queue = StageQueue(metrics["corpus"], self.queue_size)
+        # Embeddings recebem chunks e pares do corpus
+        embed_queue = StageQueue(metrics["embed"], self.queue_size, producers=2)
+
+        def checkpoint() -> None:
+            if progress:
+                progress(stats["collected"])
+
+        executor = self._make_executor()
         try:
-            logger.info(
-                f"Iniciando pipeline completo - fonte: {source}, ano: {year}")
-
-            stats = {
-                "collected": 0,
-                "processed": 0,
-                "chunks_created": 0,
-                "corpus_pairs": 0,
-                "embeddings_generated": 0
-            }
-
-            # 1. Coleta de dados
-            logger.info("Etapa 1: Coleta de dados")
-            if source == "lexml":
-                collection_result = await self.data_collector.collect_from_lexml(
-                    year=year,
-                    tipo_documento=tipo_documento,
-                    limit=limit
-                )
-            elif source == "camara":
-                collection_result = await self.data_collector.collect_from_camara(
-                    year=year,
-                    limit=limit
-                )
-            else:
-                raise ValueError(f"Fonte desconhecida: {source}")
-
-            stats["collected"] = collection_result.get("collected", 0)
-            logger.info(f"Coletados {stats['collected']} documentos")
-
-            # 2. Pré-processamento e chunking
-            logger.info("Etapa 2: Pré-processamento e chunking")
-            recent_legislations = self.db.query(Legislation).order_by(
-                Legislation.created_at.desc()
-            ).limit(stats["collected"]).all()
+            await run_stages(
+                self._collect_stage(source, year, tipo_documento, limit, progress,
+                                    chunk_queue, stats, metrics["collect"]),
+                self._chunk_stage(chunk_queue, corpus_queue, embed_queue, executor,
+                                  checkpoint, stats, metrics["chunk"]),
+                self._corpus_stage(corpus_queue, embed_queue, checkpoint, stats, metrics["corpus"]),
+                self._embed_stage(embed_queue, checkpoint, stats, cache_stats, metrics["embed"])
+            )
+        except Exception as e:
+            logger.error(f"Erro no pipeline: {str(e)}")
+            self.db.rollback()
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
 
-            for legislation in recent_legislations:
-                if not legislation.full_text:
-                    # Tentar obter texto completo (se disponível)
+        stats["stages"] = {name: stage.as_dict() for name, stage in metrics.items()}
+        stats["embedding_cache"] = cache_report(cache_stats)
+        for name, stage in stats["stages"].items():
+            logger.info(
+                f"Etapa {name}: {stage['items_in']} itens, {stage['throughput']} itens/s, "
+                f"fila máx. {stage['max_queue_depth']}")
+        logger.info(
+            f"Pipeline completo finalizado: {stats['collected']} coletados, "
+            f"{stats['chunks_created']} chunks, {stats['corpus_pairs']} pares, "
+            f"{stats['embeddings_generated']} embeddings "
+            f"(deduplicação: {stats['embedding_cache']['dedup_ratio']})")
+        return stats
+
+    def _make_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Pool de processos do chunking (None = threads)"""
+        if self.chunk_workers <= 0:
+            return None
+        if multiprocessing.current_process().daemon:
+            # Processos do worker do Celery (prefork) não podem criar filhos
+            logger.info("Chunking em threads: processo atual não pode criar subprocessos")
+            return None
+        return ProcessPoolExecutor(max_workers=self.chunk_workers)
+
+    async def _collect_stage(
+        self,
+        source: str,
+        year: Optional[int],
+        tipo_documento: Optional[str],
+        limit: int,
+        progress: Optional[Callable[[int], None]],
+        out: StageQueue,
+        stats: Dict[str, Any],
+        metrics: StageMetrics
+    ) -> None:
+        """Etapa 1: coletar e repassar as legislações gravadas com texto completo"""
+
+        async def on_stored(stable_ids: List[int]) -> None:
+            metrics.items_in += len(stable_ids)
+            with metrics.busy():
+                # Aliases de outra fonte (deduplicação) não geram chunks
+                rows = self.db.query(Legislation.id, Legislation.full_text).filter(
+                    Legislation.stable_id.in_(stable_ids),
+                    Legislation.canonical_id.is_(None)
+                ).all()
+            for legislation_id, full_text in rows:
+                if not full_text:
+                    metrics.skipped += 1
                     continue
+                await out.put((legislation_id, full_text))
+                metrics.items_out += 1
+
+        if source == "lexml":
+            result = await self.data_collector.collect_from_lexml(
+                year=year,
+                tipo_documento=tipo_documento,
+                limit=limit,
+                progress=progress,
+                on_stored=on_stored
+            )
+        elif source == "camara":
+            result = await self.data_collector.collect_from_camara(
+                year=year,
+                limit=limit,
+                progress=progress,
+                on_stored=on_stored
+            )
+        else:
+            raise ValueError(f"Fonte desconhecida: {source}")
 
-                # Processar texto
-                chunks = text_processor.process_legislation_text(
-                    legislation.full_text,
-                    legislation.id
-                )
+        stats["collected"] = result.get("collected", 0)
+        metrics.finished_at = time.perf_counter()
+        await out.close()
 
-                # Salvar chunks
-                for chunk_data in chunks:
-                    chunk = LegislationChunk(
-                        legislation_id=legislation.id,
+    async def _chunk_stage(
+        self,
+        inp: StageQueue,
+        corpus_out: StageQueue,
+        embed_out: StageQueue,
+        executor: Optional[ProcessPoolExecutor],
+        checkpoint: Callable[[], None],
+        stats: Dict[str, Any],
+        metrics: StageMetrics
+    ) -> None:
+        """Etapa 2: chunking das legislações ainda sem chunks (em paralelo)"""
+        loop = asyncio.get_running_loop()
+
+        async for batch in inp.batches(self.batch_size):
+            batch = list(dict(batch).items())  # mesma legislação duas vezes no lote
+            ids = [legislation_id for legislation_id, _ in batch]
+            with metrics.busy():
+                chunked = {
+                    legislation_id for (legislation_id,) in
+                    self.db.query(LegislationChunk.legislation_id).filter(
+                        LegislationChunk.legislation_id.in_(ids)
+                    ).distinct()
+                }
+                todo = [(i, text) for i, text in batch if i not in chunked]
+                # Envios de vários documentos: menos idas e voltas ao pool
+                size = settings.TEXT_PROCESSING_CHUNKSIZE
+                parts = [todo[start:start + size] for start in range(0, len(todo), size)]
+                if executor is not None:
+                    futures = [loop.run_in_executor(executor, process_batch, part) for part in parts]
+                else:
+                    futures = [asyncio.to_thread(process_batch, part) for part in parts]
+                results = [result for part in await asyncio.gather(*futures) for result in part]
+
+                chunks = [
+                    LegislationChunk(
+                        legislation_id=legislation_id,
                         chunk_type=chunk_data["type"],
                         chunk_number=chunk_data.get("number"),
                         content=chunk_data["content"],
                         normalized_content=chunk_data["normalized_content"],
                         meta_data=chunk_data.get("metadata", {})
                     )
-                    self.db.add(chunk)
-                    stats["chunks_created"] += 1
+                    for legislation_id, chunk_list in results
+                    for chunk_data in chunk_list
+                ]
+                self.db.add_all(chunks)
+                self.db.flush()
+                to_embed = [("chunk", chunk.id, chunk.normalized_content or chunk.content) for chunk in chunks]
+                self.db.commit()
 
-                stats["processed"] += 1
+                # Execução anterior interrompida: chunks já gravados sem embedding
+                if chunked:
+                    to_embed.extend(
+                        ("chunk", chunk_id, normalized or content)
+                        for chunk_id, normalized, content in self.db.query(
+                            LegislationChunk.id,
+                            LegislationChunk.normalized_content,
+                            LegislationChunk.content
+                        ).filter(
+                            LegislationChunk.legislation_id.in_(chunked),
+                            LegislationChunk.embedding.is_(None)
+                        )
+                    )
 
-            self.db.commit()
-            logger.info(
-                f"Processados {stats['processed']} legislações, criados {stats['chunks_created']} chunks")
+            stats["processed"] += len(results)
+            stats["chunks_created"] += len(chunks)
+            metrics.skipped += len(chunked)
+            metrics.batches += 1
+            del chunks, results, batch
 
-            # 3. Construção de corpus
-            logger.info("Etapa 3: Construção de corpus")
-            corpus_result = self.corpus_builder.build_corpus_batch(
-                legislation_ids=[l.id for l in recent_legislations],
-                limit=stats["processed"]
-            )
-            stats["corpus_pairs"] = corpus_result.get("total_created", 0)
-            logger.info(
-                f"Criados {stats['corpus_pairs']} pares pergunta-resposta")
-
-            # 4. Geração de embeddings
-            logger.info("Etapa 4: Geração de embeddings")
+            for item in to_embed:
+                await embed_out.put(item)
+            for legislation_id in ids:
+                await corpus_out.put(legislation_id)
+            metrics.items_out += len(ids)
+            checkpoint()
 
-            # Embeddings dos chunks
-            chunk_emb_result = embedding_service.update_chunk_embeddings(
-                self.db,
-                limit=stats["chunks_created"]
-            )
+        metrics.finished_at = time.perf_counter()
+        await corpus_out.close()
+        await embed_out.close()
 
-            # Embeddings do corpus
-            corpus_emb_result = embedding_service.update_corpus_embeddings(
-                self.db,
-                limit=stats["corpus_pairs"]
-            )
-
-            stats["embeddings_generated"] = (
-                chunk_emb_result.get("updated", 0) +
-                corpus_emb_result.get("updated", 0)
-            )
-            logger.info(f"Gerados {stats['embeddings_generated']} embeddings")
+    async def _corpus_stage(
+        self,
+        inp: StageQueue,
+        embed_out: StageQueue,
+        checkpoint: Callable[[], None],
+        stats: Dict[str, Any],
+        metrics: StageMetrics
+    ) -> None:
+        """Etapa 3: pares pergunta-resposta das legislações ainda sem corpus"""
+        async for ids in inp.batches(self.batch_size):
+            with metrics.busy():
+                result = self.corpus_builder.build_corpus_for_legislations(ids)
+            stats["corpus_pairs"] += result["total_created"]
+            metrics.skipped += result["skipped"]
+            metrics.batches += 1
+
+            for corpus_id, question in result["pending_embeddings"]:
+                await embed_out.put(("corpus", corpus_id, question))
+            metrics.items_out += len(ids)
+            checkpoint()
+
+        metrics.finished_at = time.perf_counter()
+        await embed_out.close()
+
+    async def _embed_stage(
+        self,
+        inp: StageQueue,
+        checkpoint: Callable[[], None],
+        stats: Dict[str, Any],
+        cache_stats: Dict[str, int],
+        metrics: StageMetrics
+    ) -> None:
+        """Etapa 4: embeddings de chunks e perguntas em lotes (textos repetidos e em cache não são recodificados)"""
+        async for batch in inp.batches(self.embed_batch_size, min_size=self.embed_min_batch):
+            with metrics.busy():
+                embeddings = await asyncio.to_thread(
+                    self.embedder.generate_embeddings_array,
+                    [text for _, _, text in batch],
+                    self.embed_batch_size,
+                    stats=cache_stats
+                )
+                updates = {"chunk": [], "corpus": []}
+                if embeddings is not None and embeddings.shape[1]:
+                    valid = ~np.isnan(embeddings).any(axis=1)
+                    for (kind, entity_id, _), embedding, ok in zip(batch, embeddings, valid):
+                        if ok:
+                            # Gravado em binário (EMBEDDING_STORAGE_FORMAT) pela coluna
+                            updates[kind].append({"id": entity_id, "embedding": embedding})
+                self.db.bulk_update_mappings(LegislationChunk, updates["chunk"])
+                self.db.bulk_update_mappings(TrainingCorpus, updates["corpus"])
+                self.db.commit()
 
-            logger.info("Pipeline completo finalizado com sucesso")
-            return stats
+            updated = len(updates["chunk"]) + len(updates["corpus"])
+            stats["embeddings_generated"] += updated
+            metrics.items_out += updated
+            metrics.skipped += len(batch) - updated
+            metrics.batches += 1
+            checkpoint()
 
-        except Exception as e:
-            logger.error(f"Erro no pipeline: {str(e)}")
-            self.db.rollback()
-            raise
+        metrics.finished_at = time.perf_counter()
 
     async def process_single_legislation(
         self,
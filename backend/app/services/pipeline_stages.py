@@ -0,0 +1,142 @@
+"""
+Primitivas do pipeline em etapas (coleta → chunking → corpus → embeddings)
+
+Cada etapa lê de uma fila limitada e escreve na fila da próxima: uma etapa
+lenta enche a fila de entrada e faz as anteriores esperarem (contrapressão),
+em vez de acumular o lote inteiro em memória. Cada fila e etapa registra
+métricas de vazão e de profundidade da fila.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List
+
+# Fim do fluxo: cada etapa de origem envia um ao terminar
+DONE = object()
+
+
+@dataclass
+class StageMetrics:
+    """Contadores de uma etapa"""
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    batches: int = 0
+    skipped: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: float = 0.0
+
+    def busy(self) -> "_BusyTimer":
+        """Contexto que soma o tempo de trabalho da etapa (sem a espera na fila)"""
+        return _BusyTimer(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "batches": self.batches,
+            "skipped": self.skipped,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            # Itens processados por segundo de trabalho efetivo
+            "throughput": round(self.items_in / self.busy_seconds, 1) if self.busy_seconds else None,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class _BusyTimer:
+    def __init__(self, metrics: StageMetrics):
+        self.metrics = metrics
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.busy_seconds += time.perf_counter() - self._start
+        return False
+
+
+class StageQueue:
+    """Fila limitada de entrada de uma etapa, com medição de profundidade"""
+
+    def __init__(self, metrics: StageMetrics, maxsize: int, producers: int = 1):
+        """
+        Args:
+            metrics: Métricas da etapa que consome a fila
+            maxsize: Itens em espera antes de bloquear os produtores
+            producers: Etapas que escrevem na fila (o fluxo termina após um DONE de cada)
+        """
+        self.metrics = metrics
+        self.producers = producers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def put(self, item: Any) -> None:
+        await self._queue.put(item)
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self._queue.qsize())
+
+    async def close(self) -> None:
+        """Sinalizar que um produtor terminou"""
+        await self._queue.put(DONE)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def items(self) -> AsyncIterator[Any]:
+        """Itens até todos os produtores terminarem"""
+        remaining = self.producers
+        while remaining:
+            item = await self._queue.get()
+            if item is DONE:
+                remaining -= 1
+                continue
+            self.metrics.items_in += 1
+            yield item
+
+    async def batches(self, size: int, min_size: int = 1) -> AsyncIterator[List[Any]]:
+        """
+        Lotes de até size itens
+
+        Com a fila vazia, um lote incompleto sai se já tiver min_size itens,
+        para a etapa não ficar parada esperando o que ainda está sendo produzido.
+        """
+        batch: List[Any] = []
+        remaining = self.producers
+        while remaining:
+            if batch and len(batch) >= min_size and self._queue.empty():
+                yield batch
+                batch = []
+            item = await self._queue.get()
+            if item is DONE:
+                remaining -= 1
+                continue
+            self.metrics.items_in += 1
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def run_stages(*stages) -> None:
+    """
+    Executar as etapas em paralelo; se uma falhar, cancelar as demais e propagar o erro
+
+    Args:
+        stages: Corrotinas das etapas
+    """
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
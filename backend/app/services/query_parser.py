@@ -0,0 +1,188 @@
+"""
+Extrator de intenção e entidades da consulta do usuário
+
+Todas as expressões regulares, listas de stop words e expansões de termos são
+compiladas uma única vez no carregamento do módulo. Cada requisição gera um
+único ParsedQuery, que é repassado para busca, ranqueamento e montagem do
+prompt (evitando reprocessar a mesma consulta em cada etapa).
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+# Palavras muito comuns que não ajudam na busca
+STOP_WORDS = frozenset({
+    "fale", "me", "sobre", "de", "uma", "lei", "leis", "o", "a", "os", "as",
+    "que", "qual", "quais", "para", "com", "do", "da", "dos", "das", "no",
+    "na", "em", "um", "explique", "diga", "quero", "saber", "como"
+})
+
+# Tamanho mínimo de uma palavra-chave
+MIN_KEYWORD_LENGTH = 3
+
+# Tipos de documento reconhecidos (ordem importa: mais específicos primeiro)
+_DOC_TYPE_PATTERNS: Tuple[Tuple[str, str], ...] = (
+    ("PEC", r"proposta\s+de\s+emenda\s+(?:à|a)\s+constitui[çc][ãa]o|pec"),
+    ("PLP", r"projetos?\s+de\s+lei\s+complementar|plp"),
+    ("PL", r"projetos?\s+de\s+lei|pls?"),
+    ("LCP", r"lei\s+complementar|lc"),
+    ("MPV", r"medida\s+provis[óo]ria|mpv?"),
+    ("DEC", r"decreto(?:-lei)?"),
+    ("LEI", r"lei"),
+)
+
+_DOC_TYPE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(
+        f"(?P<{name}>{pattern})" for name, pattern in _DOC_TYPE_PATTERNS
+    ) + r")\b"
+    r"(?:\s+(?:n[º°o]?\.?|n[úu]mero)?\s*(?P<number>\d{1,3}(?:\.\d{3})+|\d+))?"
+    r"(?:\s*/\s*(?P<number_year>\d{4}))?",
+    re.IGNORECASE
+)
+_YEAR_PATTERN = re.compile(r"\b(19[5-9]\d|20\d{2})\b")
+_WORD_PATTERN = re.compile(r"\w+(?:[./-]\w+)*")
+
+# Menções explícitas a uma fonte
+_SOURCE_PATTERNS: Tuple[Tuple[str, "re.Pattern[str]"], ...] = (
+    ("senado", re.compile(r"\bsenad(?:o|or|ores)\b", re.IGNORECASE)),
+    ("camara", re.compile(r"\bc[âa]mara\b|\bdeputad[oa]s?\b", re.IGNORECASE)),
+    ("lexml", re.compile(r"\blexml\b", re.IGNORECASE)),
+)
+
+# Expansões de termos (padrão -> termos adicionados à busca)
+_EXPANSIONS: Tuple[Tuple["re.Pattern[str]", str], ...] = (
+    (re.compile(r"\b(?:ai|ia)\b"), "inteligência artificial"),
+    (re.compile(r"intelig[êe]ncia\s+artificial"), "IA"),
+    (re.compile(r"\blgpd\b"), "proteção de dados pessoais"),
+    (re.compile(r"\bclt\b"), "consolidação das leis do trabalho"),
+    (re.compile(r"\beca\b"), "estatuto da criança e do adolescente"),
+    (re.compile(r"\bcdc\b"), "código de defesa do consumidor"),
+)
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """Consulta do usuário já analisada"""
+    text: str  # consulta original
+    lower: str  # consulta em minúsculas, sem espaços nas pontas
+    tokens: Tuple[str, ...]  # todas as palavras da consulta (minúsculas)
+    keywords: Tuple[str, ...]  # palavras relevantes (sem stop words)
+    clean_query: str  # palavras-chave unidas por espaço
+    expanded_query: str  # consulta usada nas buscas por palavra-chave
+    doc_type: Optional[str] = None  # LEI, PL, PEC, PLP, LCP, MPV, DEC
+    number: Optional[str] = None  # número do documento, só dígitos (ex: 13979)
+    number_display: Optional[str] = None  # número como escrito (ex: 13.979)
+    year: Optional[int] = None
+    source: Optional[str] = None  # fonte mencionada: senado, camara, lexml
+
+    @property
+    def has_reference(self) -> bool:
+        """Se a consulta cita um documento específico (número e ano)"""
+        return bool(self.number and self.year)
+
+    def matches_number(self, text: str) -> bool:
+        """Verificar se um texto contém o número do documento citado"""
+        if not self.number or not text:
+            return False
+        return self.number in text or (
+            self.number_display is not None and self.number_display in text
+        )
+
+
+class QueryParser:
+    """Extrator de tipo, número, ano, palavras-chave e fonte de uma consulta"""
+
+    def parse(self, query: str) -> ParsedQuery:
+        """
+        Analisar a consulta do usuário
+
+        Args:
+            query: Texto da consulta
+
+        Returns:
+            ParsedQuery com as entidades extraídas
+        """
+        text = query or ""
+        lower = text.lower().strip()
+        tokens = tuple(_WORD_PATTERN.findall(lower))
+
+        doc_type = None
+        number = None
+        number_display = None
+        number_span = None
+        number_year = None
+        for match in _DOC_TYPE_PATTERN.finditer(text):
+            match_type = next(
+                name for name, _ in _DOC_TYPE_PATTERNS if match.group(name)
+            )
+            if doc_type is None:
+                doc_type = match_type
+            if match.group("number"):
+                # A primeira referência com número define o documento citado
+                doc_type = match_type
+                number_display = match.group("number")
+                number = number_display.replace(".", "")
+                number_span = match.span("number")
+                if match.group("number_year"):
+                    number_year = int(match.group("number_year"))
+                break
+
+        year = number_year
+        if year is None:
+            fallback_year = None
+            for match in _YEAR_PATTERN.finditer(text):
+                if number_span and match.start() >= number_span[0] and match.end() <= number_span[1]:
+                    # Ano coincide com o número citado (ex: "Lei nº 2025"); usar só se não houver outro
+                    fallback_year = fallback_year or int(match.group(1))
+                    continue
+                year = int(match.group(1))
+                break
+            if year is None:
+                year = fallback_year
+
+        source = None
+        for name, pattern in _SOURCE_PATTERNS:
+            if pattern.search(text):
+                source = name
+                break
+
+        keywords = tuple(
+            w for w in tokens
+            if w not in STOP_WORDS and len(w) >= MIN_KEYWORD_LENGTH
+        )
+        clean_query = " ".join(keywords) if keywords else lower
+
+        expansions = [
+            terms for pattern, terms in _EXPANSIONS
+            if pattern.search(lower) and terms.lower() not in lower
+        ]
+        if expansions:
+            expanded_query = " ".join([clean_query, *expansions])
+        else:
+            expanded_query = clean_query if clean_query != lower else text
+
+        return ParsedQuery(
+            text=text,
+            lower=lower,
+            tokens=tokens,
+            keywords=keywords,
+            clean_query=clean_query,
+            expanded_query=expanded_query,
+            doc_type=doc_type,
+            number=number,
+            number_display=number_display,
+            year=year,
+            source=source
+        )
+
+
+# Instância global
+query_parser = QueryParser()
+
+
+@lru_cache(maxsize=2048)
+def parse_query(query: str) -> ParsedQuery:
+    """Analisar consulta com cache (ParsedQuery é imutável e pode ser compartilhado)"""
+    return query_parser.parse(query)
@@ -0,0 +1,326 @@
+"""
+Ranqueamento dos resultados de busca de legislação
+
+A consulta é tokenizada uma única vez (ParsedQuery) e cada resultado tem suas
+características extraídas uma única vez (ResultFeatures). Cada ranker produz,
+para cada resultado, um vetor de características que é combinado com um vetor
+de pesos; o detalhamento (breakdown) desse produto pode ser devolvido junto com
+os resultados para depuração.
+
+Rankers disponíveis:
+- heuristic: regras originais (número da lei, palavras no título, recência)
+- bm25: BM25 sobre título + descrição, calculado no próprio conjunto de resultados
+- cross_encoder: modelo cross-encoder (sentence-transformers), se instalado
+"""
+import math
+import operator
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from loguru import logger
+
+from app.core.config import settings
+from app.services.query_parser import ParsedQuery, STOP_WORDS
+from app.services.reranker import load_cross_encoder
+
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Tamanho mínimo de uma palavra da consulta para contar no título
+MIN_MATCH_WORD_LENGTH = 4
+
+
+class ResultFeatures:
+    """Características de um resultado extraídas uma única vez"""
+
+    __slots__ = ("title_lower", "description", "number", "date", "_text_tokens")
+
+    def __init__(self, result: Dict[str, Any]):
+        self.title_lower = str(result.get("title") or "").lower()
+        self.description = result.get("description") or ""
+        self.number = str(result.get("number") or "")
+        self.date = str(result.get("date") or "")
+        self._text_tokens: Optional[Tuple[str, ...]] = None
+
+    @property
+    def text_tokens(self) -> Tuple[str, ...]:
+        """Tokens de título + descrição (calculados só quando o ranker precisa)"""
+        if self._text_tokens is None:
+            self._text_tokens = tuple(_TOKEN_PATTERN.findall(
+                f"{self.title_lower} {self.description}".lower()
+            ))
+        return self._text_tokens
+
+
+class BaseRanker:
+    """Interface dos rankers: vetor de características x vetor de pesos"""
+
+    name = "base"
+    # Roda um modelo (bloqueia o event loop): chamado com asyncio.to_thread
+    uses_model = False
+    # Nome da característica -> peso
+    WEIGHTS: Dict[str, float] = {}
+
+    def features(
+        self,
+        parsed: ParsedQuery,
+        items: Sequence[ResultFeatures]
+    ) -> List[Tuple[float, ...]]:
+        """Calcular o vetor de características de cada resultado (ordem de WEIGHTS)"""
+        raise NotImplementedError
+
+    def score(
+        self,
+        parsed: ParsedQuery,
+        items: Sequence[ResultFeatures],
+        explain: bool = False
+    ) -> Tuple[List[float], Optional[List[Dict[str, float]]]]:
+        """
+        Pontuar resultados
+
+        Args:
+            parsed: Consulta já analisada
+            items: Características dos resultados
+            explain: Calcular também o detalhamento por característica
+
+        Returns:
+            Tupla (pontuações, detalhamento por característica ou None)
+        """
+        names = tuple(self.WEIGHTS)
+        weights = tuple(self.WEIGHTS[name] for name in names)
+        vectors = self.features(parsed, items)
+
+        scores = [sum(map(operator.mul, vector, weights)) for vector in vectors]
+        if not explain:
+            return scores, None
+
+        breakdowns = [
+            {
+                name: round(value * weight, 4)
+                for name, value, weight in zip(names, vector, weights)
+                if value
+            }
+            for vector in vectors
+        ]
+        return scores, breakdowns
+
+
+def _number_features(
+    parsed: ParsedQuery,
+    item: ResultFeatures
+) -> Tuple[float, float]:
+    """Resultado contém o número do documento citado (no campo número / no título)"""
+    if not parsed.number:
+        return 0.0, 0.0
+    return (
+        1.0 if parsed.matches_number(item.number) else 0.0,
+        1.0 if parsed.matches_number(item.title_lower) else 0.0
+    )
+
+
+class HeuristicRanker(BaseRanker):
+    """Regras originais da busca unificada"""
+
+    name = "heuristic"
+    WEIGHTS = {
+        "number_match": 100.0,  # número do resultado contém o número citado
+        "title_number": 50.0,  # título contém o número citado
+        "title_words": 10.0,  # por palavra da consulta presente no título
+        "full_query": 20.0,  # consulta completa no título
+        "recency": 1.0,  # 5 para o ano atual, 3 para o anterior
+    }
+
+    def features(self, parsed, items):
+        # Palavras da consulta calculadas uma vez por busca (não por resultado).
+        # Para consultas curtas, a busca por substring em C é mais rápida que
+        # uma alternação regex ou tokenizar cada título
+        query_words = tuple(dict.fromkeys(
+            word for word in parsed.tokens if len(word) >= MIN_MATCH_WORD_LENGTH
+        ))
+        full_query = parsed.lower
+        has_number = bool(parsed.number)
+        now = datetime.now()
+        current_year = str(now.year)
+        previous_year = str(now.year - 1)
+
+        vectors = []
+        for item in items:
+            title = item.title_lower
+            if current_year in item.date:
+                recency = 5.0
+            elif previous_year in item.date:
+                recency = 3.0
+            else:
+                recency = 0.0
+            vectors.append((
+                *(_number_features(parsed, item) if has_number else (0.0, 0.0)),
+                float(sum(1 for word in query_words if word in title)),
+                1.0 if full_query and full_query in title else 0.0,
+                recency
+            ))
+        return vectors
+
+
+class BM25Ranker(BaseRanker):
+    """BM25 sobre título + descrição dos resultados retornados pelas fontes"""
+
+    name = "bm25"
+    WEIGHTS = {
+        "number_match": 100.0,
+        "title_number": 50.0,
+        "bm25": 10.0,
+    }
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def features(self, parsed, items):
+        terms = [
+            word for word in dict.fromkeys(parsed.tokens)
+            if word not in STOP_WORDS
+        ] or list(dict.fromkeys(parsed.tokens))
+
+        total = len(items)
+        if total == 0:
+            return []
+
+        # Frequência só dos termos da consulta (tuple.count em C), sem Counter por documento
+        token_lists = [item.text_tokens for item in items]
+        counts = [
+            tuple(tokens.count(term) for term in terms) for tokens in token_lists
+        ]
+        lengths = [len(tokens) for tokens in token_lists]
+        avg_length = sum(lengths) / total or 1.0
+
+        idf = []
+        for position in range(len(terms)):
+            doc_freq = sum(1 for tf in counts if tf[position])
+            idf.append(math.log(1 + (total - doc_freq + 0.5) / (doc_freq + 0.5)))
+
+        k1, b = self.k1, self.b
+        vectors = []
+        for item, tf, length in zip(items, counts, lengths):
+            length_norm = k1 * (1 - b + b * length / avg_length)
+            bm25 = 0.0
+            for freq, term_idf in zip(tf, idf):
+                if freq:
+                    bm25 += term_idf * freq * (k1 + 1) / (freq + length_norm)
+            number_match, title_number = _number_features(parsed, item)
+            vectors.append((number_match, title_number, bm25))
+        return vectors
+
+
+class CrossEncoderRanker(BaseRanker):
+    """Cross-encoder (consulta, título + descrição); usa heurística se indisponível"""
+
+    name = "cross_encoder"
+    uses_model = True
+    WEIGHTS = {
+        "number_match": 100.0,
+        "title_number": 50.0,
+        "cross_encoder": 10.0,
+    }
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.CROSS_ENCODER_MODEL
+        # Mesma instância do modelo usada pelo reranker
+        self.model = load_cross_encoder(self.model_name)
+        self._fallback = HeuristicRanker()
+
+    def score(self, parsed, items, explain=False):
+        if self.model is None:
+            return self._fallback.score(parsed, items, explain)
+        return super().score(parsed, items, explain)
+
+    def features(self, parsed, items):
+        if not items:
+            return []
+        pairs = [(parsed.text, " ".join(item.text_tokens)) for item in items]
+        predictions = self.model.predict(
+            pairs, batch_size=settings.RERANKER_BATCH_SIZE, show_progress_bar=False)
+        return [
+            (*_number_features(parsed, item), float(prediction))
+            for item, prediction in zip(items, predictions)
+        ]
+
+
+RANKERS: Dict[str, Type[BaseRanker]] = {
+    HeuristicRanker.name: HeuristicRanker,
+    BM25Ranker.name: BM25Ranker,
+    CrossEncoderRanker.name: CrossEncoderRanker,
+}
+
+
+class ResultRanker:
+    """Ordena resultados com o ranker configurado (SEARCH_RANKER)"""
+
+    def __init__(self, default: Optional[str] = None):
+        self.default = default or settings.SEARCH_RANKER
+        self._instances: Dict[str, BaseRanker] = {}
+
+    def uses_model(self, name: Optional[str] = None) -> bool:
+        """Se o ranker roda um modelo (sem instanciá-lo, o que carregaria o modelo)"""
+        return RANKERS.get(name or self.default, HeuristicRanker).uses_model
+
+    def get_ranker(self, name: Optional[str] = None) -> BaseRanker:
+        """
+        Obter instância de um ranker (criada sob demanda e reutilizada)
+
+        Args:
+            name: Nome do ranker (None = padrão configurado)
+
+        Returns:
+            Instância do ranker
+        """
+        name = name or self.default
+        if name not in RANKERS:
+            logger.warning(f"Ranker desconhecido '{name}', usando heurística")
+            name = HeuristicRanker.name
+        if name not in self._instances:
+            self._instances[name] = RANKERS[name]()
+        return self._instances[name]
+
+    def rank(
+        self,
+        parsed: ParsedQuery,
+        results: List[Dict[str, Any]],
+        ranker: Optional[str] = None,
+        explain: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Ordenar resultados por relevância
+
+        Args:
+            parsed: Consulta já analisada
+            results: Resultados normalizados das fontes
+            ranker: Nome do ranker (None = padrão configurado)
+            explain: Incluir 'score' e 'score_breakdown' em cada resultado
+
+        Returns:
+            Resultados ordenados (ordem original mantida em caso de empate)
+        """
+        if not results:
+            return []
+
+        selected = self.get_ranker(ranker)
+        items = [ResultFeatures(result) for result in results]
+        scores, breakdowns = selected.score(parsed, items, explain)
+
+        order = sorted(range(len(results)), key=scores.__getitem__, reverse=True)
+        if not explain:
+            return [results[i] for i in order]
+
+        return [
+            {
+                **results[i],
+                "score": round(scores[i], 4),
+                "score_breakdown": {"ranker": selected.name, **breakdowns[i]}
+            }
+            for i in order
+        ]
+
+
+# Instância global
+result_ranker = ResultRanker()
@@ -0,0 +1,247 @@
+"""
+Reranqueamento dos melhores resultados com cross-encoder (CPU)
+
+Etapa opcional aplicada depois do ranker principal: só os top-K candidatos
+são pontuados pelo modelo, em lotes, e as pontuações ficam em cache por
+(hash da consulta, id do documento). Assim o contexto enviado ao LLM tem
+menos itens, e mais relevantes, sem que a latência cresça com o número de
+resultados retornados pelas fontes.
+
+Carregar e rodar o modelo bloqueia (CPU e, no primeiro uso, download): quem
+está no event loop chama rerank/load_cross_encoder com asyncio.to_thread.
+As pontuações são serializadas por um lock (cache compartilhado e um modelo
+por processo).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.services.query_parser import ParsedQuery
+
+try:
+    from sentence_transformers import CrossEncoder
+    CROSS_ENCODER_AVAILABLE = True
+except ImportError:
+    CROSS_ENCODER_AVAILABLE = False
+    logger.warning("sentence-transformers não disponível. Reranqueamento desabilitado.")
+
+
+# Tamanho máximo do texto do documento enviado ao modelo (caracteres)
+MAX_DOCUMENT_CHARS = 512
+
+
+# Carregamentos simultâneos (startup e primeira requisição) esperam um pelo outro
+_load_lock = threading.Lock()
+
+
+def load_cross_encoder(model_name: str) -> Optional[Any]:
+    """
+    Carregar modelo cross-encoder em CPU (uma única instância por modelo)
+
+    Bloqueia: no event loop, chamar com asyncio.to_thread.
+
+    Args:
+        model_name: Nome do modelo no Hugging Face
+
+    Returns:
+        Modelo carregado ou None se indisponível
+    """
+    with _load_lock:
+        return _load_cross_encoder(model_name)
+
+
+@lru_cache(maxsize=4)
+def _load_cross_encoder(model_name: str) -> Optional[Any]:
+    if not CROSS_ENCODER_AVAILABLE:
+        return None
+    try:
+        logger.info(f"Carregando cross-encoder: {model_name}")
+        return CrossEncoder(model_name, device="cpu")
+    except Exception as e:
+        logger.error(f"Erro ao carregar cross-encoder: {str(e)}")
+        return None
+
+
+def document_text(result: Dict[str, Any]) -> str:
+    """Texto do documento usado no par (consulta, título + descrição)"""
+    title = str(result.get("title") or "")
+    description = str(result.get("description") or "")
+    if description and description != title:
+        return f"{title}. {description}"[:MAX_DOCUMENT_CHARS]
+    return title[:MAX_DOCUMENT_CHARS]
+
+
+def document_id(result: Dict[str, Any]) -> str:
+    """Identificador estável do documento para a chave do cache"""
+    for field in ("id", "urn", "url"):
+        value = result.get(field)
+        if value:
+            return f"{result.get('source', '')}:{value}"
+    return hashlib.sha1(document_text(result).encode("utf-8")).hexdigest()
+
+
+class CrossEncoderReranker:
+    """Reranqueia os top-K resultados com cross-encoder e cache de pontuações"""
+
+    def __init__(
+        self,
+        model: Optional[Any] = None,
+        model_name: Optional[str] = None,
+        top_k: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        cache_size: Optional[int] = None
+    ):
+        """
+        Inicializar reranker
+
+        Args:
+            model: Modelo já carregado (None = carregar CROSS_ENCODER_MODEL sob demanda)
+            model_name: Nome do modelo (padrão: CROSS_ENCODER_MODEL)
+            top_k: Número de candidatos reranqueados (padrão: RERANKER_TOP_K)
+            batch_size: Tamanho do lote de pares (padrão: RERANKER_BATCH_SIZE)
+            cache_size: Máximo de pontuações em cache (padrão: RERANKER_CACHE_SIZE)
+        """
+        self._model = model
+        self.model_name = model_name or settings.CROSS_ENCODER_MODEL
+        self.top_k = top_k or settings.RERANKER_TOP_K
+        self.batch_size = batch_size or settings.RERANKER_BATCH_SIZE
+        self.cache_size = cache_size or settings.RERANKER_CACHE_SIZE
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "batches": 0
+        }
+
+    @property
+    def model(self) -> Optional[Any]:
+        if self._model is None:
+            self._model = load_cross_encoder(self.model_name)
+        return self._model
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    @staticmethod
+    def _query_hash(parsed: ParsedQuery) -> str:
+        return hashlib.sha1(parsed.lower.encode("utf-8")).hexdigest()[:16]
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[float]:
+        score = self._cache.get(key)
+        if score is not None:
+            self._cache.move_to_end(key)
+        return score
+
+    def _cache_put(self, key: Tuple[str, str], score: float) -> None:
+        self._cache[key] = score
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def score(
+        self,
+        parsed: ParsedQuery,
+        results: List[Dict[str, Any]]
+    ) -> List[float]:
+        """
+        Pontuar pares (consulta, documento), usando o cache quando possível
+
+        Args:
+            parsed: Consulta já analisada
+            results: Resultados a pontuar
+
+        Returns:
+            Pontuação de cada resultado (mesma ordem)
+        """
+        query_hash = self._query_hash(parsed)
+        keys = [(query_hash, document_id(result)) for result in results]
+        scores: List[Optional[float]] = [self._cache_get(key) for key in keys]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        self.stats["cache_hits"] += len(results) - len(missing)
+        self.stats["cache_misses"] += len(missing)
+        record_cache("reranker", hits=len(results) - len(missing), misses=len(missing))
+
+        if missing:
+            pairs = [(parsed.text, document_text(results[i])) for i in missing]
+            predictions = self.model.predict(
+                pairs, batch_size=self.batch_size, show_progress_bar=False)
+            self.stats["batches"] += -(-len(pairs) // self.batch_size)
+            for i, prediction in zip(missing, predictions):
+                scores[i] = float(prediction)
+                self._cache_put(keys[i], scores[i])
+
+        return scores
+
+    def rerank(
+        self,
+        parsed: ParsedQuery,
+        results: List[Dict[str, Any]],
+        top_n: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Reranquear os top-K resultados (já ordenados pelo ranker principal)
+
+        Bloqueia durante a inferência: no event loop, chamar com asyncio.to_thread.
+
+        Resultados que citam o número do documento pedido continuam na frente;
+        o cross-encoder ordena dentro de cada grupo. Os demais resultados (além
+        do top-K) mantêm a ordem original após os reranqueados.
+
+        Args:
+            parsed: Consulta já analisada
+            results: Resultados ordenados pelo ranker principal
+            top_n: Número de resultados a retornar (None = todos)
+
+        Returns:
+            Resultados reranqueados
+        """
+        if not results or not self.available:
+            return results[:top_n] if top_n else results
+
+        self.stats["requests"] += 1
+        candidates = results[:self.top_k]
+        try:
+            with self._lock:
+                scores = self.score(parsed, candidates)
+        except Exception as e:
+            logger.error(f"Erro no reranqueamento: {str(e)}")
+            return results[:top_n] if top_n else results
+
+        order = sorted(
+            range(len(candidates)),
+            key=lambda i: (
+                parsed.matches_number(str(candidates[i].get("number", ""))) or
+                parsed.matches_number(str(candidates[i].get("title", ""))),
+                scores[i]
+            ),
+            reverse=True
+        )
+        reranked = [candidates[i] for i in order] + results[self.top_k:]
+        return reranked[:top_n] if top_n else reranked
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obter estatísticas do reranqueamento e do cache"""
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        return {
+            **self.stats,
+            "enabled": settings.RERANKER_ENABLED,
+            "available": self._model is not None,
+            "cache_entries": len(self._cache),
+            "cache_hit_rate": (
+                round(self.stats["cache_hits"] / lookups, 3) if lookups else 0.0
+            )
+        }
+
+
+# Instância global
+reranker = CrossEncoderReranker()
@@ -46,17 +46,8 @@ class SenadoDataCollector:
             logger.info(f"Processando ano {ano}...")
             
             try:
-                # Listar normas do ano
-                resultado = await self.client.listar_normas(
-                    ano=ano,
-                    tipo=tipo,
-                    quantidade=1000
-                )
-                
-                normas = resultado.get("normas", [])
-                logger.info(f"  Encontradas {len(normas)} normas")
-                
-                for norma in normas:
+                # Normas do ano, página a página (a próxima é baixada durante o processamento)
+                async for norma in self.client.iter_normas(ano=ano, tipo=tipo):
                     try:
                         # Verificar se já existe
                         codigo = norma.get("codigo")
@@ -175,18 +166,10 @@ class SenadoDataCollector:
             logger.info(f"Processando ano {ano}...")
             
             try:
-                # Listar matérias do ano
-                resultado = await self.client.listar_materias(
-                    ano=ano,
-                    sigla=sigla,
-                    tramitando=tramitando,
-                    quantidade=1000
-                )
-                
-                materias = resultado.get("materias", [])
-                logger.info(f"  Encontradas {len(materias)} matérias")
-                
-                for materia in materias:
+                # Matérias do ano, página a página (a próxima é baixada durante o processamento)
+                async for materia in self.client.iter_materias(
+                    ano=ano, sigla=sigla, tramitando=tramitando
+                ):
                     try:
                         # Verificar se já existe
                         codigo = materia.get("codigo")
@@ -382,7 +365,7 @@ class SenadoDataCollector:
             # Por tipo
             by_type = self.db.query(
                 Legislation.type,
-                func.count(Legislation.id)
+                func.count()
             ).filter(
                 Legislation.source == "senado"
             ).group_by(Legislation.type).all()
@@ -390,7 +373,7 @@ class SenadoDataCollector:
             # Por ano
             by_year = self.db.query(
                 Legislation.year,
-                func.count(Legislation.id)
+                func.count()
             ).filter(
                 Legislation.source == "senado"
             ).group_by(Legislation.year).all()
@@ -1,57 +1,46 @@
 """
 Serviço para pré-processamento e limpeza de textos legislativos
 """
+import multiprocessing
+import os
 import re
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any, Optional, Tuple
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from loguru import logger
 
+from app.core.config import settings
+from app.integrations.lexml_document import LexMLUnit, iter_lexml_units, units_to_text
+from app.services.legal_parser import LEVELS, LegalDocument, parse_legal_text
+
+# Espaço em branco que não seja um espaço simples: só essas sequências são
+# substituídas (trocar cada espaço simples por outro igual custa mais que a busca)
+_WHITESPACE_PATTERN = re.compile(r'[^\S ]\s*| \s+')
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
 
 class TextProcessor:
     """Serviço para processar e limpar textos de legislação"""
-    
-    def __init__(self):
-        # Padrões regex para normalização
-        self.article_pattern = re.compile(r'Art\.?\s*(\d+)[º°]?', re.IGNORECASE)
-        self.paragraph_pattern = re.compile(r'§\s*(\d+)[º°]?', re.IGNORECASE)
-        self.inciso_pattern = re.compile(r'([IVX]+|[\d]+)[º°]?\s*-', re.IGNORECASE)
-        self.alinea_pattern = re.compile(r'([a-z])\)', re.IGNORECASE)
-    
+
     def parse_xml(self, xml_content: str) -> str:
         """
         Extrair texto de XML, removendo tags e mantendo estrutura
-        
+
+        Usa o extrator incremental de documentos LexML (uma unidade estrutural
+        por linha; sem estrutura, todos os textos do documento).
+
         Args:
             xml_content: Conteúdo XML
-            
+
         Returns:
             Texto limpo
         """
         try:
-            root = ET.fromstring(xml_content)
-            
-            # Função recursiva para extrair texto
-            def extract_text(element, depth=0):
-                text_parts = []
-                
-                # Adicionar texto do elemento
-                if element.text and element.text.strip():
-                    text_parts.append(element.text.strip())
-                
-                # Processar filhos
-                for child in element:
-                    child_text = extract_text(child, depth + 1)
-                    if child_text:
-                        text_parts.append(child_text)
-                    
-                    # Adicionar texto após o filho
-                    if child.tail and child.tail.strip():
-                        text_parts.append(child.tail.strip())
-                
-                return " ".join(text_parts)
-            
-            return extract_text(root)
-            
+            units = list(iter_lexml_units(xml_content, min_loose_text_length=0))
+            return units_to_text(units) or ""
+
         except ET.ParseError as e:
             logger.error(f"Erro ao parsear XML: {str(e)}")
             # Se não for XML válido, retornar como está
@@ -59,7 +48,7 @@ class TextProcessor:
         except Exception as e:
             logger.error(f"Erro ao processar XML: {str(e)}")
             return xml_content
-    
+
     def normalize_text(self, text: str) -> str:
         """
         Normalizar texto: remover tags, normalizar espaços, etc
@@ -74,13 +63,10 @@ class TextProcessor:
             return ""
         
         # Remover tags HTML/XML
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Normalizar espaços em branco
-        text = re.sub(r'\s+', ' ', text)
+        text = _TAG_PATTERN.sub('', text)
         
-        # Normalizar quebras de linha
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        # Normalizar espaços em branco (inclui quebras de linha)
+        text = _WHITESPACE_PATTERN.sub(' ', text)
         
         # Remover caracteres especiais problemáticos
         text = text.replace('\xa0', ' ')  # Non-breaking space
@@ -98,115 +84,187 @@ class TextProcessor:
         chunk_type: str = "article"
     ) -> List[Dict[str, Any]]:
         """
-        Dividir texto em chunks (artigos, parágrafos, etc)
-        
+        Dividir texto em chunks (artigos, parágrafos, incisos ou alíneas)
+
+        O texto é lido uma vez (parse_legal_text) e os chunks saem da árvore
+        de dispositivos, com as posições no texto e as citações de cada um.
+
         Args:
-            text: Texto completo
-            chunk_type: Tipo de chunk (article, paragraph, inciso)
-            
+            text: Texto completo, já normalizado (normalize_text)
+            chunk_type: Tipo de chunk (article, paragraph, inciso, alinea;
+                outro valor = texto inteiro)
+
         Returns:
             Lista de chunks com metadados
         """
-        chunks = []
-        
-        if chunk_type == "article":
-            # Dividir por artigos
-            articles = self.article_pattern.split(text)
-            
-            for i in range(1, len(articles), 2):
-                if i + 1 < len(articles):
-                    article_num = articles[i]
-                    article_content = articles[i + 1]
-                    
-                    # Extrair parágrafos do artigo
-                    paragraphs = self._extract_paragraphs(article_content)
-                    
-                    chunks.append({
-                        "type": "article",
-                        "number": article_num,
-                        "content": article_content,
-                        "normalized_content": self.normalize_text(article_content),
-                        "paragraphs": paragraphs,
-                        "metadata": {
-                            "has_paragraphs": len(paragraphs) > 0,
-                            "paragraph_count": len(paragraphs)
-                        }
-                    })
-        
-        elif chunk_type == "paragraph":
-            # Dividir por parágrafos
-            paragraphs = self._extract_paragraphs(text)
-            chunks = [
-                {
-                    "type": "paragraph",
-                    "number": p["number"],
-                    "content": p["content"],
-                    "normalized_content": self.normalize_text(p["content"]),
-                    "metadata": {}
-                }
-                for p in paragraphs
-            ]
-        
-        else:
+        if chunk_type not in LEVELS:
             # Chunk único
-            chunks.append({
+            return [{
                 "type": "full_text",
                 "number": None,
                 "content": text,
-                "normalized_content": self.normalize_text(text),
+                "normalized_content": text.strip(),
                 "metadata": {}
-            })
-        
+            }]
+
+        return self.chunks_from_tree(parse_legal_text(text), chunk_type)
+
+    def chunks_from_tree(
+        self,
+        document: LegalDocument,
+        chunk_type: str = "article"
+    ) -> List[Dict[str, Any]]:
+        """
+        Montar chunks de uma granularidade a partir da árvore de dispositivos
+
+        O texto do documento já está normalizado: o conteúdo de cada chunk é
+        um trecho dele, sem nova normalização.
+
+        Args:
+            document: Resultado de parse_legal_text
+            chunk_type: article, paragraph, inciso ou alinea
+
+        Returns:
+            Lista de chunks no mesmo formato de chunks_from_units
+        """
+        chunks = []
+        for node in document.iter(chunk_type):
+            content = document.body(node)
+            metadata: Dict[str, Any] = {"start": node.start, "end": node.end}
+            chunk = {
+                "type": chunk_type,
+                "number": node.number,
+                "content": content,
+                "normalized_content": content,
+                "citations": document.citations_in(node.body_start, node.end),
+                "metadata": metadata
+            }
+            if chunk_type == "article":
+                paragraphs = list(node.iter("paragraph"))
+                chunk["paragraphs"] = [
+                    {"number": p.number, "content": document.body(p)} for p in paragraphs
+                ]
+                metadata["has_paragraphs"] = len(paragraphs) > 0
+                metadata["paragraph_count"] = len(paragraphs)
+                metadata["inciso_count"] = sum(1 for _ in node.iter("inciso"))
+            else:
+                path = node.path()
+                metadata["article"] = path[0].number
+                metadata["path"] = " ".join(n.label for n in path)
+            chunks.append(chunk)
         return chunks
-    
-    def _extract_paragraphs(self, text: str) -> List[Dict[str, str]]:
-        """Extrair parágrafos de um texto"""
-        paragraphs = []
-        matches = list(self.paragraph_pattern.finditer(text))
-        
-        for i, match in enumerate(matches):
-            start = match.end()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-            
-            paragraph_text = text[start:end].strip()
-            if paragraph_text:
-                paragraphs.append({
-                    "number": match.group(1),
-                    "content": paragraph_text
-                })
-        
-        return paragraphs
-    
-    def extract_citations(self, text: str) -> List[Dict[str, str]]:
+
+    def extract_citations(self, text: str) -> List[Dict[str, Any]]:
         """
-        Extrair citações internas (ex: "Art. 5º", "§ 2º")
-        
+        Extrair citações internas (ex: "nos termos do art. 5º", "no § 2º")
+
+        Rótulos que abrem um dispositivo (início de frase) não são citações.
+
         Args:
             text: Texto para analisar
-            
+
         Returns:
-            Lista de citações encontradas
+            Lista de citações encontradas, com posição no texto
         """
-        citations = []
-        
-        # Artigos
-        for match in self.article_pattern.finditer(text):
-            citations.append({
-                "type": "article",
-                "reference": match.group(0),
-                "number": match.group(1)
-            })
-        
-        # Parágrafos
-        for match in self.paragraph_pattern.finditer(text):
-            citations.append({
-                "type": "paragraph",
-                "reference": match.group(0),
-                "number": match.group(1)
-            })
-        
-        return citations
-    
+        return parse_legal_text(text).citations
+
+    def chunks_from_units(self, units: Iterable[LexMLUnit]) -> List[Dict[str, Any]]:
+        """
+        Montar chunks (um por artigo) a partir das unidades estruturais do LexML
+
+        A estrutura vem do próprio XML: não há busca por "Art." ou "§" no
+        texto. As unidades são consumidas uma a uma, então aceita o iterador
+        do extrator incremental diretamente.
+
+        Args:
+            units: Unidades na ordem do documento
+
+        Returns:
+            Lista de chunks no mesmo formato de split_into_chunks
+        """
+        chunks = []
+        section: Tuple[str, ...] = ()
+        current: Optional[Dict[str, Any]] = None
+        lines: List[str] = []
+
+        def close_article():
+            if current is None:
+                return
+            content = "\n".join(lines)
+            current["content"] = content
+            current["normalized_content"] = self.normalize_text(content)
+            current["metadata"]["has_paragraphs"] = len(current["paragraphs"]) > 0
+            current["metadata"]["paragraph_count"] = len(current["paragraphs"])
+            chunks.append(current)
+
+        for unit in units:
+            if unit.type == "heading":
+                close_article()
+                current, lines = None, []
+                parents = unit.path[:-1] if unit.label else unit.path
+                section = parents + (unit.content,)
+            elif unit.type == "article" and unit.label:
+                close_article()
+                lines = [unit.content]
+                current = {
+                    "type": "article",
+                    "number": unit.number,
+                    "paragraphs": [],
+                    "metadata": {
+                        "source": "lexml_xml",
+                        "label": unit.label,
+                        "section": " / ".join(section) or None,
+                        "inciso_count": 0
+                    }
+                }
+            elif current is not None and unit.article == current["number"]:
+                lines.append(unit.content)
+                if unit.type == "paragraph":
+                    current["paragraphs"].append({
+                        "number": unit.number,
+                        "content": unit.text
+                    })
+                elif unit.type == "inciso":
+                    current["metadata"]["inciso_count"] += 1
+
+        close_article()
+        return chunks
+
+    def _add_chunk_metadata(
+        self,
+        chunks: List[Dict[str, Any]],
+        legislation_id: int
+    ) -> List[Dict[str, Any]]:
+        for chunk in chunks:
+            chunk["legislation_id"] = legislation_id
+            if "citations" not in chunk:
+                chunk["citations"] = self.extract_citations(chunk["content"])
+            chunk["word_count"] = len(chunk["normalized_content"].split())
+            chunk["char_count"] = len(chunk["normalized_content"])
+        return chunks
+
+    def process_lexml_document(
+        self,
+        xml_content: Union[str, bytes],
+        legislation_id: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Processar documento LexML (XML completo) e retornar chunks por artigo
+
+        Args:
+            xml_content: XML do documento
+            legislation_id: ID da legislação
+
+        Returns:
+            Lista de chunks processados (vazia se o XML não tiver artigos)
+        """
+        try:
+            chunks = self.chunks_from_units(iter_lexml_units(xml_content))
+        except ET.ParseError as e:
+            logger.error(f"Erro ao parsear XML LexML: {str(e)}")
+            return []
+        return self._add_chunk_metadata(chunks, legislation_id)
+
     def process_legislation_text(
         self,
         text: str,
@@ -214,30 +272,105 @@ class TextProcessor:
     ) -> List[Dict[str, Any]]:
         """
         Processar texto completo de uma legislação e retornar chunks
-        
+
+        Se o texto for o XML do documento LexML, os chunks saem da estrutura
+        do XML (process_lexml_document).
+
         Args:
             text: Texto completo da legislação
             legislation_id: ID da legislação
-            
+
         Returns:
             Lista de chunks processados
         """
+        if text.lstrip().startswith("<"):
+            chunks = self.process_lexml_document(text, legislation_id)
+            if chunks:
+                return chunks
+
         # Normalizar texto
         normalized = self.normalize_text(text)
-        
-        # Dividir em chunks (artigos)
+
+        # Dividir em chunks (artigos), já com as citações
         chunks = self.split_into_chunks(normalized, chunk_type="article")
-        
-        # Adicionar metadados e citações
-        for chunk in chunks:
-            chunk["legislation_id"] = legislation_id
-            chunk["citations"] = self.extract_citations(chunk["content"])
-            chunk["word_count"] = len(chunk["normalized_content"].split())
-            chunk["char_count"] = len(chunk["normalized_content"])
-        
-        return chunks
+
+        # Adicionar metadados
+        return self._add_chunk_metadata(chunks, legislation_id)
+
+
+    def process_many(
+        self,
+        texts: Iterable[Tuple[int, str]],
+        workers: Optional[int] = None,
+        chunksize: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Processar muitas legislações em paralelo, em um pool de processos
+
+        Os documentos são enviados aos processos em lotes de chunksize e os
+        resultados saem na ordem de entrada, à medida que ficam prontos. No
+        máximo 2 lotes por processo ficam em andamento: a entrada é lida aos
+        poucos (aceita um gerador) e a memória não cresce com o total.
+
+        Args:
+            texts: Pares (legislation_id, texto)
+            workers: Processos (padrão: núcleos da máquina; 0 ou 1 = no próprio processo)
+            chunksize: Documentos por envio (padrão: TEXT_PROCESSING_CHUNKSIZE)
+            executor: Pool já existente (workers é ignorado e o pool não é encerrado)
+
+        Returns:
+            Iterador de (legislation_id, chunks), como process_legislation_text
+        """
+        chunksize = max(1, chunksize or settings.TEXT_PROCESSING_CHUNKSIZE)
+        items = iter(texts)
+        own_executor = None
+
+        if executor is None:
+            workers = (os.cpu_count() or 1) if workers is None else workers
+            if workers <= 1 or multiprocessing.current_process().daemon:
+                # Sem pool: processos daemon (worker do Celery) não podem criar filhos
+                for legislation_id, text in items:
+                    yield legislation_id, self.process_legislation_text(text, legislation_id)
+                return
+            executor = own_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    batch = list(islice(items, chunksize))
+                    if not batch:
+                        break
+                    pending.append(executor.submit(process_batch, batch))
+                if not pending:
+                    break
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor is not None:
+                own_executor.shutdown(wait=True, cancel_futures=True)
 
 
 # Instância global
 text_processor = TextProcessor()
 
+
+def process_batch(items: List[Tuple[int, str]]) -> List[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Processar um lote de legislações (função de módulo: roda no pool de processos)
+
+    Args:
+        items: Pares (legislation_id, texto)
+
+    Returns:
+        Pares (legislation_id, chunks)
+    """
+    return [
+        (legislation_id, text_processor.process_legislation_text(text, legislation_id))
+        for legislation_id, text in items
+    ]
+
@@ -0,0 +1,116 @@
+"""
+Atualização periódica das legislações em destaque
+
+A cada TRENDING_REFRESH_SECONDS coleta os projetos de lei e as leis do ano
+atual no LexML, grava no armazenamento local e recalcula
+trending_legislations. Roda em background no processo da API (iniciado no
+startup); com vários workers, só atualiza quem encontrar a lista vencida.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.integrations.legislative_apis import lexml_client
+from app.services.legislation_store import LegislationStore, legislation_store
+
+
+class TrendingRefresher:
+    """Job periódico que mantém os destaques atualizados sem chamar o LexML na requisição"""
+
+    def __init__(
+        self,
+        store: Optional[LegislationStore] = None,
+        client: Any = None,
+        interval_seconds: Optional[float] = None,
+        harvest_limit: Optional[int] = None
+    ):
+        """
+        Inicializar job
+
+        Args:
+            store: Armazenamento de legislações (padrão: legislation_store)
+            client: Cliente do LexML (padrão: lexml_client)
+            interval_seconds: Intervalo entre atualizações (padrão: TRENDING_REFRESH_SECONDS)
+            harvest_limit: Documentos coletados por tipo (padrão: TRENDING_HARVEST_LIMIT)
+        """
+        self.store = store or legislation_store
+        self.client = client or lexml_client
+        self.interval_seconds = interval_seconds or settings.TRENDING_REFRESH_SECONDS
+        self.harvest_limit = harvest_limit or settings.TRENDING_HARVEST_LIMIT
+        self._task: Optional[asyncio.Task] = None
+
+    async def harvest(self) -> Dict[str, int]:
+        """
+        Coletar os projetos de lei e as leis do ano atual no LexML
+
+        Returns:
+            Contagens somadas do upsert
+        """
+        year = datetime.now().year
+        totals = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        for search in (self.client.search_projects_of_law, self.client.search_laws):
+            try:
+                documents = await search(year=year, limit=self.harvest_limit)
+            except Exception as e:
+                logger.warning(f"Erro ao coletar destaques do LexML: {str(e)}")
+                continue
+            counts = await asyncio.to_thread(self.store.upsert_lexml_documents, documents)
+            for key, value in counts.items():
+                totals[key] += value
+        return totals
+
+    async def refresh_once(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Coletar e recalcular os destaques se a lista estiver vencida
+
+        Args:
+            force: Atualizar mesmo se outro processo atualizou há pouco
+
+        Returns:
+            Resumo da atualização ou None se não foi necessária
+        """
+        if not force:
+            age = await asyncio.to_thread(self.store.trending_age_seconds)
+            if age is not None and age < self.interval_seconds * 0.9:
+                logger.debug(f"Destaques atualizados há {age:.0f}s, pulando")
+                return None
+
+        harvested = await self.harvest()
+        trending = await asyncio.to_thread(self.store.refresh_trending)
+        summary = {"harvested": harvested, "trending": trending}
+        logger.info(f"Destaques atualizados: {summary}")
+        return summary
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao atualizar destaques: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Iniciar o job no event loop atual (a primeira atualização é imediata)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Atualização dos destaques a cada {self.interval_seconds}s")
+
+    async def stop(self) -> None:
+        """Parar o job"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Instância global
+trending_refresher = TrendingRefresher()
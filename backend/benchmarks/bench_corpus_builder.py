@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark da construção do corpus de treinamento
+Execute: python benchmarks/bench_corpus_builder.py [legislações] [artigos]
+
+Corpus: legislações sintéticas com N artigos cada em SQLite em memória.
+
+Compara o caminho antigo (uma consulta de existência por par e
+session.add por linha, legislação por legislação) com o CorpusBuilder por
+conjuntos (build_corpus_range: chaves existentes em uma consulta e INSERT
+em lote). Mostra pares/s e quantos comandos SQL cada um enviou, na
+primeira execução e numa segunda execução sobre o corpus já pronto.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.models.models import Base, Legislation, LegislationChunk, TrainingCorpus  # noqa: E402
+from app.services.corpus_builder import CorpusBuilder  # noqa: E402
+
+LEGISLATIONS = 200
+ARTICLES = 50
+PHRASES = [
+    "O fornecedor está sujeito às normas deste código.",
+    "A infração sujeita o infrator à pena de multa.",
+    "O contratante é obrigado a informar o consumidor.",
+    "Esta Lei entra em vigor na data de sua publicação.",
+    "Fica vedada a cobrança de taxas não previstas em contrato.",
+]
+
+
+def build_session(legislations: int, articles: int, rng: random.Random):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.bulk_insert_mappings(Legislation, [
+        {"id": n, "external_id": f"lei_{n}", "source": "lexml", "type": "Lei", "number": str(n),
+         "year": 2000, "title": f"Lei {n}", "stable_id": n}
+        for n in range(1, legislations + 1)
+    ])
+    db.bulk_insert_mappings(LegislationChunk, [
+        {"legislation_id": n, "chunk_type": "article", "chunk_number": str(a + 1),
+         "content": " ".join(rng.choices(PHRASES, k=3))}
+        for n in range(1, legislations + 1) for a in range(articles)
+    ])
+    db.commit()
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return db, statements
+
+
+def legacy_build(db, legislation_ids):
+    """Caminho antigo de build_corpus_from_legislation, aplicado a cada legislação"""
+    builder = CorpusBuilder(db)
+    created = 0
+    for legislation_id in legislation_ids:
+        legislation = db.query(Legislation).filter_by(id=legislation_id).first()
+        chunks = db.query(LegislationChunk).filter_by(legislation_id=legislation_id).all()
+        for chunk in chunks:
+            for qa in builder.generate_qa_pairs(chunk, legislation):
+                existing = db.query(TrainingCorpus).filter_by(
+                    legislation_id=legislation_id, chunk_id=chunk.id, question=qa["question"]
+                ).first()
+                if existing:
+                    continue
+                db.add(TrainingCorpus(
+                    legislation_id=legislation_id, chunk_id=chunk.id, question=qa["question"],
+                    answer=qa["answer"], answer_source=qa["answer_source"],
+                    question_type=qa["question_type"],
+                    meta_data={"chunk_type": chunk.chunk_type, "chunk_number": chunk.chunk_number}
+                ))
+                created += 1
+        db.commit()
+    return created
+
+
+def set_based_build(db, legislation_ids):
+    return CorpusBuilder(db).build_corpus_range()["total_created"]
+
+
+def main():
+    legislations = int(sys.argv[1]) if len(sys.argv) > 1 else LEGISLATIONS
+    articles = int(sys.argv[2]) if len(sys.argv) > 2 else ARTICLES
+    ids = list(range(1, legislations + 1))
+
+    print("=" * 80)
+    print(f"BENCHMARK: CORPUS DE TREINAMENTO ({legislations} legislações x {articles} artigos)")
+    print("=" * 80)
+    print(f"{'caminho':<16} {'execução':<10} {'pares':>8} {'s':>8} {'pares/s':>10} {'comandos SQL':>13}")
+    print("-" * 80)
+    for name, build in (("por par", legacy_build), ("por conjuntos", set_based_build)):
+        db, statements = build_session(legislations, articles, random.Random(42))
+        for run in ("primeira", "segunda"):
+            statements.clear()
+            start = time.perf_counter()
+            created = build(db, ids)
+            elapsed = time.perf_counter() - start
+            pairs = db.query(TrainingCorpus).count()
+            print(f"{name:<16} {run:<10} {created:>8} {elapsed:>8.2f} {pairs / elapsed:>10.0f} "
+                  f"{len(statements):>13}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark da deduplicação entre fontes (MinHash/LSH)
+Execute: python benchmarks/bench_deduplicator.py [legislações]
+
+Corpus: legislações sintéticas de 150 palavras em SQLite em memória; 10%
+delas reaparecem em outra fonte com formatação diferente e algumas palavras
+trocadas (como a mesma lei vinda do Senado e da Câmara).
+
+Mede o tempo de Deduplicator.run para N, 2N e 4N legislações (o LSH deve
+manter o tempo por legislação estável), os pares comparados contra os
+N²/2 da comparação de todos os pares, e quantas duplicatas plantadas
+foram encontradas.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.models.models import Base, Legislation  # noqa: E402
+from app.services.deduplicator import Deduplicator  # noqa: E402
+
+LEGISLATIONS = 5000
+WORDS = 150
+DUPLICATE_RATE = 0.1
+VOCABULARY = [f"termo{n}" for n in range(5000)]
+
+
+def build_session(count: int, rng: random.Random):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    planted = {}
+    rows = []
+    originals = int(count / (1 + DUPLICATE_RATE))
+    for n in range(1, originals + 1):
+        rows.append({"id": n, "source": "lexml", "number": str(n),
+                     "full_text": " ".join(rng.choices(VOCABULARY, k=WORDS))})
+    for n in range(originals + 1, count + 1):
+        original = rng.randint(1, originals)
+        words = rows[original - 1]["full_text"].upper().split()
+        for position in rng.sample(range(WORDS), 2):
+            words[position] = "alterado"
+        rows.append({"id": n, "source": rng.choice(["senado", "camara"]),
+                     "number": f"{original:,}".replace(",", "."), "full_text": "Art. 1º " + " ".join(words)})
+        planted[n] = original
+
+    db.bulk_insert_mappings(Legislation, [
+        {**row, "external_id": f"{row['source']}_{row['id']}", "type": "Lei", "year": 2000, "title": "Lei", "stable_id": row["id"]}
+        for row in rows
+    ])
+    db.commit()
+    return db, planted
+
+
+def main():
+    base = int(sys.argv[1]) if len(sys.argv) > 1 else LEGISLATIONS
+    rng = random.Random(42)
+
+    print("=" * 88)
+    print("BENCHMARK: DEDUPLICAÇÃO ENTRE FONTES (MinHash/LSH)")
+    print("=" * 88)
+    print(f"{'legislações':>12} {'s':>8} {'µs/legisl.':>11} {'pares LSH':>10} {'todos os pares':>15} "
+          f"{'plantadas':>10} {'achadas':>8}")
+    print("-" * 88)
+    for count in (base, 2 * base, 4 * base):
+        db, planted = build_session(count, rng)
+        stats = Deduplicator(db).run(prune_aliases=False)
+        canonical = dict(db.query(Legislation.id, Legislation.canonical_id))
+        found = sum(1 for alias, original in planted.items() if canonical.get(alias) == original)
+        print(f"{count:>12} {stats['seconds']:>8.2f} {stats['seconds'] / count * 1e6:>11.0f} "
+              f"{stats['candidate_pairs']:>10} {count * (count - 1) // 2:>15} {len(planted):>10} {found:>8}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
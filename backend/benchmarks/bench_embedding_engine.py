@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark do motor de embeddings em CPU
+Execute: python benchmarks/bench_embedding_engine.py [textos]
+
+Corpus: 2.000 textos com a distribuição do pipeline: perguntas curtas do
+corpus ("Qual o conteúdo do artigo 5?") e artigos de 10 a 400 palavras.
+
+Configurações (textos/s, com o modelo de EmbeddingService):
+- antigo: model.encode(textos, batch_size=32, show_progress_bar=True), o
+  caminho antigo de generate_embeddings_batch, com .tolist() por vetor
+- torch: lotes por comprimento (EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_BATCH_TOKENS)
+- onnx: idem, no ONNX Runtime
+- onnx-int8: idem, com o modelo quantizado em int8
+
+Também mostra a fração de tokens que não é padding em cada esquema de lotes
+(calculada com o tokenizador do modelo, ou por estimativa sem ele). Sem
+sentence-transformers, só essa parte roda.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings  # noqa: E402
+from app.services.embedding_engine import (  # noqa: E402
+    EMBEDDING_AVAILABLE,
+    ONNX_AVAILABLE,
+    EmbeddingEngine,
+    length_buckets,
+    load_embedding_model,
+    padding_efficiency,
+    token_lengths,
+    word_count_length,
+)
+
+MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+TEXTS = 2000
+
+SENTENCE = ("o tratamento de dados pessoais somente poderá ser realizado mediante o "
+            "fornecimento de consentimento pelo titular ou para o cumprimento de obrigação legal")
+
+
+def build_texts(count: int):
+    texts = []
+    for n in range(count):
+        if n % 3 == 0:
+            texts.append(f"Qual o conteúdo do artigo {n % 250 + 1} da Lei nº {n}?")
+        else:
+            words = SENTENCE.split()
+            size = 10 + (n * 53) % 390
+            texts.append(" ".join(words[i % len(words)] for i in range(size)))
+    return texts
+
+
+def padding_report(texts, lengths, label):
+    def fixed(order):
+        return [order[start:start + 32] for start in range(0, len(order), 32)]
+
+    schemes = [
+        ("32 na ordem de entrada", fixed(list(range(len(texts))))),
+        # sentence-transformers ordena cada chamada pelo número de caracteres
+        ("32 por caracteres", fixed(sorted(range(len(texts)), key=lambda i: -len(texts[i])))),
+        ("por tokens + orçamento", length_buckets(
+            lengths, settings.EMBEDDING_BATCH_SIZE, settings.EMBEDDING_MAX_BATCH_TOKENS)),
+    ]
+    print(f"Tokens úteis / tokens processados ({label}):")
+    for name, batches in schemes:
+        print(f"  {name:<24} {padding_efficiency(lengths, batches):>6.1%} em {len(batches)} lotes")
+    print()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else TEXTS
+    texts = build_texts(count)
+
+    print("=" * 80)
+    print("BENCHMARK: MOTOR DE EMBEDDINGS (CPU)")
+    print("=" * 80)
+    print(f"{count} textos, {sum(len(t.split()) for t in texts) / count:.0f} palavras em média")
+    print()
+
+    if not EMBEDDING_AVAILABLE:
+        padding_report(texts, word_count_length(texts), "estimativa, sem tokenizador")
+        print("sentence-transformers não instalado: medição de textos/s não executada")
+        return
+
+    base = load_embedding_model(MODEL_NAME, "torch")
+    padding_report(texts, token_lengths(base, texts), "tokenizador do modelo")
+
+    start = time.perf_counter()
+    legacy = [vector.tolist() for vector in base.encode(
+        texts, batch_size=32, convert_to_numpy=True, show_progress_bar=True)]
+    legacy_seconds = time.perf_counter() - start
+    assert len(legacy) == len(texts)
+
+    configurations = ["torch"]
+    if ONNX_AVAILABLE:
+        configurations += ["onnx", "onnx-int8"]
+    else:
+        print("onnxruntime não instalado: configurações onnx e onnx-int8 puladas\n")
+
+    print(f"{'configuração':<14} {'s':>8} {'textos/s':>10} {'acel.':>7}")
+    print("-" * 44)
+    print(f"{'antigo':<14} {legacy_seconds:>8.2f} {len(texts) / legacy_seconds:>10.1f} {1.0:>7.2f}")
+    for backend in configurations:
+        engine = EmbeddingEngine(load_embedding_model(MODEL_NAME, backend))
+        engine.encode(texts[:64])  # aquecimento
+        start = time.perf_counter()
+        vectors = engine.encode(texts)
+        elapsed = time.perf_counter() - start
+        assert vectors.shape[0] == len(texts)
+        print(f"{backend:<14} {elapsed:>8.2f} {len(texts) / elapsed:>10.1f} {legacy_seconds / elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
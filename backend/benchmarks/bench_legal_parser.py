@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark do chunking de textos legais em texto corrido
+Execute: python benchmarks/bench_legal_parser.py [constituicao.txt] [codigo_civil.txt]
+
+Corpus: os textos da Constituição Federal e do Código Civil, se os arquivos
+(texto puro, UTF-8, como copiado do Planalto) forem passados na linha de
+comando. Sem eles, usa textos sintéticos do mesmo porte: 364 artigos com
+muitos incisos e alíneas (CF com ADCT) e 2.046 artigos curtos (CC).
+
+Compara o caminho antigo de process_legislation_text (normalize_text do
+texto todo e de novo por artigo, split com a regex de artigos,
+_extract_paragraphs por artigo, extract_citations varrendo cada chunk de
+novo) com o parser de uma varredura (app/services/legal_parser.py), que
+ainda monta a árvore completa até as alíneas.
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.legal_parser import parse_legal_text  # noqa: E402
+from app.services.text_processor import text_processor  # noqa: E402
+
+
+ITERATIONS = 5
+
+_ARTICLE = re.compile(r'Art\.?\s*(\d+)[º°]?', re.IGNORECASE)
+_PARAGRAPH = re.compile(r'§\s*(\d+)[º°]?', re.IGNORECASE)
+
+
+def legacy_normalize(text: str) -> str:
+    """normalize_text antes do parser"""
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = text.replace('\xa0', ' ').replace('\u200b', '')
+    return text.strip()
+
+
+def legacy_chunks(text: str, legislation_id: int):
+    """process_legislation_text antes do parser (texto corrido)"""
+    normalize = legacy_normalize
+
+    def paragraphs_of(content):
+        found = []
+        matches = list(_PARAGRAPH.finditer(content))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+            paragraph = content[match.end():end].strip()
+            if paragraph:
+                found.append({"number": match.group(1), "content": paragraph})
+        return found
+
+    def citations_of(content):
+        citations = [{"type": "article", "reference": m.group(0), "number": m.group(1)}
+                     for m in _ARTICLE.finditer(content)]
+        citations += [{"type": "paragraph", "reference": m.group(0), "number": m.group(1)}
+                      for m in _PARAGRAPH.finditer(content)]
+        return citations
+
+    normalized = normalize(text)
+    parts = _ARTICLE.split(normalized)
+    chunks = []
+    for i in range(1, len(parts) - 1, 2):
+        content = parts[i + 1]
+        paragraphs = paragraphs_of(content)
+        chunk = {
+            "type": "article",
+            "number": parts[i],
+            "content": content,
+            "normalized_content": normalize(content),
+            "paragraphs": paragraphs,
+            "legislation_id": legislation_id,
+        }
+        chunk["citations"] = citations_of(chunk["content"])
+        chunk["word_count"] = len(chunk["normalized_content"].split())
+        chunks.append(chunk)
+    return chunks
+
+
+def synthetic_constitution() -> str:
+    """Porte da CF/88 com ADCT: artigos longos, muitos incisos e alíneas"""
+    romans = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII"]
+    parts = ["CONSTITUIÇÃO DA REPÚBLICA FEDERATIVA DO BRASIL. Nós, representantes do povo brasileiro."]
+    for a in range(1, 365):
+        parts.append(f"Art. {a}º Compete à União, observado o disposto no art. {max(1, a - 3)}º:")
+        for i, roman in enumerate(romans[:3 + a % 10]):
+            parts.append(f"{roman} - legislar sobre a matéria {a}.{i} nos termos do § {1 + i % 3}º deste artigo;")
+            if i % 4 == 0:
+                parts.append("a) direito civil, comercial e penal; b) desapropriação; c) águas e energia;")
+        for p in range(1, 1 + a % 4):
+            parts.append(f"§ {p}º A lei complementar disporá sobre o disposto no inciso I do caput.")
+    return " ".join(parts)
+
+
+def synthetic_civil_code() -> str:
+    """Porte do Código Civil: 2.046 artigos curtos, alguns com parágrafos"""
+    parts = ["CÓDIGO CIVIL. PARTE GERAL. LIVRO I DAS PESSOAS."]
+    for a in range(1, 2047):
+        number = f"{a:,}".replace(",", ".")
+        parts.append(f"Art. {number}. Toda pessoa é capaz de direitos e deveres na ordem civil, "
+                     f"ressalvado o disposto no art. {max(1, a - 1)}.")
+        if a % 3 == 0:
+            parts.append("Parágrafo único. Aplica-se o disposto neste artigo às pessoas jurídicas.")
+        if a % 7 == 0:
+            parts.append("§ 1º Os prazos contam-se em dias corridos. § 2º Salvo disposição em contrário.")
+    return " ".join(parts)
+
+
+def timed(function, text):
+    best = float("inf")
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        result = function(text, 1)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    paths = sys.argv[1:3]
+    corpora = [
+        ("Constituição Federal", Path(paths[0]).read_text(encoding="utf-8") if len(paths) > 0 else synthetic_constitution()),
+        ("Código Civil", Path(paths[1]).read_text(encoding="utf-8") if len(paths) > 1 else synthetic_civil_code()),
+    ]
+
+    print("=" * 90)
+    print("BENCHMARK: CHUNKING DE TEXTO LEGAL (regex repetidas x parser de uma varredura)")
+    print("=" * 90)
+    print(f"{'documento':<22} {'KB':>6}  {'variante':<14} {'ms':>9} {'artigos':>8} {'dispos.':>8} {'citações':>9}")
+    print("-" * 90)
+
+    for name, text in corpora:
+        size = len(text.encode("utf-8")) // 1024
+        legacy_time, legacy = timed(legacy_chunks, text)
+        parser_time, chunks = timed(text_processor.process_legislation_text, text)
+        tree = parse_legal_text(text_processor.normalize_text(text))
+        units = sum(1 for _ in tree.iter())
+        print(f"{name:<22} {size:>6}  {'regex':<14} {legacy_time * 1000:>9.1f} {len(legacy):>8} "
+              f"{'-':>8} {sum(len(c['citations']) for c in legacy):>9}")
+        print(f"{'':<22} {'':>6}  {'parser':<14} {parser_time * 1000:>9.1f} {len(chunks):>8} "
+              f"{units:>8} {len(tree.citations):>9}")
+        print(f"{'':<22} {'':>6}  aceleração: {legacy_time / parser_time:.2f}x")
+        print()
+
+    print("Artigos do caminho antigo incluem citações (\"no art. 5º\") tomadas por")
+    print("novos artigos; as citações antigas contam também os rótulos de parágrafo.")
+
+
+if __name__ == "__main__":
+    main()
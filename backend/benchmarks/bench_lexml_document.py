@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Benchmark da extração de texto de documentos LexML completos
+Execute: python benchmarks/bench_lexml_document.py
+
+Corpus: documentos sintéticos montados repetindo os artigos de
+tests/fixtures/lexml/documento_lei.xml (100, 1.000 e 10.000 artigos), gravados
+em arquivo temporário.
+
+Compara o caminho antigo de _extract_text_from_lexml_xml
+(clean_xml_for_parsing + ET.fromstring + findall para cada variação de
+namespace e de tag) com o extrator incremental (lxml e xml.etree), que lê o
+arquivo em blocos. A memória é medida em um subprocesso por variante: pico
+do heap do Python (tracemalloc) e pico de RSS (VmHWM, zerado via
+/proc/self/clear_refs no Linux).
+"""
+
+import gc
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.integrations.legislative_apis import clean_xml_for_parsing  # noqa: E402
+from app.integrations.lexml_document import iter_lexml_units, units_to_text  # noqa: E402
+from app.integrations.lexml_parser import LXML_AVAILABLE  # noqa: E402
+
+
+FIXTURE = Path(__file__).parent.parent / "tests" / "fixtures" / "lexml" / "documento_lei.xml"
+SIZES = (100, 1000, 10000)
+ITERATIONS = 3
+
+_ARTICLE_PATTERN = re.compile(r"<Artigo .*?</Artigo>", re.DOTALL)
+
+
+def build_document(articles: int) -> bytes:
+    """Documento com o número pedido de artigos (cabeçalho e rodapé da fixture)"""
+    text = FIXTURE.read_text(encoding="utf-8")
+    found = _ARTICLE_PATTERN.findall(text)
+    head = text[:text.index("<Articulacao>") + len("<Articulacao>")]
+    tail = text[text.index("</Articulacao>"):]
+    body = "\n".join(found[i % len(found)] for i in range(articles))
+    return (head + body + tail).encode("utf-8")
+
+
+def _find_first(element, tags, namespaces):
+    for tag in tags:
+        found = element.find(f".//{tag}", namespaces) if namespaces else element.find(f".//{tag}")
+        if found is not None and found.text and found.text.strip():
+            return found.text.strip()
+    return None
+
+
+def legacy_extract(path: str) -> str:
+    """Caminho antigo de _extract_text_from_lexml_xml: árvore inteira + findall por variação de tag"""
+    xml_content = clean_xml_for_parsing(Path(path).read_text(encoding="utf-8"))
+    root = ET.fromstring(xml_content)
+
+    text_parts = []
+    for namespaces in ({"lexml": "http://www.lexml.gov.br/1.0"}, {"": "http://www.lexml.gov.br/1.0"}, {}):
+        for tag_variation in ("Artigo", "artigo", "ARTIGO"):
+            for artigo in root.findall(f".//{tag_variation}", namespaces):
+                rotulo = _find_first(artigo, ("Rotulo", "rotulo", "ROTULO", "Label", "label"), namespaces)
+                if rotulo:
+                    text_parts.append(f"\n{rotulo}")
+                for par_tag in ("Paragrafo", "paragrafo", "PARAGRAFO", "Paragraphe"):
+                    for paragrafo in artigo.findall(f".//{par_tag}", namespaces):
+                        for value in (
+                            _find_first(paragrafo, ("Rotulo", "rotulo", "ROTULO"), namespaces),
+                            _find_first(paragrafo, ("Texto", "texto", "TEXTO", "Text", "text",
+                                                    "Conteudo", "conteudo"), namespaces),
+                        ):
+                            if value:
+                                text_parts.append(value)
+                for inc_tag in ("Inciso", "inciso", "INCISO"):
+                    for inciso in artigo.findall(f".//{inc_tag}", namespaces):
+                        for value in (
+                            _find_first(inciso, ("Rotulo", "rotulo", "ROTULO"), namespaces),
+                            _find_first(inciso, ("Texto", "texto", "TEXTO"), namespaces),
+                        ):
+                            if value:
+                                text_parts.append(value)
+        if text_parts:
+            break
+
+    if not text_parts or len("".join(text_parts)) < 100:
+        def extract_all_text(elem):
+            texts = []
+            if elem.text and elem.text.strip():
+                texts.append(elem.text.strip())
+            for child in elem:
+                texts.extend(extract_all_text(child))
+            if elem.tail and elem.tail.strip():
+                texts.append(elem.tail.strip())
+            return texts
+
+        text_parts.extend(t for t in extract_all_text(root) if len(t) > 10 and not t.isdigit())
+
+    return "\n".join(text_parts).strip()
+
+
+def streaming_extract(use_lxml: bool):
+    def extract(path: str) -> int:
+        # Consome as unidades sem acumular (como um chunking incremental)
+        count = 0
+        with open(path, "rb") as stream:
+            for unit in iter_lexml_units(stream, use_lxml=use_lxml):
+                count += len(unit.content)
+        return count
+    return extract
+
+
+def streaming_text(path: str) -> str:
+    with open(path, "rb") as stream:
+        return units_to_text(list(iter_lexml_units(stream)))
+
+
+def variants():
+    found = {
+        "antigo (árvore + findall)": legacy_extract,
+        "incremental (xml.etree)": streaming_extract(False),
+    }
+    if LXML_AVAILABLE:
+        found["incremental (lxml)"] = streaming_extract(True)
+        found["incremental (lxml) + texto"] = streaming_text
+    return found
+
+
+def _proc_status_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise OSError(field)
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure_memory(variant: str, path: str) -> None:
+    """Executado em subprocesso: imprime picos (KB) de heap Python e de RSS acima da base"""
+    func = variants()[variant]
+    gc.collect()
+
+    tracemalloc.start()
+    func(path)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+
+    rss_peak = -1
+    if _reset_peak_rss():
+        baseline = _proc_status_kb("VmRSS")
+        func(path)
+        rss_peak = max(0, _proc_status_kb("VmHWM") - baseline)
+    print(heap_peak // 1024, rss_peak)
+
+
+def peak_memory_kb(variant: str, path: str):
+    output = subprocess.run(
+        [sys.executable, __file__, "--memory", variant, path],
+        capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()
+    heap, rss = output[-1].split()
+    return int(heap), (int(rss) if int(rss) >= 0 else "n/d")
+
+
+def main():
+    funcs = variants()
+
+    print("=" * 100)
+    print("BENCHMARK: EXTRAÇÃO DE TEXTO DE DOCUMENTOS LEXML")
+    print("=" * 100)
+    print(f"{'artigos':>8} {'KB':>7}  {'variante':<28} {'ms/doc':>9} "
+          f"{'heap Python (KB)':>17} {'RSS (KB)':>10}")
+    print("-" * 100)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            path = str(Path(tmp) / f"documento_{size}.xml")
+            content = build_document(size)
+            Path(path).write_bytes(content)
+            for label, func in funcs.items():
+                start = time.perf_counter()
+                for _ in range(ITERATIONS):
+                    func(path)
+                per_call_ms = (time.perf_counter() - start) * 1000 / ITERATIONS
+                heap, rss = peak_memory_kb(label, path)
+                print(f"{size:>8} {len(content) // 1024:>7}  {label:<28} {per_call_ms:>9.1f} "
+                      f"{heap:>17} {rss:>10}")
+            print()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--memory":
+        measure_memory(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do extrator de consultas
+Execute: python benchmarks/bench_query_parser.py
+
+Compara a extração antiga (regex montadas e executadas dentro de cada função,
+repetidas em search, get_relevant_context e em relevance_score por resultado)
+com o ParsedQuery produzido uma única vez por requisição.
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.query_parser import parse_query, query_parser  # noqa: E402
+
+
+QUERIES = [
+    "Me explique sobre a Lei 13.979",
+    "Quais leis foram aprovadas em 2025?",
+    "projetos de lei sobre educação",
+    "Fale sobre a LGPD",
+    "lei nº 14133/2021",
+    "leis de ai no senado",
+]
+
+# Número de resultados ranqueados por requisição (relevance_score roda por resultado)
+RESULTS_PER_REQUEST = 30
+ITERATIONS = 2000
+
+
+def legacy_request(query: str) -> None:
+    """Reproduz o trabalho de análise da consulta feito antes por requisição"""
+    # get_relevant_context
+    re.search(r'\b(20\d{2})\b', query)
+    re.search(r'lei\s+(?:n[º°]|n\.?\s*)?\s*(\d+)', query, re.IGNORECASE)
+
+    # search: ano, número, stop words e expansões
+    re.search(r'\b(20\d{2})\b', query)
+    re.search(r'lei\s+(?:n[º°]|n\.?\s*)?\s*(\d+)', query, re.IGNORECASE)
+    query_lower = query.lower().strip()
+    stop_words = ['fale', 'me', 'sobre', 'de',
+                  'uma', 'lei', 'leis', 'o', 'a', 'os', 'as']
+    query_words = [w for w in query_lower.split(
+    ) if w not in stop_words and len(w) > 2]
+    clean_query = ' '.join(query_words) if query_words else query_lower
+    re.search(r'\bai\b', query_lower)
+    re.search(r'\big\b', query_lower)
+    _ = clean_query
+
+    # search: número de novo antes de ordenar, e split por resultado
+    re.search(r'lei\s+(?:n[º°]|n\.?\s*)?\s*(\d+)', query, re.IGNORECASE)
+    for _ in range(RESULTS_PER_REQUEST):
+        [w for w in query.lower().split() if len(w) > 3]
+
+
+def parsed_request(query: str, cached: bool) -> None:
+    """Análise única compartilhada por todas as etapas"""
+    parsed = parse_query(query) if cached else query_parser.parse(query)
+    for _ in range(RESULTS_PER_REQUEST):
+        [w for w in parsed.tokens if len(w) > 3]
+
+
+def run(label: str, func) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for query in QUERIES:
+            func(query)
+    elapsed = time.perf_counter() - start
+    per_request_us = elapsed * 1_000_000 / (ITERATIONS * len(QUERIES))
+    print(f"{label:<28} {per_request_us:8.1f} µs/requisição")
+    return per_request_us
+
+
+def main():
+    print("=" * 60)
+    print("BENCHMARK: ANÁLISE DA CONSULTA POR REQUISIÇÃO")
+    print("=" * 60)
+
+    legacy = run("Regex inline (antigo)", legacy_request)
+    uncached = run("ParsedQuery (sem cache)", lambda q: parsed_request(q, False))
+    cached = run("ParsedQuery (com cache)", lambda q: parsed_request(q, True))
+
+    print("-" * 60)
+    print(f"Ganho sem cache: {legacy / uncached:.1f}x")
+    print(f"Ganho com cache: {legacy / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
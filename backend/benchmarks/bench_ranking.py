@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark do ranqueamento da busca unificada
+Execute: python benchmarks/bench_ranking.py
+
+Mede o custo de ordenar 1.000 resultados combinados das fontes com a função
+de ordenação antiga (relevance_score recalculando a consulta por resultado)
+e com os rankers do módulo app.services.ranking.
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.query_parser import parse_query  # noqa: E402
+from app.services.ranking import ResultRanker  # noqa: E402
+
+
+RESULT_COUNT = 1000
+ITERATIONS = 20
+QUERY = "Me explique a Lei 13.979 sobre enfrentamento da emergência de saúde pública"
+
+WORDS = [
+    "dispõe", "sobre", "saúde", "pública", "educação", "emergência", "medidas",
+    "enfrentamento", "altera", "lei", "tributária", "proteção", "dados",
+    "pessoais", "trabalho", "ambiente", "transporte", "segurança", "municípios",
+]
+
+
+def make_results(count: int):
+    rng = random.Random(42)
+    results = []
+    for i in range(count):
+        number = str(rng.randint(1000, 15000))
+        title = f"Lei nº {number} - " + " ".join(rng.choices(WORDS, k=12))
+        results.append({
+            "id": str(i),
+            "title": title,
+            "description": " ".join(rng.choices(WORDS, k=40)),
+            "number": number,
+            "date": f"{rng.randint(1990, 2025)}-01-01",
+        })
+    results[rng.randrange(count)]["number"] = "13979"
+    return results
+
+
+def legacy_sort(query, results):
+    """Ordenação antiga: regex e split da consulta refeitos por resultado"""
+    lei_pattern = re.search(
+        r'lei\s+(?:n[º°]|n\.?\s*)?\s*(\d+)', query, re.IGNORECASE)
+    lei_numero = lei_pattern.group(1) if lei_pattern else None
+
+    def relevance_score(result):
+        title_lower = result.get('title', '').lower()
+        query_lower = query.lower()
+        score = 0
+        if lei_numero and lei_numero in str(result.get('number', '')):
+            score += 100
+        if lei_numero and lei_numero in title_lower:
+            score += 50
+        query_words = query_lower.split()
+        matching_words = sum(
+            1 for word in query_words if len(word) > 3 and word in title_lower)
+        score += matching_words * 10
+        if query_lower in title_lower:
+            score += 20
+        date_str = str(result.get('date', ''))
+        if '2025' in date_str:
+            score += 5
+        elif '2024' in date_str:
+            score += 3
+        return score
+
+    return sorted(results, key=relevance_score, reverse=True)
+
+
+def run(label, func):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    per_call_ms = (time.perf_counter() - start) * 1000 / ITERATIONS
+    print(f"{label:<32} {per_call_ms:8.2f} ms / {RESULT_COUNT} resultados")
+    return per_call_ms
+
+
+def main():
+    results = make_results(RESULT_COUNT)
+    parsed = parse_query(QUERY)
+
+    print("=" * 64)
+    print("BENCHMARK: RANQUEAMENTO DE RESULTADOS COMBINADOS")
+    print("=" * 64)
+
+    run("relevance_score (antigo)", lambda: legacy_sort(QUERY, results))
+    for name in ("heuristic", "bm25"):
+        ranker = ResultRanker(default=name)
+        run(f"{name}", lambda: ranker.rank(parsed, results))
+        run(f"{name} (explain)", lambda: ranker.rank(parsed, results, explain=True))
+
+
+if __name__ == "__main__":
+    main()
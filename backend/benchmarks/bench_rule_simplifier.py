@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do simplificador local (caminho rápido da simplificação)
+Execute: python benchmarks/bench_rule_simplifier.py
+
+Mede o tempo de RuleBasedSimplifier.simplify (glossário jurídico + índice
+de legibilidade) por ementa. O caminho rápido substitui a chamada ao LLM,
+então deve ficar bem abaixo de 1 ms por ementa.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ai.rule_simplifier import rule_simplifier  # noqa: E402
+
+
+EMENTAS = [
+    "Dispõe sobre a proteção de dados pessoais e altera a Lei nº 12.965, "
+    "de 23 de abril de 2014. Outrossim, é vedado o tratamento de dados "
+    "sensíveis, ressalvado o disposto no caput do art. 11.",
+    "Dispõe sobre as medidas para enfrentamento da emergência de saúde pública "
+    "de importância internacional decorrente do coronavírus responsável pelo surto de 2019.",
+    "Fica revogado o art. 2º da Lei nº 8.666, de 21 de junho de 1993, "
+    "consoante o disposto na legislação supracitada.",
+    "A lei foi aprovada. Ela vale hoje. Você tem direitos.",
+]
+ITERATIONS = 2000
+
+
+def main():
+    print("=" * 60)
+    print("BENCHMARK: SIMPLIFICADOR LOCAL (CAMINHO RÁPIDO)")
+    print("=" * 60)
+
+    for ementa in EMENTAS:
+        rule_simplifier.simplify(ementa)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for ementa in EMENTAS:
+            rule_simplifier.simplify(ementa)
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed * 1_000_000 / (ITERATIONS * len(EMENTAS))
+
+    print(f"{'Caminho rápido':<28} {per_call_us:8.1f} µs/ementa")
+
+
+if __name__ == "__main__":
+    main()
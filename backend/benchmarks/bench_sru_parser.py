@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parser de respostas SRU do LexML
+Execute: python benchmarks/bench_sru_parser.py
+
+Corpus: respostas salvas em tests/fixtures/lexml, mais respostas sintéticas
+maiores montadas a partir dos mesmos registros (100 e 1.000 registros, com
+e sem entidades HTML).
+
+Compara o caminho antigo (clean_xml_for_parsing + ET.fromstring para o
+total + _parse_lexml_xml limpando e parseando de novo) com o SRUParser
+(lxml e xml.etree). A memória é medida em um subprocesso por variante:
+pico do heap do Python (tracemalloc) e pico de RSS (VmHWM, zerado via
+/proc/self/clear_refs no Linux), pois o lxml aloca fora do heap do Python.
+"""
+
+import gc
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.integrations.legislative_apis import clean_xml_for_parsing  # noqa: E402
+from app.integrations.lexml_parser import LXML_AVAILABLE, SRUParser  # noqa: E402
+
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "lexml"
+ITERATIONS = 20
+
+_RECORD_PATTERN = re.compile(r"<srw:record>.*?</srw:record>", re.DOTALL)
+
+
+def build_corpus(only=None):
+    """Respostas salvas + respostas sintéticas maiores (only = só um documento)"""
+    corpus = {
+        path.name: path.read_bytes() for path in sorted(FIXTURES.glob("*.xml"))
+        if only in (None, path.name)
+    }
+
+    for source in ("sru_leis.xml", "sru_entidades_html.xml"):
+        for size in (100, 1000):
+            name = f"{source[:-4]}_x{size}.xml"
+            if only not in (None, name):
+                continue
+            text = (FIXTURES / source).read_text(encoding="utf-8")
+            records = _RECORD_PATTERN.findall(text)
+            head = text[:text.index("<srw:record>")]
+            tail = text[text.rindex("</srw:record>") + len("</srw:record>"):]
+            body = "\n".join(records[i % len(records)] for i in range(size))
+            corpus[name] = (head + body + tail).encode("utf-8")
+    return corpus
+
+
+def legacy_parse(content: bytes):
+    """Caminho antigo de LexMLClient.search (limpeza e parsing duplicados)"""
+    xml_content = clean_xml_for_parsing(content.decode("utf-8", errors="replace"))
+    try:
+        root = ET.fromstring(xml_content)
+    except ET.ParseError:
+        xml_content = re.sub(
+            r'&(?!amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+;)[^;]*;', '&amp;', xml_content)
+        root = ET.fromstring(xml_content)
+    namespaces = {'srw': 'http://www.loc.gov/zing/srw/'}
+    number_of_records = root.find('.//srw:numberOfRecords', namespaces)
+    total = int(number_of_records.text) if number_of_records is not None else 0
+
+    # _parse_lexml_xml: limpa e parseia de novo
+    xml_content = clean_xml_for_parsing(xml_content)
+    root = ET.fromstring(xml_content)
+    namespaces = {
+        'srw': 'http://www.loc.gov/zing/srw/',
+        'dc': 'http://purl.org/dc/elements/1.1/',
+        'srw_dc': 'info:srw/schema/1/dc-schema'
+    }
+    records = []
+    for record in root.findall('.//srw:record', namespaces):
+        record_data = record.find('.//srw_dc:dc', namespaces)
+        if record_data is None:
+            continue
+        doc = {}
+        for tag, key in (('tipoDocumento', 'tipo_documento'), ('facet-tipoDocumento', 'facet_tipo_documento'),
+                         ('urn', 'urn'), ('localidade', 'localidade'), ('facet-localidade', 'facet_localidade'),
+                         ('autoridade', 'autoridade'), ('facet-autoridade', 'facet_autoridade')):
+            element = record_data.find(tag)
+            if element is not None:
+                doc[key] = element.text
+        for tag, key in (('.//dc:title', 'title'), ('.//dc:description', 'description'),
+                         ('.//dc:date', 'date'), ('.//dc:type', 'dc_type'), ('.//dc:identifier', 'lexml_id')):
+            element = record_data.find(tag, namespaces)
+            if element is not None:
+                doc[key] = element.text
+        records.append(doc)
+    return total, records
+
+
+def variants():
+    found = {
+        "antigo (limpeza + 2x ET)": legacy_parse,
+        "SRUParser (xml.etree)": SRUParser(use_lxml=False).parse,
+    }
+    if LXML_AVAILABLE:
+        found["SRUParser (lxml)"] = SRUParser(use_lxml=True).parse
+    return found
+
+
+def _proc_status_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise OSError(field)
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure_memory(variant: str, name: str) -> None:
+    """Executado em subprocesso: imprime picos (KB) de heap Python e de RSS acima da base"""
+    content = build_corpus(only=name)[name]
+    func = variants()[variant]
+    gc.collect()
+
+    tracemalloc.start()
+    func(content)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+
+    rss_peak = -1
+    if _reset_peak_rss():
+        baseline = _proc_status_kb("VmRSS")
+        func(content)
+        rss_peak = max(0, _proc_status_kb("VmHWM") - baseline)
+    print(heap_peak // 1024, rss_peak)
+
+
+def peak_memory_kb(variant: str, name: str):
+    output = subprocess.run(
+        [sys.executable, __file__, "--memory", variant, name],
+        capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()
+    heap, rss = output[-1].split()
+    return int(heap), (int(rss) if int(rss) >= 0 else "n/d")
+
+
+def main():
+    corpus = build_corpus()
+    funcs = variants()
+
+    print("=" * 104)
+    print("BENCHMARK: PARSING DE RESPOSTAS SRU DO LEXML")
+    print("=" * 104)
+    print(f"{'resposta':<30} {'KB':>5}  {'variante':<26} {'ms/resp':>8} "
+          f"{'heap Python (KB)':>17} {'RSS (KB)':>10}")
+    print("-" * 104)
+
+    for name, content in corpus.items():
+        for label, func in funcs.items():
+            start = time.perf_counter()
+            for _ in range(ITERATIONS):
+                func(content)
+            per_call_ms = (time.perf_counter() - start) * 1000 / ITERATIONS
+            heap, rss = peak_memory_kb(label, name)
+            print(f"{name:<30} {len(content) // 1024:>5}  {label:<26} {per_call_ms:>8.2f} "
+                  f"{heap:>17} {rss:>10}")
+        print()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--memory":
+        measure_memory(sys.argv[2], sys.argv[3])
+    else:
+        main()
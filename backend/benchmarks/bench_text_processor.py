@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark do chunking em lote de legislações (TextProcessor.process_many)
+Execute: python benchmarks/bench_text_processor.py [documentos]
+
+Corpus: leis sintéticas de tamanho real (40 a 160 artigos, com parágrafos,
+incisos e citações; ~20 a 90 KB cada), 2.000 documentos por padrão. Metade
+em texto corrido e metade no XML do LexML (documento da fixture com os
+artigos repetidos).
+
+Compara o processamento serial (process_legislation_text um a um) com
+process_many em 1, 2, 4, ... processos até o número de núcleos, e mostra a
+aceleração e a eficiência (aceleração / processos) de cada configuração.
+O ganho depende de núcleos livres: em máquina com um núcleo o pool só
+acrescenta o custo de serializar os documentos entre processos.
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.text_processor import text_processor  # noqa: E402
+
+
+FIXTURE = Path(__file__).parent.parent / "tests" / "fixtures" / "lexml" / "documento_lei.xml"
+DOCUMENTS = 2000
+CHUNKSIZES = (1, 8, 32)
+
+_ARTICLE_PATTERN = re.compile(r"<Artigo .*?</Artigo>", re.DOTALL)
+
+
+def plain_law(n: int) -> str:
+    """Lei em texto corrido com 40 a 160 artigos"""
+    articles = []
+    for a in range(1, 40 + (n * 37) % 121):
+        articles.append(
+            f"Art. {a}º O tratamento de dados pessoais de que trata a norma {n} somente "
+            f"poderá ser realizado nas hipóteses previstas no art. {max(1, a - 1)}º desta Lei. "
+            f"§ 1º Para os fins do disposto no caput, considera-se controlador a pessoa "
+            f"natural ou jurídica a quem competem as decisões referentes ao tratamento. "
+            f"§ 2º Aplica-se o disposto no § 1º aos operadores. "
+            f"I - mediante o fornecimento de consentimento pelo titular; "
+            f"II - para o cumprimento de obrigação legal ou regulatória pelo controlador; "
+            f"III - pela administração pública, para a execução de políticas públicas. "
+        )
+    return "".join(articles)
+
+
+def xml_law(n: int) -> str:
+    """Documento LexML com 40 a 160 artigos (artigos da fixture repetidos)"""
+    text = FIXTURE.read_text(encoding="utf-8")
+    found = _ARTICLE_PATTERN.findall(text)
+    head = text[:text.index("<Articulacao>") + len("<Articulacao>")]
+    tail = text[text.index("</Articulacao>"):]
+    body = "\n".join(found[i % len(found)] for i in range(40 + (n * 37) % 121))
+    return head + body + tail
+
+
+def build_corpus(count: int):
+    return [(n, xml_law(n) if n % 2 else plain_law(n)) for n in range(1, count + 1)]
+
+
+def run_serial(texts) -> int:
+    return sum(len(text_processor.process_legislation_text(text, i)) for i, text in texts)
+
+
+def run_pool(texts, workers: int, chunksize: int) -> int:
+    return sum(len(chunks) for _, chunks in
+               text_processor.process_many(texts, workers=workers, chunksize=chunksize))
+
+
+def worker_counts():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores] if cores > 1 else [2]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DOCUMENTS
+    texts = build_corpus(count)
+    size_mb = sum(len(text) for _, text in texts) / 1024 / 1024
+
+    print("=" * 80)
+    print("BENCHMARK: CHUNKING EM LOTE (TextProcessor.process_many)")
+    print("=" * 80)
+    print(f"{count} documentos, {size_mb:.1f} MB, {os.cpu_count()} núcleos")
+    print(f"{'variante':<30} {'s':>8} {'docs/s':>9} {'chunks':>9} {'acel.':>7} {'efic.':>7}")
+    print("-" * 80)
+
+    start = time.perf_counter()
+    chunks = run_serial(texts)
+    serial = time.perf_counter() - start
+    print(f"{'serial':<30} {serial:>8.2f} {count / serial:>9.0f} {chunks:>9} {1.0:>7.2f} {1.0:>7.2f}")
+
+    for workers in worker_counts():
+        for chunksize in CHUNKSIZES:
+            start = time.perf_counter()
+            total = run_pool(texts, workers, chunksize)
+            elapsed = time.perf_counter() - start
+            assert total == chunks
+            speedup = serial / elapsed
+            label = f"pool {workers} proc, envio {chunksize}"
+            print(f"{label:<30} {elapsed:>8.2f} {count / elapsed:>9.0f} {total:>9} "
+                  f"{speedup:>7.2f} {speedup / workers:>7.2f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
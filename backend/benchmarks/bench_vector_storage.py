@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark do armazenamento de embeddings: arrays JSON x binário
+Execute: python benchmarks/bench_vector_storage.py [vetores]
+
+Corpus: 20.000 vetores normalizados de 384 dimensões (dimensão do
+paraphrase-multilingual-MiniLM-L12-v2), gravados em um SQLite temporário
+como array JSON (formato antigo) e nos formatos de app/core/vector_codec.py.
+
+Mostra, com storage_report (o mesmo de scripts/embedding_storage_report.py):
+bytes por vetor, tamanho do arquivo e o tempo para carregar todos os vetores
+em uma matriz float32; e o erro de similaridade de cosseno de cada formato
+em relação ao float32.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.core.vector_codec import FORMATS, decode_matrix, encode_vector, storage_report  # noqa: E402
+
+VECTORS = 20000
+DIMENSION = 384
+
+
+def build_vectors(count: int) -> np.ndarray:
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def write_table(path: str, values, column_type: str):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE legislation_chunks (id INTEGER PRIMARY KEY, embedding {column_type})"))
+        connection.execute(
+            text("INSERT INTO legislation_chunks (id, embedding) VALUES (:id, :embedding)"),
+            [{"id": i + 1, "embedding": value} for i, value in enumerate(values)]
+        )
+    with engine.connect() as connection:
+        report = storage_report(connection, "legislation_chunks")
+    engine.dispose()
+    report["file_bytes"] = os.path.getsize(path)
+    return report
+
+
+def cosine_error(vectors: np.ndarray, decoded: np.ndarray) -> float:
+    """Maior diferença de similaridade de cosseno entre pares (amostra de 500)"""
+    sample = vectors[:500]
+    approx = decoded[:500] / np.linalg.norm(decoded[:500], axis=1, keepdims=True)
+    return float(np.abs(sample @ sample.T - approx @ approx.T).max())
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else VECTORS
+    vectors = build_vectors(count)
+
+    print("=" * 84)
+    print("BENCHMARK: ARMAZENAMENTO DE EMBEDDINGS (SQLite)")
+    print("=" * 84)
+    print(f"{count} vetores de {DIMENSION} dimensões")
+    print()
+    print(f"{'formato':<9} {'bytes/vetor':>12} {'arquivo (MB)':>13} {'leitura (s)':>12} "
+          f"{'acel.':>7} {'erro cosseno':>13}")
+    print("-" * 84)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = write_table(os.path.join(tmp, "json.db"),
+                               [json.dumps(vector) for vector in vectors.tolist()], "JSON")
+        print(f"{'json':<9} {baseline['bytes_per_row']:>12.0f} {baseline['file_bytes'] / 2**20:>13.1f} "
+              f"{baseline['load_seconds']:>12.3f} {1.0:>7.2f} {0.0:>13.5f}")
+
+        for storage_format in FORMATS:
+            blobs = [encode_vector(vector, storage_format) for vector in vectors]
+            report = write_table(os.path.join(tmp, f"{storage_format}.db"), blobs, "BLOB")
+            assert report["rows"] == count and report["format"] == storage_format
+            error = cosine_error(vectors, decode_matrix(blobs))
+            print(f"{storage_format:<9} {report['bytes_per_row']:>12.0f} "
+                  f"{report['file_bytes'] / 2**20:>13.1f} {report['load_seconds']:>12.3f} "
+                  f"{baseline['load_seconds'] / report['load_seconds']:>7.2f} {error:>13.5f}")
+
+
+if __name__ == "__main__":
+    main()
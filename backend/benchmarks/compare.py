@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Comparar dois resultados da suíte de benchmarks (run_suite.py)
+Execute: python benchmarks/compare.py base.json novo.json [--threshold 0.10] [--min-delta-ms 2]
+
+Mostra, por cenário, vazão e p50/p95/p99 dos dois resultados e a variação.
+Sai com código 1 (para o CI) se algum cenário piorou além do limite: p95
+ou p99 maior em mais de threshold (e em mais de min-delta-ms, para não
+acusar ruído em latências de poucos milissegundos), vazão menor em mais de
+threshold ou erros que antes não havia. Resultados com configurações
+diferentes (latência, concorrência...) são comparados, mas com aviso.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LATENCY_KEYS = ("p95_ms", "p99_ms")
+SHOWN_KEYS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    """Variação relativa (None sem base)"""
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before
+
+
+def regressions(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float = 0.10,
+    min_delta_ms: float = 2.0
+) -> List[str]:
+    """
+    Pioras do resultado novo em relação à base
+
+    Args:
+        base: Resultado de referência
+        new: Resultado a verificar
+        threshold: Piora relativa tolerada (0.10 = 10%)
+        min_delta_ms: Aumento absoluto mínimo de latência para contar
+
+    Returns:
+        Descrição de cada piora (vazio se nenhuma)
+    """
+    found = []
+    for name, after in new["scenarios"].items():
+        before = base["scenarios"].get(name)
+        if before is None or "skipped" in before or "skipped" in after:
+            continue
+        for key in LATENCY_KEYS:
+            if key not in before or key not in after:
+                continue
+            relative = change(before[key], after[key])
+            if relative is not None and relative > threshold and after[key] - before[key] > min_delta_ms:
+                found.append(f"{name}: {key} {before[key]:.1f} -> {after[key]:.1f} ms (+{relative:.0%})")
+        relative = change(before.get("throughput_rps"), after.get("throughput_rps"))
+        if relative is not None and relative < -threshold:
+            found.append(f"{name}: vazão {before['throughput_rps']:.1f} -> "
+                         f"{after['throughput_rps']:.1f} req/s ({relative:.0%})")
+        if after.get("errors") and not before.get("errors"):
+            found.append(f"{name}: {after['errors']} erros (antes nenhum)")
+    return found
+
+
+def print_table(base: Dict[str, Any], new: Dict[str, Any]) -> None:
+    print(f"base: {base.get('commit')}{' (alterado)' if base.get('dirty') else ''}  {base.get('timestamp')}")
+    print(f"novo: {new.get('commit')}{' (alterado)' if new.get('dirty') else ''}  {new.get('timestamp')}")
+    if base.get("config") != new.get("config"):
+        print("Aviso: configurações diferentes entre os resultados")
+    print(f"\n{'cenário':<22}{'métrica':<16}{'base':>10}{'novo':>10}{'variação':>10}")
+    for name, after in new["scenarios"].items():
+        before = base["scenarios"].get(name, {})
+        if "skipped" in after or "skipped" in before:
+            print(f"{name:<22}pulado")
+            continue
+        for key in SHOWN_KEYS:
+            relative = change(before.get(key), after.get(key))
+            shown = f"{relative:+.1%}" if relative is not None else "-"
+            print(f"{name:<22}{key:<16}{before.get(key, float('nan')):>10.1f}"
+                  f"{after.get(key, float('nan')):>10.1f}{shown:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Comparar resultados da suíte de benchmarks")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora relativa tolerada")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Aumento mínimo de latência (ms)")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    print_table(base, new)
+    found = regressions(base, new, args.threshold, args.min_delta_ms)
+    if found:
+        print("\nPioras de desempenho:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nSem pioras acima do limite")
+
+
+if __name__ == "__main__":
+    main()
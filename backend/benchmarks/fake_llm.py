@@ -0,0 +1,58 @@
+"""
+LLM falso para os benchmarks: latência configurável e resposta determinística
+
+Tem a interface usada por ChatService (ainvoke com a lista de mensagens) e
+devolve AIMessage com usage_metadata, como os modelos do LangChain, para
+que métricas de tokens e spans funcionem como em produção. A latência
+cresce com o tamanho do prompt e da resposta (tempo até o primeiro token +
+tempo por token), em vez de um valor fixo.
+"""
+
+import asyncio
+from typing import Any, List
+
+try:
+    from langchain_core.messages import AIMessage
+    LANGCHAIN_AVAILABLE = True
+except ImportError:
+    LANGCHAIN_AVAILABLE = False
+
+# Resposta no tom do prompt do Voz da Lei
+ANSWER = (
+    "Essa lei define regras para proteger os seus direitos. Em palavras simples: "
+    "o governo e as empresas precisam seguir essas regras e você pode reclamar "
+    "quando elas não forem cumpridas. Para mais detalhes, consulte a fonte oficial."
+)
+
+
+def count_tokens(text: str) -> int:
+    """Aproximação de tokens: ~4 caracteres por token"""
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel:
+    """Modelo de chat falso com latência proporcional aos tokens"""
+
+    def __init__(self, first_token_ms: float = 300.0, per_token_ms: float = 2.0, answer: str = ANSWER):
+        """
+        Args:
+            first_token_ms: Tempo até o primeiro token
+            per_token_ms: Tempo por token de saída
+            answer: Texto devolvido em toda chamada
+        """
+        self.first_token_ms = first_token_ms
+        self.per_token_ms = per_token_ms
+        self.answer = answer
+        self.calls = 0
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        self.calls += 1
+        prompt = "".join(str(getattr(message, "content", message)) for message in messages)
+        input_tokens = count_tokens(prompt)
+        output_tokens = count_tokens(self.answer)
+        await asyncio.sleep((self.first_token_ms + self.per_token_ms * output_tokens) / 1000)
+        return AIMessage(
+            content=self.answer,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens},
+        )
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita LexML, Senado e Câmara com respostas gravadas
+Execute: python benchmarks/mock_upstream.py [--port 8900] [--latency-ms 80] [--jitter-ms 20]
+
+As respostas vêm de benchmarks/fixtures/upstream (index.json diz qual
+arquivo responde a cada caminho). Cada serviço fica sob um prefixo:
+    /lexml/busca/SRU, /lexml/documento/...   (LEXML_API_URL, LEXML_DOCUMENT_BASE_URL)
+    /senado/dadosabertos/...                  (SENADO_API_URL)
+    /camara/api/v2/...                        (CAMARA_API_URL)
+upstream_settings() devolve essas URLs para o ambiente da aplicação.
+
+A latência de cada resposta é latency_ms ± jitter_ms (sorteio com semente
+fixa), por serviço quando configurada (ex.: --latency senado=300).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "upstream"
+SERVICES = ("lexml", "senado", "camara")
+
+
+class FixtureIndex:
+    """Respostas gravadas, escolhidas por serviço, caminho e parâmetros"""
+
+    def __init__(self, directory: Path = FIXTURES_DIR):
+        self.directory = directory
+        self.entries = json.loads((directory / "index.json").read_text(encoding="utf-8"))["entries"]
+        self._bodies: Dict[str, bytes] = {}
+
+    def find(self, service: str, path: str, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Entrada que responde à requisição (None se nenhuma casar)"""
+        best = None
+        for entry in self.entries:
+            if entry["service"] != service:
+                continue
+            if "path" in entry and entry["path"] != path:
+                continue
+            if "prefix" in entry and not path.startswith(entry["prefix"]):
+                continue
+            match = entry.get("match", {})
+            if any(params.get(key) != str(value) for key, value in match.items()):
+                continue
+            if best is None or len(match) > len(best.get("match", {})):
+                best = entry
+        return best
+
+    def body(self, entry: Dict[str, Any]) -> bytes:
+        if entry["file"] not in self._bodies:
+            self._bodies[entry["file"]] = (self.directory / entry["file"]).read_bytes()
+        return self._bodies[entry["file"]]
+
+
+class MockUpstream:
+    """Servidor aiohttp com as respostas gravadas e latência configurável"""
+
+    def __init__(
+        self,
+        latency_ms: float = 80.0,
+        jitter_ms: float = 20.0,
+        service_latency_ms: Optional[Dict[str, float]] = None,
+        index: Optional[FixtureIndex] = None,
+        seed: int = 42
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.service_latency_ms = service_latency_ms or {}
+        self.index = index or FixtureIndex()
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+        self.stats: Dict[str, int] = {service: 0 for service in SERVICES}
+        self.stats["unmatched"] = 0
+
+    def _delay(self, service: str) -> float:
+        latency = self.service_latency_ms.get(service, self.latency_ms)
+        jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(latency + jitter, 0.0) / 1000
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        service = request.match_info["service"]
+        path = "/" + request.match_info["path"]
+        entry = self.index.find(service, path, dict(request.query))
+        await asyncio.sleep(self._delay(service))
+        if entry is None:
+            self.stats["unmatched"] += 1
+            return web.Response(status=404, text=f"Sem resposta gravada para {service}{path}")
+        self.stats[service] += 1
+        content_type, _, charset = entry["content_type"].partition("; charset=")
+        return web.Response(body=self.index.body(entry), content_type=content_type, charset=charset or None)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Iniciar no loop atual; devolve a URL base"""
+        app = web.Application()
+        app.router.add_route("*", "/{service}/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def reset_stats(self) -> Dict[str, int]:
+        """Zerar os contadores, devolvendo os anteriores"""
+        previous = dict(self.stats)
+        for key in self.stats:
+            self.stats[key] = 0
+        return previous
+
+
+def upstream_settings(base_url: str) -> Dict[str, str]:
+    """Variáveis de ambiente que apontam os clientes para o servidor local"""
+    return {
+        "LEXML_API_URL": f"{base_url}/lexml/busca/SRU",
+        "LEXML_DOCUMENT_BASE_URL": f"{base_url}/lexml",
+        "SENADO_API_URL": f"{base_url}/senado/dadosabertos",
+        "CAMARA_API_URL": f"{base_url}/camara/api/v2",
+        # Páginas do LexML gravadas com 20 registros
+        "PAGINATION_PAGE_SIZE": "20",
+    }
+
+
+def parse_service_latency(values: Optional[list]) -> Dict[str, float]:
+    """['senado=300', 'lexml=120'] -> {'senado': 300.0, 'lexml': 120.0}"""
+    latencies = {}
+    for value in values or []:
+        service, _, latency = value.partition("=")
+        if service not in SERVICES or not latency:
+            raise ValueError(f"Latência inválida: {value} (use serviço=ms, serviços: {', '.join(SERVICES)})")
+        latencies[service] = float(latency)
+    return latencies
+
+
+async def serve(port: int, latency_ms: float, jitter_ms: float, service_latency_ms: Dict[str, float]) -> None:
+    mock = MockUpstream(latency_ms, jitter_ms, service_latency_ms)
+    url = await mock.start(port=port)
+    print(f"Mock das APIs em {url}")
+    for key, value in upstream_settings(url).items():
+        print(f"  {key}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await mock.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock local das APIs legislativas")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--latency", action="append", metavar="SERVIÇO=MS",
+                        help="Latência de um serviço (repetível)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.port, args.latency_ms, args.jitter_ms, parse_service_latency(args.latency)))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
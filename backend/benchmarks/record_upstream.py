@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Regravar as respostas das APIs externas usadas pelo mock_upstream.py
+Execute: python benchmarks/record_upstream.py [--only lexml,camara]
+
+Refaz a requisição real de cada entrada de fixtures/upstream/index.json
+(campo record) e sobrescreve o arquivo da resposta. Precisa de rede; rode
+quando o formato de alguma API mudar e confira o diff antes de commitar,
+já que resultados antigos da suíte deixam de ser comparáveis.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_upstream import FIXTURES_DIR, SERVICES  # noqa: E402
+
+
+async def record(session: aiohttp.ClientSession, entry: Dict[str, Any]) -> int:
+    """Buscar a resposta de uma entrada e gravá-la; devolve o tamanho"""
+    accept = entry["content_type"].split(";")[0]
+    async with session.get(entry["record"]["url"], params=entry["record"].get("params") or None,
+                           headers={"Accept": accept}) as response:
+        response.raise_for_status()
+        body = await response.read()
+    if accept == "application/json":
+        # JSON indentado: diffs legíveis
+        body = (json.dumps(json.loads(body), indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+    (FIXTURES_DIR / entry["file"]).write_bytes(body)
+    return len(body)
+
+
+async def main_async(services: set) -> int:
+    entries = json.loads((FIXTURES_DIR / "index.json").read_text(encoding="utf-8"))["entries"]
+    failures = 0
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        for entry in entries:
+            if entry["service"] not in services:
+                continue
+            try:
+                size = await record(session, entry)
+                print(f"[OK] {entry['file']} ({size} bytes)")
+            except Exception as e:
+                failures += 1
+                print(f"[ERRO] {entry['file']}: {e}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Regravar as respostas das APIs externas")
+    parser.add_argument("--only", default=",".join(SERVICES), help="Serviços separados por vírgula")
+    args = parser.parse_args()
+    failures = asyncio.run(main_async({name.strip() for name in args.only.split(",")}))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks dos caminhos quentes das requisições
+Execute: python benchmarks/run_suite.py [--requests 200] [--concurrency 8] [--latency-ms 80]
+         [--latency senado=300] [--llm-latency-ms 300] [--scenarios search_local,trending]
+         [--output resultado.json]
+
+Reprodutível e sem rede: LexML, Senado e Câmara são servidos por
+mock_upstream.py com as respostas gravadas em fixtures/upstream (latência
+configurável, sorteio com semente fixa) e o LLM é o fake_llm.py. A
+aplicação roda com um SQLite temporário, populado pela coleta do LexML
+(a mesma usada em produção, contra o mock), e as requisições vão direto à
+aplicação ASGI, com todos os middlewares.
+
+Cenários (carga em malha fechada: --concurrency clientes, cada um envia a
+próxima requisição quando recebe a resposta):
+- chat: POST /api/v1/chat/ (busca de contexto + LLM; precisa do LangChain)
+- search_local: POST /api/v1/search/ no banco
+- search_live: POST /api/v1/search/ nas APIs (mode=live)
+- trending: GET /api/v1/legislation/trending
+- simplification_batch: POST /api/v1/simplification/batch (LLM só com LangChain)
+- pipeline: coleta, texto completo, chunking, corpus e embeddings de 40
+  leis num banco novo a cada iteração (embeddings por hashing, sem modelo)
+
+Para cada cenário: vazão, latência média, p50/p95/p99/máx, erros e
+requisições às APIs externas por requisição. O JSON (padrão:
+benchmarks/results/<data>_<commit>.json) guarda o commit e a configuração;
+compare dois resultados com benchmarks/compare.py.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCHMARKS_DIR.parent
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from fake_llm import FakeChatModel  # noqa: E402
+from mock_upstream import MockUpstream, parse_service_latency, upstream_settings  # noqa: E402
+
+SCENARIOS = ("chat", "search_local", "search_live", "trending", "simplification_batch", "pipeline")
+
+# Perguntas e buscas que os usuários fazem (uma por requisição, em rodízio)
+QUERIES = [
+    "proteção de dados pessoais",
+    "direitos do consumidor",
+    "meio ambiente",
+    "saúde pública",
+    "educação básica",
+    "trabalho e previdência",
+    "trânsito",
+    "imposto de renda",
+]
+
+# Lote de /simplification/batch: artigos com jargão jurídico
+LEGAL_TEXTS = [
+    "Art. 1º Fica instituída a obrigatoriedade de o fornecedor, outrossim, informar ao consumidor, "
+    "nos termos do regulamento, as condições de pagamento, sob pena de multa.",
+    "Art. 2º Compete à União, aos Estados e ao Distrito Federal legislar concorrentemente sobre "
+    "proteção ao meio ambiente e controle da poluição, ressalvado o disposto em lei complementar.",
+    "Art. 3º O tratamento de dados pessoais somente poderá ser realizado mediante o fornecimento "
+    "de consentimento pelo titular, salvo nas hipóteses de cumprimento de obrigação legal.",
+    "Art. 4º É vedado ao empregador exigir atestado de gravidez para efeitos admissionais.",
+    "Art. 5º Esta Lei entra em vigor na data de sua publicação.",
+]
+
+
+def git_revision() -> Dict[str, Any]:
+    """Commit atual e se há alterações não commitadas"""
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or None,
+                "dirty": bool(git("status", "--porcelain", "--", "."))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Vazão e percentis (ms) de uma carga"""
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    result: Dict[str, Any] = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    if len(values):
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        result.update({
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        })
+    return result
+
+
+async def asgi_request(app: Any, method: str, path: str, body: Any = None) -> int:
+    """Requisição direta à aplicação ASGI; devolve o status"""
+    path, _, query = path.partition("?")
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": query.encode(),
+             "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                         (b"content-length", str(len(payload)).encode())],
+             "client": ("127.0.0.1", 1234), "server": ("bench", 80)}
+    status = 0
+    done = asyncio.Event()
+    body_sent = False
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # Cliente só "desconecta" depois da resposta
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        done.set()
+    return status
+
+
+async def closed_loop(
+    call: Callable[[int], Awaitable[bool]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """
+    Carga em malha fechada
+
+    Args:
+        call: Corrotina que faz a i-ésima requisição e diz se deu certo
+        requests: Total de requisições
+        concurrency: Clientes simultâneos
+
+    Returns:
+        Resumo de summarize()
+    """
+    latencies: List[float] = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def client() -> None:
+        nonlocal errors
+        for index in indexes:
+            started = time.perf_counter()
+            try:
+                ok = await call(index)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(max(1, concurrency))))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+class HashingModel:
+    """Embeddings por hashing de palavras (interface de encode do SentenceTransformer)"""
+
+    dimension = 384
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+                vectors[row, int.from_bytes(digest, "little") % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+class Suite:
+    """Aplicação com banco temporário apontada para o mock das APIs"""
+
+    def __init__(self, args: argparse.Namespace, workdir: Path):
+        self.args = args
+        self.workdir = workdir
+        self.mock = MockUpstream(args.latency_ms, args.jitter_ms, parse_service_latency(args.latency))
+        self.llm = FakeChatModel(first_token_ms=args.llm_latency_ms, per_token_ms=args.llm_per_token_ms)
+        self.app: Any = None
+        self.langchain = False
+
+    async def setup(self) -> None:
+        url = await self.mock.start()
+        # Configuração lida pelo app na importação
+        os.environ.update(upstream_settings(url))
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{self.workdir / 'app.db'}",
+            "DEBUG": "false",
+            "EMBEDDING_CACHE_ENABLED": "false",
+            "TRENDING_REFRESH_ENABLED": "false",
+        })
+        # Logs, caches e áudios do app no diretório temporário
+        os.chdir(self.workdir)
+
+        from loguru import logger
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+        from app.ai import simplification
+        from app.core.database import SessionLocal, init_db
+        from app.main import app
+        from app.services.data_collector import DataCollector
+        from app.services.legislation_store import legislation_store
+
+        self.app = app
+        init_db()
+        db = SessionLocal()
+        try:
+            seeded = await DataCollector(db).collect_from_lexml(tipo_documento="Lei", limit=40)
+        finally:
+            db.close()
+        legislation_store.refresh_trending()
+        print(f"Banco populado com {seeded['collected']} leis (mock em {url})")
+
+        # Sem LangChain o app não monta mensagens: chat e o caminho do LLM ficam de fora
+        self.langchain = simplification.LANGCHAIN_AVAILABLE
+        if self.langchain:
+            simplification.chat_service.llm = self.llm
+            simplification.simplification_service.chat_service.llm = self.llm
+
+    async def teardown(self) -> None:
+        await self.mock.stop()
+
+    def requests_for(self, name: str) -> Optional[Callable[[int], Awaitable[bool]]]:
+        """Corrotina de uma requisição do cenário (None se não há como rodá-lo)"""
+        app = self.app
+
+        async def chat(i: int) -> bool:
+            return await asgi_request(app, "POST", "/api/v1/chat/",
+                                      {"message": f"O que diz a lei sobre {QUERIES[i % len(QUERIES)]}?"}) == 200
+
+        async def search_local(i: int) -> bool:
+            return await asgi_request(app, "POST", "/api/v1/search/",
+                                      {"query": QUERIES[i % len(QUERIES)], "mode": "local"}) == 200
+
+        async def search_live(i: int) -> bool:
+            return await asgi_request(app, "POST", "/api/v1/search/",
+                                      {"query": QUERIES[i % len(QUERIES)], "mode": "live"}) == 200
+
+        async def trending(i: int) -> bool:
+            return await asgi_request(app, "GET", "/api/v1/legislation/trending?limit=10") == 200
+
+        async def simplification_batch(i: int) -> bool:
+            return await asgi_request(app, "POST", "/api/v1/simplification/batch?target_level=simple",
+                                      LEGAL_TEXTS) == 200
+
+        if name == "chat" and not self.langchain:
+            return None
+        return {"chat": chat, "search_local": search_local, "search_live": search_live,
+                "trending": trending, "simplification_batch": simplification_batch}[name]
+
+    async def run_requests(self, name: str) -> Dict[str, Any]:
+        call = self.requests_for(name)
+        if call is None:
+            return {"skipped": "LangChain não instalado (o chat precisa das mensagens do LangChain)"}
+        if self.args.warmup:
+            await closed_loop(call, self.args.warmup, self.args.concurrency)
+        self.mock.reset_stats()
+        llm_calls = self.llm.calls
+        result = await closed_loop(call, self.args.requests, self.args.concurrency)
+        result["upstream_requests"] = self.mock.reset_stats()
+        result["llm_calls"] = self.llm.calls - llm_calls
+        if name == "simplification_batch" and not self.langchain:
+            result["note"] = "só o caminho por regras (LLM indisponível sem LangChain)"
+        return result
+
+    async def run_pipeline(self) -> Dict[str, Any]:
+        """Pipeline completo num banco novo por iteração"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import NullPool
+
+        from app.integrations.fulltext_resolver import FullTextResolver
+        from app.models.models import Base, Legislation
+        from app.services.embedding_cache import EmbeddingCache
+        from app.services.embedding_service import EmbeddingService
+        from app.services.legislation_store import LegislationStore
+        from app.services.pipeline_service import PipelineService
+
+        durations: List[float] = []
+        errors = 0
+        last: Dict[str, Any] = {}
+        self.mock.reset_stats()
+        for iteration in range(self.args.pipeline_iterations):
+            engine = create_engine(f"sqlite:///{self.workdir / f'pipeline_{iteration}.db'}", poolclass=NullPool)
+            Base.metadata.create_all(engine)
+            session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+            db = session_factory()
+            embedder = EmbeddingService(model_name="bench-hash", model=HashingModel(),
+                                        cache=EmbeddingCache(":memory:"))
+            store = LegislationStore(session_factory=session_factory)
+            resolver = FullTextResolver()
+            started = time.perf_counter()
+            try:
+                # 1ª execução: coleta (o SRU não traz o texto completo)
+                first = await PipelineService(db, embedder=embedder, chunk_workers=0).run_full_pipeline(
+                    source="lexml", tipo_documento="Lei", limit=40)
+                pending = db.query(Legislation.stable_id, Legislation.urn).filter(
+                    Legislation.full_text.is_(None), Legislation.urn.isnot(None)).all()
+                texts = await asyncio.gather(*(resolver.resolve(urn) for _, urn in pending))
+                for (stable_id, _), text in zip(pending, texts):
+                    if text:
+                        store.save_full_text(stable_id, text)
+                # 2ª execução: chunking, corpus e embeddings das leis com texto
+                last = await PipelineService(db, embedder=embedder, chunk_workers=0).run_full_pipeline(
+                    source="lexml", tipo_documento="Lei", limit=40)
+                last["collected"] = first["collected"]
+                last["full_texts"] = sum(1 for text in texts if text)
+            except Exception as e:
+                errors += 1
+                print(f"  pipeline {iteration}: erro {e}", file=sys.stderr)
+            finally:
+                durations.append(time.perf_counter() - started)
+                db.close()
+                engine.dispose()
+
+        result = summarize(durations, errors, sum(durations))
+        result["upstream_requests"] = self.mock.reset_stats()
+        result["last_run"] = {key: last.get(key) for key in
+                              ("collected", "full_texts", "chunks_created", "corpus_pairs", "embeddings_generated")}
+        return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos quentes com APIs e LLM simulados")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições medidas por cenário")
+    parser.add_argument("--warmup", type=int, default=20, help="Requisições de aquecimento por cenário")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultâneos")
+    parser.add_argument("--pipeline-iterations", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Latência das APIs externas")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--latency", action="append", metavar="SERVIÇO=MS",
+                        help="Latência de um serviço (repetível, ex.: senado=300)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Tempo até o primeiro token do LLM")
+    parser.add_argument("--llm-per-token-ms", type=float, default=2.0)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Cenários separados por vírgula ({', '.join(SCENARIOS)})")
+    parser.add_argument("--output", help="Arquivo JSON (padrão: benchmarks/results/<data>_<commit>.json)")
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Cenários desconhecidos: {', '.join(sorted(unknown))}")
+    parse_service_latency(args.latency)
+    return args
+
+
+def print_table(scenarios: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'cenário':<22}{'req/s':>9}{'média':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'erros':>7}")
+    for name, result in scenarios.items():
+        if "skipped" in result:
+            print(f"{name:<22}  pulado: {result['skipped']}")
+            continue
+        print(f"{name:<22}{result['throughput_rps']:>9.1f}{result.get('mean_ms', 0):>10.1f}"
+              f"{result.get('p50_ms', 0):>10.1f}{result.get('p95_ms', 0):>10.1f}"
+              f"{result.get('p99_ms', 0):>10.1f}{result['errors']:>7}")
+    print("(latências em ms)")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    revision = git_revision()
+    output = Path(args.output).resolve() if args.output else None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="vozdalei-bench-") as workdir:
+        suite = Suite(args, Path(workdir))
+        try:
+            await suite.setup()
+            scenarios: Dict[str, Dict[str, Any]] = {}
+            for name in args.scenarios:
+                print(f"Cenário {name}...")
+                scenarios[name] = await (suite.run_pipeline() if name == "pipeline" else suite.run_requests(name))
+        finally:
+            await suite.teardown()
+            os.chdir(cwd)
+
+    timestamp = datetime.now(timezone.utc)
+    report = {
+        **revision,
+        "timestamp": timestamp.isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count(), "langchain": suite.langchain},
+        "config": {key: getattr(args, key) for key in
+                   ("requests", "warmup", "concurrency", "pipeline_iterations", "latency_ms", "jitter_ms",
+                    "latency", "llm_latency_ms", "llm_per_token_ms")},
+        "scenarios": scenarios,
+    }
+    if output is None:
+        output = (BENCHMARKS_DIR / "results" /
+                  f"{timestamp.strftime('%Y%m%dT%H%M%S')}_{revision['commit'] or 'sem-commit'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print_table(scenarios)
+    print(f"\nResultado em {output}")
+    return report
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,11 @@ from pathlib import Path
 # Adicionar diretório do backend ao path
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
+from app.core.config import settings
 from app.core.database import SessionLocal, init_db
 from app.services.data_collector import DataCollector
+from app.services.harvester import default_feeds, harvester
+from app.services.legislation_store import legislation_store
 from app.services.pipeline_service import PipelineService
 from loguru import logger
 
@@ -30,54 +33,14 @@ class LexMLDataCollector:
         """
         Coletar todas as leis federais de um período
         
+        Usa a coleta incremental (cursor em harvest_cursors): se for
+        interrompida, a próxima execução continua da última página gravada.
+        
         Args:
             start_year: Ano inicial (padrão: 1988 - Constituição)
             end_year: Ano final (padrão: ano atual)
         """
-        if end_year is None:
-            end_year = datetime.now().year
-            
-        logger.info(f"Iniciando coleta de leis de {start_year} a {end_year}")
-        
-        total_collected = 0
-        total_failed = 0
-        
-        for year in range(start_year, end_year + 1):
-            logger.info(f"Coletando leis de {year}...")
-            
-            try:
-                result = await self.collector.collect_from_lexml(
-                    year=year,
-                    tipo_documento="Lei",
-                    limit=1000  # Máximo por requisição
-                )
-                
-                collected = result.get('collected', 0)
-                failed = result.get('failed', 0)
-                
-                total_collected += collected
-                total_failed += failed
-                
-                logger.info(
-                    f"Ano {year}: {collected} leis coletadas, {failed} falhas"
-                )
-                
-                # Aguardar entre anos para não sobrecarregar o servidor
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Erro ao coletar leis de {year}: {str(e)}")
-                total_failed += 1
-                
-        logger.info(
-            f"Coleta concluída! Total: {total_collected} leis coletadas, "
-            f"{total_failed} falhas"
-        )
-        
-        return {
-            'total_collected': total_collected,
-            'total_failed': total_failed
-        }
+        return await self._harvest("lexml_leis", start_year, end_year)
     
     async def collect_recent_projects(self, years: int = 5):
         """
@@ -87,49 +50,24 @@ class LexMLDataCollector:
             years: Quantidade de anos para trás (padrão: 5)
         """
         current_year = datetime.now().year
-        start_year = current_year - years
-        
-        logger.info(
-            f"Coletando projetos de lei de {start_year} a {current_year}"
+        return await self._harvest("lexml_projetos", current_year - years, current_year)
+    
+    async def _harvest(self, feed_name: str, start_year: int, end_year: int = None):
+        """Coleta incremental de uma fonte (ver app/services/harvester.py)"""
+        result = await harvester.run(
+            default_feeds()[feed_name],
+            start_year=start_year,
+            end_year=end_year
         )
         
-        total_collected = 0
-        total_failed = 0
-        
-        for year in range(start_year, current_year + 1):
-            logger.info(f"Coletando projetos de {year}...")
-            
-            try:
-                result = await self.collector.collect_from_lexml(
-                    year=year,
-                    tipo_documento="Projeto de Lei",
-                    limit=1000
-                )
-                
-                collected = result.get('collected', 0)
-                failed = result.get('failed', 0)
-                
-                total_collected += collected
-                total_failed += failed
-                
-                logger.info(
-                    f"Ano {year}: {collected} projetos coletados, {failed} falhas"
-                )
-                
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Erro ao coletar projetos de {year}: {str(e)}")
-                total_failed += 1
-                
         logger.info(
-            f"Coleta concluída! Total: {total_collected} projetos coletados, "
-            f"{total_failed} falhas"
+            f"Coleta {result['status']}! Total: {result['created']} novos, "
+            f"{result['updated']} atualizados, {result['skipped']} sem identificador"
         )
         
         return {
-            'total_collected': total_collected,
-            'total_failed': total_failed
+            'total_collected': result['created'],
+            'total_failed': result['skipped'] + (1 if result['status'] == 'failed' else 0)
         }
     
     async def collect_by_theme(self, theme: str, limit: int = 100):
@@ -141,55 +79,28 @@ class LexMLDataCollector:
             limit: Limite de resultados
         """
         from app.integrations.legislative_apis import lexml_client
+        from app.integrations.pagination import batched
         
         logger.info(f"Buscando leis sobre: {theme}")
         
         try:
-            results = await lexml_client.search_by_keywords(
+            results = lexml_client.iter_by_keywords(
                 keywords=theme,
                 tipo_documento="Lei",
                 limit=limit
             )
             
-            logger.info(f"Encontradas {len(results)} leis sobre {theme}")
+            # Salvar no banco página a página (upsert pela URN)
+            collected = total = 0
+            async for batch in batched(results, settings.PAGINATION_PAGE_SIZE):
+                counts = legislation_store.upsert_lexml_documents(batch, db=self.db)
+                collected += counts["created"]
+                total += len(batch)
             
-            # Salvar no banco
-            collected = 0
-            for doc in results:
-                try:
-                    from app.models.models import Legislation
-                    
-                    # Verificar se já existe
-                    existing = self.db.query(Legislation).filter(
-                        Legislation.external_id == doc.get("lexml_id")
-                    ).first()
-                    
-                    if existing:
-                        continue
-                    
-                    legislation = Legislation(
-                        external_id=doc.get("lexml_id", ""),
-                        source="lexml",
-                        type=doc.get("tipo_documento", "Lei"),
-                        number=self._extract_number(doc.get("title", "")),
-                        year=int(doc.get("date", datetime.now().year)),
-                        title=doc.get("title", ""),
-                        summary=doc.get("description", ""),
-                        author=doc.get("autoridade"),
-                        raw_data=doc,
-                        created_at=datetime.utcnow()
-                    )
-                    
-                    self.db.add(legislation)
-                    collected += 1
-                    
-                except Exception as e:
-                    logger.error(f"Erro ao salvar documento: {str(e)}")
-                    
-            self.db.commit()
+            logger.info(f"Encontradas {total} leis sobre {theme}")
             logger.info(f"{collected} novas leis salvas sobre {theme}")
             
-            return {'collected': collected, 'total': len(results)}
+            return {'collected': collected, 'total': total}
             
         except Exception as e:
             logger.error(f"Erro ao buscar leis sobre {theme}: {str(e)}")
@@ -237,18 +148,6 @@ class LexMLDataCollector:
             logger.error(f"Erro no pipeline: {str(e)}")
             raise
     
-    def _extract_number(self, title: str) -> str:
-        """Extrair número do título"""
-        try:
-            if "nº" in title or "Nº" in title:
-                parts = title.split("nº") if "nº" in title else title.split("Nº")
-                if len(parts) > 1:
-                    number_part = parts[1].split("/")[0].strip()
-                    return number_part
-            return ""
-        except:
-            return ""
-    
     def close(self):
         """Fechar conexão com banco"""
         self.db.close()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tamanho e tempo de leitura dos embeddings gravados no banco
+Execute: python scripts/embedding_storage_report.py
+
+Rode antes e depois de "alembic upgrade head" (migração 0005, arrays JSON →
+binário) para comparar bytes por vetor, tamanho da tabela (PostgreSQL) e o
+tempo para carregar todos os vetores em uma matriz float32.
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import engine  # noqa: E402
+from app.core.vector_codec import storage_report  # noqa: E402
+
+TABLES = ("legislation_chunks", "training_corpus")
+
+
+def main():
+    print(f"{'tabela':<20} {'formato':<8} {'linhas':>8} {'dim':>5} {'bytes/vetor':>12} "
+          f"{'coluna (MB)':>12} {'tabela (MB)':>12} {'leitura (s)':>12}")
+    with engine.connect() as connection:
+        for table_name in TABLES:
+            report = storage_report(connection, table_name)
+            table_mb = f"{report['table_bytes'] / 2**20:.1f}" if report["table_bytes"] else "-"
+            print(f"{table_name:<20} {report['format'] or '-':<8} {report['rows']:>8} "
+                  f"{report['dimension']:>5} {report['bytes_per_row'] or 0:>12.0f} "
+                  f"{report['column_bytes'] / 2**20:>12.1f} {table_mb:>12} {report['load_seconds']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Planos de execução das consultas frequentes no banco configurado
+Execute: python scripts/explain_hot_queries.py
+
+Mostra o EXPLAIN de cada consulta de app/core/query_plans.py e marca as que
+leem uma tabela por inteiro. Rode depois de "alembic upgrade head"
+(migração 0007) e de um ANALYZE para conferir os índices em produção.
+Sai com código 1 se alguma consulta fizer varredura sequencial.
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import engine  # noqa: E402
+from app.core.query_plans import full_scans, hot_query_plans  # noqa: E402
+
+TABLES = ("legislations", "legislation_chunks", "training_corpus", "data_collection_jobs")
+
+
+def main():
+    with engine.connect() as connection:
+        plans = hot_query_plans(connection)
+    failed = 0
+    for name, plan in plans.items():
+        scans = full_scans(plan, TABLES)
+        failed += bool(scans)
+        print(f"{'[SCAN]' if scans else '[OK]  '} {name}")
+        for line in plan:
+            print(f"         {line}")
+    print(f"\n{len(plans) - failed} de {len(plans)} consultas sem varredura sequencial")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
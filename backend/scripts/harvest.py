@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Coleta incremental e retomável dos catálogos do LexML e do Senado
+Execute: python scripts/harvest.py [--delta] [--feed lexml_leis ...]
+
+Exemplos:
+    python scripts/harvest.py                          # coleta completa (retoma se interrompida)
+    python scripts/harvest.py --delta                  # só o que mudou desde a última coleta
+    python scripts/harvest.py --feed lexml_leis --start-year 2000
+    python scripts/harvest.py --feed senado_normas --restart
+    python scripts/harvest.py --status
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.harvester import default_feeds, harvester  # noqa: E402
+
+
+def parse_args(feeds):
+    parser = argparse.ArgumentParser(description="Coleta incremental dos catálogos legislativos")
+    parser.add_argument("--feed", action="append", choices=sorted(feeds),
+                        help="Fonte a coletar (repetível; padrão: todas)")
+    parser.add_argument("--delta", action="store_true",
+                        help="Só registros novos desde a última coleta concluída")
+    parser.add_argument("--start-year", type=int, help="Primeiro ano da coleta completa")
+    parser.add_argument("--end-year", type=int, help="Último ano (padrão: ano atual)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignorar a coleta interrompida e começar de novo")
+    parser.add_argument("--status", action="store_true", help="Mostrar os cursores e sair")
+    return parser.parse_args()
+
+
+def print_status():
+    print(f"{'fonte':<18} {'modo':<6} {'estado':<10} {'ano':>5} {'posição':>8} "
+          f"{'registros':>10}  última conclusão")
+    for cursor in harvester.status():
+        print(f"{cursor['feed']:<18} {cursor['mode']:<6} {cursor['status']:<10} "
+              f"{cursor['year'] or '-':>5} {cursor['position'] or '-':>8} "
+              f"{cursor['records_harvested'] or 0:>10}  {cursor['last_success_at'] or '-'}")
+        if cursor["error_message"]:
+            print(f"    erro: {cursor['error_message']}")
+
+
+async def main():
+    feeds = default_feeds()
+    args = parse_args(feeds)
+
+    if args.status:
+        print_status()
+        return 0
+
+    selected = [feeds[name] for name in (args.feed or feeds)]
+    results = await harvester.run_many(
+        selected,
+        mode="delta" if args.delta else "full",
+        start_year=args.start_year,
+        end_year=args.end_year,
+        restart=args.restart
+    )
+
+    print("\n" + "=" * 70)
+    for result in results:
+        print(f"{result['feed']:<18} {result['status']:<10} {result['records']:>8} registros "
+              f"({result['created']} novos, {result['updated']} atualizados)")
+        if result.get("error"):
+            print(f"    erro: {result['error']} (execute de novo para retomar)")
+    print("=" * 70)
+    return 0 if all(result["status"] == "completed" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,120 @@
+"""
+Testes da suíte de benchmarks (benchmarks/)
+
+Valida:
+1. Escolha da resposta gravada por serviço, caminho e parâmetros
+2. Mock das APIs servindo as respostas, com 404 e contagem por serviço
+3. Percentis e detecção de pioras entre dois resultados
+4. Execução curta da suíte gerando o JSON de resultados
+"""
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Adicionar diretórios do backend e dos benchmarks ao path
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "benchmarks"))
+
+import aiohttp  # noqa: E402
+
+from compare import regressions  # noqa: E402
+from mock_upstream import FixtureIndex, MockUpstream, parse_service_latency  # noqa: E402
+from run_suite import summarize  # noqa: E402
+
+
+def test_fixture_index():
+    """Entrada com mais parâmetros casados vence; prefixo para documentos"""
+    index = FixtureIndex()
+    assert index.find("lexml", "/busca/SRU", {"startRecord": "21"})["file"] == "lexml/sru_leis_2.xml"
+    assert index.find("lexml", "/busca/SRU", {"startRecord": "1"})["file"] == "lexml/sru_leis_1.xml"
+    assert index.find("lexml", "/documento/urn:lex:br:federal:lei:2018;1", {})["file"] == "lexml/documento_lei.xml"
+    assert index.find("camara", "/api/v2/proposicoes", {"keywords": "saúde"})["file"] == "camara/proposicoes.json"
+    assert index.find("senado", "/dadosabertos/materia/1", {}) is None
+    for entry in index.entries:
+        assert index.body(entry)
+    assert parse_service_latency(["senado=300"]) == {"senado": 300.0}
+
+
+def test_mock_upstream():
+    """Respostas gravadas pelo HTTP, 404 sem gravação, contagem por serviço"""
+    async def scenario():
+        mock = MockUpstream(latency_ms=1, jitter_ms=0)
+        url = await mock.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{url}/senado/dadosabertos/legislacao/lista", params={"ano": "2021"}) as r:
+                    assert r.status == 200
+                    assert (await r.json())["normas"]
+                async with session.get(f"{url}/lexml/busca/SRU", params={"startRecord": "21"}) as r:
+                    assert r.status == 200 and r.content_type == "application/xml"
+                    assert "numberOfRecords" in await r.text()
+                async with session.get(f"{url}/camara/api/v2/deputados") as r:
+                    assert r.status == 404
+            return mock.reset_stats()
+        finally:
+            await mock.stop()
+
+    stats = asyncio.run(scenario())
+    assert stats == {"lexml": 1, "senado": 1, "camara": 0, "unmatched": 1}
+
+
+def result(p95, p99, throughput, errors=0):
+    return {"requests": 100, "errors": errors, "throughput_rps": throughput, "p95_ms": p95, "p99_ms": p99}
+
+
+def test_summary_and_regressions():
+    """Percentis em ms; piora acima do limite (relativo e absoluto) é acusada"""
+    summary = summarize([i / 1000 for i in range(1, 101)], errors=2, elapsed=2.0)
+    assert summary["requests"] == 100 and summary["errors"] == 2 and summary["throughput_rps"] == 50.0
+    assert summary["p50_ms"] == 50.5 and 95 < summary["p95_ms"] < 96 and summary["max_ms"] == 100.0
+    assert summarize([], 0, 0.0)["throughput_rps"] == 0.0
+
+    base = {"scenarios": {"search_local": result(20.0, 30.0, 300.0), "trending": result(1.0, 1.5, 900.0),
+                          "chat": {"skipped": "sem LangChain"}}}
+    same = {"scenarios": {"search_local": result(21.0, 31.0, 290.0), "trending": result(1.4, 2.0, 880.0),
+                          "chat": {"skipped": "sem LangChain"}}}
+    # +40% em latências de 1 ms está abaixo de min_delta_ms: ruído
+    assert regressions(base, same) == []
+
+    slower = {"scenarios": {"search_local": result(26.0, 30.0, 200.0, errors=3),
+                            "trending": result(1.0, 1.5, 900.0)}}
+    found = regressions(base, slower)
+    assert len(found) == 3
+    assert found[0].startswith("search_local: p95_ms") and "vazão" in found[1] and "erros" in found[2]
+    assert regressions(base, slower, threshold=0.5) == ["search_local: 3 erros (antes nenhum)"]
+
+
+def test_suite_smoke(tmp_path):
+    """Execução curta: todos os cenários com resultado ou motivo do pulo"""
+    output = tmp_path / "result.json"
+    completed = subprocess.run(
+        [sys.executable, str(BACKEND_DIR / "benchmarks" / "run_suite.py"),
+         "--requests", "4", "--warmup", "0", "--concurrency", "2", "--pipeline-iterations", "1",
+         "--latency-ms", "0", "--jitter-ms", "0", "--llm-latency-ms", "0", "--output", str(output)],
+        capture_output=True, text=True, timeout=300
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["commit"] and report["config"]["concurrency"] == 2
+    scenarios = report["scenarios"]
+    for name in ("search_local", "search_live", "trending", "simplification_batch"):
+        assert scenarios[name]["requests"] == 4 and scenarios[name]["errors"] == 0, (name, scenarios[name])
+    assert scenarios["search_live"]["upstream_requests"]["camara"] == 4
+    assert scenarios["pipeline"]["errors"] == 0
+    assert scenarios["pipeline"]["last_run"]["collected"] == 40
+    assert scenarios["pipeline"]["last_run"]["chunks_created"] > 0
+    assert ("skipped" in scenarios["chat"]) != report["environment"]["langchain"]
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_fixture_index()
+    test_mock_upstream()
+    test_summary_and_regressions()
+    test_suite_smoke(Path(tempfile.mkdtemp()))
+    print("\n[OK] Testes da suíte de benchmarks concluídos!")
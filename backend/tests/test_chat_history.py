@@ -0,0 +1,191 @@
+"""
+Testes do histórico de conversas no servidor
+
+Usa SQLite em memória para validar:
+1. Gravação e leitura do contexto de uma sessão
+2. Cache de sessões ativas (só confere a última mensagem no banco)
+3. Vários workers com caches em memória próprios: sem contexto desatualizado
+4. Paginação por chave (keyset) do histórico da sessão
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models.models import Base  # noqa: E402
+from app.services import chat_history  # noqa: E402
+from app.services.chat_history import (  # noqa: E402
+    ChatHistoryStore,
+    MemorySessionCache,
+    decode_cursor
+)
+
+
+def make_store(max_messages=10):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    cache = MemorySessionCache(max_sessions=10, ttl_seconds=60, max_messages=max_messages)
+    store = ChatHistoryStore(session_factory=factory, cache=cache)
+    store.max_messages = max_messages
+    return store, factory
+
+
+def worker_store(factory, max_messages=10):
+    """Outro processo: mesmo banco, cache em memória próprio"""
+    store = ChatHistoryStore(
+        session_factory=factory,
+        cache=MemorySessionCache(max_sessions=10, ttl_seconds=60, max_messages=max_messages)
+    )
+    store.max_messages = max_messages
+    return store
+
+
+def exchange(store, session_id, question):
+    store.append(session_id, [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": f"resposta: {question}"}
+    ])
+
+
+def contents(messages):
+    return [m["content"] for m in messages]
+
+
+def test_session_context_roundtrip():
+    """Mensagens gravadas voltam em ordem cronológica"""
+    store, _ = make_store()
+    session_id = store.start_session()
+
+    exchange(store, session_id, "O que é PEC?")
+    exchange(store, session_id, "E PL?")
+
+    context = store.get_context(session_id)
+    assert [m["content"] for m in context] == [
+        "O que é PEC?", "resposta: O que é PEC?", "E PL?", "resposta: E PL?"
+    ]
+
+
+def test_context_loaded_from_database_when_cache_is_cold():
+    """Sessão fora do cache é carregada do banco e limitada às últimas mensagens"""
+    store, factory = make_store(max_messages=3)
+    session_id = "sessao-fria"
+    exchange(store, session_id, "primeira")
+    exchange(store, session_id, "segunda")
+
+    cold_store = worker_store(factory, max_messages=3)
+    context = cold_store.get_context(session_id)
+
+    assert [m["content"] for m in context] == [
+        "resposta: primeira", "segunda", "resposta: segunda"
+    ]
+
+
+def test_hot_session_skips_loading_messages():
+    """Sessão aquecida: só o id da última mensagem é consultado no banco"""
+    store, factory = make_store()
+    session_id = store.start_session()
+    exchange(store, session_id, "pergunta")
+
+    statements = []
+    event.listen(factory.kw["bind"], "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    context = store.get_context(session_id)
+    assert context == [{"role": "user", "content": "pergunta"},
+                       {"role": "assistant", "content": "resposta: pergunta"}]
+    assert len(statements) == 1 and "content" not in statements[0]
+
+
+def test_workers_with_separate_caches():
+    """Turno gravado por outro worker invalida o cache deste"""
+    store, factory = make_store()
+    other = worker_store(factory)
+    session_id = store.start_session()
+    exchange(store, session_id, "primeira")
+    assert len(store.get_context(session_id)) == 2
+
+    # Segunda pergunta atendida pelo outro worker
+    assert len(other.get_context(session_id)) == 2
+    exchange(other, session_id, "segunda")
+
+    # Terceira volta ao primeiro worker, cujo cache ainda está dentro do TTL
+    assert contents(store.get_context(session_id))[-1] == "resposta: segunda"
+
+    # Gravação sem leitura antes (cliente antigo com conversation_history):
+    # o cache atrasado é descartado em vez de ganhar um buraco
+    exchange(other, session_id, "terceira")
+    exchange(store, session_id, "quarta")
+    assert contents(store.get_context(session_id)) == contents(worker_store(factory).get_context(session_id))
+    assert "terceira" in contents(store.get_context(session_id))
+
+
+def test_auto_cache_uses_redis_with_several_workers(monkeypatch):
+    """CHAT_HISTORY_CACHE=auto: Redis com mais de um worker, memória com um"""
+    class FakeRedisCache:
+        shared = True
+
+        def __init__(self, url, ttl_seconds, max_messages):
+            self.client = self
+
+        def ping(self):
+            return True
+
+    monkeypatch.setattr(chat_history, "RedisSessionCache", FakeRedisCache)
+    monkeypatch.setattr(chat_history, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(settings, "CHAT_HISTORY_CACHE", "auto")
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    assert isinstance(ChatHistoryStore().cache, FakeRedisCache)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 1)
+    assert isinstance(ChatHistoryStore().cache, MemorySessionCache)
+
+
+def test_keyset_pagination():
+    """Páginas da sessão não se repetem e terminam com next_cursor None"""
+    store, _ = make_store()
+    for i in range(5):
+        exchange(store, "sessao", f"pergunta {i}")
+    exchange(store, "outra", "de outra sessão")
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        messages, cursor = store.list_session_messages("sessao", limit=4, cursor=cursor)
+        seen.extend(m["id"] for m in messages)
+        assert {m["session_id"] for m in messages} == {"sessao"}
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 10
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_invalid_cursor():
+    """Cursor inválido deve gerar ValueError"""
+    with pytest.raises(ValueError):
+        decode_cursor("nao-e-um-cursor")
+
+
+if __name__ == "__main__":
+    test_session_context_roundtrip()
+    test_context_loaded_from_database_when_cache_is_cold()
+    test_hot_session_skips_loading_messages()
+    test_workers_with_separate_caches()
+    test_keyset_pagination()
+    test_invalid_cursor()
+    print("[OK] Testes do histórico de conversas concluídos!")
@@ -0,0 +1,137 @@
+"""
+Testes do CorpusBuilder por conjuntos
+
+Usa SQLite em memória para validar:
+1. Perguntas por palavra-chave com as minúsculas calculadas uma vez
+2. Número de consultas fixo, qualquer que seja o número de pares (sem N+1)
+3. force_rebuild e novas execuções só inserem os pares que faltam
+4. Intervalos de IDs (shard_ranges) cobrem todas as legislações e geram o
+   mesmo corpus que uma execução única
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.models.models import Base, Legislation, LegislationChunk, TrainingCorpus  # noqa: E402
+from app.services.corpus_builder import CorpusBuilder, keyword_flags  # noqa: E402
+
+ARTICLES = [
+    "Esta Lei dispõe sobre a proteção do consumidor.",
+    "Está sujeito às normas deste código o fornecedor obrigado a informar.",
+    "A infração sujeita o infrator à pena de multa.",
+    "Esta Lei entra em vigor na data de sua publicação.",
+]
+
+
+def make_session(legislations=3, articles=4):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    for legislation_id in range(1, legislations + 1):
+        db.add(Legislation(id=legislation_id, external_id=f"lei_{legislation_id}", source="lexml",
+                           type="Lei", number=str(8000 + legislation_id), year=1990,
+                           title="Código de Defesa do Consumidor"))
+        for n in range(articles):
+            content = ARTICLES[n % len(ARTICLES)]
+            db.add(LegislationChunk(legislation_id=legislation_id, chunk_type="article",
+                                    chunk_number=str(n + 1), content=content, normalized_content=content))
+    db.commit()
+    return db, engine
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def corpus_keys(db):
+    return sorted(db.query(TrainingCorpus.chunk_id, TrainingCorpus.question, TrainingCorpus.question_type))
+
+
+def test_generate_qa_pairs():
+    """Perguntas e tipos por chunk, como antes da mudança"""
+    db, _ = make_session(1)
+    builder = CorpusBuilder(db)
+    legislation = db.get(Legislation, 1)
+    chunks = db.query(LegislationChunk).order_by(LegislationChunk.id).all()
+
+    assert keyword_flags("SUJEITO À PENA de Multa") == {"quem_sujeito", "qual_pena"}
+    first = builder.generate_qa_pairs(chunks[0], legislation)
+    assert [qa["question"] for qa in first] == [
+        "O que diz o artigo 1 da Lei 8001/1990?",
+        "Qual o conteúdo do artigo 1?",
+        "Sobre o que trata a Lei 8001/1990?",
+        "O que é a Lei 8001/1990 sobre Código de Defesa do Consumidor?",
+    ]
+    assert all(qa["answer"] == ARTICLES[0] and qa["answer_source"] == "Art. 1" for qa in first)
+    types = [[qa["question_type"] for qa in builder.generate_qa_pairs(chunk, legislation)] for chunk in chunks[1:]]
+    assert types == [
+        ["o_que_diz", "qual_conteudo", "quem_sujeito", "o_que_e"],
+        ["o_que_diz", "qual_conteudo", "qual_pena", "o_que_e"],
+        ["o_que_diz", "qual_conteudo", "quando_vigor", "o_que_e"],
+    ]
+
+
+def test_constant_queries():
+    """Consultas por legislação não crescem com o número de chunks e pares"""
+    counts = []
+    for articles in (4, 40):
+        db, engine = make_session(1, articles)
+        statements = count_statements(engine)
+        result = CorpusBuilder(db).build_corpus_from_legislation(1)
+        assert result["total_created"] == result["total_generated"] > articles * 3
+        counts.append(len(statements))
+    assert counts[0] == counts[1] <= 8
+
+
+def test_force_rebuild_inserts_missing():
+    """Pares existentes não são duplicados; os apagados voltam"""
+    db, _ = make_session(2)
+    builder = CorpusBuilder(db)
+    first = builder.build_corpus_from_legislation(1)
+    assert builder.build_corpus_from_legislation(1)["status"] == "exists"
+
+    db.query(TrainingCorpus).filter(TrainingCorpus.question_type == "qual_pena").delete()
+    db.commit()
+    rebuilt = builder.build_corpus_from_legislation(1, force_rebuild=True)
+    assert rebuilt["total_generated"] == first["total_created"] and rebuilt["total_created"] == 1
+    assert db.query(TrainingCorpus).count() == first["total_created"]
+
+    batch = builder.build_corpus_batch()
+    assert batch["processed"] == 2 and batch["total_created"] == first["total_created"]
+
+
+def test_shard_ranges():
+    """Intervalos disjuntos cobrem tudo e produzem o mesmo corpus"""
+    db, _ = make_session(7)
+    single, _ = make_session(7)
+    CorpusBuilder(single).build_corpus_range()
+
+    builder = CorpusBuilder(db)
+    ranges = builder.shard_ranges(3)
+    assert len(ranges) == 3 and ranges[0][0] == 1 and ranges[-1][1] is None
+    assert all(ranges[i][1] == ranges[i + 1][0] for i in range(2))
+
+    processed = []
+    for start, end in ranges:
+        result = builder.build_corpus_range(start, end, batch_size=2, progress=processed.append)
+        assert result["processed"] in (2, 3)
+    assert corpus_keys(db) == corpus_keys(single)
+    # Executar um intervalo de novo não insere nada
+    assert builder.build_corpus_range(*ranges[0])["total_created"] == 0
+
+
+if __name__ == "__main__":
+    test_generate_qa_pairs()
+    test_constant_queries()
+    test_force_rebuild_inserts_missing()
+    test_shard_ranges()
+    print("\n[OK] Testes do CorpusBuilder concluídos!")
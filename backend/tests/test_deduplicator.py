@@ -0,0 +1,186 @@
+"""
+Testes da deduplicação entre fontes
+
+Usa SQLite em memória e textos sintéticos para validar:
+1. Jaccard estimado pelo MinHash próximo do real; normalização ignora caixa,
+   acentos e pontuação
+2. LSH só devolve candidatos parecidos
+3. Mesma lei do LexML, Senado e Câmara vira um grupo com o LexML canônico;
+   chunks e corpus dos aliases são removidos
+4. Zona cinzenta decidida pelos embeddings; nova execução não muda nada,
+   mesmo depois de removidos os chunks (e embeddings) dos aliases
+"""
+import random
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.models.models import Base, Legislation, LegislationChunk, TrainingCorpus  # noqa: E402
+from app.services.deduplicator import (  # noqa: E402
+    Deduplicator,
+    LSHIndex,
+    MinHasher,
+    estimated_jaccard,
+)
+
+VOCABULARY = [f"termo{n}" for n in range(400)]
+
+
+def law_text(seed: int, words: int = 200) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def edited(text: str, edits: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = text.split()
+    for position in rng.sample(range(len(words)), edits):
+        words[position] = f"outro{position}"
+    return " ".join(words)
+
+
+def true_jaccard(hasher: MinHasher, a: str, b: str) -> float:
+    sa, sb = set(hasher.shingles(a).tolist()), set(hasher.shingles(b).tolist())
+    return len(sa & sb) / len(sa | sb)
+
+
+def make_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_minhash_estimate():
+    """Estimativa dentro de ~2 desvios; formatação não muda a assinatura"""
+    hasher = MinHasher(num_perm=256)
+    base = law_text(1)
+    for edits in (0, 5, 20, 60):
+        other = edited(base, edits)
+        assert abs(estimated_jaccard(hasher.signature(base), hasher.signature(other))
+                   - true_jaccard(hasher, base, other)) < 0.07
+
+    formatted = "Art. 1º " + base.upper().replace("termo1 ", "TÉRMO1, ")
+    plain = "art 1o " + base.replace("termo1 ", "termo1 ")
+    assert hasher.signature("Lei nº 8.078, de 11 de setembro") is not None
+    assert estimated_jaccard(hasher.signature(formatted), hasher.signature(plain)) > 0.9
+    assert hasher.signature("  ... ") is None
+
+
+def test_lsh_candidates():
+    """Quase duplicatas colidem; textos diferentes não"""
+    hasher = MinHasher()
+    index = LSHIndex(hasher.num_perm, 32)
+    texts = [law_text(seed) for seed in range(50)]
+    for key, text in enumerate(texts):
+        assert index.add(key, hasher.signature(text)) == set()
+    assert index.add(50, hasher.signature(edited(texts[7], 3))) == {7}
+
+
+def test_cross_source_clusters():
+    """Um grupo por lei, LexML canônico, aliases sem chunks nem corpus"""
+    db = make_session()
+    lei = law_text(10)
+    outra = law_text(11)
+    rows = [
+        # id, fonte, número, texto
+        (1, "camara", "8078", edited(lei, 2, seed=1)),
+        (2, "lexml", "8.078", lei),
+        (3, "senado", "08078", "Art. 1º " + lei.upper()),
+        (4, "lexml", "8079", outra),
+        (5, "senado", "8080", None),  # sem texto e sem ementa parecida
+        (6, "senado", "9999", lei),  # mesmo texto, outra lei
+    ]
+    for legislation_id, source, number, text in rows:
+        db.add(Legislation(id=legislation_id, external_id=f"{source}_{legislation_id}", source=source,
+                           type="Lei", number=number, year=2000,
+                           title=f"Lei {legislation_id}", full_text=text))
+        if text:
+            db.add(LegislationChunk(id=legislation_id, legislation_id=legislation_id,
+                                    chunk_type="article", content=text[:50]))
+            db.add(TrainingCorpus(legislation_id=legislation_id, chunk_id=legislation_id,
+                                  question="Q", answer="A"))
+    db.commit()
+
+    stats = Deduplicator(db).run()
+    canonical = {row.id: row.canonical_id for row in db.query(Legislation)}
+    assert canonical == {1: 2, 2: None, 3: 2, 4: None, 5: None, 6: None}
+    assert stats["clusters"] == 1 and stats["aliases"] == 2 and stats["updated"] == 2
+    assert stats["chunks_removed"] == 2 and stats["corpus_removed"] == 2
+    assert sorted(c.legislation_id for c in db.query(LegislationChunk)) == [2, 4, 6]
+    assert stats["number_mismatches"] == 3 and stats["candidate_pairs"] == 6
+
+    again = Deduplicator(db).run()
+    assert again["updated"] == 0 and again["aliases"] == 2 and again["chunks_removed"] == 0
+
+
+def gray_zone_session():
+    db = make_session()
+    hasher = MinHasher()
+    base = law_text(20)
+    near = edited(base, 10, seed=2)
+    similarity = estimated_jaccard(hasher.signature(base), hasher.signature(near))
+    assert 0.45 <= similarity < 0.7
+
+    vector = np.ones(8, dtype=np.float32)
+    other_vector = np.array([1, -1] * 4, dtype=np.float32)
+    for legislation_id, source, text, embedding in (
+        (1, "lexml", base, vector),
+        (2, "senado", near, vector * 2),
+        (3, "lexml", law_text(21), vector),
+        (4, "camara", edited(law_text(21), 10, seed=2), other_vector),
+    ):
+        db.add(Legislation(id=legislation_id, external_id=f"{source}_{legislation_id}", source=source,
+                           type="Lei", number=str((legislation_id + 1) // 2),
+                           year=2001, title=f"Lei {legislation_id}", full_text=text))
+        db.add(LegislationChunk(legislation_id=legislation_id, chunk_type="article",
+                                content=text[:40], embedding=embedding))
+    db.commit()
+    return db, hasher
+
+
+def test_embedding_gray_zone():
+    """Jaccard intermediário: embeddings próximos juntam, distantes não"""
+    db, hasher = gray_zone_session()
+
+    stats = Deduplicator(db, hasher=hasher).run(prune_aliases=False)
+    assert {row.id: row.canonical_id for row in db.query(Legislation)} == {1: None, 2: 1, 3: None, 4: None}
+    assert stats["embedding_duplicates"] == 1 and stats["text_duplicates"] == 0
+    assert db.query(LegislationChunk).count() == 4
+
+
+def test_gray_zone_rerun_after_prune():
+    """Sem os embeddings do alias (removidos), a ligação da zona cinzenta se mantém"""
+    db, hasher = gray_zone_session()
+    expected = {1: None, 2: 1, 3: None, 4: None}
+
+    first = Deduplicator(db, hasher=hasher).run(prune_aliases=True)
+    assert {row.id: row.canonical_id for row in db.query(Legislation)} == expected
+    assert first["updated"] == 1 and first["chunks_removed"] == 1
+    assert db.query(LegislationChunk).filter(LegislationChunk.legislation_id == 2).count() == 0
+
+    again = Deduplicator(db, hasher=hasher).run(prune_aliases=True)
+    assert {row.id: row.canonical_id for row in db.query(Legislation)} == expected
+    assert again["updated"] == 0 and again["aliases"] == 1 and again["chunks_removed"] == 0
+
+    # Texto do alias reescrito (abaixo da zona cinzenta): a ligação é desfeita
+    db.query(Legislation).filter(Legislation.id == 2).update({"full_text": law_text(99)})
+    db.commit()
+    changed = Deduplicator(db, hasher=hasher).run(prune_aliases=True)
+    assert changed["updated"] == 1 and changed["aliases"] == 0
+    assert db.get(Legislation, 2).canonical_id is None
+
+
+if __name__ == "__main__":
+    test_minhash_estimate()
+    test_lsh_candidates()
+    test_cross_source_clusters()
+    test_embedding_gray_zone()
+    test_gray_zone_rerun_after_prune()
+    print("\n[OK] Testes da deduplicação concluídos!")
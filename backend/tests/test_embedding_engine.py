@@ -0,0 +1,103 @@
+"""
+Testes do motor de embeddings (lotes por comprimento)
+
+Usa um modelo falso (sem sentence-transformers) para validar:
+1. Lotes respeitam o máximo de textos e o orçamento de tokens com padding
+2. Lotes por comprimento têm menos padding que lotes fixos
+3. Saída em um array float32 contíguo, na ordem de entrada
+4. EmbeddingService: listas só na borda (colunas JSON) e None onde falhou
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+
+from app.services.embedding_cache import EmbeddingCache  # noqa: E402
+from app.services.embedding_engine import (  # noqa: E402
+    EmbeddingEngine,
+    length_buckets,
+    padding_efficiency,
+    word_count_length,
+)
+from app.services.embedding_service import EmbeddingService  # noqa: E402
+
+
+class FakeModel:
+    """Vetor = (número de palavras, 1.0); registra os lotes recebidos"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        assert not show_progress_bar
+        if self.fail:
+            raise RuntimeError("modelo indisponível")
+        self.batches.append([len(text.split()) for text in texts])
+        return np.array([[float(len(text.split())), 1.0] for text in texts], dtype=np.float64)
+
+
+def texts_of_mixed_length(count=200):
+    return [" ".join(["palavra"] * (3 + (n * 37) % 120)) for n in range(count)]
+
+
+def test_length_buckets():
+    """Nenhum lote passa dos limites e todos os índices aparecem uma vez"""
+    lengths = word_count_length(texts_of_mixed_length())
+    buckets = length_buckets(lengths, batch_size=16, max_batch_tokens=1024)
+
+    assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+    for bucket in buckets:
+        assert len(bucket) <= 16
+        assert len(bucket) == 1 or len(bucket) * max(lengths[i] for i in bucket) <= 1024
+
+    fixed = [list(range(start, min(start + 16, len(lengths)))) for start in range(0, len(lengths), 16)]
+    assert padding_efficiency(lengths, buckets) > 0.9
+    assert padding_efficiency(lengths, buckets) > padding_efficiency(lengths, fixed) + 0.2
+    # Texto maior que o orçamento vai sozinho
+    assert length_buckets([5000, 10, 10], batch_size=8, max_batch_tokens=100) == [[0], [1, 2]]
+
+
+def test_engine_output_order():
+    """Array float32 contíguo na ordem de entrada, com lotes homogêneos"""
+    texts = texts_of_mixed_length(50)
+    model = FakeModel()
+    engine = EmbeddingEngine(model, batch_size=8, max_batch_tokens=400, length_fn=word_count_length)
+    vectors = engine.encode(texts)
+
+    assert vectors.dtype == np.float32 and vectors.flags["C_CONTIGUOUS"]
+    assert vectors.shape == (50, 2)
+    assert vectors[:, 0].tolist() == [float(len(t.split())) for t in texts]
+    for batch in model.batches:
+        assert max(batch) - min(batch) < 40
+
+    fixed = EmbeddingEngine(FakeModel(), batch_size=8, bucketing=False)
+    assert np.array_equal(fixed.encode(texts), vectors)
+    assert engine.encode([]).shape == (0, 0)
+
+
+def test_service_lists_at_the_edge():
+    """generate_embeddings_batch converte o array uma vez; falha vira None"""
+    service = EmbeddingService(model_name="fake", model=FakeModel(), cache=EmbeddingCache(":memory:"))
+    service.engine.length_fn = word_count_length
+    array = service.generate_embeddings_array(["um dois", "três"])
+    assert array.dtype == np.float32 and array.tolist() == [[2.0, 1.0], [1.0, 1.0]]
+    assert service.generate_embeddings_batch(["um dois", "três"]) == [[2.0, 1.0], [1.0, 1.0]]
+
+    broken = EmbeddingService(model_name="fake", model=FakeModel(fail=True), cache=EmbeddingCache(":memory:"))
+    broken.engine.length_fn = word_count_length
+    assert broken.generate_embeddings_batch(["a", "b"]) == [None, None]
+
+    # Parte em cache, parte com falha
+    broken.cache = service.cache
+    assert broken.generate_embeddings_batch(["três", "novo"]) == [[1.0, 1.0], None]
+
+
+if __name__ == "__main__":
+    test_length_buckets()
+    test_engine_output_order()
+    test_service_lists_at_the_edge()
+    print("\n[OK] Testes do motor de embeddings concluídos!")
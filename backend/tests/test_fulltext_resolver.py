@@ -0,0 +1,259 @@
+"""
+Testes do resolvedor de texto completo do LexML
+
+Usa um fetcher falso (sem rede) com atraso por padrão de URL para validar:
+1. URLs candidatas disparadas ao mesmo tempo (vence a primeira com texto)
+2. Padrão de URL aprendido por autoridade, disputando com os demais
+3. Cache negativo com TTL (404/410 entram; 429, 5xx e falhas de rede não,
+   mesmo quando a consulta SRU responde sem texto)
+4. Cache de textos, busca compartilhada entre chamadas e prefetch
+5. Espera limitada com a busca continuando em background
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiohttp import web  # noqa: E402
+
+from app.integrations.fulltext_resolver import (  # noqa: E402
+    FullTextResolver,
+    normalize_urn,
+    urn_authority,
+)
+
+
+URN = "urn:lex:br:federal:lei:2018-08-14;13709"
+TEXT = "Art. 1º Esta Lei dispõe sobre o tratamento de dados pessoais."
+
+
+class FakeFetcher:
+    """Responde por padrão de URL: (atraso em segundos, texto | None | Exception)"""
+
+    def __init__(self, behavior):
+        self.behavior = behavior
+        self.calls = []
+
+    def pattern(self, url: str) -> str:
+        if "recordSchema=lexml" in url:
+            return "sru_lexml"
+        if url.endswith("/xml"):
+            return "documento_xml"
+        if "formato=xml" in url:
+            return "documento_formato_xml"
+        if "%3A" in url:
+            return "documento"
+        return "documento_raw"
+
+    async def __call__(self, url: str):
+        name = self.pattern(url)
+        self.calls.append(name)
+        delay, result = self.behavior.get(name, (0.0, None))
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def make_resolver(fetcher, **kwargs):
+    kwargs.setdefault("base_url", "https://lexml.example")
+    kwargs.setdefault("negative_ttl_seconds", 3600)
+    kwargs.setdefault("cache_size", 16)
+    kwargs.setdefault("prefetch_concurrency", 2)
+    return FullTextResolver(fetcher=fetcher, **kwargs)
+
+
+def test_urn_helpers():
+    """Normalização da URN e autoridade"""
+    assert normalize_urn("federal:lei:2018;13709") == "urn:lex:br:federal:lei:2018;13709"
+    assert normalize_urn(URN) == URN
+    assert urn_authority(URN) == "br:federal"
+    assert urn_authority("urn:lex:br:senado.federal:projeto.lei;pls:2008;489") == "br:senado.federal"
+
+
+def test_race_takes_first_text():
+    """Todas as URLs ao mesmo tempo: o tempo é o da primeira com texto, não a soma"""
+    fetcher = FakeFetcher({
+        "documento": (0.3, None),
+        "documento_raw": (0.3, None),
+        "documento_formato_xml": (0.05, TEXT),
+        "documento_xml": (0.3, TimeoutError()),
+        "sru_lexml": (0.3, None),
+    })
+    resolver = make_resolver(fetcher)
+
+    start = time.perf_counter()
+    text = asyncio.run(resolver.resolve(URN))
+    elapsed = time.perf_counter() - start
+
+    assert text == TEXT
+    assert elapsed < 0.25
+    assert len(fetcher.calls) == 5
+    assert resolver.get_stats()["learned_patterns"] == {"br:federal": "documento_formato_xml"}
+
+
+def test_learned_pattern_races_with_others():
+    """Padrão aprendido vai à frente, mas na mesma corrida: se parar de responder, não custa um timeout"""
+    fetcher = FakeFetcher({"documento_xml": (0.0, TEXT)})
+    resolver = make_resolver(fetcher)
+
+    async def scenario():
+        await resolver.resolve(URN)
+        fetcher.calls.clear()
+        return await resolver.resolve("urn:lex:br:federal:lei:2011-11-18;12527")
+
+    assert asyncio.run(scenario()) == TEXT
+    assert fetcher.calls[0] == "documento_xml" and len(fetcher.calls) == 5
+    assert resolver.stats["learned_pattern_hits"] == 1
+
+    # Padrão aprendido agora lento: outra URL vence sem esperar por ele
+    fetcher.behavior = {"documento_xml": (0.5, TimeoutError()), "documento": (0.05, TEXT)}
+    start = time.perf_counter()
+    assert asyncio.run(resolver.resolve("urn:lex:br:federal:lei:2014-04-23;12965")) == TEXT
+    assert time.perf_counter() - start < 0.4
+    assert resolver.stats["learned_pattern_hits"] == 1
+    assert resolver.get_stats()["learned_patterns"] == {"br:federal": "documento"}
+
+
+def test_negative_cache():
+    """URN sem texto (LexML respondeu) não é buscada de novo até o TTL expirar"""
+    fetcher = FakeFetcher({})
+    resolver = make_resolver(fetcher)
+
+    async def scenario():
+        first = await resolver.resolve(URN)
+        calls = len(fetcher.calls)
+        second = await resolver.resolve(URN)
+        return first, second, calls
+
+    first, second, calls = asyncio.run(scenario())
+    assert first is None and second is None
+    assert calls == 5
+    assert len(fetcher.calls) == 5
+    assert resolver.stats["negative_hits"] == 1
+
+    resolver._missing[URN] = time.monotonic() - 1
+    assert asyncio.run(resolver.resolve(URN)) is None
+    assert len(fetcher.calls) == 10
+
+
+def test_network_failures_are_not_cached():
+    """Falhas só de rede/timeout não entram no cache negativo"""
+    fetcher = FakeFetcher({
+        name: (0.0, ConnectionError("sem rede"))
+        for name in ("documento", "documento_raw", "documento_formato_xml", "documento_xml", "sru_lexml")
+    })
+    resolver = make_resolver(fetcher)
+
+    assert asyncio.run(resolver.resolve(URN)) is None
+    assert resolver.get_stats()["negative_entries"] == 0
+
+
+def test_partial_failures_are_not_cached():
+    """URLs de documento com erro e SRU sem texto: ausência não é definitiva"""
+    fetcher = FakeFetcher({
+        "documento": (0.0, ConnectionError("HTTP 503")),
+        "documento_raw": (0.0, TimeoutError()),
+        "documento_formato_xml": (0.0, ConnectionError("HTTP 502")),
+        "documento_xml": (0.0, TimeoutError()),
+        "sru_lexml": (0.0, None),
+    })
+    resolver = make_resolver(fetcher)
+
+    assert asyncio.run(resolver.resolve(URN)) is None
+    assert resolver.get_stats()["negative_entries"] == 0
+
+    # Uma só URL com erro já impede o cache negativo
+    fetcher.behavior = {"documento_xml": (0.0, TimeoutError())}
+    assert asyncio.run(resolver.resolve(URN)) is None
+    assert resolver.get_stats()["negative_entries"] == 0
+
+
+def test_http_status_handling():
+    """404/410 do LexML vão para o cache negativo; 429 e 5xx são temporários"""
+    statuses = {"value": 503}
+
+    async def handler(request):
+        return web.Response(status=statuses["value"])
+
+    async def resolve_with(status):
+        statuses["value"] = status
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        try:
+            port = runner.addresses[0][1]
+            resolver = FullTextResolver(base_url=f"http://127.0.0.1:{port}", negative_ttl_seconds=3600)
+            return await resolver.resolve(URN), resolver.get_stats()["negative_entries"]
+        finally:
+            await runner.cleanup()
+
+    for status in (429, 500, 503):
+        assert asyncio.run(resolve_with(status)) == (None, 0), status
+    for status in (404, 410):
+        assert asyncio.run(resolve_with(status)) == (None, 1), status
+
+
+def test_cache_and_shared_inflight():
+    """Chamadas simultâneas compartilham a busca; depois o texto vem do cache"""
+    fetcher = FakeFetcher({"documento": (0.05, TEXT)})
+    resolver = make_resolver(fetcher)
+
+    async def scenario():
+        results = await asyncio.gather(*(resolver.resolve(URN) for _ in range(5)))
+        cached = await resolver.resolve(URN)
+        return results, cached
+
+    results, cached = asyncio.run(scenario())
+    assert results == [TEXT] * 5
+    assert cached == TEXT
+    assert len(fetcher.calls) == 5  # uma única corrida de URLs
+    assert resolver.stats["inflight_joins"] == 4
+    assert resolver.stats["cache_hits"] == 1
+
+
+def test_prefetch():
+    """Prefetch preenche os caches com concorrência limitada"""
+    fetcher = FakeFetcher({"documento": (0.01, TEXT)})
+    resolver = make_resolver(fetcher)
+    urns = [f"urn:lex:br:federal:lei:2020;{n}" for n in range(6)] + ["federal:lei:2020;0"]
+
+    summary = asyncio.run(resolver.prefetch(urns))
+
+    assert summary == {"requested": 6, "found": 6, "missing": 0}
+    assert resolver.get_stats()["cached_texts"] == 6
+
+
+def test_resolve_within_keeps_fetching():
+    """Tempo esgotado: None agora, texto em cache quando a busca terminar"""
+    fetcher = FakeFetcher({"documento": (0.1, TEXT)})
+    resolver = make_resolver(fetcher)
+
+    async def scenario():
+        quick = await resolver.resolve_within(URN, timeout_seconds=0.01)
+        await asyncio.sleep(0.2)
+        return quick, await resolver.resolve(URN)
+
+    quick, later = asyncio.run(scenario())
+    assert quick is None
+    assert later == TEXT
+    assert resolver.stats["cache_hits"] == 1
+
+
+if __name__ == "__main__":
+    test_urn_helpers()
+    test_race_takes_first_text()
+    test_learned_pattern_races_with_others()
+    test_negative_cache()
+    test_network_failures_are_not_cached()
+    test_partial_failures_are_not_cached()
+    test_http_status_handling()
+    test_cache_and_shared_inflight()
+    test_prefetch()
+    test_resolve_within_keeps_fetching()
+    print("\n[OK] Testes do resolvedor de texto completo concluídos!")
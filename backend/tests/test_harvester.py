@@ -0,0 +1,209 @@
+"""
+Testes da coleta incremental e retomável
+
+Usa SQLite em memória e fontes falsas (sem rede) para validar:
+1. Páginas baixadas em paralelo (janela limitada) e gravadas em ordem
+2. Retomada da última página gravada após uma falha
+3. Modo delta a partir da última coleta concluída
+4. Paginação do LexML por startRecord (para no total) e filtros do Senado
+"""
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.models.models import Base, HarvestCursor, Legislation  # noqa: E402
+from app.services.harvester import (  # noqa: E402
+    Harvester,
+    HarvestFeed,
+    HarvestPage,
+    LexMLFeed,
+    SenadoFeed,
+)
+from app.services.legislation_store import LegislationStore, lexml_fields  # noqa: E402
+
+
+def doc(year, n):
+    return {
+        "urn": f"urn:lex:br:federal:lei:{year};{n}",
+        "title": f"Lei nº {n}/{year}",
+        "tipo_documento": "Lei",
+        "date": f"{year}-01-{n % 28 + 1:02d}",
+    }
+
+
+class FakeFeed(HarvestFeed):
+    """Páginas em memória; falha (sempre) nas posições de fail_at"""
+
+    name = "fake"
+
+    def __init__(self, docs_by_year, page_size=2, delay=0.01):
+        super().__init__(page_size=page_size)
+        self.docs_by_year = docs_by_year
+        self.delay = delay
+        self.fail_at = set()
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def fetch_page(self, year, position, since):
+        self.calls.append((year, position, since))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if (year, position) in self.fail_at:
+                raise ConnectionError("falha simulada")
+            start = (position - 1) * self.page_size
+            return HarvestPage(records=self.docs_by_year.get(year, [])[start:start + self.page_size])
+        finally:
+            self.active -= 1
+
+    def to_fields(self, record, year):
+        return lexml_fields(record)
+
+    def record_date(self, record):
+        return record["date"]
+
+
+def make_harvester(concurrency=3):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    store = LegislationStore(session_factory=factory)
+    harvester = Harvester(
+        store=store, session_factory=factory, concurrency=concurrency,
+        max_retries=2, retry_delay_seconds=0
+    )
+    return harvester, factory
+
+
+def count_legislations(factory):
+    db = factory()
+    try:
+        return db.query(Legislation).count()
+    finally:
+        db.close()
+
+
+def test_full_harvest_in_parallel():
+    """Todas as páginas gravadas; downloads em paralelo limitados à janela"""
+    feed = FakeFeed({2020: [doc(2020, n) for n in range(9)], 2021: [doc(2021, n) for n in range(4)]})
+    harvester, factory = make_harvester(concurrency=3)
+
+    result = asyncio.run(harvester.run(feed, start_year=2020, end_year=2021))
+
+    assert result["status"] == "completed"
+    assert result["records"] == 13 and result["created"] == 13
+    assert count_legislations(factory) == 13
+    assert 1 < feed.max_active <= 3
+
+    status = harvester.status()[0]
+    assert status["status"] == "completed"
+    assert status["records_harvested"] == 13
+    assert status["last_modified"] == "2021-01-04"
+    assert status["last_success_at"] is not None
+
+
+def test_resume_after_failure():
+    """Falha na página 3: o cursor fica na página 3 e a próxima execução continua dali"""
+    feed = FakeFeed({2020: [doc(2020, n) for n in range(10)]})
+    feed.fail_at = {(2020, 3)}
+    harvester, factory = make_harvester(concurrency=2)
+
+    failed = asyncio.run(harvester.run(feed, start_year=2020, end_year=2020))
+    assert failed["status"] == "failed"
+    assert "falha simulada" in failed["error"]
+    assert count_legislations(factory) == 4
+
+    cursor = harvester.status()[0]
+    assert (cursor["status"], cursor["year"], cursor["position"]) == ("failed", 2020, 3)
+
+    feed.fail_at.clear()
+    feed.calls.clear()
+    resumed = asyncio.run(harvester.run(feed, start_year=2020, end_year=2020))
+    assert resumed["status"] == "completed"
+    assert min(position for _, position, _ in feed.calls) == 3
+    assert resumed["created"] == 6
+    assert count_legislations(factory) == 10
+
+
+def test_delta_mode():
+    """Delta começa no ano da última coleta concluída e passa a data de corte"""
+    year = datetime.now().year
+    feed = FakeFeed({year - 2: [doc(year - 2, 1)], year: [doc(year, 1)]})
+    harvester, factory = make_harvester()
+
+    # Sem coleta concluída ainda: o delta vira coleta completa
+    first = asyncio.run(harvester.run(feed, mode="delta", start_year=year - 2))
+    assert first["mode"] == "full" and first["created"] == 2
+
+    db = factory()
+    last_success = db.query(HarvestCursor).one().last_success_at
+    db.close()
+
+    feed.docs_by_year[year].append(doc(year, 2))
+    feed.calls.clear()
+    delta = asyncio.run(harvester.run(feed, mode="delta"))
+    assert delta["mode"] == "delta"
+    assert delta["created"] == 1 and delta["unchanged"] == 1
+    assert {call[0] for call in feed.calls} == {year}
+    assert all(since == last_success for _, _, since in feed.calls)
+
+
+class FakeLexMLClient:
+    def __init__(self, total):
+        self.total = total
+        self.starts = []
+
+    async def search(self, query, start_record=1, maximum_records=20, raise_errors=False):
+        self.starts.append(start_record)
+        end = min(self.total, start_record + maximum_records - 1)
+        records = [doc(2020, n) for n in range(start_record, end + 1)]
+        return {"total": self.total, "records": records}
+
+
+class FakeSenadoClient:
+    def __init__(self):
+        self.params = []
+
+    async def listar_materias(self, **params):
+        self.params.append(params)
+        return {"materias": [{"codigo": 1, "sigla": "PL", "numero": 10, "ano": 2024}]}
+
+
+def test_lexml_and_senado_feeds():
+    """LexML: startRecord de page_size em page_size até o total; Senado: data de corte"""
+    client = FakeLexMLClient(total=25)
+    feed = LexMLFeed("lexml_leis", "Lei", client=client, page_size=10)
+    harvester, factory = make_harvester(concurrency=4)
+
+    result = asyncio.run(harvester.run(feed, start_year=2020, end_year=2020))
+    assert result["created"] == 25
+    assert client.starts == [1, 11, 21]
+
+    senado = FakeSenadoClient()
+    materias = SenadoFeed("senado_materias", "materia", client=senado, page_size=100)
+    page = asyncio.run(materias.fetch_page(2024, 1, datetime(2024, 3, 5)))
+    assert senado.params[0]["tramitando"] is None
+    assert senado.params[0]["data_inicio"] == "20240305"
+    assert materias.to_fields(page.records[0], 2024)["external_id"] == "senado_mat_1"
+
+
+if __name__ == "__main__":
+    test_full_harvest_in_parallel()
+    test_resume_after_failure()
+    test_delta_mode()
+    test_lexml_and_senado_feeds()
+    print("\n[OK] Testes da coleta incremental concluídos!")
@@ -0,0 +1,243 @@
+"""
+Testes da fila de jobs de coleta e do pipeline
+
+Usa SQLite em memória, execuções falsas (sem rede) e o Celery em modo eager
+(sem broker) para validar:
+1. submit grava o job, enfileira e o worker registra progresso e resultado
+2. Limite de jobs simultâneos por fonte (o excedente é adiado)
+3. Nova tentativa após erro transitório e falha definitiva após o limite
+4. Cancelamento de job pendente e de job em execução
+5. Job "running" de um worker perdido é retomado na reentrega
+6. Reservas da mesma fonte serializadas no PostgreSQL (advisory lock)
+7. Broker fora do ar: o job falha em vez de ficar pendente para sempre
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import app.services.job_queue as job_queue_module  # noqa: E402
+from app.celery_app import CELERY_AVAILABLE, celery_app  # noqa: E402
+from app.models.models import Base, DataCollectionJob  # noqa: E402
+from app.services.job_queue import (  # noqa: E402
+    JobDeferred,
+    JobQueue,
+    JobRetry,
+)
+
+
+def make_queue(runners, **kwargs):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    kwargs.setdefault("retry_delay_seconds", 0)
+    kwargs.setdefault("defer_seconds", 0)
+    return JobQueue(session_factory=factory, runners=runners, **kwargs), factory
+
+
+def add_job(factory, source="lexml", status="pending"):
+    db = factory()
+    job = DataCollectionJob(job_type=source, source=source, status=status, parameters={}, attempts=0)
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    db.close()
+    return job_id
+
+
+async def pages_runner(db, parameters, progress):
+    """Coleta falsa: três páginas de 10 registros"""
+    for page in range(1, 4):
+        progress(page * 10)
+    return {"collected": 25, "failed": 5, "total": 30}
+
+
+def test_submit_runs_on_worker():
+    """Celery eager: o job roda ao ser enfileirado e o resultado fica no job"""
+    queue, factory = make_queue({"lexml": pages_runner})
+    assert CELERY_AVAILABLE
+
+    previous = (job_queue_module.job_queue, celery_app.conf.task_always_eager)
+    job_queue_module.job_queue = queue
+    celery_app.conf.task_always_eager = True
+    try:
+        job = queue.submit("lexml", {"year": 2024}, priority=1)
+    finally:
+        job_queue_module.job_queue, celery_app.conf.task_always_eager = previous
+
+    assert job["status"] == "completed"
+    assert job["source"] == "lexml" and job["priority"] == 1 and job["attempts"] == 1
+    assert (job["total_items"], job["processed_items"], job["failed_items"]) == (30, 25, 5)
+    assert job["started_at"] is not None and job["completed_at"] is not None
+
+    try:
+        queue.submit("desconhecido", {})
+        raise AssertionError("tipo desconhecido aceito")
+    except ValueError:
+        pass
+
+
+def test_source_concurrency_cap():
+    """Com a fonte no limite o job é adiado; outra fonte roda normalmente"""
+    queue, factory = make_queue(
+        {"lexml": pages_runner, "camara": pages_runner},
+        source_limits={"lexml": 1, "camara": 1}
+    )
+    add_job(factory, "lexml", status="running")
+    waiting = add_job(factory, "lexml")
+    other = add_job(factory, "camara")
+
+    try:
+        queue.execute(waiting)
+        raise AssertionError("limite da fonte ignorado")
+    except JobDeferred:
+        pass
+    assert queue.get(waiting)["status"] == "pending"
+    assert queue.get(waiting)["attempts"] == 0
+
+    queue.execute(other)
+    assert queue.get(other)["status"] == "completed"
+
+
+def test_retry_then_fail():
+    """Erro de rede devolve o job à fila; após max_retries o job falha"""
+    calls = []
+
+    async def flaky(db, parameters, progress):
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("conexão recusada")
+        return {"collected": 1, "total": 1}
+
+    queue, factory = make_queue({"lexml": flaky}, max_retries=2)
+    job_id = add_job(factory)
+    for _ in range(2):
+        try:
+            queue.execute(job_id)
+            raise AssertionError("erro transitório não devolveu o job à fila")
+        except JobRetry:
+            pass
+        job = queue.get(job_id)
+        assert job["status"] == "pending" and "conexão recusada" in job["error_message"]
+
+    queue.execute(job_id)
+    job = queue.get(job_id)
+    assert job["status"] == "completed" and job["attempts"] == 3
+    assert job["error_message"] is None
+
+    async def down(db, parameters, progress):
+        raise ConnectionError("fora do ar")
+
+    queue.runners = {"lexml": down}
+    failing = add_job(factory)
+    raised = []
+    for _ in range(4):
+        try:
+            queue.execute(failing)
+        except JobRetry:
+            raised.append("retry")
+        except ConnectionError:
+            raised.append("failed")
+    assert raised[:3] == ["retry", "retry", "failed"]
+    assert queue.get(failing)["status"] == "failed"
+
+
+def test_cancel():
+    """Pendente: não chega a rodar; em execução: para no próximo progresso"""
+    started = []
+
+    async def runner(db, parameters, progress):
+        started.append(parameters)
+        progress(10)
+        queue.cancel(running_id)
+        progress(20)
+        raise AssertionError("cancelamento ignorado")
+
+    queue, factory = make_queue({"lexml": runner})
+
+    pending_id = add_job(factory)
+    assert queue.cancel(pending_id)["status"] == "cancelled"
+    assert queue.execute(pending_id) == {"job_id": pending_id, "status": "cancelled"}
+    assert started == []
+
+    running_id = add_job(factory)
+    assert queue.execute(running_id)["status"] == "cancelled"
+    job = queue.get(running_id)
+    assert job["status"] == "cancelled" and job["processed_items"] == 20
+    assert queue.cancel(12345) is None
+
+
+def test_redelivered_running_job():
+    """Worker perdido: na reentrega o job "running" volta a rodar"""
+    queue, factory = make_queue({"lexml": pages_runner})
+    job_id = add_job(factory, status="running")
+
+    assert queue.execute(job_id)["status"] == "running"
+    queue.execute(job_id, redelivered=True)
+    assert queue.get(job_id)["status"] == "completed"
+
+
+class RecordingSession:
+    """Sessão falsa de um dialeto qualquer: guarda os comandos executados"""
+
+    def __init__(self, dialect):
+        self.dialect = dialect
+        self.statements = []
+
+    def get_bind(self):
+        return type("Bind", (), {"dialect": type("Dialect", (), {"name": self.dialect})})()
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+
+
+def test_source_lock():
+    """PostgreSQL: advisory lock da fonte antes da contagem; SQLite não precisa"""
+    postgres = RecordingSession("postgresql")
+    JobQueue._lock_source(postgres, "lexml")
+    assert postgres.statements == [("SELECT pg_advisory_xact_lock(hashtext(:source))", {"source": "lexml"})]
+
+    sqlite = RecordingSession("sqlite")
+    JobQueue._lock_source(sqlite, "lexml")
+    assert sqlite.statements == []
+
+
+def test_dispatch_failure_marks_job_failed():
+    """Erro do broker ao enfileirar: o job é marcado como falho e o erro sobe"""
+    queue, factory = make_queue({"lexml": pages_runner})
+
+    def broker_down(job_id, priority):
+        raise ConnectionError("broker indisponível")
+
+    queue._dispatch = broker_down
+    try:
+        queue.submit("lexml", {})
+        raise AssertionError("erro do broker engolido")
+    except ConnectionError:
+        pass
+
+    db = factory()
+    job = db.query(DataCollectionJob).one()
+    assert job.status == "failed" and "broker indisponível" in job.error_message
+    assert job.completed_at is not None
+    db.close()
+
+
+if __name__ == "__main__":
+    test_submit_runs_on_worker()
+    test_source_concurrency_cap()
+    test_retry_then_fail()
+    test_cancel()
+    test_redelivered_running_job()
+    test_source_lock()
+    test_dispatch_failure_marks_job_failed()
+    print("\n[OK] Testes da fila de jobs concluídos!")
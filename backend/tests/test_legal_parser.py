@@ -0,0 +1,133 @@
+"""
+Testes do parser de estrutura de textos legais
+
+Valida:
+1. Árvore artigo → parágrafo → inciso → alínea com posições no texto
+2. Citações ("no art. 5º", "no § 2º") não abrem dispositivos
+3. Numeração com milhar, sufixo (7º-A) e "Parágrafo único"
+4. Chunks em qualquer granularidade a partir da mesma árvore
+5. Artigos logo depois de títulos (TÍTULO, CAPÍTULO, Seção), sem pontuação
+   antes; "Art." maiúsculo depois de "no"/"nos termos do" segue citação
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.legal_parser import parse_legal_text  # noqa: E402
+from app.services.text_processor import text_processor  # noqa: E402
+
+
+TEXT = (
+    "LEI Nº 1, DE 2024 Dispõe sobre o tratamento de dados. "
+    "Art. 1º Esta Lei regula o tratamento previsto no art. 5º da Lei nº 9.000. "
+    "§ 1º Aplica-se o disposto no § 2º aos operadores: "
+    "I - mediante consentimento; "
+    "II - para cumprir: a) obrigação legal; b) contrato; "
+    "§ 2º O controlador responde pelos danos. "
+    "Parágrafo único. Revogado. "
+    "Art. 1.000. Os prazos são contados em dias úteis. "
+    "Art. 7º-A O tratamento será registrado (Incluído pela Lei nº 2) "
+    "Art. 8º Esta Lei entra em vigor na data de sua publicação."
+)
+
+
+def test_tree_and_offsets():
+    """Cada dispositivo fica sob o superior e as posições cobrem o seu texto"""
+    document = parse_legal_text(TEXT)
+    assert [a.number for a in document.articles] == ["1", "1000", "7-A", "8"]
+
+    art1 = document.articles[0]
+    assert [(c.type, c.number) for c in art1.children] == [
+        ("paragraph", "1"), ("paragraph", "2"), ("paragraph", "único")]
+    par1 = art1.children[0]
+    assert [c.number for c in par1.children] == ["I", "II"]
+    assert [c.number for c in par1.children[1].children] == ["a", "b"]
+
+    alinea = par1.children[1].children[0]
+    assert TEXT[alinea.start:alinea.end].strip() == "a) obrigação legal;"
+    assert document.body(alinea) == "obrigação legal;"
+    assert [n.label for n in alinea.path()] == ["Art. 1º", "§ 1º", "II -", "a)"]
+    assert art1.end == document.articles[1].start
+    assert document.articles[-1].end == len(TEXT)
+    assert TEXT[art1.start:].startswith("Art. 1º Esta Lei")
+
+
+def test_citations():
+    """Referências no meio da frase são citações, com posição"""
+    document = parse_legal_text(TEXT)
+    assert [(c["type"], c["number"]) for c in document.citations] == [("article", "5"), ("paragraph", "2")]
+    citation = document.citations[0]
+    assert TEXT[citation["start"]:citation["end"]] == "art. 5º"
+
+    art1 = document.articles[0]
+    assert document.citations_in(art1.body_start, art1.end) == document.citations
+    assert document.citations_in(document.articles[1].start, len(TEXT)) == []
+
+
+def test_chunks_at_any_granularity():
+    """Artigos, parágrafos, incisos e alíneas saem da mesma árvore"""
+    normalized = text_processor.normalize_text(TEXT)
+    articles = text_processor.split_into_chunks(normalized, "article")
+    assert [c["number"] for c in articles] == ["1", "1000", "7-A", "8"]
+    art1 = articles[0]
+    assert art1["content"].startswith("Esta Lei regula")
+    assert art1["normalized_content"] == art1["content"]
+    assert [p["number"] for p in art1["paragraphs"]] == ["1", "2", "único"]
+    assert art1["metadata"]["paragraph_count"] == 3
+    assert art1["metadata"]["inciso_count"] == 2
+    assert len(art1["citations"]) == 2
+
+    incisos = text_processor.split_into_chunks(normalized, "inciso")
+    assert [c["number"] for c in incisos] == ["I", "II"]
+    assert incisos[1]["metadata"]["path"] == "Art. 1º § 1º II -"
+    assert incisos[1]["metadata"]["article"] == "1"
+
+    alineas = text_processor.split_into_chunks(normalized, "alinea")
+    assert [c["content"] for c in alineas] == ["obrigação legal;", "contrato;"]
+
+    assert len(text_processor.split_into_chunks(normalized, "paragraph")) == 3
+    assert text_processor.split_into_chunks(normalized, "full_text")[0]["type"] == "full_text"
+
+    chunks = text_processor.process_legislation_text(TEXT, legislation_id=7)
+    assert [c["number"] for c in chunks] == ["1", "1000", "7-A", "8"]
+    assert chunks[0]["legislation_id"] == 7 and chunks[0]["word_count"] > 0
+
+
+HEADINGS = (
+    "LEI Nº 13.709, DE 14 DE AGOSTO DE 2018 Lei Geral de Proteção de Dados Pessoais (LGPD). "
+    "O PRESIDENTE DA REPÚBLICA Faço saber que o Congresso Nacional decreta e eu sanciono a seguinte Lei: "
+    "TÍTULO I DISPOSIÇÕES GERAIS CAPÍTULO I DISPOSIÇÕES PRELIMINARES "
+    "Art. 1º Esta Lei dispõe sobre o tratamento de dados pessoais "
+    "Art. 2º A disciplina da proteção de dados pessoais tem como fundamentos: "
+    "I - o respeito à privacidade; II - a autodeterminação informativa. "
+    "CAPÍTULO II DO TRATAMENTO DE DADOS PESSOAIS "
+    "Seção I Dos Requisitos para o Tratamento de Dados Pessoais "
+    "Art. 7º O tratamento somente poderá ser realizado nas hipóteses previstas no Art. 11 "
+    "e nos termos do Art. 8º, observado o art. 6º desta Lei. "
+    "Seção II Do tratamento de dados sensíveis "
+    "Art. 8º O consentimento deverá ser fornecido por escrito."
+)
+
+
+def test_articles_after_headings():
+    """Títulos antes do artigo não o transformam em citação"""
+    document = parse_legal_text(HEADINGS)
+    assert [a.number for a in document.articles] == ["1", "2", "7", "8"]
+    assert HEADINGS[document.articles[0].start:].startswith("Art. 1º Esta Lei")
+    assert [(c["type"], c["number"]) for c in document.citations] == [
+        ("article", "11"), ("article", "8"), ("article", "6")]
+    art7 = document.articles[2]
+    assert [c["number"] for c in document.citations_in(art7.start, art7.end)] == ["11", "8", "6"]
+
+    chunks = text_processor.process_legislation_text(HEADINGS, legislation_id=1)
+    assert [c["number"] for c in chunks] == ["1", "2", "7", "8"]
+
+
+if __name__ == "__main__":
+    test_tree_and_offsets()
+    test_citations()
+    test_chunks_at_any_granularity()
+    test_articles_after_headings()
+    print("\n[OK] Testes do parser de textos legais concluídos!")
@@ -0,0 +1,248 @@
+"""
+Testes do armazenamento local de metadados de legislação
+
+Usa SQLite em memória e um cliente do LexML falso para validar:
+1. ID estável (digest da URN) igual entre processos
+2. Upsert em lote: cria, atualiza e preserva o texto completo
+3. Busca pelo ID estável, pelo lexml_id antigo e pela URN
+4. Destaques materializados (ordem, cache e atualização periódica)
+5. GET /legislation/{id} e /trending sem chamar o LexML
+6. Mesma norma vinda do Senado e do LexML (mesma URN) em um só registro
+"""
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+from fastapi import BackgroundTasks, HTTPException  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.api.v1 import legislation as legislation_api  # noqa: E402
+from app.models.models import Base, Legislation, legislation_stable_id  # noqa: E402
+from app.services.legislation_store import LegislationStore, lexml_fields, senado_norma_fields  # noqa: E402
+from app.services.trending_refresher import TrendingRefresher  # noqa: E402
+
+
+URN = "urn:lex:br:federal:lei:2018-08-14;13709"
+
+
+def doc(n, tipo="Lei", year=2024, **extra):
+    found = {
+        "urn": f"urn:lex:br:federal:{tipo.lower().replace(' ', '.')}:{year};{n}",
+        "lexml_id": str(1000 + n),
+        "title": f"{tipo} nº {n}/{year}",
+        "description": f"Ementa do documento {n}",
+        "tipo_documento": tipo,
+        "date": str(year),
+        "autoridade": "Federal",
+    }
+    found.update(extra)
+    return found
+
+
+def make_store(**kwargs):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    kwargs.setdefault("trending_size", 5)
+    kwargs.setdefault("cache_seconds", 0)
+    return LegislationStore(session_factory=factory, **kwargs), factory
+
+
+class FakeLexML:
+    """Cliente do LexML falso: conta as chamadas"""
+
+    def __init__(self, projects=(), laws=()):
+        self.projects = list(projects)
+        self.laws = list(laws)
+        self.calls = 0
+
+    async def search_projects_of_law(self, year=None, limit=20):
+        self.calls += 1
+        return self.projects[:limit]
+
+    async def search_laws(self, year=None, limit=20):
+        self.calls += 1
+        return self.laws[:limit]
+
+
+class NoUpstream:
+    """Qualquer uso do cliente do LexML falha o teste"""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"LexML chamado no caminho da requisição: {name}")
+
+
+def test_stable_id_is_deterministic():
+    """Mesmo ID em outro processo (hash() muda com PYTHONHASHSEED; o digest não)"""
+    expected = legislation_stable_id(URN)
+    code = (
+        "import sys; sys.path.insert(0, '.');"
+        "from app.models.models import legislation_stable_id;"
+        f"print(legislation_stable_id({URN!r}))"
+    )
+    env = dict(os.environ, PYTHONHASHSEED="123")
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=str(Path(__file__).parent.parent), env=env
+    ).stdout.split()[-1]
+
+    assert int(output) == expected
+    assert 0 < expected < 2 ** 53
+    assert legislation_stable_id(None, "senado", "senado_1") != legislation_stable_id(None, "senado", "senado_2")
+    assert lexml_fields(doc(1, urn="federal:lei:2024;1"))["urn"] == "urn:lex:br:federal:lei:2024;1"
+    assert lexml_fields({"title": "sem identificador"}) is None
+
+
+def test_upsert_creates_and_updates():
+    """Novos são criados; repetidos atualizam metadados sem perder o texto completo"""
+    store, factory = make_store()
+    counts = store.upsert_lexml_documents([doc(1), doc(2), doc(2), {"title": "x"}])
+    assert counts == {"created": 2, "updated": 0, "unchanged": 0, "skipped": 1}
+
+    stable_id = legislation_stable_id(doc(1)["urn"])
+    assert store.save_full_text(stable_id, "Art. 1º Texto.")
+
+    counts = store.upsert_lexml_documents([doc(1, description="Nova ementa"), doc(2)])
+    assert counts == {"created": 0, "updated": 1, "unchanged": 1, "skipped": 0}
+
+    legislation = store.get(stable_id)
+    assert legislation.summary == "Nova ementa"
+    assert legislation.full_text == "Art. 1º Texto."
+    assert legislation.number == "1"
+    assert legislation.year == 2024
+    assert legislation.last_update is not None
+
+    db = factory()
+    assert db.query(Legislation).count() == 2
+    db.close()
+
+
+def test_same_urn_across_sources():
+    """Norma do Senado e documento do LexML com a mesma URN não violam o índice único"""
+    store, factory = make_store()
+    lexml_doc = doc(13709, year=2018, urn=URN, title="Lei nº 13.709/2018")
+    norma = {"codigo": "550000", "numero": "13709", "data": "2018-08-14",
+             "ementa": "Lei Geral de Proteção de Dados Pessoais (LGPD).", "urn": URN}
+    assert senado_norma_fields(norma)["stable_id"] == lexml_fields(lexml_doc)["stable_id"]
+
+    assert store.upsert([senado_norma_fields(norma)])["created"] == 1
+    counts = store.upsert_lexml_documents([lexml_doc, doc(1)])
+    assert counts["created"] == 1 and counts["updated"] == 1
+
+    # Registro antigo do Senado, com o ID derivado do código
+    old = {**senado_norma_fields({**norma, "codigo": "1", "urn": URN.replace("13709", "1")}),
+           "stable_id": legislation_stable_id(None, "senado", "senado_1")}
+    store.upsert([old])
+    counts = store.upsert_lexml_documents([doc(1, year=2018, urn=URN.replace("13709", "1"))])
+    assert counts == {"created": 0, "updated": 1, "unchanged": 0, "skipped": 0}
+
+    # Mesma URN duas vezes no lote
+    other = URN.replace("13709", "2")
+    counts = store.upsert([senado_norma_fields({**norma, "codigo": "2", "urn": other}),
+                           lexml_fields(doc(2, year=2018, urn=other))])
+    assert counts["created"] == 1
+
+    db = factory()
+    assert db.query(Legislation).filter(Legislation.urn == URN).count() == 1
+    assert db.query(Legislation).count() == 4
+    db.close()
+    assert store.get_by_urn(URN).summary == lexml_doc["description"]
+
+
+def test_lookup_by_id_and_urn():
+    """ID estável, lexml_id antigo e URN (com ou sem prefixo)"""
+    store, _ = make_store()
+    store.upsert_lexml_documents([doc(7)])
+    stable_id = legislation_stable_id(doc(7)["urn"])
+
+    assert store.get(stable_id).urn == doc(7)["urn"]
+    assert store.get(1007).stable_id == stable_id
+    assert store.get_by_urn("federal:lei:2024;7").stable_id == stable_id
+    assert store.get(12345) is None
+
+
+def test_trending_materialization():
+    """Ano mais recente primeiro, projetos antes de leis; lista lida da tabela"""
+    store, _ = make_store(cache_seconds=60)
+    store.upsert_lexml_documents([
+        doc(1, year=2023), doc(2, tipo="Projeto de Lei", year=2023),
+        doc(3, year=2024), doc(4, tipo="Projeto de Lei", year=2024), doc(5, year=2024),
+        doc(6, year=2022),
+    ])
+    assert store.trending(10) == []
+    assert store.trending_age_seconds() is None
+
+    assert store.refresh_trending() == 5
+    titles = [legislation.title for legislation in store.trending(10)]
+    assert titles == [
+        "Projeto de Lei nº 4/2024", "Lei nº 5/2024", "Lei nº 3/2024",
+        "Projeto de Lei nº 2/2023", "Lei nº 1/2023",
+    ]
+    assert [legislation.title for legislation in store.trending(2)] == titles[:2]
+    assert store.trending_age_seconds() < 5
+
+    # Cache em memória até a próxima atualização
+    store.upsert_lexml_documents([doc(8, tipo="Projeto de Lei", year=2025)])
+    assert store.trending(1)[0].title == titles[0]
+    store.refresh_trending()
+    assert store.trending(1)[0].title == "Projeto de Lei nº 8/2025"
+
+
+def test_refresher_harvests_and_skips_fresh_list():
+    """Coleta do LexML e recálculo; lista recente (outro worker) não é atualizada de novo"""
+    store, _ = make_store()
+    client = FakeLexML(projects=[doc(1, tipo="Projeto de Lei")], laws=[doc(2), doc(3)])
+    refresher = TrendingRefresher(store=store, client=client, interval_seconds=600, harvest_limit=10)
+
+    summary = asyncio.run(refresher.refresh_once())
+    assert summary["harvested"]["created"] == 3
+    assert summary["trending"] == 3
+    assert client.calls == 2
+
+    assert asyncio.run(refresher.refresh_once()) is None
+    assert client.calls == 2
+
+
+def test_endpoints_do_not_call_upstream(monkeypatch):
+    """Detalhe e destaques vêm do banco; texto completo é buscado em background"""
+    store, _ = make_store()
+    store.upsert_lexml_documents([doc(1, tipo="Projeto de Lei"), doc(2)])
+    store.refresh_trending()
+    monkeypatch.setattr(legislation_api, "legislation_store", store)
+    monkeypatch.setattr(legislation_api, "lexml_client", NoUpstream())
+
+    trending = asyncio.run(legislation_api.get_trending_legislation(limit=10))
+    assert [item.title for item in trending] == ["Projeto de Lei nº 1/2024", "Lei nº 2/2024"]
+
+    tasks = BackgroundTasks()
+    detail = asyncio.run(legislation_api.get_legislation_detail(trending[0].id, tasks))
+    assert detail.id == trending[0].id
+    assert detail.urn == doc(1, tipo="Projeto de Lei")["urn"]
+    assert detail.full_text is None
+    assert [task.func for task in tasks.tasks] == [store.fill_full_text]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(legislation_api.get_legislation_detail(999, BackgroundTasks()))
+    assert error.value.status_code == 404
+
+
+if __name__ == "__main__":
+    test_stable_id_is_deterministic()
+    test_upsert_creates_and_updates()
+    test_same_urn_across_sources()
+    test_lookup_by_id_and_urn()
+    test_trending_materialization()
+    test_refresher_harvests_and_skips_fresh_list()
+    print("\n[OK] Testes do armazenamento de legislações concluídos!")
@@ -0,0 +1,152 @@
+"""
+Testes do extrator incremental de documentos LexML
+
+Usa tests/fixtures/lexml/documento_lei.xml para validar, com lxml e com
+xml.etree:
+1. Unidades estruturais (artigo, parágrafo, inciso, alínea, agrupadores) na ordem do documento
+2. Resultado igual para qualquer tamanho de bloco (entidades cortadas entre blocos)
+3. Respostas SRU ignoradas e documentos sem estrutura (textos soltos)
+4. Chunks por artigo montados a partir das unidades, sem regex
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+
+from app.integrations.lexml_document import (  # noqa: E402
+    LexMLDocumentParser,
+    extract_lexml_text,
+    iter_lexml_units,
+    label_number,
+)
+from app.integrations.lexml_parser import LXML_AVAILABLE  # noqa: E402
+from app.services.text_processor import text_processor  # noqa: E402
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lexml"
+
+BACKENDS = [False] + ([True] if LXML_AVAILABLE else [])
+
+
+def load(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_structural_units(use_lxml):
+    """Artigos, parágrafos, incisos e alíneas com rótulo, número e caminho"""
+    units = list(iter_lexml_units(load("documento_lei.xml"), use_lxml=use_lxml))
+    by_type = {}
+    for unit in units:
+        by_type.setdefault(unit.type, []).append(unit)
+
+    assert by_type["ementa"][0].text == "Lei Geral de Proteção de Dados Pessoais (LGPD)."
+    assert [u.number for u in by_type["article"]] == ["1", "2", "7", "7-A"]
+    assert [u.label for u in by_type["heading"]] == ["CAPÍTULO I", "CAPÍTULO II"]
+
+    art1 = by_type["article"][0]
+    assert art1.text.startswith("Esta Lei dispõe sobre o tratamento")
+    assert art1.path == ("CAPÍTULO I", "Art. 1º")
+
+    single = by_type["paragraph"][0]
+    assert single.number == "único"
+    assert single.article == "1"
+    # Texto de elementos embutidos no parágrafo (<span>) é preservado
+    assert "interesse nacional e devem" in single.text
+
+    alinea_b = by_type["alinea"][1]
+    assert alinea_b.content == "b) obrigação prevista em regulamento & contrato;"
+    assert alinea_b.path == ("CAPÍTULO II", "Art. 7º", "II -", "b)")
+    assert alinea_b.article == "7"
+    assert alinea_b.depth == 3
+
+    # Pai sempre antes dos filhos
+    types = [u.type for u in units if u.article == "7"]
+    assert types == ["article", "inciso", "inciso", "alinea", "alinea", "paragraph", "paragraph"]
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_chunk_size_does_not_change_result(use_lxml):
+    """Blocos pequenos (entidades e UTF-8 cortados) dão o mesmo resultado"""
+    content = load("documento_lei.xml")
+    expected = list(iter_lexml_units(content, use_lxml=use_lxml))
+    for chunk_size in (7, 64, 1000):
+        assert list(iter_lexml_units(content, use_lxml=use_lxml, chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_sru_response_is_ignored(use_lxml):
+    """Resposta SRU (metadados) não é documento: nenhuma unidade"""
+    parser = LexMLDocumentParser(use_lxml=use_lxml)
+    assert parser.feed(load("sru_leis.xml")) == []
+    assert parser.is_sru
+    assert extract_lexml_text(load("sru_leis.xml"), use_lxml=use_lxml) is None
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_document_without_structure(use_lxml):
+    """Sem artigos, o texto é o dos elementos soltos (curtos e números descartados)"""
+    content = (
+        "<documento><cabecalho>123</cabecalho>"
+        "<corpo>Texto corrido de uma norma sem marcação estrutural.</corpo>"
+        "<corpo>Segundo bloco de texto da mesma norma.</corpo></documento>"
+    )
+    text = extract_lexml_text(content, use_lxml=use_lxml)
+    assert text == (
+        "Texto corrido de uma norma sem marcação estrutural.\n"
+        "Segundo bloco de texto da mesma norma."
+    )
+
+
+def test_label_number():
+    """Números extraídos dos rótulos"""
+    assert label_number("Art. 1º-A") == "1-A"
+    assert label_number("Art. 10.") == "10"
+    assert label_number("§ 2º") == "2"
+    assert label_number("Parágrafo único.") == "único"
+    assert label_number("IV -") == "IV"
+    assert label_number("b)") == "b"
+    assert label_number("CAPÍTULO III") == "III"
+
+
+def test_chunks_from_document():
+    """Um chunk por artigo, com parágrafos e seção vindos do XML"""
+    chunks = text_processor.process_lexml_document(load("documento_lei.xml"), legislation_id=1)
+
+    assert [c["number"] for c in chunks] == ["1", "2", "7", "7-A"]
+    art7 = chunks[2]
+    assert art7["content"].splitlines()[0].startswith("Art. 7º O tratamento")
+    assert "a) obrigação prevista em lei;" in art7["content"]
+    assert [p["number"] for p in art7["paragraphs"]] == ["1", "2"]
+    assert art7["metadata"]["inciso_count"] == 2
+    assert art7["metadata"]["section"] == "CAPÍTULO II DO TRATAMENTO DE DADOS PESSOAIS"
+    assert art7["legislation_id"] == 1
+    assert chunks[0]["metadata"]["paragraph_count"] == 1
+
+    # process_legislation_text reconhece o XML e usa o mesmo caminho
+    from_text = text_processor.process_legislation_text(
+        load("documento_lei.xml").decode("utf-8"), legislation_id=1)
+    assert [c["content"] for c in from_text] == [c["content"] for c in chunks]
+
+
+def test_parse_xml_keeps_structure():
+    """parse_xml devolve uma unidade por linha e o conteúdo original se não for XML"""
+    text = text_processor.parse_xml(load("documento_lei.xml").decode("utf-8"))
+    assert "Art. 2º A disciplina da proteção de dados pessoais tem como fundamentos:\nI - o respeito à privacidade;" in text
+    if not LXML_AVAILABLE:
+        assert text_processor.parse_xml("<a><b>texto</a>") == "<a><b>texto</a>"
+
+
+if __name__ == "__main__":
+    for backend in BACKENDS:
+        test_structural_units(backend)
+        test_chunk_size_does_not_change_result(backend)
+        test_sru_response_is_ignored(backend)
+        test_document_without_structure(backend)
+    test_label_number()
+    test_chunks_from_document()
+    test_parse_xml_keeps_structure()
+    print("\n[OK] Testes do extrator de documentos LexML concluídos!")
@@ -0,0 +1,118 @@
+"""
+Testes do parser das respostas SRU do LexML
+
+Usa respostas salvas em tests/fixtures/lexml para validar, com lxml e com
+xml.etree:
+1. Total (numberOfRecords) e registros extraídos na mesma passada
+2. Entidades HTML e & soltos (correção só quando o parser falha)
+3. Encoding declarado no XML (ISO-8859-1)
+4. Respostas vazias ou irrecuperáveis
+5. numberOfRecords vazio ou inválido (total = registros lidos)
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+
+from app.integrations.lexml_parser import LXML_AVAILABLE, SRUParser, fix_entities  # noqa: E402
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lexml"
+
+BACKENDS = [False] + ([True] if LXML_AVAILABLE else [])
+
+
+def load(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_total_and_records(use_lxml):
+    """Resposta válida: total e todos os campos do registro"""
+    result = SRUParser(use_lxml=use_lxml).parse(load("sru_leis.xml"))
+
+    assert result.total == 1532
+    assert len(result.records) == 3
+    assert not result.recovered
+
+    first = result.records[0]
+    assert first["title"] == "Lei nº 13.979, de 6 de Fevereiro de 2020"
+    assert first["urn"] == first["identifier"] == "urn:lex:br:federal:lei:2020-02-06;13979"
+    assert first["tipo_documento"] == "Lei"
+    assert first["facet_tipo_documento"] == "Legislação::Lei"
+    assert first["date"] == "2020-02-06"
+    assert first["dc_type"] == "Lei Ordinária"
+    assert first["autoridade"] == "Federal"
+    assert first["lexml_id"] == "id/urn:lex:br:federal:lei:2020-02-06;13979"
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_html_entities_are_preserved(use_lxml):
+    """Entidades HTML viram caracteres; & soltos e entidades desconhecidas ficam literais"""
+    result = SRUParser(use_lxml=use_lxml).parse(load("sru_entidades_html.xml"))
+
+    assert result.recovered
+    assert result.total == 2
+    first, second = result.records
+    assert first["title"] == "Projeto de Lei nº 2338, de 2023"
+    assert "Regulação & governança; P&D &foo; em IA." in first["description"]
+    # Entidades escapadas duas vezes na origem
+    assert second["description"] == "Condições para a promoção da saúde."
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_declared_encoding_and_str_input(use_lxml):
+    """Bytes em ISO-8859-1 e texto já decodificado devem dar o mesmo resultado"""
+    parser = SRUParser(use_lxml=use_lxml)
+    latin1 = parser.parse(load("sru_latin1.xml"))
+    text = parser.parse(load("sru_leis.xml").decode("utf-8"))
+
+    assert latin1.records == text.records
+    assert latin1.records[0]["facet_tipo_documento"] == "Legislação::Lei"
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+def test_empty_and_broken_responses(use_lxml):
+    """Sem registros ou XML irrecuperável não deve gerar exceção"""
+    parser = SRUParser(use_lxml=use_lxml)
+
+    empty = parser.parse(load("sru_vazio.xml"))
+    assert empty.total == 0 and empty.records == []
+
+    assert parser.parse(b"").records == []
+    assert parser.parse(b"<html><body>Erro 503").records == []
+
+
+@pytest.mark.parametrize("use_lxml", BACKENDS)
+@pytest.mark.parametrize("declared", [b"<srw:numberOfRecords/>",
+                                      b"<srw:numberOfRecords>  </srw:numberOfRecords>",
+                                      b"<srw:numberOfRecords>n/d</srw:numberOfRecords>"])
+def test_malformed_number_of_records(use_lxml, declared):
+    """Total ilegível não derruba a resposta: conta os registros lidos"""
+    content = load("sru_leis.xml")
+    content = content.replace(b"<srw:numberOfRecords>1532</srw:numberOfRecords>", declared)
+    assert declared in content
+
+    result = SRUParser(use_lxml=use_lxml).parse(content)
+    assert result.total == len(result.records) == 3
+
+
+def test_fix_entities():
+    """Só entidades inválidas são alteradas"""
+    fixed = fix_entities(b"a &amp; b &#231; &ccedil; &nbsp; & &foo; \x01")
+
+    assert fixed == b"a &amp; b &#231; &#231; &#160; &amp; &amp;foo; "
+
+
+if __name__ == "__main__":
+    for backend in BACKENDS:
+        test_total_and_records(backend)
+        test_html_entities_are_preserved(backend)
+        test_declared_encoding_and_str_input(backend)
+        test_empty_and_broken_responses(backend)
+        test_malformed_number_of_records(backend, b"<srw:numberOfRecords>n/d</srw:numberOfRecords>")
+    test_fix_entities()
+    print("[OK] Testes do parser SRU concluídos!")
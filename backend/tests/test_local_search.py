@@ -0,0 +1,227 @@
+"""
+Testes da busca textual local
+
+Usa SQLite em memória (modo sem tsvector) e um PostgreSQL de teste quando
+TEST_DATABASE_URL estiver configurada, para validar:
+1. Termos sem acento/caixa e trechos com os termos marcados
+2. Ranking (título antes de texto), chunks, filtros, facetas, paginação;
+   aliases da deduplicação fora dos resultados
+3. SQL do PostgreSQL: websearch_to_tsquery, ts_rank_cd, ts_headline e
+   GROUPING SETS em três consultas
+4. /search/ no modo auto responde do banco e só chama as APIs sem resultado local
+5. O mesmo no PostgreSQL com as colunas da migração 0008
+"""
+import asyncio
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+from pydantic import ValidationError  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.api.v1 import search as search_api  # noqa: E402
+from app.core.config import Settings  # noqa: E402
+from app.models.models import Base, Legislation, LegislationChunk  # noqa: E402
+from app.schemas.schemas import SearchRequest  # noqa: E402
+from app.services.local_search import LocalLegislationSearch, fold, highlight, search_terms  # noqa: E402
+
+LEGISLATIONS = [
+    # id, fonte, tipo, ano, título, ementa, chunk
+    (1, "lexml", "Lei", 2018, "Lei Geral de Proteção de Dados", "Dispõe sobre o tratamento de dados pessoais.",
+     "Art. 1º Esta Lei dispõe sobre o tratamento de dados pessoais."),
+    (2, "camara", "PL", 2023, "Projeto sobre educação", "Altera a lei de diretrizes da educação.",
+     "Art. 2º O tratamento de dados de estudantes observará a proteção prevista em lei."),
+    (3, "senado", "Lei", 2018, "Lei de licitações", "Normas de licitação e contratos.",
+     "Art. 5º A licitação destina-se a garantir a isonomia."),
+    (4, "senado", "Lei", 2018, "Lei Geral de Proteção de Dados (Senado)", "Dispõe sobre dados pessoais.", None),
+]
+
+
+def make_search(url="sqlite://"):
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    for legislation_id, source, type_, year, title, summary, chunk in LEGISLATIONS:
+        db.add(Legislation(id=legislation_id, external_id=f"{source}_{legislation_id}", source=source,
+                           type=type_, number=str(legislation_id), year=year, title=title, summary=summary,
+                           status="Em tramitação" if type_ == "PL" else "Sancionada"))
+        if chunk:
+            db.add(LegislationChunk(legislation_id=legislation_id, chunk_type="article", content=chunk))
+    db.flush()
+    # Legislação 4 é alias da 1 (deduplicação)
+    db.get(Legislation, 4).canonical_id = 1
+    db.commit()
+    db.close()
+    return LocalLegislationSearch(session_factory=factory), engine
+
+
+def test_terms_and_highlight():
+    """Acentos e caixa não importam; termos marcados no trecho"""
+    assert fold("Proteção de DADOS") == "protecao de dados"
+    assert search_terms("  *  ") == [] and search_terms("proteção de dados") == ["proteção", "de", "dados"]
+    snippet = highlight("A Lei dispõe sobre PROTECAO de dados pessoais.", ["proteção", "dados"])
+    assert snippet == "A Lei dispõe sobre <mark>PROTECAO</mark> de <mark>dados</mark> pessoais."
+    long_text = "palavra " * 100 + "licitação pública " + "palavra " * 100
+    snippet = highlight(long_text, ["licitacao"], size=80)
+    assert snippet.startswith("… ") and snippet.endswith(" …") and "<mark>licitação</mark>" in snippet
+
+
+def test_fallback_search():
+    """Ranking, chunks, filtros, facetas e paginação sem tsvector"""
+    search, _ = make_search()
+    found = search.search("proteção dados")
+    ids = [item["identifier"] for item in found["results"]]
+    # Título antes de chunk; alias (4) fora
+    assert ids == ["lexml_1", "camara_2"] and found["total"] == 2
+    assert found["facets"] == {"type": {"Lei": 1, "PL": 1}, "year": {"2018": 1, "2023": 1},
+                               "source": {"lexml": 1, "camara": 1}}
+    assert "<mark>" in found["results"][0]["snippet"]
+    # Sem o termo na ementa, o trecho vem do chunk
+    assert "estudantes" in found["results"][1]["snippet"]
+    assert found["results"][0]["rank"] > found["results"][1]["rank"] > 0
+    assert found["took_ms"] >= 0
+
+    assert [i["identifier"] for i in search.search("dados", {"source": "camara"})["results"]] == ["camara_2"]
+    assert search.search("dados", {"year": 2018, "type": "Lei"})["total"] == 1
+    assert search.search("dados", {"status": "tramita"})["total"] == 1
+    assert search.search("inexistente")["total"] == 0
+
+    # Sem texto de busca: só filtros, mais recentes primeiro; paginação
+    listing = search.search("*", page=1, page_size=2)
+    assert listing["total"] == 3 and [i["year"] for i in listing["results"]] == [2023, 2018]
+    assert [i["identifier"] for i in search.search("*", page=2, page_size=2)["results"]] == ["lexml_1"]
+
+
+class RecordingSession:
+    """Sessão falsa no dialeto do PostgreSQL: guarda o SQL e devolve linhas vazias"""
+
+    def __init__(self):
+        self.statements = []
+        self.dialect = postgresql.dialect()
+
+    def get_bind(self):
+        return self
+
+    def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=self.dialect)))
+        return self
+
+    def all(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def test_postgres_statements():
+    """Consultas do PostgreSQL usam o tsvector, ts_rank_cd e GROUPING SETS"""
+    session = RecordingSession()
+    found = LocalLegislationSearch(session_factory=lambda: session).search("proteção de dados", {"year": 2018})
+    assert found["total"] == 0 and found["results"] == []
+    page, facets = session.statements
+    assert "websearch_to_tsquery('portuguese_unaccent'::regconfig" in page
+    assert "ts_rank_cd(legislations.search_vector" in page and "legislation_chunks.search_vector @@" in page
+    assert "ts_headline" in page and "count(*) OVER ()" in page
+    assert "legislations.canonical_id IS NULL" in page
+    assert "GROUPING SETS" in facets
+
+    session = RecordingSession()
+    LocalLegislationSearch(session_factory=lambda: session).search("*")
+    assert "tsquery" not in session.statements[0] and "ts_headline" not in session.statements[0]
+
+
+class NoUpstream:
+    """Cliente falso: registra chamadas às APIs"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def search_propositions(self, **kwargs):
+        self.calls += 1
+        return []
+
+    async def search_by_keywords(self, **kwargs):
+        self.calls += 1
+        return []
+
+
+def test_search_endpoint_modes(monkeypatch):
+    """Modo auto: banco primeiro, APIs só sem resultado local"""
+    search, _ = make_search()
+    upstream = NoUpstream()
+    monkeypatch.setattr(search_api, "local_search", search)
+    monkeypatch.setattr(search_api, "camara_client", upstream)
+    monkeypatch.setattr(search_api, "lexml_client", upstream)
+
+    response = asyncio.run(search_api.search_legislation(SearchRequest(query="licitação")))
+    assert response.mode == "local" and response.total == 1 and upstream.calls == 0
+    assert response.results[0].title == "Lei de licitações" and "<mark>" in response.results[0].snippet
+    assert response.facets["source"] == {"senado": 1}
+
+    response = asyncio.run(search_api.search_legislation(SearchRequest(query="inexistente")))
+    assert response.mode == "live" and upstream.calls == 1
+
+    response = asyncio.run(search_api.search_legislation(SearchRequest(query="inexistente", mode="local")))
+    assert response.mode == "local" and response.total == 0 and upstream.calls == 1
+
+    response = asyncio.run(search_api.search_legislation(SearchRequest(query="licitação", mode="live")))
+    assert response.mode == "live" and upstream.calls == 2
+
+    # Modo desconhecido é recusado (antes caía silenciosamente no live)
+    with pytest.raises(ValidationError):
+        SearchRequest(query="licitação", mode="remoto")
+    with pytest.raises(ValidationError):
+        Settings(SEARCH_MODE="remoto")
+
+
+def test_postgres_search():
+    """Busca com tsvector no PostgreSQL (TEST_DATABASE_URL)"""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url or not url.startswith("postgresql"):
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) não configurada")
+    from alembic.operations import Operations
+    from alembic.runtime.migration import MigrationContext
+
+    path = Path(__file__).parent.parent / "alembic" / "versions" / "0008_legislation_fulltext.py"
+    spec = importlib.util.spec_from_file_location("migration_0008", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    search, engine = make_search(url)
+    try:
+        with engine.connect() as connection:
+            # Tabelas recriadas; a configuração de uma execução anterior pode ter ficado
+            connection.exec_driver_sql("DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent")
+            with Operations.context(MigrationContext.configure(connection)):
+                migration.upgrade()
+            connection.commit()
+
+        found = search.search("protecao de dados")
+        assert [i["identifier"] for i in found["results"]] == ["lexml_1", "camara_2"]
+        assert found["facets"]["source"] == {"lexml": 1, "camara": 1}
+        assert "<mark>" in found["results"][0]["snippet"]
+        assert search.search("licitações")["total"] == 1  # stemmer: licitação/licitações
+        assert search.search("*")["total"] == 3
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    test_terms_and_highlight()
+    test_fallback_search()
+    test_postgres_statements()
+    print("\n[OK] Testes da busca local concluídos!")
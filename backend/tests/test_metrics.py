@@ -0,0 +1,243 @@
+"""
+Testes das métricas (GET /metrics)
+
+Valida:
+1. Razão de acertos dos caches calculada na coleta
+2. timed como decorador (síncrono e assíncrono) e como bloco, com outcome ok/error
+3. @instrument_client: latência por método e gauge de chamadas em andamento
+   (chamadas aninhadas do mesmo cliente contam uma vez)
+4. Consultas SQL medidas por operação (instrument_engine), sem deixar o
+   início de uma consulta com erro na conexão
+5. /metrics e o middleware HTTP
+6. Custo de um registro: microssegundos por chamada
+7. Modo multiprocesso (PROMETHEUS_MULTIPROC_DIR): valores somados entre os
+   workers, razão de acertos sobre a soma, gauge "livesum" sem os workers
+   encerrados
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+from prometheus_client import CollectorRegistry, Histogram, generate_latest  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.metrics import (  # noqa: E402
+    instrument_client,
+    instrument_engine,
+    record_cache,
+    registry,
+    timed,
+)
+
+
+def sample(name, target=registry, **labels):
+    """Valor de uma amostra (0 se ainda não existe)"""
+    return target.get_sample_value(name, labels) or 0
+
+
+def test_cache_hit_ratio():
+    """Fração de acertos por cache, calculada dos contadores na coleta"""
+    record_cache("test_cache", hits=3, misses=1)
+    assert sample("vozdalei_cache_lookups_total", cache="test_cache", result="hit") == 3
+    assert sample("vozdalei_cache_hit_ratio", cache="test_cache") == 0.75
+    assert 'vozdalei_cache_hit_ratio{cache="test_cache"} 0.75' in generate_latest(registry).decode()
+
+
+def test_timed_decorator():
+    """Síncrono e assíncrono; exceções viram outcome=error e seguem adiante"""
+    local = CollectorRegistry()
+    latency = Histogram("test_timed_seconds", "Latência", ("operation", "outcome"), registry=local)
+
+    def count(**labels):
+        return sample("test_timed_seconds_count", local, **labels)
+
+    @timed(latency, operation="sync")
+    def work(value):
+        return value * 2
+
+    @timed(latency, operation="async")
+    async def async_work(fail):
+        if fail:
+            raise ValueError("falhou")
+        return "ok"
+
+    assert work(2) == 4 and work.__name__ == "work"
+    assert asyncio.run(async_work(False)) == "ok"
+    try:
+        asyncio.run(async_work(True))
+        raise AssertionError("exceção engolida")
+    except ValueError:
+        pass
+    assert count(operation="sync", outcome="ok") == 1
+    assert count(operation="async", outcome="ok") == 1
+    assert count(operation="async", outcome="error") == 1
+
+    # Erro tratado dentro do bloco
+    with timed(latency, operation="handled") as timer:
+        timer.outcome = "error"
+    assert count(operation="handled", outcome="error") == 1
+
+
+def test_instrument_client():
+    """Latência por método e chamadas em andamento"""
+    observed = []
+
+    @instrument_client("test_client")
+    class Client:
+        async def search(self, query):
+            observed.append(sample("vozdalei_upstream_requests_in_flight", client="test_client"))
+            return await self.details(query)
+
+        async def details(self, query):
+            observed.append(sample("vozdalei_upstream_requests_in_flight", client="test_client"))
+            await asyncio.sleep(0)
+            return query.upper()
+
+        async def _private(self):
+            return None
+
+    assert asyncio.run(Client().search("lei")) == "LEI"
+    # Chamada aninhada não conta de novo
+    assert observed == [1, 1] and sample("vozdalei_upstream_requests_in_flight", client="test_client") == 0
+    for method in ("search", "details"):
+        assert sample("vozdalei_upstream_request_seconds_count",
+                      client="test_client", method=method, outcome="ok") == 1
+    assert not hasattr(Client._private, "__wrapped__")
+
+    async def concurrent():
+        client = Client()
+        await asyncio.gather(client.details("a"), client.details("b"))
+
+    observed.clear()
+    asyncio.run(concurrent())
+    assert observed == [1, 2]
+
+
+def test_db_queries():
+    """Consultas medidas por operação; consulta com erro não deixa resto na conexão"""
+    def count(operation):
+        return sample("vozdalei_db_query_seconds_count", operation=operation)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    instrument_engine(engine)
+    selects, inserts = count("SELECT"), count("INSERT")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+        connection.execute(text("INSERT INTO t VALUES (1)"))
+        connection.execute(text("SELECT x FROM t")).all()
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT y FROM inexistente"))
+        assert connection.connection.info["metrics_query_start"] == []
+    assert count("SELECT") == selects + 1
+    assert count("INSERT") == inserts + 1
+    assert count("OTHER") >= 1
+
+
+async def asgi_get(app, path):
+    """GET direto na aplicação ASGI: (status, cabeçalhos, corpo)"""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": b"", "headers": [(b"host", b"testserver")],
+             "client": ("127.0.0.1", 1234), "server": ("testserver", 80)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return start["status"], dict(start["headers"]), body.decode()
+
+
+def test_metrics_endpoint():
+    """/metrics no formato de texto, com as requisições anteriores"""
+    from app.main import app
+
+    assert asyncio.run(asgi_get(app, "/health"))[0] == 200
+    status, headers, body = asyncio.run(asgi_get(app, "/metrics"))
+    assert status == 200
+    assert headers[b"content-type"].startswith(b"text/plain; version=")
+    assert "# TYPE vozdalei_http_request_seconds histogram" in body
+    assert 'vozdalei_http_request_seconds_count{method="GET",route="/health",status="200"}' in body
+    for name in ("vozdalei_upstream_request_seconds", "vozdalei_search_source_seconds",
+                 "vozdalei_llm_request_seconds", "vozdalei_llm_tokens", "vozdalei_audio_seconds",
+                 "vozdalei_db_query_seconds", "vozdalei_cache_hit_ratio"):
+        assert f"# TYPE {name}" in body
+
+
+def test_overhead():
+    """Um registro custa poucos microssegundos"""
+    local = CollectorRegistry()
+    latency = Histogram("test_overhead_seconds", "Latência", ("operation", "outcome"), registry=local)
+
+    def noop():
+        return None
+
+    measured = timed(latency, operation="noop")(noop)
+    calls = 20000
+
+    def per_call(func):
+        best = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            for _ in range(calls):
+                func()
+            best = min(best, (time.perf_counter() - started) / calls)
+        return best
+
+    overhead = per_call(measured) - per_call(noop)
+    # Folga para máquinas lentas de CI; localmente fica em ~4 µs
+    assert overhead < 20e-6, f"{overhead * 1e6:.1f} µs por chamada"
+    assert sample("test_overhead_seconds_count", local, operation="noop", outcome="ok") == 3 * calls
+
+
+def run_worker(multiproc_dir, code):
+    """Executar código num processo separado, como um worker do uvicorn"""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)}
+    result = subprocess.run(
+        [sys.executable, "-c", "from app.core import metrics\n" + code],
+        cwd=Path(__file__).parent.parent, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_multiprocess_workers(tmp_path):
+    """/metrics soma os workers; o gauge de andamento ignora os encerrados"""
+    run_worker(tmp_path, "metrics.record_cache('mp_cache', hits=3, misses=1)\n"
+                         "metrics.HTTP_REQUESTS_IN_FLIGHT.inc()")
+    run_worker(tmp_path, "metrics.record_cache('mp_cache', hits=1, misses=3)\n"
+                         "metrics.HTTP_REQUESTS_IN_FLIGHT.inc()\n"
+                         "metrics.mark_process_dead()")
+    body = run_worker(tmp_path, "from prometheus_client import generate_latest\n"
+                                "print(generate_latest(metrics.exposition_registry()).decode())")
+
+    assert 'vozdalei_cache_lookups_total{cache="mp_cache",result="hit"} 4.0' in body
+    assert 'vozdalei_cache_lookups_total{cache="mp_cache",result="miss"} 4.0' in body
+    assert 'vozdalei_cache_hit_ratio{cache="mp_cache"} 0.5' in body
+    assert "vozdalei_http_requests_in_flight 1.0" in body
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_cache_hit_ratio()
+    test_timed_decorator()
+    test_instrument_client()
+    test_db_queries()
+    test_metrics_endpoint()
+    test_overhead()
+    test_multiprocess_workers(Path(tempfile.mkdtemp()))
+    print("\n[OK] Testes das métricas concluídos!")
@@ -0,0 +1,198 @@
+"""
+Testes da paginação em streaming
+
+Usa buscadores de página falsos (sem rede) para validar:
+1. Todas as páginas em ordem e prefetch sobrepondo download e processamento
+2. Contrapressão: o produtor não se adianta mais que prefetch páginas
+3. break no consumidor cancela o produtor; erros chegam ao consumidor
+4. limit, batched e os iteradores dos clientes (Senado, LexML, Câmara)
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.integrations.legislative_apis import CamaraAPIClient, LexMLClient  # noqa: E402
+from app.integrations.pagination import Page, batched, paginate, paginate_pages  # noqa: E402
+from app.integrations.senado_api import SenadoAPIClient  # noqa: E402
+
+
+class FakePages:
+    """Páginas numeradas de 1 a pages, com page_size registros cada"""
+
+    def __init__(self, pages=5, page_size=3, delay=0.0, fail_at=None):
+        self.pages = pages
+        self.page_size = page_size
+        self.delay = delay
+        self.fail_at = fail_at
+        self.fetched = []
+        self.cancelled = False
+
+    async def fetch(self, position):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if position == self.fail_at:
+            raise ConnectionError("falha simulada")
+        self.fetched.append(position)
+        records = [(position, i) for i in range(self.page_size)]
+        return Page(records, position + 1 if position < self.pages else None)
+
+
+async def consume(iterator, work=0.0):
+    records = []
+    async for record in iterator:
+        records.append(record)
+        if work:
+            await asyncio.sleep(work)
+    return records
+
+
+def test_order_and_overlap():
+    """Registros em ordem; com prefetch o download da próxima página corre durante o processamento"""
+    expected = [(p, i) for p in range(1, 6) for i in range(2)]
+
+    sequential = FakePages(pages=5, page_size=2, delay=0.04)
+    started = time.perf_counter()
+    records = asyncio.run(consume(paginate(sequential.fetch, prefetch=0), work=0.02))
+    sequential_time = time.perf_counter() - started
+    assert records == expected
+
+    prefetched = FakePages(pages=5, page_size=2, delay=0.04)
+    started = time.perf_counter()
+    records = asyncio.run(consume(paginate(prefetched.fetch, prefetch=1), work=0.02))
+    prefetch_time = time.perf_counter() - started
+    assert records == expected
+
+    # Sequencial ~5 × (0,04 + 0,04); com prefetch ~5 × 0,04 + 0,04
+    assert prefetch_time < sequential_time * 0.8
+
+
+def test_backpressure():
+    """Consumidor parado: o produtor busca no máximo prefetch páginas à frente (+1 em espera)"""
+    async def run():
+        source = FakePages(pages=50, page_size=1)
+        pages = paginate_pages(source.fetch, prefetch=2)
+        first = await pages.__anext__()
+        await asyncio.sleep(0.05)
+        fetched = len(source.fetched)
+        await pages.aclose()
+        return first, fetched
+
+    first, fetched = asyncio.run(run())
+    assert first.records == [(1, 0)]
+    # 1 entregue + 2 na fila + 1 aguardando vaga
+    assert fetched <= 4
+
+
+def test_break_cancels_and_errors_propagate():
+    """break cancela o download em andamento; erro do buscador chega ao consumidor"""
+    async def stop_early(source):
+        async for record in paginate(source.fetch, prefetch=1):
+            if record == (2, 0):
+                break
+        await asyncio.sleep(0.05)
+
+    source = FakePages(pages=100, page_size=2, delay=0.01)
+    asyncio.run(stop_early(source))
+    assert len(source.fetched) <= 4
+    assert source.cancelled
+
+    failing = FakePages(pages=5, page_size=2, fail_at=3)
+    try:
+        asyncio.run(consume(paginate(failing.fetch, prefetch=1)))
+        raise AssertionError("erro não propagado")
+    except ConnectionError as e:
+        assert "falha simulada" in str(e)
+
+
+def test_limit_and_batched():
+    """limit interrompe a paginação; batched agrupa em lotes"""
+    source = FakePages(pages=10, page_size=3)
+    records = asyncio.run(consume(paginate(source.fetch, prefetch=0, limit=7)))
+    assert len(records) == 7
+    assert source.fetched == [1, 2, 3]
+
+    async def batches():
+        return [batch async for batch in batched(paginate(FakePages(pages=3, page_size=3).fetch), 4)]
+
+    assert [len(batch) for batch in asyncio.run(batches())] == [4, 4, 1]
+
+
+class FakeSenadoClient(SenadoAPIClient):
+    def __init__(self, total):
+        super().__init__()
+        self.total = total
+        self.calls = []
+
+    async def listar_normas(self, **params):
+        self.calls.append(params)
+        start = (params["pagina"] - 1) * params["quantidade"]
+        end = min(self.total, start + params["quantidade"])
+        return {"normas": [{"codigo": n} for n in range(start, end)]}
+
+
+class FakeLexMLClient(LexMLClient):
+    def __init__(self, total):
+        self.total = total
+        self.starts = []
+
+    async def search(self, query, start_record=1, maximum_records=20, record_schema="dc", raise_errors=False):
+        self.starts.append((query, start_record, maximum_records))
+        end = min(self.total, start_record + maximum_records - 1)
+        next_start = start_record + maximum_records if start_record + maximum_records <= self.total else None
+        return {
+            "total": self.total,
+            "records": [{"urn": f"urn:{n}"} for n in range(start_record, end + 1)],
+            "next_start": next_start,
+        }
+
+
+class FakeCamaraClient(CamaraAPIClient):
+    def __init__(self, total):
+        self.total = total
+        self.pages = []
+
+    async def search_propositions(self, limit=10, page=1, raise_errors=False, **filters):
+        self.pages.append((page, limit))
+        start = (page - 1) * limit
+        return [{"id": n} for n in range(start, min(self.total, start + limit))]
+
+
+def test_client_iterators():
+    """iter_normas, iter_laws e iter_propositions percorrem todas as páginas"""
+    senado = FakeSenadoClient(total=25)
+    normas = asyncio.run(consume(senado.iter_normas(ano=2024, page_size=10)))
+    assert [n["codigo"] for n in normas] == list(range(25))
+    assert [c["pagina"] for c in senado.calls] == [1, 2, 3]
+    assert all(c["raise_errors"] and c["ano"] == 2024 for c in senado.calls)
+
+    lexml = FakeLexMLClient(total=23)
+    laws = asyncio.run(consume(lexml.iter_laws(year=2020, page_size=10)))
+    assert len(laws) == 23
+    assert [start for _, start, _ in lexml.starts] == [1, 11, 21]
+    assert lexml.starts[0][0] == 'tipoDocumento="Lei" and urn="2020"'
+
+    # limit menor que a página reduz o maximumRecords pedido
+    lexml.starts.clear()
+    assert len(asyncio.run(consume(lexml.iter_laws(year=2020, limit=5)))) == 5
+    assert lexml.starts == [('tipoDocumento="Lei" and urn="2020"', 1, 5)]
+
+    camara = FakeCamaraClient(total=250)
+    propositions = asyncio.run(consume(camara.iter_propositions(year=2024, page_size=500)))
+    assert len(propositions) == 250
+    assert camara.pages == [(1, 100), (2, 100), (3, 100)]
+
+
+if __name__ == "__main__":
+    test_order_and_overlap()
+    test_backpressure()
+    test_break_cancels_and_errors_propagate()
+    test_limit_and_batched()
+    test_client_iterators()
+    print("\n[OK] Testes da paginação em streaming concluídos!")
@@ -0,0 +1,233 @@
+"""
+Testes do pipeline em etapas (coleta → chunking → corpus → embeddings)
+
+Usa SQLite em memória, um coletor falso (sem rede) e embeddings falsos para validar:
+1. Todas as etapas completas, com métricas por etapa
+2. Execução repetida não duplica chunks, corpus nem embeddings
+3. Execução interrompida é completada na seguinte (embeddings faltantes)
+4. Lotes de embeddings respeitam o tamanho configurado; filas limitadas
+5. Chunking em pool de processos
+6. Textos repetidos e já em cache não são recodificados (deduplicação por execução)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine, null  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.models.models import Base, LegislationChunk, TrainingCorpus  # noqa: E402
+from app.services.embedding_cache import EmbeddingCache  # noqa: E402
+from app.services.embedding_service import EmbeddingService  # noqa: E402
+from app.services.legislation_store import LegislationStore, lexml_fields  # noqa: E402
+from app.services.pipeline_service import PipelineService  # noqa: E402
+from app.services.pipeline_stages import StageMetrics, StageQueue  # noqa: E402
+
+
+def law_text(n):
+    return (
+        f"Art. 1º Esta Lei dispõe sobre o tema {n} e entra em vigor na data de sua publicação. "
+        f"Art. 2º Fica sujeito a multa quem descumprir o disposto no tema {n}. "
+        "Art. 3º Revogam-se as disposições em contrário."
+    )
+
+
+class FakeCollector:
+    """Grava documentos do LexML em páginas e avisa o pipeline, como o DataCollector"""
+
+    def __init__(self, store, db, documents, page_size=3):
+        self.store = store
+        self.db = db
+        self.documents = documents
+        self.page_size = page_size
+
+    async def collect_from_lexml(self, year=None, tipo_documento=None, limit=50,
+                                 progress=None, on_stored=None):
+        created = 0
+        for start in range(0, min(limit, len(self.documents)), self.page_size):
+            page = self.documents[start:start + self.page_size]
+            rows = [lexml_fields(doc) for doc in page]
+            for row, doc in zip(rows, page):
+                row["full_text"] = doc.get("full_text")
+            created += self.store.upsert(rows, db=self.db)["created"]
+            await on_stored([row["stable_id"] for row in rows])
+        return {"collected": created, "total": len(self.documents)}
+
+
+class FakeModel:
+    """Modelo falso com a interface do SentenceTransformer"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        self.batches.append(len(texts))
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+def fake_embedder():
+    return EmbeddingService(model_name="fake", model=FakeModel(), cache=EmbeddingCache(":memory:"))
+
+
+def documents(count, with_text=True):
+    return [
+        {
+            "urn": f"urn:lex:br:federal:lei:2024;{n}",
+            "title": f"Lei nº {n}/2024",
+            "tipo_documento": "Lei",
+            "date": "2024-01-01",
+            "full_text": law_text(n) if with_text or n % 2 else None,
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def make_pipeline(docs, embedder=None, **kwargs):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    store = LegislationStore(session_factory=lambda: db)
+    kwargs.setdefault("chunk_workers", 0)
+    pipeline = PipelineService(
+        db,
+        data_collector=FakeCollector(store, db, docs),
+        embedder=embedder or fake_embedder(),
+        **kwargs
+    )
+    return pipeline, db
+
+
+def test_full_pipeline():
+    """Documentos com texto passam por todas as etapas; os sem texto param na coleta"""
+    embedder = fake_embedder()
+    pipeline, db = make_pipeline(documents(8, with_text=False), embedder=embedder,
+                                 batch_size=2, embed_batch_size=8, embed_min_batch=4)
+    stats = asyncio.run(pipeline.run_full_pipeline(limit=50))
+
+    assert stats["collected"] == 8
+    assert stats["processed"] == 4
+    assert stats["chunks_created"] == db.query(LegislationChunk).count() == 12
+    assert stats["corpus_pairs"] == db.query(TrainingCorpus).count() > 0
+    assert stats["embeddings_generated"] == stats["chunks_created"] + stats["corpus_pairs"]
+    assert db.query(LegislationChunk).filter(LegislationChunk.embedding.is_(None)).count() == 0
+    assert db.query(TrainingCorpus).filter(TrainingCorpus.embedding.is_(None)).count() == 0
+
+    stages = stats["stages"]
+    assert stages["collect"]["items_in"] == 8 and stages["collect"]["skipped"] == 4
+    assert stages["chunk"]["items_in"] == 4
+    assert stages["corpus"]["items_in"] == 4
+    assert stages["embed"]["items_in"] == stats["embeddings_generated"]
+    assert all(size <= 8 for size in embedder.model.batches)
+    assert all(stage["max_queue_depth"] <= 256 for stage in stages.values())
+
+
+def test_rerun_is_idempotent_and_resumes():
+    """Segunda execução não duplica; embeddings apagados são refeitos"""
+    pipeline, db = make_pipeline(documents(5))
+    first = asyncio.run(pipeline.run_full_pipeline())
+    chunks = db.query(LegislationChunk).count()
+    pairs = db.query(TrainingCorpus).count()
+
+    second = asyncio.run(pipeline.run_full_pipeline())
+    assert second["collected"] == 0
+    assert second["chunks_created"] == 0 and second["corpus_pairs"] == 0
+    assert second["embeddings_generated"] == 0
+    assert db.query(LegislationChunk).count() == chunks
+    assert db.query(TrainingCorpus).count() == pairs
+
+    # Simular execução interrompida antes dos embeddings
+    db.query(LegislationChunk).update({LegislationChunk.embedding: null()})
+    db.query(TrainingCorpus).filter(TrainingCorpus.id % 2 == 0).update(
+        {TrainingCorpus.embedding: null()}, synchronize_session=False)
+    db.commit()
+    missing = chunks + db.query(TrainingCorpus).filter(TrainingCorpus.embedding.is_(None)).count()
+
+    third = asyncio.run(pipeline.run_full_pipeline())
+    assert third["embeddings_generated"] == missing
+    # Todos os textos já estavam no cache
+    assert third["embedding_cache"]["encoded"] == 0
+    assert third["embedding_cache"]["dedup_ratio"] == 1.0
+    assert first["embeddings_generated"] == chunks + pairs
+    assert db.query(LegislationChunk).filter(LegislationChunk.embedding.is_(None)).count() == 0
+
+
+def test_stage_queue_backpressure_and_batches():
+    """Produtor espera com a fila cheia; lotes respeitam size e min_size"""
+    async def run():
+        queue = StageQueue(StageMetrics("teste"), maxsize=3)
+        produced = []
+
+        async def producer():
+            for n in range(10):
+                await queue.put(n)
+                produced.append(n)
+            await queue.close()
+
+        task = asyncio.ensure_future(producer())
+        await asyncio.sleep(0.01)
+        blocked_at = len(produced)
+        batches = [batch async for batch in queue.batches(4, min_size=2)]
+        await task
+        return blocked_at, batches, queue.metrics
+
+    blocked_at, batches, metrics = asyncio.run(run())
+    assert blocked_at == 3
+    assert [n for batch in batches for n in batch] == list(range(10))
+    assert all(len(batch) <= 4 for batch in batches)
+    assert metrics.items_in == 10 and metrics.max_queue_depth == 3
+
+
+def test_embedding_dedup():
+    """Perguntas repetidas entre leis são codificadas uma vez; o cache persiste entre execuções"""
+    embedder = fake_embedder()
+    pipeline, db = make_pipeline(documents(6), embedder=embedder)
+    stats = asyncio.run(pipeline.run_full_pipeline())
+
+    report = stats["embedding_cache"]
+    texts = stats["chunks_created"] + stats["corpus_pairs"]
+    assert report["texts"] == texts == stats["embeddings_generated"]
+    assert report["encoded"] == sum(embedder.model.batches) < texts
+    assert 0 < report["dedup_ratio"] < 1
+    assert embedder.cache.count("fake") == report["encoded"]
+
+    # Mesmo texto em duas linhas recebe o mesmo vetor
+    rows = db.query(TrainingCorpus.question, TrainingCorpus.embedding).all()
+    by_question = {}
+    for question, embedding in rows:
+        assert np.array_equal(by_question.setdefault(question, embedding), embedding)
+
+    # Outro serviço com o mesmo cache: nada a codificar
+    other = EmbeddingService(model_name="fake", model=FakeModel(), cache=embedder.cache)
+    run_stats = {}
+    other.generate_embeddings_batch([q for q, _ in rows], stats=run_stats)
+    assert other.model.batches == [] and run_stats["cache_hits"] == run_stats["unique"]
+    # Outro modelo não reaproveita os vetores
+    third = EmbeddingService(model_name="outro", model=FakeModel(), cache=embedder.cache)
+    third.generate_embeddings_batch(["Qual o conteúdo do artigo 1?"] * 3)
+    assert third.model.batches == [1]
+
+
+def test_process_pool_chunking():
+    """Chunking em subprocessos produz os mesmos chunks"""
+    pipeline, db = make_pipeline(documents(3), chunk_workers=2)
+    stats = asyncio.run(pipeline.run_full_pipeline())
+    assert stats["chunks_created"] == 9
+    assert {c.chunk_number for c in db.query(LegislationChunk)} == {"1", "2", "3"}
+
+
+if __name__ == "__main__":
+    test_full_pipeline()
+    test_rerun_is_idempotent_and_resumes()
+    test_stage_queue_backpressure_and_batches()
+    test_embedding_dedup()
+    test_process_pool_chunking()
+    print("\n[OK] Testes do pipeline em etapas concluídos!")
@@ -0,0 +1,106 @@
+"""
+Testes do extrator de intenção e entidades da consulta
+
+Valida:
+1. Tipo, número e ano do documento citado
+2. Palavras-chave, expansões e fonte mencionada
+3. Cache do ParsedQuery compartilhado entre etapas
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.query_parser import parse_query, query_parser  # noqa: E402
+
+
+def test_law_number_with_thousands_separator():
+    """'Lei 13.979' deve virar LEI 13979, preservando o número como escrito"""
+    parsed = query_parser.parse("Me explique sobre a Lei 13.979")
+
+    assert parsed.doc_type == "LEI"
+    assert parsed.number == "13979"
+    assert parsed.number_display == "13.979"
+    assert parsed.year is None
+    assert parsed.matches_number("Lei nº 13.979, de 6 de fevereiro de 2020")
+    assert parsed.matches_number("LEI-13979-2020")
+    assert not parsed.matches_number("Lei nº 14.133")
+
+
+def test_number_with_year_suffix():
+    """'Lei 14133/2021' deve usar o ano após a barra"""
+    parsed = query_parser.parse("lei nº 14133/2021")
+
+    assert parsed.doc_type == "LEI"
+    assert parsed.number == "14133"
+    assert parsed.year == 2021
+    assert parsed.has_reference
+
+
+def test_document_types():
+    """Tipos mais específicos devem vencer os genéricos"""
+    assert query_parser.parse("projeto de lei complementar 12").doc_type == "PLP"
+    assert query_parser.parse("projetos de lei sobre educação").doc_type == "PL"
+    assert query_parser.parse("PL 2338/2023").doc_type == "PL"
+    assert query_parser.parse("lei complementar 101").doc_type == "LCP"
+    assert query_parser.parse("medida provisória 1.154").doc_type == "MPV"
+    assert query_parser.parse("PEC 45").doc_type == "PEC"
+    assert query_parser.parse("decreto 10.024").doc_type == "DEC"
+
+
+def test_year_without_number():
+    """Ano solto na consulta deve ser extraído"""
+    parsed = query_parser.parse("Quais leis foram aprovadas em 2025?")
+
+    assert parsed.year == 2025
+    assert parsed.number is None
+    assert not parsed.has_reference
+
+
+def test_keywords_and_expansions():
+    """Stop words removidas e siglas expandidas"""
+    parsed = query_parser.parse("Fale sobre a LGPD?")
+
+    assert parsed.keywords == ("lgpd",)
+    assert parsed.clean_query == "lgpd"
+    assert "proteção de dados pessoais" in parsed.expanded_query
+
+    parsed = query_parser.parse("leis de IA")
+    assert "inteligência artificial" in parsed.expanded_query
+
+
+def test_source_detection():
+    """Menções a uma casa legislativa devem ser detectadas"""
+    assert query_parser.parse("projetos do Senado sobre saúde").source == "senado"
+    assert query_parser.parse("o que os deputados votaram").source == "camara"
+    assert query_parser.parse("leis sobre saúde").source is None
+
+
+def test_parse_query_is_cached():
+    """A mesma consulta deve devolver o mesmo objeto imutável"""
+    first = parse_query("Lei 13.979")
+    second = parse_query("Lei 13.979")
+
+    assert first is second
+
+
+def test_empty_query():
+    """Consulta vazia não deve falhar"""
+    parsed = query_parser.parse("")
+
+    assert parsed.tokens == ()
+    assert parsed.doc_type is None
+    assert parsed.expanded_query == ""
+
+
+if __name__ == "__main__":
+    test_law_number_with_thousands_separator()
+    test_number_with_year_suffix()
+    test_document_types()
+    test_year_without_number()
+    test_keywords_and_expansions()
+    test_source_detection()
+    test_parse_query_is_cached()
+    test_empty_query()
+    print("[OK] Testes do extrator de consultas concluídos!")
@@ -0,0 +1,125 @@
+"""
+Testes dos planos das consultas frequentes
+
+Semeia tabelas grandes (poucos chunks e pares sem embedding, poucos jobs
+ativos), roda ANALYZE e valida:
+1. Nenhuma consulta de HOT_QUERIES lê uma tabela por inteiro no SQLite
+2. full_scans() detecta a varredura quando o índice não existe
+3. O mesmo no PostgreSQL quando TEST_DATABASE_URL aponta para um banco de
+   teste (as tabelas são recriadas)
+"""
+import os
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.query_plans import HOT_QUERIES, explain, full_scans, hot_query_plans  # noqa: E402
+from app.models.models import (  # noqa: E402
+    Base,
+    DataCollectionJob,
+    Legislation,
+    LegislationChunk,
+    TrainingCorpus,
+)
+
+LEGISLATIONS = 4000
+CHUNKS_PER_LEGISLATION = 5
+TABLES = ["legislations", "legislation_chunks", "training_corpus", "data_collection_jobs"]
+
+
+def source(n):
+    # LexML é a fonte principal; Senado e Câmara são minoria
+    return "senado" if n % 20 == 0 else "camara" if n % 20 == 1 else "lexml"
+
+
+def seed(engine):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    vector = np.ones(8, dtype=np.float32)
+    types = ["Lei", "PL", "PEC", "Decreto"]
+    with engine.begin() as connection:
+        connection.execute(insert(Legislation), [
+            {"id": n, "external_id": f"lei_{n}", "stable_id": n, "source": source(n),
+             "type": types[n % 4], "number": str(n), "year": 1990 + n % 35, "title": f"Lei {n}"}
+            for n in range(1, LEGISLATIONS + 1)
+        ])
+        chunk_id = 0
+        chunks, corpus = [], []
+        for legislation_id in range(1, LEGISLATIONS + 1):
+            for _ in range(CHUNKS_PER_LEGISLATION):
+                chunk_id += 1
+                # 1% ainda na fila de embeddings
+                embedding = None if chunk_id % 100 == 0 else vector
+                chunks.append({"id": chunk_id, "legislation_id": legislation_id, "chunk_type": "article",
+                               "content": "texto", "embedding": embedding})
+                corpus.append({"legislation_id": legislation_id, "chunk_id": chunk_id,
+                               "question": f"Pergunta {chunk_id}", "answer": "texto", "embedding": embedding})
+        connection.execute(insert(LegislationChunk), chunks)
+        connection.execute(insert(TrainingCorpus), corpus)
+        connection.execute(insert(DataCollectionJob), [
+            {"job_type": source(n), "source": source(n),
+             "status": "pending" if n % 200 == 0 else "running" if n % 199 == 0 else "completed"}
+            for n in range(LEGISLATIONS)
+        ])
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("ANALYZE" if engine.dialect.name == "sqlite" else "VACUUM ANALYZE")
+
+
+def assert_no_full_scans(engine):
+    with engine.connect() as connection:
+        plans = hot_query_plans(connection)
+    scans = {name: plan for name, plan in plans.items() if full_scans(plan, TABLES)}
+    assert not scans, "\n".join(f"{name}: {plan}" for name, plan in scans.items())
+    assert set(plans) == set(HOT_QUERIES)
+
+
+def sqlite_engine():
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+def test_sqlite_hot_queries_use_indexes():
+    """Nenhuma varredura sequencial nas tabelas semeadas"""
+    engine = sqlite_engine()
+    seed(engine)
+    assert_no_full_scans(engine)
+
+
+def test_full_scan_detected():
+    """Sem o índice parcial, a fila de embeddings vira uma varredura"""
+    engine = sqlite_engine()
+    seed(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_legislation_chunks_pending_embedding")
+        plan = explain(connection, HOT_QUERIES["chunks_pending_embedding"]())
+    assert full_scans(plan, TABLES) == ["legislation_chunks"]
+    assert full_scans(["SCAN data_collection_jobs_1"], TABLES) == ["data_collection_jobs"]
+    assert full_scans(["SCAN legislations USING COVERING INDEX ix_x"], TABLES) == []
+    assert full_scans(["  ->  Seq Scan on training_corpus  (cost=0.00..1.00 rows=1 width=4)"],
+                      TABLES) == ["training_corpus"]
+
+
+def test_postgres_hot_queries_use_indexes():
+    """Mesmo teste no PostgreSQL (TEST_DATABASE_URL)"""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url or not url.startswith("postgresql"):
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) não configurada")
+    engine = create_engine(url)
+    try:
+        seed(engine)
+        assert_no_full_scans(engine)
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    test_sqlite_hot_queries_use_indexes()
+    test_full_scan_detected()
+    print("\n[OK] Testes dos planos das consultas concluídos!")
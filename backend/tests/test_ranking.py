@@ -0,0 +1,70 @@
+"""
+Testes do ranqueamento de resultados da busca unificada
+
+Valida:
+1. Prioridade do número do documento citado (heurística)
+2. BM25 favorece resultados com termos raros da consulta
+3. Detalhamento da pontuação (explain)
+4. Ranker desconhecido usa a heurística
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.query_parser import parse_query  # noqa: E402
+from app.services.ranking import ResultRanker  # noqa: E402
+
+
+RESULTS = [
+    {"id": "1", "title": "Dispõe sobre a educação básica", "description": "", "number": "9394", "date": "1996-12-20"},
+    {"id": "2", "title": "Lei nº 13.979 - medidas de enfrentamento", "description": "saúde pública", "number": "13979", "date": "2020-02-06"},
+    {"id": "3", "title": "Altera a lei de saúde pública", "description": "vigilância sanitária", "number": "8080", "date": "1990-09-19"},
+]
+
+
+def test_heuristic_prioritizes_cited_number():
+    """Resultado com o número citado deve vir primeiro"""
+    ranker = ResultRanker(default="heuristic")
+    ranked = ranker.rank(parse_query("Lei 13.979"), RESULTS)
+
+    assert ranked[0]["id"] == "2"
+
+
+def test_bm25_prefers_matching_terms():
+    """BM25 deve colocar os resultados com termos da consulta à frente"""
+    ranker = ResultRanker(default="bm25")
+    ranked = ranker.rank(parse_query("vigilância sanitária"), RESULTS)
+
+    assert ranked[0]["id"] == "3"
+    # Sem termos em comum, a ordem original é mantida
+    assert [r["id"] for r in ranked[1:]] == ["1", "2"]
+
+
+def test_explain_returns_breakdown():
+    """explain=True deve incluir pontuação e detalhamento sem alterar o original"""
+    ranker = ResultRanker(default="heuristic")
+    ranked = ranker.rank(parse_query("Lei 13.979"), RESULTS, explain=True)
+
+    top = ranked[0]
+    assert top["score_breakdown"]["ranker"] == "heuristic"
+    assert top["score_breakdown"]["number_match"] == 100.0
+    assert top["score"] >= 150.0
+    assert "score" not in RESULTS[1]
+
+
+def test_unknown_ranker_falls_back_to_heuristic():
+    """Nome inválido não deve falhar"""
+    ranker = ResultRanker(default="heuristic")
+
+    assert ranker.get_ranker("inexistente").name == "heuristic"
+    assert ranker.rank(parse_query("saúde"), []) == []
+
+
+if __name__ == "__main__":
+    test_heuristic_prioritizes_cited_number()
+    test_bm25_prefers_matching_terms()
+    test_explain_returns_breakdown()
+    test_unknown_ranker_falls_back_to_heuristic()
+    print("[OK] Testes de ranqueamento concluídos!")
@@ -0,0 +1,161 @@
+"""
+Testes do reranqueamento com cross-encoder
+
+Usa um modelo falso (mesma interface de predict do CrossEncoder) para validar:
+1. Reordenação dos top-K pela pontuação do modelo
+2. Resultados além do top-K mantêm a ordem
+3. Cache por (consulta, documento) evita nova pontuação
+4. Pontuação em lotes
+5. Inferência fora do event loop (contexto do chat e ranker cross_encoder)
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings  # noqa: E402
+from app.services import legislation_search, ranking  # noqa: E402
+from app.services.query_parser import parse_query  # noqa: E402
+from app.services.reranker import CrossEncoderReranker  # noqa: E402
+
+
+class FakeCrossEncoder:
+    """Pontua pelo número de palavras da consulta presentes no documento"""
+
+    def __init__(self):
+        self.pairs_scored = 0
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls += 1
+        self.pairs_scored += len(pairs)
+        return [
+            float(sum(word in doc.lower() for word in query.lower().split()))
+            for query, doc in pairs
+        ]
+
+
+def make_results():
+    return [
+        {"id": "1", "source": "LexML", "title": "Dispõe sobre transporte", "description": ""},
+        {"id": "2", "source": "LexML", "title": "Dispõe sobre saúde", "description": "vigilância sanitária"},
+        {"id": "3", "source": "Senado Federal", "title": "Altera a lei de educação", "description": ""},
+        {"id": "4", "source": "Câmara dos Deputados", "title": "Vigilância sanitária e saúde", "description": ""},
+    ]
+
+
+def test_rerank_top_k_only():
+    """Só os top-K são reordenados; o restante mantém a ordem"""
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(model=model, top_k=2, batch_size=8, cache_size=10)
+
+    ranked = reranker.rerank(parse_query("saúde"), make_results())
+
+    assert [r["id"] for r in ranked] == ["2", "1", "3", "4"]
+    assert model.pairs_scored == 2
+
+
+def test_top_n_limits_results():
+    """top_n limita o número de itens enviados ao LLM"""
+    reranker = CrossEncoderReranker(model=FakeCrossEncoder(), top_k=4, batch_size=8, cache_size=10)
+
+    ranked = reranker.rerank(parse_query("vigilância sanitária saúde"), make_results(), top_n=2)
+
+    assert [r["id"] for r in ranked] == ["2", "4"]
+
+
+def test_scores_are_cached():
+    """A mesma consulta não deve pontuar o mesmo documento duas vezes"""
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(model=model, top_k=4, batch_size=2, cache_size=10)
+    parsed = parse_query("saúde")
+
+    reranker.rerank(parsed, make_results())
+    reranker.rerank(parsed, make_results())
+
+    assert model.pairs_scored == 4
+    assert reranker.stats["batches"] == 2
+    assert reranker.get_stats()["cache_hit_rate"] == 0.5
+
+
+def test_cache_is_bounded():
+    """Cache LRU não deve crescer além do limite"""
+    reranker = CrossEncoderReranker(model=FakeCrossEncoder(), top_k=4, batch_size=8, cache_size=3)
+
+    reranker.rerank(parse_query("saúde"), make_results())
+
+    assert reranker.get_stats()["cache_entries"] == 3
+
+
+class SlowCrossEncoder(FakeCrossEncoder):
+    """Inferência lenta que registra a thread onde rodou"""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.threads.add(threading.get_ident())
+        time.sleep(0.2)
+        return super().predict(pairs, batch_size, show_progress_bar)
+
+
+async def ticks_during(coroutine):
+    """Executar a corrotina contando quantas vezes o event loop rodou outra tarefa"""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    result = await coroutine
+    ticking.cancel()
+    return result, ticks
+
+
+def test_inference_off_event_loop(monkeypatch):
+    """Contexto do chat e ranker cross_encoder não travam o event loop"""
+    model = SlowCrossEncoder()
+    monkeypatch.setattr(legislation_search, "reranker",
+                        CrossEncoderReranker(model=model, top_k=4, batch_size=8, cache_size=10))
+    monkeypatch.setattr(settings, "RERANKER_ENABLED", True)
+    service = legislation_search.unified_search
+
+    async def fake_search(query, limit=10, year=None, parsed=None):
+        return make_results()
+
+    monkeypatch.setattr(service, "search", fake_search)
+    context, ticks = asyncio.run(ticks_during(service.get_relevant_context("saúde", max_results=2)))
+    assert "Vigilância sanitária e saúde" in context
+    assert ticks >= 10 and threading.get_ident() not in model.threads
+
+    # Ranker com modelo: a ordenação da busca também vai para uma thread
+    ranker = ranking.CrossEncoderRanker.__new__(ranking.CrossEncoderRanker)
+    ranker.model, ranker._fallback = model, ranking.HeuristicRanker()
+    monkeypatch.setitem(ranking.result_ranker._instances, "cross_encoder", ranker)
+    assert ranking.result_ranker.uses_model("cross_encoder") and not ranking.result_ranker.uses_model("bm25")
+    model.threads.clear()
+
+    async def fake_keywords(keywords, limit=10):
+        return [{"urn": r["id"], "title": r["title"], "description": r["description"]} for r in make_results()]
+
+    monkeypatch.setattr(legislation_search.lexml_client, "search_by_keywords", fake_keywords)
+    ranked, ticks = asyncio.run(ticks_during(
+        type(service).search(service, "saúde", sources=["lexml"], ranker="cross_encoder")))
+    assert len(ranked) == 4
+    assert ticks >= 10 and model.threads and threading.get_ident() not in model.threads
+
+
+if __name__ == "__main__":
+    test_rerank_top_k_only()
+    test_top_n_limits_results()
+    test_scores_are_cached()
+    test_cache_is_bounded()
+    print("[OK] Testes do reranqueamento concluídos!")
@@ -0,0 +1,103 @@
+"""
+Testes do simplificador local baseado em regras (caminho rápido)
+
+Valida:
+1. Substituição de expressões do glossário jurídico
+2. Preservação de maiúsculas no início da expressão
+3. Índice de legibilidade (textos simples > textos jurídicos)
+4. Caminho rápido da simplificação sem chamar o LLM
+   (tempo de execução em benchmarks/bench_rule_simplifier.py)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ai.rule_simplifier import RuleBasedSimplifier, rule_simplifier  # noqa: E402
+from app.ai.simplification import SimplificationService  # noqa: E402
+
+
+EMENTA = (
+    "Dispõe sobre a proteção de dados pessoais e altera a Lei nº 12.965, "
+    "de 23 de abril de 2014. Outrossim, é vedado o tratamento de dados "
+    "sensíveis, ressalvado o disposto no caput do art. 11."
+)
+
+
+def test_glossary_replacements():
+    """Expressões do glossário devem ser trocadas por linguagem simples"""
+    result = rule_simplifier.simplify(EMENTA)
+
+    assert result.text.startswith("Trata da proteção")
+    assert "Além disso, é proibido" in result.text
+    assert "exceto o disposto" in result.text
+    assert "texto principal do artigo" in result.text
+    assert result.replacements == 5
+
+
+def test_longest_term_wins_and_word_boundaries():
+    """Termos mais longos têm prioridade e não há troca dentro de palavras"""
+    simplifier = RuleBasedSimplifier({"revogado": "X", "fica revogado": "deixa de valer"})
+    text, count = simplifier.apply_glossary("Fica   revogado o art. 2º. Irrevogado.")
+
+    assert text == "Deixa de valer o art. 2º. Irrevogado."
+    assert count == 1
+
+
+def test_readability_orders_texts():
+    """Texto simples deve ter índice de legibilidade maior que texto jurídico"""
+    simple = rule_simplifier.readability("A lei foi aprovada. Ela vale hoje. Você tem direitos.")
+    legal = rule_simplifier.readability(
+        "Consoante o disposto na legislação supracitada, incumbe à administração "
+        "pública a fiscalização precípua das obrigações tributárias acessórias; "
+        "outrossim, ressalvadas as hipóteses constitucionalmente estabelecidas"
+    )
+
+    assert simple.score > legal.score
+    assert simple.sentences == 3
+    assert simple.reading_time_minutes == 1
+
+
+def test_empty_text():
+    """Texto vazio não deve falhar"""
+    result = rule_simplifier.simplify("")
+
+    assert result.text == ""
+    assert result.replacements == 0
+    assert result.readability.words == 0
+
+
+class RecordingChat:
+    """Chat com LLM configurado que só registra as chamadas"""
+
+    llm = object()
+
+    def __init__(self):
+        self.calls = []
+
+    async def simplify_text(self, text, target_level):
+        self.calls.append((text, target_level))
+        return text
+
+
+def test_fast_path_skips_llm():
+    """Rascunho local legível o bastante é devolvido sem chamar o LLM"""
+    service = SimplificationService()
+    service.chat_service = RecordingChat()
+
+    result = asyncio.run(service.simplify_text("A lei foi aprovada. Ela vale hoje. Você tem direitos."))
+
+    assert result["method"] == "rules"
+    assert service.chat_service.calls == []
+    assert service.get_stats()["fast_path_hits"] == 1 and service.get_stats()["llm_calls"] == 0
+
+
+if __name__ == "__main__":
+    test_glossary_replacements()
+    test_longest_term_wins_and_word_boundaries()
+    test_readability_orders_texts()
+    test_empty_text()
+    test_fast_path_skips_llm()
+    print("[OK] Testes do simplificador concluídos!")
@@ -0,0 +1,79 @@
+"""
+Testes do processamento em lote de legislações (TextProcessor.process_many)
+
+Valida:
+1. Pool de processos produz os mesmos chunks que o processamento serial
+2. Resultados saem na ordem de entrada, para qualquer tamanho de envio
+3. Entrada lida aos poucos (no máximo 2 envios por processo em andamento)
+4. Sem pool (workers=0) roda no próprio processo
+"""
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.text_processor import process_batch, text_processor  # noqa: E402
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "lexml" / "documento_lei.xml"
+
+
+def law_text(n):
+    return (
+        f"Art. 1º Esta Lei dispõe sobre o tema {n}. § 1º O disposto neste artigo aplica-se a todos. "
+        f"Art. 2º Fica sujeito a multa quem descumprir o tema {n}. "
+        "Art. 3º Esta Lei entra em vigor na data de sua publicação."
+    )
+
+
+def corpus(count):
+    texts = [(n, law_text(n)) for n in range(1, count + 1)]
+    texts.append((count + 1, FIXTURE.read_text(encoding="utf-8")))
+    return texts
+
+
+def test_pool_matches_serial():
+    """Mesmos chunks, na mesma ordem, com pool e sem pool"""
+    texts = corpus(20)
+    serial = process_batch(texts)
+    for chunksize in (1, 3, 50):
+        parallel = list(text_processor.process_many(texts, workers=2, chunksize=chunksize))
+        assert parallel == serial
+    assert [legislation_id for legislation_id, _ in serial] == list(range(1, 22))
+    assert [c["number"] for c in serial[0][1]] == ["1", "2", "3"]
+    assert serial[-1][1][0]["metadata"]["source"] == "lexml_xml"
+
+
+def test_streams_input():
+    """A entrada é consumida à medida que os resultados são lidos"""
+    consumed = []
+
+    def source():
+        for item in corpus(40):
+            consumed.append(item[0])
+            yield item
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = text_processor.process_many(source(), chunksize=2, executor=executor)
+        first = next(results)
+        assert first[0] == 1
+        # 2 processos x 2 envios x 2 documentos
+        assert len(consumed) <= 8
+        rest = list(results)
+    assert len(rest) == 40 and len(consumed) == 41
+
+
+def test_in_process():
+    """workers=0: sem subprocessos, mesmo resultado"""
+    texts = corpus(5)
+    assert list(text_processor.process_many(texts, workers=0)) == process_batch(texts)
+    assert list(text_processor.process_many([], workers=2)) == []
+
+
+if __name__ == "__main__":
+    test_pool_matches_serial()
+    test_streams_input()
+    test_in_process()
+    print("\n[OK] Testes do processamento em lote concluídos!")
@@ -0,0 +1,361 @@
+"""
+Testes do tracing (spans por requisição)
+
+Valida:
+1. Hierarquia de spans, atributos, exceções (status error) e exportação JSONL
+2. Amostragem: razão configurável pela raiz, filhos seguem a raiz,
+   traceparent de quem chamou respeitado
+3. Busca unificada: span por fonte, por método do cliente e por ano
+   consultado no Senado (arg.ano)
+4. Exportador OTLP/HTTP enviando a um coletor local
+5. Span raiz do middleware HTTP continuando o traceparent recebido
+6. Custo de um span desligado/fora da amostra
+7. Encerramento no shutdown da aplicação sem bloquear o event loop
+8. Chat: tokens do LLM (gen_ai.usage.*) no span exportado e span do prompt
+   encerrado mesmo quando a montagem falha
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter  # noqa: E402
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+from opentelemetry.trace import SpanKind, StatusCode  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.metrics import instrument_client  # noqa: E402
+from app.core.tracing import NON_RECORDING_SPAN, JsonlSpanExporter, Tracer, tracer  # noqa: E402
+from app.ai import simplification  # noqa: E402
+from app.integrations.senado_api import SenadoAPIClient  # noqa: E402
+from app.services import legislation_search  # noqa: E402
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class MemoryExporter(InMemorySpanExporter):
+    """Exportador em memória"""
+
+    @property
+    def spans(self):
+        return self.get_finished_spans()
+
+    def named(self, name):
+        return [span for span in self.spans if span.name == name]
+
+
+def parent_id(span):
+    return span.parent.span_id if span.parent else None
+
+
+@pytest.fixture
+def exported():
+    """Tracer global ligado, 100% de amostragem, spans em memória"""
+    exporter = MemoryExporter()
+    tracer.configure(enabled=True, sample_ratio=1.0, exporter=exporter)
+    yield exporter
+    tracer.shutdown()
+    tracer.configure()
+
+
+def test_spans_and_jsonl(tmp_path):
+    """Filhos apontam para o pai; exceções marcam erro e seguem adiante"""
+    local = Tracer(enabled=True, sample_ratio=1.0, exporter=JsonlSpanExporter(str(tmp_path / "traces.jsonl")))
+    with local.span("chat", {"query.length": 12}) as root:
+        with local.span("chat.retrieval") as child:
+            child.set_attribute("results", 3)
+            child.set_attribute("payload", "x" * 1000)
+        with pytest.raises(ValueError):
+            with local.span("llm.chat"):
+                raise ValueError("tempo esgotado")
+        assert local.current_span() is root
+    assert local.current_span() is NON_RECORDING_SPAN
+    local.shutdown()
+
+    lines = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    spans = {line["name"]: line for line in lines}
+    assert list(spans) == ["chat.retrieval", "llm.chat", "chat"]
+    assert {line["trace_id"] for line in lines} == {spans["chat"]["trace_id"]}
+    assert spans["chat"]["parent_span_id"] is None
+    assert spans["chat.retrieval"]["parent_span_id"] == spans["chat"]["span_id"]
+    assert spans["chat.retrieval"]["attributes"] == {"results": 3, "payload": "x" * 256}
+    assert spans["llm.chat"]["status"] == {"code": "error", "message": "ValueError: tempo esgotado"}
+    assert spans["llm.chat"]["events"][0]["attributes"]["exception.type"] == "ValueError"
+    assert spans["chat"]["attributes"]["query.length"] == 12
+    assert spans["chat"]["duration_ms"] >= spans["chat.retrieval"]["duration_ms"]
+
+
+def test_sampling():
+    """Razão pela raiz; traceparent de quem chamou prevalece"""
+    exporter = MemoryExporter()
+    local = Tracer(enabled=True, sample_ratio=0.25, exporter=exporter)
+    for _ in range(4000):
+        with local.span("root"):
+            with local.span("child"):
+                pass
+    local.force_flush()
+    roots = len(exporter.named("root"))
+    assert 800 < roots < 1200 and len(exporter.named("child")) == roots
+
+    exporter = MemoryExporter()
+    local = Tracer(enabled=True, sample_ratio=0.0, exporter=exporter)
+    with local.span("root") as root:
+        assert not root.is_recording()
+        with local.span("child") as child:
+            assert child is NON_RECORDING_SPAN
+    with local.span("remote", traceparent=TRACEPARENT):
+        pass
+    with local.span("remote_unsampled", traceparent=TRACEPARENT[:-2] + "00"):
+        pass
+    local.force_flush()
+    [remote] = exporter.spans
+    assert remote.name == "remote"
+    assert f"{remote.context.trace_id:032x}" == "0af7651916cd43dd8448eb211c80319c"
+    assert f"{parent_id(remote):016x}" == "b7ad6b7169203331"
+
+    # Cabeçalho inválido: trace novo (fora da amostra com razão 0)
+    with local.span("invalid", traceparent="00-xyz-b7ad6b7169203331-01") as span:
+        assert not span.is_recording()
+    disabled = Tracer(enabled=False, sample_ratio=1.0, exporter=exporter)
+    with disabled.span("nada") as span:
+        assert span is NON_RECORDING_SPAN
+
+
+@instrument_client("camara")
+class UnavailableCamara:
+    """Câmara fora do ar"""
+
+    async def search_propositions(self, **kwargs):
+        raise RuntimeError("HTTP 503")
+
+
+def test_search_spans(exported, monkeypatch):
+    """Span por fonte, por chamada ao cliente e por ano consultado no Senado"""
+    senado = SenadoAPIClient()
+    senado._min_request_interval = 0
+    requested = []
+
+    async def fake_request(url, params=None, max_retries=3):
+        requested.append(params)
+        return {"normas": [{"id": f"norma_{params.get('ano')}", "descricao": "proteção de dados pessoais"}]}
+
+    monkeypatch.setattr(senado, "_make_request", fake_request)
+    monkeypatch.setattr(legislation_search, "senado_client", senado)
+    monkeypatch.setattr(legislation_search, "camara_client", UnavailableCamara())
+
+    results = asyncio.run(legislation_search.unified_search.search(
+        "proteção de dados", sources=["senado", "camara"]))
+    assert results and requested
+    tracer.force_flush()
+
+    [unified] = exported.named("search.unified")
+    [senado_span] = exported.named("search.senado")
+    [camara_span] = exported.named("search.camara")
+    assert parent_id(senado_span) == unified.context.span_id == parent_id(camara_span)
+    assert senado_span.status.status_code == StatusCode.UNSET
+    assert camara_span.status.status_code == StatusCode.ERROR
+
+    searches = exported.named("senado.search_legislation")
+    assert searches and {parent_id(span) for span in searches} == {senado_span.context.span_id}
+    assert searches[0].attributes["arg.keywords"] and searches[0].kind == SpanKind.CLIENT
+    by_year = exported.named("senado.legislacao_lista")
+    assert {parent_id(span) for span in by_year} <= {span.context.span_id for span in searches}
+    assert {span.attributes.get("arg.ano") for span in by_year} >= {2025, 2024, 2023}
+
+    [camara_call] = exported.named("camara.search_propositions")
+    assert parent_id(camara_call) == camara_span.context.span_id
+    assert camara_call.status.status_code == StatusCode.ERROR
+    assert camara_call.attributes["peer.service"] == "camara"
+
+
+def test_otlp_exporter():
+    """OTLP/HTTP (protobuf) a um coletor local"""
+    received = []
+
+    class Collector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = ExportTraceServiceRequest()
+            body.ParseFromString(self.rfile.read(int(self.headers["Content-Length"])))
+            received.append((self.path, self.headers["Content-Type"], body))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Collector)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        endpoint = f"http://127.0.0.1:{server.server_port}/v1/traces"
+        local = Tracer(enabled=True, sample_ratio=1.0, exporter=OTLPSpanExporter(endpoint=endpoint))
+        with local.span("chat", kind="server"):
+            with local.span("llm.chat", {"gen_ai.usage.input_tokens": 120, "score": 0.5, "cached": False}):
+                pass
+        local.shutdown()
+    finally:
+        server.shutdown()
+
+    [(path, content_type, body)] = received
+    assert path == "/v1/traces" and content_type == "application/x-protobuf"
+    resource_spans = body.resource_spans[0]
+    resource = {a.key: a.value.string_value for a in resource_spans.resource.attributes}
+    assert resource["service.name"] == settings.APP_NAME
+    llm, chat = resource_spans.scope_spans[0].spans
+    assert chat.kind == chat.SPAN_KIND_SERVER and not chat.parent_span_id
+    assert llm.parent_span_id == chat.span_id
+    assert len(llm.trace_id) == 16 and len(llm.span_id) == 8
+    attributes = {a.key: a.value for a in llm.attributes}
+    assert attributes["gen_ai.usage.input_tokens"].int_value == 120
+    assert attributes["score"].double_value == 0.5 and attributes["cached"].bool_value is False
+    assert llm.end_time_unix_nano >= llm.start_time_unix_nano
+
+
+def test_http_root_span(exported):
+    """Middleware: span raiz com a rota e o trace de quem chamou"""
+    from app.main import app
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/health", "raw_path": b"/health", "root_path": "",
+             "query_string": b"", "headers": [(b"host", b"testserver"), (b"traceparent", TRACEPARENT.encode())],
+             "client": ("127.0.0.1", 1234), "server": ("testserver", 80)}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    asyncio.run(app(scope, receive, send))
+    tracer.force_flush()
+    [root] = exported.named("GET /health")
+    assert root.kind == SpanKind.SERVER and f"{root.context.trace_id:032x}" == TRACEPARENT.split("-")[1]
+    assert root.attributes["http.route"] == "/health" and root.attributes["http.response.status_code"] == 200
+
+
+def test_overhead():
+    """Span desligado ou fora da amostra custa menos de alguns microssegundos"""
+    calls = 20000
+
+    def per_call(local):
+        started = time.perf_counter()
+        with local.span("root"):
+            for _ in range(calls):
+                with local.span("child"):
+                    pass
+        return (time.perf_counter() - started) / calls
+
+    disabled = per_call(Tracer(enabled=False, exporter=MemoryExporter()))
+    unsampled = per_call(Tracer(enabled=True, sample_ratio=0.0, exporter=MemoryExporter()))
+    # Folga para máquinas lentas de CI; localmente ~0,7 µs
+    assert disabled < 5e-6 and unsampled < 5e-6, (disabled, unsampled)
+
+
+class SlowExporter(MemoryExporter):
+    """Coletor que demora a responder"""
+
+    def export(self, spans):
+        time.sleep(0.5)
+        return super().export(spans)
+
+
+def test_shutdown_off_event_loop(monkeypatch):
+    """Shutdown da aplicação exporta o que falta sem travar o event loop"""
+    from app import main
+
+    exporter = SlowExporter()
+    monkeypatch.setattr(main, "tracer", Tracer(enabled=True, sample_ratio=1.0, exporter=exporter))
+    monkeypatch.setattr(main.trending_refresher, "stop", lambda: asyncio.sleep(0))
+
+    async def scenario():
+        with main.tracer.span("pendente"):
+            pass
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        await main.stop_background_jobs()
+        ticking.cancel()
+        return ticks
+
+    # O event loop seguiu rodando durante a exportação de 0,5 s
+    assert asyncio.run(scenario()) > 10
+    assert [span.name for span in exporter.spans] == ["pendente"]
+
+
+class FakeMessage:
+    """Mensagem no formato do LangChain (só o conteúdo)"""
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeResponse(FakeMessage):
+    usage_metadata = {"input_tokens": 120, "output_tokens": 45}
+
+
+class FakeLLM:
+    """LLM que responde na hora, com contagem de tokens"""
+
+    async def ainvoke(self, messages):
+        return FakeResponse("Resposta simples.")
+
+
+def test_chat_llm_usage(exported, monkeypatch):
+    """Tokens do LLM chegam ao span exportado; prompt_span termina mesmo com erro"""
+    for name in ("SystemMessage", "HumanMessage", "AIMessage"):
+        monkeypatch.setattr(simplification, name, FakeMessage, raising=False)
+
+    async def fake_context(query, max_results=5, parsed=None):
+        return "1. Lei nº 13.709, de 14 de agosto de 2018"
+
+    async def fake_search(query, limit=10, parsed=None):
+        return []
+
+    service = simplification.ChatService()
+    service.llm = FakeLLM()
+    monkeypatch.setattr(simplification.unified_search, "get_relevant_context", fake_context)
+    monkeypatch.setattr(simplification.unified_search, "search", fake_search)
+
+    response = asyncio.run(service.chat("O que diz a Lei nº 13.709?"))
+    assert response["message"] == "Resposta simples."
+    assert asyncio.run(service.simplify_text("Fica vedado o tratamento.")) == "Resposta simples."
+    tracer.force_flush()
+
+    for name in ("llm.chat", "llm.simplify"):
+        [llm_span] = exported.named(name)
+        assert llm_span.attributes["gen_ai.usage.input_tokens"] == 120
+        assert llm_span.attributes["gen_ai.usage.output_tokens"] == 45
+    [prompt] = exported.named("chat.prompt")
+    assert prompt.attributes["llm.prompt.messages"] == 3
+
+    def broken_parser(message):
+        raise ValueError("consulta inválida")
+
+    monkeypatch.setattr(simplification, "parse_query", broken_parser)
+    asyncio.run(service.chat("O que diz a Lei nº 13.709?"))
+    tracer.force_flush()
+    assert len(exported.named("chat.prompt")) == 2
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_spans_and_jsonl(Path(tempfile.mkdtemp()))
+    test_sampling()
+    test_otlp_exporter()
+    test_overhead()
+    print("\n[OK] Testes do tracing concluídos!")
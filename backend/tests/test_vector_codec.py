@@ -0,0 +1,107 @@
+"""
+Testes do formato binário dos embeddings
+
+Usa SQLite em memória para validar:
+1. float32 sem perda, float16 e int8 com erro pequeno; tamanho por formato
+2. Leitura sem cópia (np.frombuffer) e matriz única com decode_matrix
+3. Coluna VectorType: aceita listas e arrays, devolve arrays, NULL continua NULL
+4. load_embeddings monta a matriz direto dos bytes gravados
+"""
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.vector_codec import FORMATS, decode_matrix, decode_vector, encode_vector  # noqa: E402
+from app.models.models import Base, Legislation, LegislationChunk  # noqa: E402
+from app.services.embedding_service import EmbeddingService  # noqa: E402
+
+
+def make_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def vectors(count=4, dimension=384):
+    rng = np.random.default_rng(7)
+    return rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+def test_roundtrip_formats():
+    """Erro de cada formato e bytes por vetor de 384 dimensões"""
+    vector = vectors(1)[0]
+    sizes = {name: len(encode_vector(vector, name)) for name in FORMATS}
+    assert sizes == {"float32": 1540, "float16": 772, "int8": 392}
+
+    assert np.array_equal(decode_vector(encode_vector(vector, "float32")), vector)
+    assert np.abs(decode_vector(encode_vector(vector, "float16")) - vector).max() < 2e-3
+    step = np.abs(vector).max() / 127
+    assert np.abs(decode_vector(encode_vector(vector, "int8")) - vector).max() <= step / 2 + 1e-6
+    assert not decode_vector(encode_vector(np.zeros(8), "int8")).any()
+
+    # Listas também são aceitas; formato desconhecido é erro
+    assert decode_vector(encode_vector([0.5, -1.0], "float32")).tolist() == [0.5, -1.0]
+    try:
+        encode_vector(vector, "float64")
+        assert False, "formato inválido aceito"
+    except ValueError:
+        pass
+
+
+def test_zero_copy_and_matrix():
+    """float32/float16 são visões sobre os bytes; decode_matrix junta em uma matriz"""
+    data = vectors()
+    blob = encode_vector(data[0], "float32")
+    view = decode_vector(blob)
+    assert not view.flags["OWNDATA"] and not view.flags["WRITEABLE"]
+    assert decode_vector(encode_vector(data[0], "float16")).dtype == np.float16
+
+    for name in FORMATS:
+        blobs = [encode_vector(row, name) for row in data]
+        matrix = decode_matrix(blobs)
+        assert matrix.dtype == np.float32 and matrix.shape == data.shape
+        assert np.array_equal(matrix, np.vstack([decode_vector(b) for b in blobs]).astype(np.float32))
+
+    # Formatos misturados (mudança de EMBEDDING_STORAGE_FORMAT) continuam legíveis
+    mixed = decode_matrix([encode_vector(data[0], "float32"), encode_vector(data[1], "int8")])
+    assert mixed.shape == (2, 384) and np.array_equal(mixed[0], data[0])
+    assert decode_matrix([]).shape == (0, 0)
+
+
+def test_vector_column():
+    """A coluna grava bytes e devolve arrays; load_embeddings lê a matriz"""
+    db = make_session()
+    db.add(Legislation(id=1, source="teste", type="lei", number="1", year=2000, title="Lei 1"))
+    data = vectors(3, 8)
+    db.add_all([
+        LegislationChunk(id=1, legislation_id=1, chunk_type="article", content="a", embedding=data[0]),
+        LegislationChunk(id=2, legislation_id=1, chunk_type="article", content="b", embedding=data[1].tolist()),
+        LegislationChunk(id=3, legislation_id=1, chunk_type="article", content="c", embedding=None),
+    ])
+    db.commit()
+    db.expire_all()
+
+    first = db.get(LegislationChunk, 1).embedding
+    assert isinstance(first, np.ndarray) and np.allclose(first, data[0], atol=1e-2)
+    assert db.query(LegislationChunk).filter(LegislationChunk.embedding.is_(None)).count() == 1
+
+    service = EmbeddingService(model_name="fake", model=None, cache=None)
+    ids, matrix = service.load_embeddings(db)
+    assert ids == [1, 2] and matrix.shape == (2, 8) and matrix.dtype == np.float32
+    assert np.allclose(matrix, data[:2], atol=1e-2)
+    ids, matrix = service.load_embeddings(db, ids=[2, 3])
+    assert ids == [2] and np.allclose(matrix[0], data[1], atol=1e-2)
+
+
+if __name__ == "__main__":
+    test_roundtrip_formats()
+    test_zero_copy_and_matrix()
+    test_vector_column()
+    print("\n[OK] Testes do formato binário dos embeddings concluídos!")
@@ -17,6 +17,7 @@ export default function ChatPage() {
   const [input, setInput] = useState("");
   const [isLoading, setIsLoading] = useState(false);
   const [suggestions, setSuggestions] = useState<string[]>([]);
+  const [sessionId, setSessionId] = useState<string | undefined>(undefined);
   const [speakingId, setSpeakingId] = useState<number | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
@@ -66,10 +67,15 @@ export default function ChatPage() {
     try {
       const response = await chatApi.sendMessage({
         message: messageText,
-        conversation_history: messages,
+        // O histórico fica no servidor; só enviamos a sessão
+        session_id: sessionId,
         use_audio: false,
       });
 
+      if (response.session_id) {
+        setSessionId(response.session_id);
+      }
+
       const assistantMessage: ChatMessage = {
         role: "assistant",
         content: response.message,
@@ -128,6 +134,7 @@ export default function ChatPage() {
 
   const clearChat = () => {
     setMessages([]);
+    setSessionId(undefined);
     // Parar qualquer fala em andamento
     if ("speechSynthesis" in window) {
       window.speechSynthesis.cancel();
@@ -40,12 +40,14 @@ export interface ChatMessage {
 
 export interface ChatRequest {
   message: string;
+  session_id?: string;
   conversation_history?: ChatMessage[];
   use_audio?: boolean;
 }
 
 export interface ChatResponse {
   message: string;
+  session_id?: string;
   audio_url?: string;
   sources?: any[];
   suggestions?: string[];